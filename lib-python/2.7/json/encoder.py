@@ -206,6 +206,21 @@ class JSONEncoder(object):
         '{"foo": ["bar", "baz"]}'
 
         """
+        if (fast_encode is not None and self.indent is None and
+                self.encoding == 'utf-8' and
+                type(self.item_separator) is str and
+                type(self.key_separator) is str):
+            res = fast_encode(o, self.ensure_ascii, self.allow_nan,
+                              self.sort_keys, self.skipkeys,
+                              self.check_circular, self.item_separator,
+                              self.key_separator, self.__encode_fallback)
+            if res is not None:
+                return res
+        return self.__encode_fallback(o)
+
+    def __encode_fallback(self, o):
+        # also called by _pypyjson.encode() for the objects it doesn't
+        # know about, which ends up calling self.default()
         if self.check_circular:
             markers = {}
         else:
@@ -536,3 +551,7 @@ try:
     from _pypyjson import raw_encode_basestring_ascii
 except ImportError:
     pass
+try:
+    from _pypyjson import encode as fast_encode
+except ImportError:
+    fast_encode = None
@@ -255,7 +255,7 @@ testmap = [
     RegrTest('test_gzip.py', usemodules='zlib'),
     RegrTest('test_hash.py', core=True),
     RegrTest('test_hashlib.py', core=True),
-    RegrTest('test_heapq.py', core=True),
+    RegrTest('test_heapq.py', core=True, usemodules='_heapq'),
     RegrTest('test_hmac.py'),
     RegrTest('test_hotshot.py', skip="unsupported extension module"),
     RegrTest('test_htmllib.py'),
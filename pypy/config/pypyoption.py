@@ -36,7 +36,7 @@ working_modules.update([
     "cStringIO", "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "cppyy", "_pypyjson", "_jitlog"
+    "_csv", "cppyy", "_pypyjson", "_jitlog", "_heapq", "_bisect"
 ])
 
 from rpython.jit.backend import detect_cpu
@@ -224,6 +224,21 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withutf8unicode",
+                   "store unicode strings decoded from utf-8 as utf-8, "
+                   "instead of 4 bytes per character",
+                   default=False),
+
+        BoolOption("withsharedkeysdict",
+                   "let dicts with the same str keys share them, and only "
+                   "store their values",
+                   default=False),
+
+        BoolOption("withintmap",
+                   "store dicts mapping ints to ints or floats, and sets of "
+                   "ints, unboxed in flat open-addressing tables",
+                   default=False),
+
         BoolOption("withcelldict",
                    "use dictionaries that are optimized for being used as module dicts",
                    default=False,
@@ -283,6 +298,9 @@ def set_pypy_opt_level(config, level):
     if level == 'mem':
         config.objspace.std.suggest(withprebuiltint=True)
         config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withutf8unicode=True)
+        config.objspace.std.suggest(withsharedkeysdict=True)
+        config.objspace.std.suggest(withintmap=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
@@ -935,7 +935,7 @@ class BuiltinCode4(BuiltinCode):
             w_result = space.w_None
         return w_result
 
-def interpindirect2app(unbound_meth, unwrap_spec=None):
+def interpindirect2app(unbound_meth, unwrap_spec=None, doc=None):
     base_cls = unbound_meth.im_class
     func = unbound_meth.im_func
     args = inspect.getargs(func.func_code)
@@ -955,12 +955,12 @@ def interpindirect2app(unbound_meth, unwrap_spec=None):
     # necessary for unique identifiers for pickling
     f.func_name = func.func_name
     if unwrap_spec is None:
-        unwrap_spec = getattr(unbound_meth, 'unwrap_spec', {})
+        unwrap_spec = getattr(unbound_meth, 'unwrap_spec', {}).copy()
     else:
         assert isinstance(unwrap_spec, dict)
         unwrap_spec = unwrap_spec.copy()
     unwrap_spec['self'] = base_cls
-    return interp2app(globals()['unwrap_spec'](**unwrap_spec)(f))
+    return interp2app(globals()['unwrap_spec'](**unwrap_spec)(f), doc=doc)
 
 class interp2app(W_Root):
     """Build a gateway that calls 'f' at interp-level."""
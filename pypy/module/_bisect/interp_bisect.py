@@ -0,0 +1,161 @@
+"""
+Interp-level implementation of the bisection algorithms, see bisect.py.
+
+Searching a list of ints, floats or strs that uses the integer, float or
+bytes list strategy for an object of exactly the same type compares the
+unwrapped items.  Everything else goes through the sequence protocol and
+the '<' operator, like the pure Python version.
+"""
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import (
+    W_ListObject, BytesListStrategy, FloatListStrategy, IntegerListStrategy)
+
+
+def _make_unwrapped_bisect(name):
+    class UnwrappedBisect(object):
+        @staticmethod
+        def bisect_left(a, x, lo, hi):
+            while lo < hi:
+                mid = lo + ((hi - lo) >> 1)
+                if a[mid] < x:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        @staticmethod
+        def bisect_right(a, x, lo, hi):
+            while lo < hi:
+                mid = lo + ((hi - lo) >> 1)
+                if x < a[mid]:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return lo
+
+    UnwrappedBisect.__name__ = name
+    return UnwrappedBisect
+
+IntBisect = _make_unwrapped_bisect('IntBisect')
+FloatBisect = _make_unwrapped_bisect('FloatBisect')
+BytesBisect = _make_unwrapped_bisect('BytesBisect')
+
+
+def _get_bounds(space, w_a, lo, w_hi):
+    if lo < 0:
+        raise oefmt(space.w_ValueError, "lo must be non-negative")
+    if space.is_none(w_hi):
+        hi = -1
+    else:
+        hi = space.int_w(w_hi)
+    if hi == -1:
+        hi = space.len_w(w_a)
+    return hi
+
+def _bisect(space, w_a, w_x, lo, hi, right):
+    if type(w_a) is W_ListObject and hi <= w_a.length():
+        # only exact lists: a subclass may override __getitem__
+        strategy = w_a.strategy
+        if (strategy is space.fromcache(IntegerListStrategy) and
+                type(w_x) is W_IntObject):
+            l = w_a.getitems_int()
+            x = space.int_w(w_x)
+            if right:
+                return IntBisect.bisect_right(l, x, lo, hi)
+            return IntBisect.bisect_left(l, x, lo, hi)
+        if (strategy is space.fromcache(FloatListStrategy) and
+                type(w_x) is W_FloatObject):
+            l = w_a.getitems_float()
+            x = space.float_w(w_x)
+            if right:
+                return FloatBisect.bisect_right(l, x, lo, hi)
+            return FloatBisect.bisect_left(l, x, lo, hi)
+        if (strategy is space.fromcache(BytesListStrategy) and
+                type(w_x) is W_BytesObject):
+            l = w_a.getitems_bytes()
+            x = space.bytes_w(w_x)
+            if right:
+                return BytesBisect.bisect_right(l, x, lo, hi)
+            return BytesBisect.bisect_left(l, x, lo, hi)
+    while lo < hi:
+        mid = lo + ((hi - lo) >> 1)
+        w_litem = space.getitem(w_a, space.newint(mid))
+        if right:
+            if space.is_true(space.lt(w_x, w_litem)):
+                hi = mid
+            else:
+                lo = mid + 1
+        else:
+            if space.is_true(space.lt(w_litem, w_x)):
+                lo = mid + 1
+            else:
+                hi = mid
+    return lo
+
+def _insort(space, w_a, w_x, index):
+    if type(w_a) is W_ListObject:
+        w_a.insert(index, w_x)
+    else:
+        space.call_method(w_a, 'insert', space.newint(index), w_x)
+
+
+@unwrap_spec(lo=int)
+def bisect_left(space, w_a, w_x, lo=0, w_hi=None):
+    """bisect_left(a, x[, lo[, hi]]) -> index
+
+Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e < x, and all e in
+a[i:] have e >= x.  So if x already appears in the list, i points just
+before the leftmost x already there.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    hi = _get_bounds(space, w_a, lo, w_hi)
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, False))
+
+@unwrap_spec(lo=int)
+def bisect_right(space, w_a, w_x, lo=0, w_hi=None):
+    """bisect_right(a, x[, lo[, hi]]) -> index
+
+Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e <= x, and all e in
+a[i:] have e > x.  So if x already appears in the list, i points just
+beyond the rightmost x already there
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    hi = _get_bounds(space, w_a, lo, w_hi)
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, True))
+
+@unwrap_spec(lo=int)
+def insort_left(space, w_a, w_x, lo=0, w_hi=None):
+    """insort_left(a, x[, lo[, hi]])
+
+Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the left of the leftmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    hi = _get_bounds(space, w_a, lo, w_hi)
+    _insort(space, w_a, w_x, _bisect(space, w_a, w_x, lo, hi, False))
+
+@unwrap_spec(lo=int)
+def insort_right(space, w_a, w_x, lo=0, w_hi=None):
+    """insort_right(a, x[, lo[, hi]])
+
+Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the right of the rightmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    hi = _get_bounds(space, w_a, lo, w_hi)
+    _insort(space, w_a, w_x, _bisect(space, w_a, w_x, lo, hi, True))
@@ -0,0 +1,64 @@
+class AppTestBisect:
+    spaceconfig = dict(usemodules=['_bisect'])
+
+    def test_bisect_left_right(self):
+        import _bisect
+        for a, x, left, right in [([], 1, 0, 0),
+                                  ([1, 2, 2, 3], 2, 1, 3),
+                                  ([1, 2, 2, 3], 0, 0, 0),
+                                  ([1, 2, 2, 3], 5, 4, 4),
+                                  ([1.5, 2.5, 2.5], 2.5, 1, 3),
+                                  (['a', 'b', 'b', 'c'], 'b', 1, 3),
+                                  ([1, 2, 2, 3], 2.0, 1, 3),
+                                  ([(1, 'a'), (2, 'b')], (2, 'a'), 1, 1),
+                                  ((1, 2, 2, 3), 2, 1, 3)]:
+            assert _bisect.bisect_left(a, x) == left
+            assert _bisect.bisect_right(a, x) == right
+            assert _bisect.bisect(a, x) == right
+
+    def test_lo_hi(self):
+        import _bisect
+        a = [1, 2, 2, 3, 4]
+        assert _bisect.bisect_left(a, 2, 2) == 2
+        assert _bisect.bisect_right(a, 2, 0, 2) == 2
+        assert _bisect.bisect_right(a, 4, hi=3) == 3
+        assert _bisect.bisect_left(a, 0, lo=1, hi=None) == 1
+        assert _bisect.bisect_right(a, 10, 0, -1) == 5
+        raises(ValueError, _bisect.bisect_left, a, 1, -1)
+        raises(IndexError, _bisect.bisect_left, a, 10, 0, 10)
+
+    def test_insort(self):
+        import _bisect
+        from __pypy__ import strategy
+        for data, name in [([5, 1, 4, 2, 3, 3], 'IntegerListStrategy'),
+                           ([0.5, -1.0, 2.25, 0.5], 'FloatListStrategy'),
+                           (['pear', 'fig', 'apple'], 'BytesListStrategy')]:
+            a = []
+            for x in data:
+                _bisect.insort(a, x)
+            assert a == sorted(data)
+            assert strategy(a) == name
+        a = [1, 3]
+        _bisect.insort_left(a, 2.0)
+        _bisect.insort_right(a, 2)
+        assert a == [1, 2.0, 2, 3]
+        assert type(a[1]) is float
+
+    def test_subclass_and_sequence(self):
+        import _bisect
+        class MyList(list):
+            def __getitem__(self, index):
+                return -list.__getitem__(self, index)
+        assert _bisect.bisect_left(MyList([3, 2, 1]), -2) == 1
+        class Seq(object):
+            def __init__(self):
+                self.items = [1, 3, 5]
+            def __len__(self):
+                return len(self.items)
+            def __getitem__(self, index):
+                return self.items[index]
+            def insert(self, index, item):
+                self.items.insert(index, item)
+        s = Seq()
+        _bisect.insort(s, 4)
+        assert s.items == [1, 3, 4, 5]
@@ -0,0 +1,81 @@
+"""
+The parts of _heapq that are written at app-level.  They use the max-heap
+helpers below only on the decorated tuples built by heapq.nsmallest(), so
+there is nothing to gain from moving them to interp-level.
+"""
+
+from itertools import islice
+
+from _heapq import heapify, heappushpop
+
+
+def _cmp_lt(x, y):
+    return (x < y) if hasattr(x, '__lt__') else (not y <= x)
+
+def _siftdown_max(heap, startpos, pos):
+    newitem = heap[pos]
+    while pos > startpos:
+        parentpos = (pos - 1) >> 1
+        parent = heap[parentpos]
+        if _cmp_lt(parent, newitem):
+            heap[pos] = parent
+            pos = parentpos
+            continue
+        break
+    heap[pos] = newitem
+
+def _siftup_max(heap, pos):
+    endpos = len(heap)
+    startpos = pos
+    newitem = heap[pos]
+    childpos = 2*pos + 1
+    while childpos < endpos:
+        rightpos = childpos + 1
+        if rightpos < endpos and not _cmp_lt(heap[rightpos], heap[childpos]):
+            childpos = rightpos
+        heap[pos] = heap[childpos]
+        pos = childpos
+        childpos = 2*pos + 1
+    heap[pos] = newitem
+    _siftdown_max(heap, startpos, pos)
+
+def _heappushpop_max(heap, item):
+    if heap and _cmp_lt(item, heap[0]):
+        item, heap[0] = heap[0], item
+        _siftup_max(heap, 0)
+    return item
+
+def nlargest(n, iterable):
+    """Find the n largest elements in a dataset.
+
+Equivalent to:  sorted(iterable, reverse=True)[:n]
+"""
+    if n < 0:
+        return []
+    it = iter(iterable)
+    result = list(islice(it, n))
+    if not result:
+        return result
+    heapify(result)
+    for elem in it:
+        heappushpop(result, elem)
+    result.sort(reverse=True)
+    return result
+
+def nsmallest(n, iterable):
+    """Find the n smallest elements in a dataset.
+
+Equivalent to:  sorted(iterable)[:n]
+"""
+    if n < 0:
+        return []
+    it = iter(iterable)
+    result = list(islice(it, n))
+    if not result:
+        return result
+    for i in reversed(range(len(result) // 2)):
+        _siftup_max(result, i)
+    for elem in it:
+        _heappushpop_max(result, elem)
+    result.sort()
+    return result
@@ -0,0 +1,289 @@
+"""
+Interp-level implementation of the heap queue algorithm, see heapq.py.
+
+A heap of ints, floats or strs that uses the integer, float or bytes list
+strategy is sifted directly in the unwrapped storage of the list, as long as
+the item pushed is an object of exactly the same type.  All other heaps use
+the same comparison as the pure Python version of heapq.
+"""
+
+from pypy.interpreter.error import oefmt
+from pypy.module.__builtin__.interp_classobj import W_InstanceObject
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.listobject import (
+    W_ListObject, BytesListStrategy, FloatListStrategy, IntegerListStrategy)
+
+# the kinds of heaps, see _heap_kind()
+GENERIC = 0
+INTS = 1
+FLOATS = 2
+BYTES = 3
+
+
+def _check_heap(space, w_heap):
+    if not isinstance(w_heap, W_ListObject):
+        raise oefmt(space.w_TypeError, "heap argument must be a list")
+    return w_heap
+
+def _heap_kind(space, w_heap):
+    strategy = w_heap.strategy
+    if strategy is space.fromcache(IntegerListStrategy):
+        return INTS
+    if strategy is space.fromcache(FloatListStrategy):
+        return FLOATS
+    if strategy is space.fromcache(BytesListStrategy):
+        return BYTES
+    return GENERIC
+
+def _heap_kind_for_item(space, w_heap, w_item):
+    kind = _heap_kind(space, w_heap)
+    if kind == INTS and type(w_item) is W_IntObject:
+        return INTS
+    if kind == FLOATS and type(w_item) is W_FloatObject:
+        return FLOATS
+    if kind == BYTES and type(w_item) is W_BytesObject:
+        return BYTES
+    return GENERIC
+
+# ____________________________________________________________
+# sifting unwrapped storage; one copy of the code per type of items
+
+def _make_unwrapped_heap(name):
+    def _siftdown(heap, startpos, pos):
+        newitem = heap[pos]
+        while pos > startpos:
+            parentpos = (pos - 1) >> 1
+            parent = heap[parentpos]
+            if not newitem < parent:
+                break
+            heap[pos] = parent
+            pos = parentpos
+        heap[pos] = newitem
+
+    def _siftup(heap, pos):
+        endpos = len(heap)
+        startpos = pos
+        newitem = heap[pos]
+        # bubble up the smaller child until hitting a leaf, then move
+        # newitem to its final place with _siftdown()
+        childpos = 2 * pos + 1
+        while childpos < endpos:
+            rightpos = childpos + 1
+            if rightpos < endpos and not heap[childpos] < heap[rightpos]:
+                childpos = rightpos
+            heap[pos] = heap[childpos]
+            pos = childpos
+            childpos = 2 * pos + 1
+        heap[pos] = newitem
+        _siftdown(heap, startpos, pos)
+
+    class UnwrappedHeap(object):
+        @staticmethod
+        def push(heap, item):
+            heap.append(item)
+            _siftdown(heap, 0, len(heap) - 1)
+
+        @staticmethod
+        def pop(heap):
+            lastelt = heap.pop()
+            if not heap:
+                return lastelt
+            returnitem = heap[0]
+            heap[0] = lastelt
+            _siftup(heap, 0)
+            return returnitem
+
+        @staticmethod
+        def replace(heap, item):
+            returnitem = heap[0]
+            heap[0] = item
+            _siftup(heap, 0)
+            return returnitem
+
+        @staticmethod
+        def pushpop(heap, item):
+            if heap and heap[0] < item:
+                returnitem = heap[0]
+                heap[0] = item
+                _siftup(heap, 0)
+                return returnitem
+            return item
+
+        @staticmethod
+        def heapify(heap):
+            for i in range(len(heap) // 2 - 1, -1, -1):
+                _siftup(heap, i)
+
+    UnwrappedHeap.__name__ = name
+    return UnwrappedHeap
+
+IntHeap = _make_unwrapped_heap('IntHeap')
+FloatHeap = _make_unwrapped_heap('FloatHeap')
+BytesHeap = _make_unwrapped_heap('BytesHeap')
+
+# ____________________________________________________________
+# sifting any list, with the comparison of the pure Python version
+
+def cmp_lt(space, w_x, w_y):
+    # like hasattr(x, '__lt__') in heapq.py: only old-style instances need
+    # a real getattr, for the others looking at the type is enough
+    if isinstance(w_x, W_InstanceObject):
+        has_lt = space.findattr(w_x, space.newtext('__lt__')) is not None
+    else:
+        has_lt = space.lookup(w_x, '__lt__') is not None
+    if has_lt:
+        return space.is_true(space.lt(w_x, w_y))
+    return not space.is_true(space.le(w_y, w_x))
+
+def _check_size(space, w_heap, size):
+    if w_heap.length() != size:
+        raise oefmt(space.w_RuntimeError,
+                    "list changed size during iteration")
+
+def _siftdown_w(space, w_heap, startpos, pos):
+    size = w_heap.length()
+    if pos >= size:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_newitem = w_heap.getitem(pos)
+    while pos > startpos:
+        parentpos = (pos - 1) >> 1
+        w_parent = w_heap.getitem(parentpos)
+        lt = cmp_lt(space, w_newitem, w_parent)
+        _check_size(space, w_heap, size)
+        if not lt:
+            break
+        w_heap.setitem(pos, w_parent)
+        pos = parentpos
+    w_heap.setitem(pos, w_newitem)
+
+def _siftup_w(space, w_heap, pos):
+    endpos = w_heap.length()
+    startpos = pos
+    if pos >= endpos:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_newitem = w_heap.getitem(pos)
+    childpos = 2 * pos + 1
+    while childpos < endpos:
+        rightpos = childpos + 1
+        if rightpos < endpos:
+            lt = cmp_lt(space, w_heap.getitem(childpos),
+                        w_heap.getitem(rightpos))
+            _check_size(space, w_heap, endpos)
+            if not lt:
+                childpos = rightpos
+        w_heap.setitem(pos, w_heap.getitem(childpos))
+        pos = childpos
+        childpos = 2 * pos + 1
+    w_heap.setitem(pos, w_newitem)
+    _siftdown_w(space, w_heap, startpos, pos)
+
+# ____________________________________________________________
+
+def heappush(space, w_heap, w_item):
+    """heappush(heap, item) -> None. Push item onto heap, maintaining the
+heap invariant."""
+    w_heap = _check_heap(space, w_heap)
+    kind = _heap_kind_for_item(space, w_heap, w_item)
+    if kind == INTS:
+        IntHeap.push(w_heap.getitems_int(), space.int_w(w_item))
+    elif kind == FLOATS:
+        FloatHeap.push(w_heap.getitems_float(), space.float_w(w_item))
+    elif kind == BYTES:
+        BytesHeap.push(w_heap.getitems_bytes(), space.bytes_w(w_item))
+    else:
+        w_heap.append(w_item)
+        _siftdown_w(space, w_heap, 0, w_heap.length() - 1)
+
+def heappop(space, w_heap):
+    """Pop the smallest item off the heap, maintaining the heap
+invariant."""
+    w_heap = _check_heap(space, w_heap)
+    if w_heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    kind = _heap_kind(space, w_heap)
+    if kind == INTS:
+        return space.newint(IntHeap.pop(w_heap.getitems_int()))
+    elif kind == FLOATS:
+        return space.newfloat(FloatHeap.pop(w_heap.getitems_float()))
+    elif kind == BYTES:
+        return space.newbytes(BytesHeap.pop(w_heap.getitems_bytes()))
+    w_lastelt = w_heap.pop_end()
+    if w_heap.length() == 0:
+        return w_lastelt
+    w_returnitem = w_heap.getitem(0)
+    w_heap.setitem(0, w_lastelt)
+    _siftup_w(space, w_heap, 0)
+    return w_returnitem
+
+def heapreplace(space, w_heap, w_item):
+    """heapreplace(heap, item) -> value. Pop and return the current smallest
+value, and add the new item.
+
+This is more efficient than heappop() followed by heappush(), and can be
+more appropriate when using a fixed-size heap.  Note that the value
+returned may be larger than item!  That constrains reasonable uses of
+this routine unless written as part of a conditional replacement:
+
+    if item > heap[0]:
+        item = heapreplace(heap, item)
+"""
+    w_heap = _check_heap(space, w_heap)
+    if w_heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    kind = _heap_kind_for_item(space, w_heap, w_item)
+    if kind == INTS:
+        return space.newint(IntHeap.replace(w_heap.getitems_int(),
+                                     space.int_w(w_item)))
+    elif kind == FLOATS:
+        return space.newfloat(FloatHeap.replace(w_heap.getitems_float(),
+                                       space.float_w(w_item)))
+    elif kind == BYTES:
+        return space.newbytes(BytesHeap.replace(w_heap.getitems_bytes(),
+                                       space.bytes_w(w_item)))
+    w_returnitem = w_heap.getitem(0)
+    w_heap.setitem(0, w_item)
+    _siftup_w(space, w_heap, 0)
+    return w_returnitem
+
+def heappushpop(space, w_heap, w_item):
+    """heappushpop(heap, item) -> value. Push item on the heap, then pop and
+return the smallest item from the heap. The combined action runs more
+efficiently than heappush() followed by a separate call to heappop()."""
+    w_heap = _check_heap(space, w_heap)
+    kind = _heap_kind_for_item(space, w_heap, w_item)
+    if kind == INTS:
+        return space.newint(IntHeap.pushpop(w_heap.getitems_int(),
+                                     space.int_w(w_item)))
+    elif kind == FLOATS:
+        return space.newfloat(FloatHeap.pushpop(w_heap.getitems_float(),
+                                       space.float_w(w_item)))
+    elif kind == BYTES:
+        return space.newbytes(BytesHeap.pushpop(w_heap.getitems_bytes(),
+                                       space.bytes_w(w_item)))
+    if w_heap.length() == 0:
+        return w_item
+    w_top = w_heap.getitem(0)
+    if not cmp_lt(space, w_top, w_item):
+        return w_item
+    if w_heap.length() == 0:
+        raise oefmt(space.w_IndexError, "index out of range")
+    w_returnitem = w_heap.getitem(0)
+    w_heap.setitem(0, w_item)
+    _siftup_w(space, w_heap, 0)
+    return w_returnitem
+
+def heapify(space, w_heap):
+    """Transform list into a heap, in-place, in O(len(heap)) time."""
+    w_heap = _check_heap(space, w_heap)
+    kind = _heap_kind(space, w_heap)
+    if kind == INTS:
+        IntHeap.heapify(w_heap.getitems_int())
+    elif kind == FLOATS:
+        FloatHeap.heapify(w_heap.getitems_float())
+    elif kind == BYTES:
+        BytesHeap.heapify(w_heap.getitems_bytes())
+    else:
+        for i in range(w_heap.length() // 2 - 1, -1, -1):
+            _siftup_w(space, w_heap, i)
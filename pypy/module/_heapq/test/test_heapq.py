@@ -0,0 +1,119 @@
+class AppTestHeapq:
+    spaceconfig = dict(usemodules=['_heapq'])
+
+    def w_check_invariant(self, heap):
+        for pos in range(1, len(heap)):
+            assert heap[(pos - 1) >> 1] <= heap[pos]
+
+    def test_push_pop(self):
+        import _heapq
+        for data in [[5, 3, 8, 1, 9, 2, 7], [5.5, -1.0, 3.25, 0.0, 8.0],
+                     ['pear', 'apple', 'fig', 'kiwi', 'banana'],
+                     [(3, 'c'), (1, 'a'), (2, 'b')]]:
+            heap = []
+            for item in data:
+                _heapq.heappush(heap, item)
+                self.check_invariant(heap)
+            result = [_heapq.heappop(heap) for i in range(len(data))]
+            assert result == sorted(data)
+            assert heap == []
+        raises(IndexError, _heapq.heappop, [])
+
+    def test_strategies_are_kept(self):
+        import _heapq
+        from __pypy__ import strategy
+        for data, name in [(range(50, 0, -3), 'IntegerListStrategy'),
+                           ([x * 0.5 for x in range(20, 0, -1)],
+                            'FloatListStrategy'),
+                           ([str(x) for x in range(30, 0, -1)],
+                            'BytesListStrategy')]:
+            heap = data[:]
+            _heapq.heapify(heap)
+            assert strategy(heap) == name
+            self.check_invariant(heap)
+            _heapq.heappush(heap, data[0])
+            _heapq.heapreplace(heap, data[1])
+            _heapq.heappushpop(heap, data[2])
+            assert strategy(heap) == name
+            self.check_invariant(heap)
+            result = [_heapq.heappop(heap) for i in range(len(heap))]
+            assert result == sorted(result)
+
+    def test_mixed_types(self):
+        import _heapq
+        heap = [3, 1, 2]
+        _heapq.heapify(heap)
+        _heapq.heappush(heap, 1.5)
+        _heapq.heappush(heap, True)
+        assert [_heapq.heappop(heap) for i in range(5)] == [1, True, 1.5, 2, 3]
+        h = [10]
+        x = _heapq.heappushpop(h, 10.0)
+        assert (h, x) == ([10], 10.0)
+        assert type(h[0]) is int
+        assert type(x) is float
+
+    def test_heappushpop_and_replace(self):
+        import _heapq
+        assert _heapq.heappushpop([], 10) == 10
+        h = [10]
+        assert _heapq.heappushpop(h, 9) == 9
+        assert h == [10]
+        assert _heapq.heappushpop(h, 11) == 10
+        assert h == [11]
+        h = [1, 5, 3]
+        assert _heapq.heapreplace(h, 4) == 1
+        assert h == [3, 5, 4]
+        raises(IndexError, _heapq.heapreplace, [], 1)
+
+    def test_lt_and_le(self):
+        import _heapq
+        class LT:
+            def __init__(self, x):
+                self.x = x
+            def __lt__(self, other):
+                return self.x > other.x
+        class LE:
+            def __init__(self, x):
+                self.x = x
+            def __le__(self, other):
+                return self.x >= other.x
+        for cls in [LT, LE]:
+            data = map(cls, [4, 8, 1, 6, 3])
+            _heapq.heapify(data)
+            result = [_heapq.heappop(data).x for i in range(5)]
+            assert result == [8, 6, 4, 3, 1]
+
+    def test_mutating_heap(self):
+        import _heapq
+        class SideEffectLT:
+            def __init__(self, value, heap):
+                self.value = value
+                self.heap = heap
+            def __lt__(self, other):
+                self.heap[:] = []
+                return self.value < other.value
+        heap = []
+        heap.extend(SideEffectLT(i, heap) for i in range(200))
+        raises(RuntimeError, _heapq.heappush, heap, SideEffectLT(5, heap))
+        heap.extend(SideEffectLT(i, heap) for i in range(200))
+        raises(RuntimeError, _heapq.heappop, heap)
+
+    def test_not_a_list(self):
+        import _heapq
+        raises(TypeError, _heapq.heappush, (), 1)
+        raises(TypeError, _heapq.heappop, 10)
+        raises(TypeError, _heapq.heapify, None)
+
+    def test_nlargest_nsmallest(self):
+        import _heapq
+        data = [(i * 7919) % 1000 for i in range(1000)]
+        for n in [0, 1, 10, 1000, 1100]:
+            assert _heapq.nsmallest(n, data) == sorted(data)[:n]
+            assert _heapq.nlargest(n, data) == sorted(data, reverse=True)[:n]
+        assert _heapq.nsmallest(-1, data) == []
+
+    def test_heapq_module(self):
+        import heapq
+        assert heapq.heappush.__module__ == '_heapq'
+        assert heapq._nlargest.__module__ == '_heapq'
+        assert heapq.nsmallest(3, [5, 2, 8, 1], key=lambda x: -x) == [8, 5, 2]
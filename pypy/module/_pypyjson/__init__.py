@@ -3,10 +3,15 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     """fast json implementation"""
 
-    appleveldefs = {}
+    appleveldefs = {
+        'iterload': 'app_stream.iterload',
+        'iterloads': 'app_stream.iterloads',
+        }
 
     interpleveldefs = {
         'loads' : 'interp_decoder.loads',
+        'encode': 'interp_encoder.encode',
+        'StreamDecoder': 'interp_stream.W_StreamDecoder',
         'raw_encode_basestring_ascii':
             'interp_encoder.raw_encode_basestring_ascii',
         }
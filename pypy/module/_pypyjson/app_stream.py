@@ -0,0 +1,28 @@
+from _pypyjson import StreamDecoder
+
+def iterload(fp, path=None, chunksize=65536):
+    """Decode the JSON values read from the file object 'fp' one by one.
+    See StreamDecoder for the meaning of 'path'."""
+    decoder = StreamDecoder(path)
+    while True:
+        data = fp.read(chunksize)
+        if not data:
+            break
+        decoder.feed(data)
+        for value in decoder:
+            yield value
+    decoder.close()
+    for value in decoder:
+        yield value
+
+def iterloads(chunks, path=None):
+    """Decode the JSON values from the iterable of strings 'chunks' one by
+    one.  See StreamDecoder for the meaning of 'path'."""
+    decoder = StreamDecoder(path)
+    for data in chunks:
+        decoder.feed(data)
+        for value in decoder:
+            yield value
+    decoder.close()
+    for value in decoder:
+        yield value
@@ -0,0 +1,136 @@
+""" json.loads benchmark over log-like and API-like payloads.
+
+Every payload is decoded twice: once with its objects having the same keys
+in the same order (what the map-based decoder is optimized for), and once
+with the keys of every object shuffled, which defeats the sharing of shapes.
+For each run we print the time per loads() call and the growth of the
+resident set size while keeping the decoded objects alive.
+
+Usage:  pypy bench_loads.py [records] [repeat]
+"""
+
+import gc
+import json
+import random
+import sys
+import time
+
+try:
+    import __pypy__
+except ImportError:
+    __pypy__ = None
+
+LEVELS = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR']
+METHODS = ['GET', 'GET', 'GET', 'POST', 'PUT', 'DELETE']
+PATHS = ['/api/v1/users', '/api/v1/orders', '/api/v1/items/search',
+         '/healthz', '/api/v2/sessions']
+
+def log_record(i):
+    return {
+        'timestamp': '2017-09-%02dT12:%02d:%02d.%06dZ' % (
+            1 + i % 28, i % 60, (i * 7) % 60, i % 1000000),
+        'level': LEVELS[i % len(LEVELS)],
+        'logger': 'app.handlers.request',
+        'host': 'web-%03d.example.com' % (i % 50),
+        'pid': 1000 + i % 64,
+        'thread': 'worker-%d' % (i % 16),
+        'request_id': '%032x' % (i * 2654435761),
+        'method': METHODS[i % len(METHODS)],
+        'path': PATHS[i % len(PATHS)],
+        'status': 200 if i % 13 else 500,
+        'duration_ms': (i % 997) * 0.731,
+        'bytes_sent': (i * 37) % 65536,
+        'user_agent': 'Mozilla/5.0 (X11; Linux x86_64)',
+        'message': 'request finished in %d ms' % (i % 997),
+    }
+
+def api_record(i):
+    return {
+        'id': i,
+        'type': 'order',
+        'created_at': '2017-09-01T10:00:00Z',
+        'updated_at': '2017-09-02T11:30:00Z',
+        'status': 'shipped' if i % 3 else 'pending',
+        'currency': 'EUR',
+        'total': (i % 1000) * 1.25,
+        'customer': {
+            'id': i * 7,
+            'name': 'Customer %d' % i,
+            'email': 'customer%d@example.com' % i,
+            'vip': i % 10 == 0,
+        },
+        'items': [{'sku': 'SKU-%05d' % ((i + j) % 10000),
+                   'quantity': 1 + j,
+                   'price': 9.99 * (j + 1)}
+                  for j in range(i % 4 + 1)],
+        'tags': ['web', 'promo'] if i % 2 else [],
+        'note': None,
+    }
+
+def dumps_shuffled(obj, rnd):
+    if isinstance(obj, dict):
+        keys = obj.keys()
+        rnd.shuffle(keys)
+        return '{%s}' % ', '.join(['%s: %s' % (json.dumps(k),
+                                               dumps_shuffled(obj[k], rnd))
+                                   for k in keys])
+    elif isinstance(obj, list):
+        return '[%s]' % ', '.join([dumps_shuffled(x, rnd) for x in obj])
+    return json.dumps(obj)
+
+def make_payloads(name, make_record, n):
+    records = [make_record(i) for i in range(n)]
+    rnd = random.Random(42)
+    fixed = '[%s]' % ',\n'.join([json.dumps(r, sort_keys=True)
+                                 for r in records])
+    shuffled = '[%s]' % ',\n'.join([dumps_shuffled(r, rnd) for r in records])
+    return [(name + ' (same shape)', fixed),
+            (name + ' (shuffled keys)', shuffled)]
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return 0
+    return pages * 4
+
+def count_strategies(objs, counts):
+    for obj in objs:
+        if isinstance(obj, dict):
+            if __pypy__ is not None:
+                name = __pypy__.strategy(obj)
+                counts[name] = counts.get(name, 0) + 1
+            count_strategies(obj.values(), counts)
+        elif isinstance(obj, list):
+            count_strategies(obj, counts)
+    return counts
+
+def bench(title, payload, repeat):
+    json.loads(payload)     # warm up, and learn the shapes
+    t0 = time.time()
+    for i in range(repeat):
+        json.loads(payload)
+    t1 = time.time()
+    gc.collect()
+    rss_before = rss_kb()
+    keep = [json.loads(payload) for i in range(repeat)]
+    gc.collect()
+    rss_after = rss_kb()
+    print '%-32s %8.2f ms/loads  %8d kB kept' % (
+        title, (t1 - t0) / repeat * 1000.0, rss_after - rss_before)
+    if __pypy__ is not None:
+        counts = count_strategies(keep[0], {})
+        print '%32s %s' % ('', ', '.join(['%s: %d' % item
+                                          for item in sorted(counts.items())]))
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 20000
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    payloads = (make_payloads('log records', log_record, n) +
+                make_payloads('api records', api_record, n))
+    for title, payload in payloads:
+        bench(title, payload, repeat)
+
+if __name__ == '__main__':
+    main(sys.argv)
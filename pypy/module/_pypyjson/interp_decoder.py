@@ -1,10 +1,12 @@
 import sys
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib.objectmodel import specialize, always_inline
-from rpython.rlib import rfloat, runicode
+from rpython.rlib import rfloat, runicode, jit
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.interpreter.error import oefmt
 from pypy.interpreter import unicodehelper
+from pypy.objspace.std.unicodeobject import (
+    newunicode_from_ascii, newunicode_from_utf8)
 
 OVF_DIGITS = len(str(sys.maxint))
 
@@ -42,8 +44,120 @@ def strslice2unicode_latin1(s, start, end):
         ll_res.chars[i] = cast_primitive(UniChar, ch)
     return hlunicode(ll_res)
 
-TYPE_UNKNOWN = 0
-TYPE_STRING = 1
+
+# Objects are decoded following a tree of "maps", similar to the maps of
+# pypy/objspace/std/mapdict.py: every map stands for a sequence of keys, and
+# following the transitions from the root map spells out the keys of an
+# object in order.  Objects with the same keys in the same order end up with
+# the same map, share its interned key objects and become dicts using the
+# compact JsonDictStrategy.  The tree is kept per space, so that the shapes
+# learned by one call to loads() are reused by the following ones.
+
+# stop creating new maps when the following limits are reached; objects
+# whose keys are not already known then become regular dicts.  This bounds
+# the memory used for documents whose keys are really data (ids, dates...)
+MAX_MAPS = 10000
+MAX_NEXTMAPS = 32
+
+class JSONMap(object):
+    _immutable_fields_ = ['prev', 'key', 'ukey', 'fast_key', 'w_key',
+                          'length']
+
+    def __init__(self, prev, key, ukey, w_key):
+        self.prev = prev
+        self.key = key                # utf-8 encoded
+        self.ukey = ukey              # decoded
+        self.w_key = w_key            # interned W_UnicodeObject
+        if prev is None:
+            self.length = 0
+            self.fast_key = None
+        else:
+            self.length = prev.length + 1
+            # the key can be compared with the raw input, without decoding,
+            # if it does not contain anything that needs escaping
+            self.fast_key = key
+            for c in key:
+                if c == '"' or c == '\\' or c < '\x20':
+                    self.fast_key = None
+                    break
+        # most objects of a given shape have the same next key, so the
+        # decoder first tries the most recently used transition
+        self.single_nextmap = None
+        self.nextmaps = None
+        self.keys_in_order = None
+        self.w_keys_in_order = None
+        self.key_to_index = None
+        self.strategy_instance = None
+
+    def get_nextmap(self, key):
+        nextmap = self.single_nextmap
+        if nextmap is not None and nextmap.key == key:
+            return nextmap
+        if self.nextmaps is None:
+            return None
+        nextmap = self.nextmaps.get(key, None)
+        if nextmap is not None:
+            self.single_nextmap = nextmap
+        return nextmap
+
+    def contains_key(self, key):
+        jsonmap = self
+        while jsonmap.prev is not None:
+            if jsonmap.key == key:
+                return True
+            jsonmap = jsonmap.prev
+        return False
+
+    def add_nextmap(self, key, ukey, w_key):
+        nextmap = JSONMap(self, key, ukey, w_key)
+        if self.nextmaps is None:
+            self.nextmaps = {}
+        self.nextmaps[key] = nextmap
+        self.single_nextmap = nextmap
+        return nextmap
+
+    def _fill_keys(self):
+        keys = [None] * self.length
+        keys_w = [None] * self.length
+        jsonmap = self
+        while jsonmap.prev is not None:
+            index = jsonmap.length - 1
+            keys_w[index] = jsonmap.w_key
+            keys[index] = jsonmap.ukey
+            jsonmap = jsonmap.prev
+        self.keys_in_order = keys
+        self.w_keys_in_order = keys_w
+
+    def get_keys_in_order(self):
+        "Return the unwrapped keys as a list of unicode, don't modify it"
+        if self.keys_in_order is None:
+            self._fill_keys()
+        return self.keys_in_order
+
+    def get_w_keys_in_order(self):
+        "Return the interned key objects as a list, don't modify it"
+        if self.w_keys_in_order is None:
+            self._fill_keys()
+        return self.w_keys_in_order
+
+    @jit.elidable
+    def get_index(self, key):
+        "Return the position of the unicode 'key' in the map, or -1"
+        if self.key_to_index is None:
+            key_to_index = {}
+            keys = self.get_keys_in_order()
+            for i in range(len(keys)):
+                key_to_index[keys[i]] = i
+            self.key_to_index = key_to_index
+        return self.key_to_index.get(key, -1)
+
+
+class JSONMapCache(object):
+    def __init__(self, space):
+        self.startmap = JSONMap(None, '', u'', None)
+        self.num_maps = 0
+
+
 class JSONDecoder(object):
     def __init__(self, space, s):
         self.space = space
@@ -55,7 +169,9 @@ class JSONDecoder(object):
         self.ll_chars = rffi.str2charp(s)
         self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
         self.pos = 0
-        self.last_type = TYPE_UNKNOWN
+        # keys of objects that are not described by a map are interned
+        # for the duration of one decoding only
+        self.key_cache = {}
 
     def close(self):
         rffi.free_charp(self.ll_chars)
@@ -248,25 +364,60 @@ class JSONDecoder(object):
 
     def decode_object(self, i):
         start = i
-        w_dict = self.space.newdict()
         #
         i = self.skip_whitespace(i)
         if self.ll_chars[i] == '}':
             self.pos = i+1
-            return w_dict
+            return self.space.newdict()
         #
+        mapcache = self.space.fromcache(JSONMapCache)
+        currmap = mapcache.startmap
+        values_w = []
         while True:
             # parse a key: value
-            self.last_type = TYPE_UNKNOWN
-            w_name = self.decode_any(i)
-            if self.last_type != TYPE_STRING:
-                self._raise("Key name must be string for object starting at char %d", start)
+            i = self.skip_whitespace(i)
+            if self.ll_chars[i] != '"':
+                self._raise_key_not_string(i, start)
+            i += 1
+            nextmap = self.match_key_fast(currmap, i)
+            if nextmap is None:
+                key = self.decode_key(i)
+                nextmap = currmap.get_nextmap(key)
+                if nextmap is None:
+                    nextmap = self.new_nextmap(mapcache, currmap, key)
+                    if nextmap is None:
+                        # unknown shape: continue with a regular dict
+                        w_dict = self.space.newdict()
+                        keys_w = currmap.get_w_keys_in_order()
+                        for j in range(len(values_w)):
+                            self.space.setitem(w_dict, keys_w[j], values_w[j])
+                        return self.decode_object_items(
+                            w_dict, self.intern_key(key), start)
+            currmap = nextmap
+            i = self.skip_colon(self.pos)
+            #
+            w_value = self.decode_any(i)
+            values_w.append(w_value)
             i = self.skip_whitespace(self.pos)
             ch = self.ll_chars[i]
-            if ch != ':':
-                self._raise("No ':' found at char %d", i)
             i += 1
-            i = self.skip_whitespace(i)
+            if ch == '}':
+                self.pos = i
+                from pypy.objspace.std.jsondict import from_values_and_jsonmap
+                return from_values_and_jsonmap(self.space, values_w, currmap)
+            elif ch == ',':
+                pass
+            elif ch == '\0':
+                self._raise("Unterminated object starting at char %d", start)
+            else:
+                self._raise("Unexpected '%s' when decoding object (char %d)",
+                            ch, i-1)
+
+    def decode_object_items(self, w_dict, w_name, start):
+        """Continue decoding the object starting at 'start' into the regular
+        dict w_dict.  w_name is the key that was just parsed."""
+        while True:
+            i = self.skip_colon(self.pos)
             #
             w_value = self.decode_any(i)
             self.space.setitem(w_dict, w_name, w_value)
@@ -283,6 +434,76 @@ class JSONDecoder(object):
             else:
                 self._raise("Unexpected '%s' when decoding object (char %d)",
                             ch, i-1)
+            i = self.skip_whitespace(i)
+            if self.ll_chars[i] != '"':
+                self._raise_key_not_string(i, start)
+            w_name = self.intern_key(self.decode_key(i+1))
+
+    def _raise_key_not_string(self, i, start):
+        # decode_any() gives the better error message if there is no
+        # valid JSON value at all
+        self.decode_any(i)
+        self._raise("Key name must be string for object starting at char %d",
+                    start)
+
+    def skip_colon(self, i):
+        i = self.skip_whitespace(i)
+        if self.ll_chars[i] != ':':
+            self._raise("No ':' found at char %d", i)
+        return self.skip_whitespace(i+1)
+
+    def match_key_fast(self, currmap, i):
+        """Check whether the key starting at i (just after the opening quote)
+        is the most recently seen next key of currmap, comparing the raw
+        input.  Return the next map in that case, None otherwise."""
+        nextmap = currmap.single_nextmap
+        if nextmap is None:
+            return None
+        key = nextmap.fast_key
+        if key is None:
+            return None
+        for j in range(len(key)):
+            if self.ll_chars[i+j] != key[j]:
+                return None
+        i += len(key)
+        if self.ll_chars[i] != '"':
+            return None
+        self.pos = i+1
+        return nextmap
+
+    def decode_key(self, i):
+        """Parse the key string starting at i (just after the opening quote)
+        and return it utf-8 encoded, without wrapping it."""
+        start = i
+        while True:
+            ch = self.ll_chars[i]
+            i += 1
+            if ch == '"':
+                self.pos = i
+                return self.getslice(start, i-1)
+            elif ch == '\\' or ch < '\x20':
+                self.pos = i-1
+                w_key = self.decode_string_escaped(start)
+                return unicodehelper.encode_utf8(self.space,
+                                                 self.space.unicode_w(w_key))
+
+    def new_nextmap(self, mapcache, currmap, key):
+        if (mapcache.num_maps >= MAX_MAPS or
+                (currmap.nextmaps is not None and
+                 len(currmap.nextmaps) >= MAX_NEXTMAPS) or
+                currmap.contains_key(key)):
+            return None
+        ukey = unicodehelper.decode_utf8(self.space, key)
+        mapcache.num_maps += 1
+        return currmap.add_nextmap(key, ukey, self.space.newunicode(ukey))
+
+    def intern_key(self, key):
+        w_key = self.key_cache.get(key, None)
+        if w_key is None:
+            w_key = self.space.newunicode(
+                unicodehelper.decode_utf8(self.space, key))
+            self.key_cache[key] = w_key
+        return w_key
 
 
     def decode_string(self, i):
@@ -295,17 +516,20 @@ class JSONDecoder(object):
             i += 1
             bits |= ord(ch)
             if ch == '"':
+                self.pos = i
                 if bits & 0x80:
                     # the 8th bit is set, it's an utf8 strnig
                     content_utf8 = self.getslice(start, i-1)
                     content_unicode = unicodehelper.decode_utf8(self.space, content_utf8)
-                else:
-                    # ascii only, fast path (ascii is a strict subset of
-                    # latin1, and we already checked that all the chars are <
-                    # 128)
-                    content_unicode = strslice2unicode_latin1(self.s, start, i-1)
-                self.last_type = TYPE_STRING
-                self.pos = i
+                    return newunicode_from_utf8(self.space, content_utf8,
+                                                content_unicode)
+                if self.space.config.objspace.std.withutf8unicode:
+                    return newunicode_from_ascii(self.space,
+                                                 self.getslice(start, i-1))
+                # ascii only, fast path (ascii is a strict subset of
+                # latin1, and we already checked that all the chars are <
+                # 128)
+                content_unicode = strslice2unicode_latin1(self.s, start, i-1)
                 return self.space.newunicode(content_unicode)
             elif ch == '\\' or ch < '\x20':
                 self.pos = i-1
@@ -324,9 +548,9 @@ class JSONDecoder(object):
             if ch == '"':
                 content_utf8 = builder.build()
                 content_unicode = unicodehelper.decode_utf8(self.space, content_utf8)
-                self.last_type = TYPE_STRING
                 self.pos = i
-                return self.space.newunicode(content_unicode)
+                return newunicode_from_utf8(self.space, content_utf8,
+                                            content_unicode)
             elif ch == '\\':
                 i = self.decode_escape_sequence(i, builder)
             elif ch < '\x20':
@@ -392,6 +616,10 @@ def loads(space, w_s):
         raise oefmt(space.w_TypeError,
                     "Expected utf8-encoded str, got unicode")
     s = space.bytes_w(w_s)
+    return decode_document(space, s)
+
+def decode_document(space, s):
+    "Decode the JSON document contained in the whole string s"
     decoder = JSONDecoder(space, s)
     try:
         w_res = decoder.decode_any(0)
@@ -1,6 +1,10 @@
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib.runicode import str_decode_utf_8
+from rpython.rlib.rfloat import isfinite, isnan
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.floatobject import float2string
 
 
 HEX = '0123456789abcdef'
@@ -16,38 +20,19 @@ ESCAPE_BEFORE_SPACE = [ESCAPE_DICT.get(chr(_i), '\\u%04x' % _i)
                        for _i in range(32)]
 
 
-def raw_encode_basestring_ascii(space, w_string):
-    if space.isinstance_w(w_string, space.w_bytes):
-        s = space.bytes_w(w_string)
-        for i in range(len(s)):
-            c = s[i]
-            if c >= ' ' and c <= '~' and c != '"' and c != '\\':
-                pass
-            else:
-                first = i
-                break
+def find_first_special(s):
+    """Return the index of the first char of the byte string 's' which needs
+    to be escaped in ascii-only JSON, or -1 if there is none."""
+    for i in range(len(s)):
+        c = s[i]
+        if c >= ' ' and c <= '~' and c != '"' and c != '\\':
+            pass
         else:
-            # the input is a string with only non-special ascii chars
-            return w_string
-
-        eh = unicodehelper.decode_error_handler(space)
-        u = str_decode_utf_8(
-                s, len(s), None, final=True, errorhandler=eh,
-                allow_surrogates=True)[0]
-        sb = StringBuilder(len(u))
-        sb.append_slice(s, 0, first)
-    else:
-        # We used to check if 'u' contains only safe characters, and return
-        # 'w_string' directly.  But this requires an extra pass over all
-        # characters, and the expected use case of this function, from
-        # json.encoder, will anyway re-encode a unicode result back to
-        # a string (with the ascii encoding).  This requires two passes
-        # over the characters.  So we may as well directly turn it into a
-        # string here --- only one pass.
-        u = space.unicode_w(w_string)
-        sb = StringBuilder(len(u))
-        first = 0
+            return i
+    return -1
 
+def escape_unicode_ascii(sb, u, first):
+    """Append to 'sb' the ascii-only JSON escaped form of u[first:]"""
     for i in range(first, len(u)):
         c = u[i]
         if c <= u'~':
@@ -78,5 +63,330 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
+def escape_utf8_ascii(space, sb, s, first):
+    """Append to 'sb' the ascii-only JSON escaped form of the utf-8 encoded
+    byte string 's', whose chars before 'first' need no escaping."""
+    eh = unicodehelper.decode_error_handler(space)
+    u = str_decode_utf_8(
+            s, len(s), None, final=True, errorhandler=eh,
+            allow_surrogates=True)[0]
+    sb.append_slice(s, 0, first)
+    escape_unicode_ascii(sb, u, first)
+
+def escape_bytes_raw(sb, s):
+    """Append to 'sb' the JSON escaped form of 's', leaving the non-ascii
+    bytes alone.  Return True if there were any."""
+    nonascii = False
+    start = 0
+    for i in range(len(s)):
+        c = s[i]
+        if c == '"' or c == '\\':
+            sb.append_slice(s, start, i)
+            sb.append('\\')
+            sb.append(c)
+            start = i + 1
+        elif c < ' ':
+            sb.append_slice(s, start, i)
+            sb.append(ESCAPE_BEFORE_SPACE[ord(c)])
+            start = i + 1
+        elif c >= '\x80':
+            nonascii = True
+    sb.append_slice(s, start, len(s))
+    return nonascii
+
+
+def raw_encode_basestring_ascii(space, w_string):
+    if space.isinstance_w(w_string, space.w_bytes):
+        s = space.bytes_w(w_string)
+        first = find_first_special(s)
+        if first == -1:
+            # the input is a string with only non-special ascii chars
+            return w_string
+        sb = StringBuilder(len(s))
+        escape_utf8_ascii(space, sb, s, first)
+    else:
+        # We used to check if 'u' contains only safe characters, and return
+        # 'w_string' directly.  But this requires an extra pass over all
+        # characters, and the expected use case of this function, from
+        # json.encoder, will anyway re-encode a unicode result back to
+        # a string (with the ascii encoding).  This requires two passes
+        # over the characters.  So we may as well directly turn it into a
+        # string here --- only one pass.
+        u = space.unicode_w(w_string)
+        sb = StringBuilder(len(u))
+        escape_unicode_ascii(sb, u, 0)
+
     res = sb.build()
     return space.newtext(res)
+
+
+class EncodeFallback(Exception):
+    """Raised when the object cannot be encoded here at all, and
+    json/encoder.py must do all the work."""
+
+
+class JSONEncoder(object):
+    """Encodes dicts, lists, tuples, strings, numbers, bools and None into a
+    single StringBuilder.  Any other object, including instances of
+    subclasses of the types above, is passed to 'w_fallback', which
+    encodes it with the app-level code of json/encoder.py and returns the
+    resulting string.
+
+    With ensure_ascii=False, the result is built utf-8 encoded and decoded
+    at the end if it needs to be a unicode string."""
+
+    def __init__(self, space, ensure_ascii, allow_nan, sort_keys, skipkeys,
+                 check_circular, item_separator, key_separator, w_fallback):
+        self.space = space
+        self.ensure_ascii = ensure_ascii
+        self.allow_nan = allow_nan
+        self.sort_keys = sort_keys
+        self.skipkeys = skipkeys
+        self.check_circular = check_circular
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        self.w_fallback = w_fallback
+        self.builder = StringBuilder()
+        # the lists and dicts being encoded, to detect circular references
+        self.markers_w = []
+        self.has_unicode = False
+        self.has_nonascii_bytes = False
+
+    def encode(self, w_obj):
+        self.encode_any(w_obj)
+        res = self.builder.build()
+        if self.has_unicode:
+            if self.has_nonascii_bytes:
+                # let json/encoder.py raise the UnicodeDecodeError
+                raise EncodeFallback
+            return self.space.newunicode(
+                unicodehelper.decode_utf8(self.space, res))
+        return self.space.newbytes(res)
+
+    def encode_any(self, w_obj):
+        space = self.space
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append('null')
+            return
+        if space.is_w(w_obj, space.w_True):
+            self.builder.append('true')
+            return
+        if space.is_w(w_obj, space.w_False):
+            self.builder.append('false')
+            return
+        w_type = space.type(w_obj)
+        if space.is_w(w_type, space.w_bytes):
+            self.encode_bytes(space.bytes_w(w_obj))
+        elif space.is_w(w_type, space.w_unicode):
+            self.encode_unicode(space.unicode_w(w_obj))
+        elif space.is_w(w_type, space.w_int):
+            self.builder.append(str(space.int_w(w_obj)))
+        elif space.is_w(w_type, space.w_long):
+            self.builder.append(space.text_w(space.str(w_obj)))
+        elif space.is_w(w_type, space.w_float):
+            self.encode_float(space.float_w(w_obj))
+        elif (space.is_w(w_type, space.w_list) or
+              space.is_w(w_type, space.w_tuple)):
+            self.encode_list(w_obj)
+        elif space.is_w(w_type, space.w_dict):
+            self.encode_dict(w_obj)
+        else:
+            self.encode_fallback(w_obj)
+
+    def encode_bytes(self, s):
+        self.builder.append('"')
+        if self.ensure_ascii:
+            first = find_first_special(s)
+            if first == -1:
+                self.builder.append(s)
+            else:
+                escape_utf8_ascii(self.space, self.builder, s, first)
+        else:
+            if escape_bytes_raw(self.builder, s):
+                self.has_nonascii_bytes = True
+        self.builder.append('"')
+
+    def encode_unicode(self, u):
+        self.builder.append('"')
+        if self.ensure_ascii:
+            escape_unicode_ascii(self.builder, u, 0)
+        else:
+            self.has_unicode = True
+            escape_bytes_raw(self.builder, self.unicode_to_utf8(u))
+        self.builder.append('"')
+
+    def unicode_to_utf8(self, u):
+        for c in u:
+            if u'\ud800' <= c <= u'\udfff':
+                # encoding and decoding would merge surrogate pairs
+                raise EncodeFallback
+        return unicodehelper.encode_utf8(self.space, u)
+
+    def floatstr(self, x):
+        if isfinite(x):
+            return float2string(x, 'r', 0)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%R", self.space.newfloat(x))
+        if isnan(x):
+            return 'NaN'
+        elif x > 0.0:
+            return 'Infinity'
+        else:
+            return '-Infinity'
+
+    def encode_float(self, x):
+        self.builder.append(self.floatstr(x))
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            for w_marked in self.markers_w:
+                if w_marked is w_obj:
+                    raise oefmt(self.space.w_ValueError,
+                                "Circular reference detected")
+            self.markers_w.append(w_obj)
+
+    def unmark(self):
+        if self.check_circular:
+            self.markers_w.pop()
+
+    def encode_list(self, w_list):
+        space = self.space
+        # the common homogeneous lists are encoded without boxing
+        intlist = space.listview_int(w_list)
+        if intlist is not None:
+            self.encode_int_list(intlist)
+            return
+        floatlist = space.listview_float(w_list)
+        if floatlist is not None:
+            self.encode_float_list(floatlist)
+            return
+        items_w = space.fixedview(w_list)
+        if not items_w:
+            self.builder.append('[]')
+            return
+        self.mark(w_list)
+        self.builder.append('[')
+        for i in range(len(items_w)):
+            if i > 0:
+                self.builder.append(self.item_separator)
+            self.encode_any(items_w[i])
+        self.builder.append(']')
+        self.unmark()
+
+    def encode_int_list(self, intlist):
+        self.builder.append('[')
+        for i in range(len(intlist)):
+            if i > 0:
+                self.builder.append(self.item_separator)
+            self.builder.append(str(intlist[i]))
+        self.builder.append(']')
+
+    def encode_float_list(self, floatlist):
+        self.builder.append('[')
+        for i in range(len(floatlist)):
+            if i > 0:
+                self.builder.append(self.item_separator)
+            self.encode_float(floatlist[i])
+        self.builder.append(']')
+
+    def encode_dict(self, w_dict):
+        from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+        space = self.space
+        assert isinstance(w_dict, W_DictMultiObject)
+        if w_dict.length() == 0:
+            self.builder.append('{}')
+            return
+        self.mark(w_dict)
+        self.builder.append('{')
+        first = True
+        if self.sort_keys:
+            w_keys = w_dict.w_keys()
+            space.call_method(w_keys, 'sort')
+            for w_key in space.listview(w_keys):
+                w_value = space.getitem(w_dict, w_key)
+                if self.encode_item(w_key, w_value, first):
+                    first = False
+        else:
+            iteritems = w_dict.iteritems()
+            while True:
+                w_key, w_value = iteritems.next_item()
+                if w_key is None:
+                    break
+                if self.encode_item(w_key, w_value, first):
+                    first = False
+        self.builder.append('}')
+        self.unmark()
+
+    def encode_item(self, w_key, w_value, first):
+        """Encode one 'key: value' of a dict.  Return False if the key was
+        skipped."""
+        space = self.space
+        # the same key types as json/encoder.py
+        if space.isinstance_w(w_key, space.w_bytes):
+            key = None
+        elif space.isinstance_w(w_key, space.w_unicode):
+            key = None
+        elif space.isinstance_w(w_key, space.w_float):
+            key = self.floatstr(space.float_w(w_key))
+        elif space.is_w(w_key, space.w_True):
+            key = 'true'
+        elif space.is_w(w_key, space.w_False):
+            key = 'false'
+        elif space.is_w(w_key, space.w_None):
+            key = 'null'
+        elif space.is_w(space.type(w_key), space.w_int):
+            key = str(space.int_w(w_key))
+        elif (space.isinstance_w(w_key, space.w_int) or
+              space.isinstance_w(w_key, space.w_long)):
+            key = space.text_w(space.str(w_key))
+        elif self.skipkeys:
+            return False
+        else:
+            raise oefmt(space.w_TypeError, "key %R is not a string", w_key)
+        if not first:
+            self.builder.append(self.item_separator)
+        if key is not None:
+            self.builder.append('"')
+            self.builder.append(key)
+            self.builder.append('"')
+        elif space.isinstance_w(w_key, space.w_bytes):
+            self.encode_bytes(space.bytes_w(w_key))
+        else:
+            self.encode_unicode(space.unicode_w(w_key))
+        self.builder.append(self.key_separator)
+        self.encode_any(w_value)
+        return True
+
+    def encode_fallback(self, w_obj):
+        space = self.space
+        w_res = space.call_function(self.w_fallback, w_obj)
+        if space.isinstance_w(w_res, space.w_unicode):
+            if not self.ensure_ascii:
+                self.has_unicode = True
+            self.builder.append(self.unicode_to_utf8(space.unicode_w(w_res)))
+        else:
+            s = space.bytes_w(w_res)
+            if not self.ensure_ascii:
+                for c in s:
+                    if c >= '\x80':
+                        self.has_nonascii_bytes = True
+                        break
+            self.builder.append(s)
+
+
+@unwrap_spec(ensure_ascii=bool, allow_nan=bool, sort_keys=bool,
+             skipkeys=bool, check_circular=bool, item_separator='bytes',
+             key_separator='bytes')
+def encode(space, w_obj, ensure_ascii, allow_nan, sort_keys, skipkeys,
+           check_circular, item_separator, key_separator, w_fallback):
+    """Encode w_obj to JSON like json.JSONEncoder.encode() without indent.
+    Returns None if json/encoder.py must encode the object instead."""
+    encoder = JSONEncoder(space, ensure_ascii, allow_nan, sort_keys,
+                          skipkeys, check_circular, item_separator,
+                          key_separator, w_fallback)
+    try:
+        return encoder.encode(w_obj)
+    except EncodeFallback:
+        return space.w_None
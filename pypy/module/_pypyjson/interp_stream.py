@@ -0,0 +1,339 @@
+"""Incremental decoding of JSON streams.
+
+A StreamDecoder is fed the input in chunks of any size.  It only finds
+where each value starts and ends, with a small state machine that survives
+the chunk boundaries, and hands the text of every complete value to the
+regular JSONDecoder.  It never keeps more than the text of the value that
+is being read, so the memory needed does not depend on the size of the
+whole stream.
+
+Without a path, the decoder returns the top-level values of the stream,
+which can be separated by whitespace (JSON Lines, concatenated documents).
+With a path, a list of keys, the stream must be an object, and the decoder
+returns the items of the array found by following the keys, one at a time.
+"""
+
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rstring import StringBuilder
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, WrappedDefault, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.module._pypyjson.interp_decoder import (
+    decode_document, is_whitespace)
+
+# states, i.e. what the decoder expects to see next
+(ST_VALUE,          # the start of a value to read
+ ST_SCALAR,         # the rest of a number or of true/false/null...
+ ST_STRING,         # the rest of a string
+ ST_CONTAINER,      # the rest of an object or an array
+ ST_PATH_VALUE,     # the object or array where the path leads
+ ST_OBJ_START,      # the first key of an object of the path, or '}'
+ ST_NEXT_KEY,       # another key of an object of the path
+ ST_KEY,            # the rest of such a key
+ ST_COLON,          # the ':' after such a key
+ ST_AFTER_MEMBER,   # ',' or '}' after the value of a key of the path
+ ST_ARRAY_START,    # the first item of the array of the path, or ']'
+ ST_AFTER_ITEM,     # ',' or ']' after an item of that array
+ ST_DONE,           # nothing more: the array of the path was read
+ ) = range(13)
+
+# what to do when the end of a value is found
+(CTX_TOP,           # return it, it is a top-level value
+ CTX_ITEM,          # return it, it is an item of the array of the path
+ CTX_SKIP,          # ignore it, it is the value of a key not on the path
+ ) = range(3)
+
+def is_delimiter(ch):
+    return (is_whitespace(ch) or ch == ',' or ch == ']' or ch == '}' or
+            ch == '[' or ch == '{' or ch == '"' or ch == ':')
+
+
+class W_StreamDecoder(W_Root):
+
+    def __init__(self, space, path):
+        self.space = space
+        self.path = path
+        self.level = 0          # number of keys of the path matched so far
+        self.chunk = ''
+        self.i = 0              # position in chunk
+        self.offset = 0         # position of chunk[0] in the whole stream
+        # the text of the current value or key: pieces from the previous
+        # chunks, plus the part of the chunk starting at self.start
+        self.pieces = None
+        self.start = -1
+        self.keep = False       # whether we need the text at all
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key_matches = False
+        self.closed = False
+        if path:
+            self.state = ST_PATH_VALUE
+        else:
+            self.state = ST_VALUE
+        self.ctx = CTX_TOP
+
+    @unwrap_spec(data='bytes')
+    def descr_feed(self, space, data):
+        """feed(data) -> None.  Add data at the end of the stream."""
+        if self.closed:
+            raise oefmt(space.w_ValueError, "feed() after close()")
+        keep_from = self.i
+        if self.start != -1:
+            keep_from = self.start
+        assert keep_from >= 0
+        if keep_from == len(self.chunk):
+            pass
+        elif self.i == len(self.chunk):
+            # in the middle of a value: remember its text so far, if needed
+            if self.keep:
+                if self.pieces is None:
+                    self.pieces = StringBuilder()
+                self.pieces.append_slice(self.chunk, keep_from,
+                                         len(self.chunk))
+            keep_from = len(self.chunk)
+        else:
+            # values are still waiting to be read from the current chunk
+            data = self.chunk[keep_from:] + data
+        self.offset += keep_from
+        self.i -= keep_from
+        if self.start != -1:
+            self.start = 0
+        self.chunk = data
+
+    def descr_close(self, space):
+        """close() -> None.  Mark the end of the stream: the remaining values
+        can then be read."""
+        self.closed = True
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        """Return the next complete value.  StopIteration means that more
+        data must be fed, or that the stream is finished if it is closed."""
+        w_value = self.read_value()
+        if w_value is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        return w_value
+
+    @specialize.arg(1)
+    def _error(self, msg, ch, i):
+        raise oefmt(self.space.w_ValueError, msg, ch, self.offset + i)
+
+    def _get_text(self, end):
+        "Return the text of the current value or key, which ends at 'end'"
+        start = self.start
+        assert 0 <= start <= end
+        if self.pieces is None:
+            s = self.chunk[start:end]
+        else:
+            self.pieces.append_slice(self.chunk, start, end)
+            s = self.pieces.build()
+            self.pieces = None
+        self.start = -1
+        return s
+
+    def _start_value(self, i, ch):
+        self.start = i
+        self.keep = self.ctx != CTX_SKIP
+        if ch == '{' or ch == '[':
+            self.state = ST_CONTAINER
+            self.depth = 1
+            self.in_string = False
+            self.escape = False
+        elif ch == '"':
+            self.state = ST_STRING
+            self.escape = False
+        elif ch == ',' or ch == ']' or ch == '}' or ch == ':':
+            self._error("No JSON object could be decoded: unexpected '%s' "
+                        "at char %d", ch, i)
+        else:
+            self.state = ST_SCALAR
+            return i        # the first char may already end the value
+        return i + 1
+
+    def _end_value(self, end):
+        """The current value ends at 'end'.  Decode it if needed, and return
+        it, or return None."""
+        ctx = self.ctx
+        if ctx == CTX_TOP:
+            self.state = ST_VALUE
+        elif ctx == CTX_ITEM:
+            self.state = ST_AFTER_ITEM
+        else:
+            self.state = ST_AFTER_MEMBER
+        if not self.keep:
+            self.start = -1
+            self.pieces = None
+            return None
+        return decode_document(self.space, self._get_text(end))
+
+    def read_value(self):
+        """Run the state machine until the end of a value to return is found,
+        or until the end of the current chunk."""
+        chunk = self.chunk
+        i = self.i
+        while i < len(chunk):
+            ch = chunk[i]
+            state = self.state
+            if state == ST_SCALAR:
+                if is_delimiter(ch):
+                    self.i = i
+                    w_value = self._end_value(i)
+                    if w_value is not None:
+                        return w_value
+                    continue
+                i += 1
+            elif state == ST_STRING:
+                i += 1
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.i = i
+                    w_value = self._end_value(i)
+                    if w_value is not None:
+                        return w_value
+            elif state == ST_CONTAINER:
+                i += 1
+                if self.in_string:
+                    if self.escape:
+                        self.escape = False
+                    elif ch == '\\':
+                        self.escape = True
+                    elif ch == '"':
+                        self.in_string = False
+                elif ch == '"':
+                    self.in_string = True
+                elif ch == '{' or ch == '[':
+                    self.depth += 1
+                elif ch == '}' or ch == ']':
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.i = i
+                        w_value = self._end_value(i)
+                        if w_value is not None:
+                            return w_value
+            elif state == ST_KEY:
+                i += 1
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    w_key = decode_document(self.space, self._get_text(i))
+                    key = self.space.unicode_w(w_key)
+                    self.key_matches = key == self.path[self.level]
+                    self.state = ST_COLON
+            elif is_whitespace(ch):
+                i += 1
+            elif state == ST_VALUE:
+                i = self._start_value(i, ch)
+            elif state == ST_PATH_VALUE:
+                if self.level < len(self.path):
+                    if ch != '{':
+                        self._error("Expected '{' on the path, got '%s' "
+                                    "at char %d", ch, i)
+                    self.state = ST_OBJ_START
+                else:
+                    if ch != '[':
+                        self._error("Expected '[' at the end of the path, "
+                                    "got '%s' at char %d", ch, i)
+                    self.state = ST_ARRAY_START
+                i += 1
+            elif state == ST_OBJ_START or state == ST_NEXT_KEY:
+                if ch == '}' and state == ST_OBJ_START:
+                    # the path is not in the stream
+                    self.state = ST_DONE
+                elif ch == '"':
+                    self.state = ST_KEY
+                    self.start = i
+                    self.keep = True
+                    self.escape = False
+                else:
+                    self._error("Expected a key, got '%s' at char %d", ch, i)
+                i += 1
+            elif state == ST_COLON:
+                if ch != ':':
+                    self._error("Expected ':', got '%s' at char %d", ch, i)
+                i += 1
+                if self.key_matches:
+                    self.level += 1
+                    self.state = ST_PATH_VALUE
+                else:
+                    self.ctx = CTX_SKIP
+                    self.state = ST_VALUE
+            elif state == ST_AFTER_MEMBER:
+                if ch == ',':
+                    self.state = ST_NEXT_KEY
+                elif ch == '}':
+                    # the path is not in the stream
+                    self.state = ST_DONE
+                else:
+                    self._error("Unexpected '%s' when decoding object "
+                                "(char %d)", ch, i)
+                i += 1
+            elif state == ST_ARRAY_START:
+                self.ctx = CTX_ITEM
+                if ch == ']':
+                    self.state = ST_DONE
+                    i += 1
+                else:
+                    i = self._start_value(i, ch)
+            elif state == ST_AFTER_ITEM:
+                if ch == ',':
+                    self.state = ST_VALUE
+                elif ch == ']':
+                    self.state = ST_DONE
+                else:
+                    self._error("Unexpected '%s' when decoding array "
+                                "(char %d)", ch, i)
+                i += 1
+            else:
+                assert state == ST_DONE
+                # the rest of the stream is not interesting
+                i = len(chunk)
+        self.i = i
+        if self.closed:
+            return self._read_value_at_end()
+        return None
+
+    def _read_value_at_end(self):
+        state = self.state
+        if state == ST_SCALAR:
+            return self._end_value(self.i)
+        if state == ST_DONE or (state == ST_VALUE and self.ctx == CTX_TOP):
+            return None
+        raise oefmt(self.space.w_ValueError,
+                    "Unexpected end of JSON stream (char %d)",
+                    self.offset + self.i)
+
+
+@unwrap_spec(w_path=WrappedDefault(None))
+def descr_new_streamdecoder(space, w_subtype, w_path):
+    """StreamDecoder(path=None)
+
+    Incremental JSON decoder.  Feed it the input in chunks with feed(),
+    call close() at the end of the input, and iterate over it to get the
+    values decoded so far.  Without a path, the values are the top-level
+    values of the stream.  With a path, a list of keys, they are the items
+    of the array found in the stream by following the keys."""
+    path = []
+    if not space.is_none(w_path):
+        for w_key in space.listview(w_path):
+            path.append(space.unicode_w(w_key))
+    return W_StreamDecoder(space, path)
+
+W_StreamDecoder.typedef = TypeDef(
+    '_pypyjson.StreamDecoder',
+    __new__ = interp2app(descr_new_streamdecoder),
+    feed = interp2app(W_StreamDecoder.descr_feed),
+    close = interp2app(W_StreamDecoder.descr_close),
+    __iter__ = interp2app(W_StreamDecoder.descr_iter),
+    next = interp2app(W_StreamDecoder.descr_next),
+    __doc__ = descr_new_streamdecoder.__doc__,
+)
+W_StreamDecoder.typedef.acceptable_as_base_class = False
@@ -13,7 +13,7 @@ def test_skip_whitespace():
     
 
 class AppTest(object):
-    spaceconfig = {"objspace.usemodules._pypyjson": True}
+    spaceconfig = {"usemodules": ["_pypyjson", "struct"]}
 
     def test_raise_on_unicode(self):
         import _pypyjson
@@ -164,6 +164,48 @@ class AppTest(object):
         raises(ValueError, _pypyjson.loads, '{"key"')
         raises(ValueError, _pypyjson.loads, '{"key": 42')
 
+    def test_decode_object_same_shape(self):
+        import _pypyjson
+        s = '[{"a": 1, "b": 2}, {"a": 3, "b": 4}, {"b": 5, "a": 6}]'
+        res = _pypyjson.loads(s)
+        assert res == [{'a': 1, 'b': 2}, {'a': 3, 'b': 4}, {'a': 6, 'b': 5}]
+        assert res[0].keys() == [u'a', u'b']
+        assert res[2].keys() == [u'b', u'a']
+        # the key objects are shared between objects of the same shape
+        assert res[0].keys()[0] is res[1].keys()[0]
+        res2 = _pypyjson.loads('{"a": 7, "b": 8}')
+        assert res2.keys()[1] is res[1].keys()[1]
+
+    def test_decode_object_duplicate_key(self):
+        import _pypyjson
+        res = _pypyjson.loads('{"a": 1, "b": 2, "a": 3}')
+        assert res == {'a': 3, 'b': 2}
+        assert len(res) == 2
+        res = _pypyjson.loads('{"a": 1, "a": 2}')
+        assert res == {'a': 2}
+
+    def test_decode_object_escaped_keys(self):
+        import _pypyjson
+        s = '[{"a\\"b": 1, "c\\u00e9": 2}, {"a\\"b": 3, "c\\u00e9": 4}]'
+        res = _pypyjson.loads(s)
+        assert res == [{u'a"b': 1, u'c\xe9': 2}, {u'a"b': 3, u'c\xe9': 4}]
+        # a key whose raw text is a prefix of a known key
+        res = _pypyjson.loads('[{"abc": 1}, {"ab": 2}, {"abcd": 3}]')
+        assert res == [{'abc': 1}, {'ab': 2}, {'abcd': 3}]
+        res = _pypyjson.loads('{"\xc3\xa9": 1}')
+        assert res == {u'\xe9': 1}
+        raises(UnicodeDecodeError, _pypyjson.loads, '{"\xe0": 1}')
+
+    def test_decode_object_many_shapes(self):
+        import _pypyjson
+        s = '[%s]' % ', '.join(['{"x": 0, "key%d": %d, "y": 1}' % (i, i)
+                                for i in range(200)])
+        res = _pypyjson.loads(s)
+        assert len(res) == 200
+        for i, d in enumerate(res):
+            assert d == {'x': 0, 'key%d' % i: i, 'y': 1}
+            assert sorted(d.keys()) == sorted([u'x', u'key%d' % i, u'y'])
+
     def test_decode_object_nonstring_key(self):
         import _pypyjson
         raises(ValueError, "_pypyjson.loads('{42: 43}')")
@@ -231,3 +273,198 @@ class AppTest(object):
         for inputtext, errmsg in test_cases:
             exc = raises(ValueError, _pypyjson.loads, inputtext)
             assert str(exc.value) == errmsg
+
+    def test_encode(self):
+        import _pypyjson
+        def fallback(o):
+            raise AssertionError("unexpected fallback for %r" % (o,))
+        def encode(o, ensure_ascii=True, allow_nan=True, sort_keys=False,
+                   skipkeys=False, check_circular=True, item_separator=', ',
+                   key_separator=': ', fallback=fallback):
+            return _pypyjson.encode(o, ensure_ascii, allow_nan, sort_keys,
+                                    skipkeys, check_circular, item_separator,
+                                    key_separator, fallback)
+        assert encode(None) == 'null'
+        assert encode(True) == 'true'
+        assert encode(False) == 'false'
+        assert encode(42) == '42'
+        assert encode(-42L) == '-42'
+        assert encode(1 << 100) == str(1 << 100)
+        assert encode(1.5) == '1.5'
+        assert encode(0.1) == '0.1'
+        assert encode(1e100) == '1e+100'
+        assert encode(float('inf')) == 'Infinity'
+        assert encode(float('-inf')) == '-Infinity'
+        assert encode(float('nan')) == 'NaN'
+        raises(ValueError, encode, float('nan'), allow_nan=False)
+        assert encode("abc") == '"abc"'
+        assert encode(u"abc") == '"abc"'
+        assert encode("a\"b\\c\n\x01") == '"a\\"b\\\\c\\n\\u0001"'
+        assert encode(u"\xe9\u1234\U00012345") == (
+            '"\\u00e9\\u1234\\ud808\\udf45"')
+        assert encode("\xc3\xa9") == '"\\u00e9"'
+        raises(UnicodeDecodeError, encode, "\xc0")
+        assert encode([]) == '[]'
+        assert encode(()) == '[]'
+        assert encode([1, 2, 3]) == '[1, 2, 3]'
+        assert encode([1.5, 2.5]) == '[1.5, 2.5]'
+        assert encode(["a", "b"]) == '["a", "b"]'
+        assert encode((1, "a", None, [True])) == '[1, "a", null, [true]]'
+        assert encode({}) == '{}'
+        assert encode({"a": 1}) == '{"a": 1}'
+        assert encode({"a": [1, {"b": None}]},
+                      item_separator=',', key_separator=':') == (
+            '{"a":[1,{"b":null}]}')
+
+    def test_encode_keys(self):
+        import _pypyjson
+        def encode(o, sort_keys=False, skipkeys=False):
+            return _pypyjson.encode(o, True, True, sort_keys, skipkeys, True,
+                                    ', ', ': ', None)
+        assert encode({"b": 1, u"a": 2, "c": 3}, sort_keys=True) == (
+            '{"a": 2, "b": 1, "c": 3}')
+        assert encode({1: 1}) == '{"1": 1}'
+        assert encode({1L << 70: 1}) == '{"%d": 1}' % (1L << 70)
+        assert encode({1.5: 1}) == '{"1.5": 1}'
+        assert encode({True: 1}) == '{"true": 1}'
+        assert encode({None: 1}) == '{"null": 1}'
+        exc = raises(TypeError, encode, {(1, 2): 1})
+        assert str(exc.value) == "key (1, 2) is not a string"
+        assert encode({(1, 2): 1}, skipkeys=True) == '{}'
+        assert encode({(1, 2): 1, "a": 2}, skipkeys=True) == '{"a": 2}'
+
+    def test_encode_not_ascii(self):
+        import _pypyjson
+        def encode(o):
+            return _pypyjson.encode(o, False, True, False, False, True,
+                                    ', ', ': ', None)
+        res = encode(["abc", {"x": 1}])
+        assert res == '["abc", {"x": 1}]'
+        assert type(res) is str
+        res = encode(["\xc3\xa9\x7f\n"])
+        assert res == '["\xc3\xa9\x7f\\n"]'
+        assert type(res) is str
+        res = encode([u"\xe9\u1234\U00012345", "a"])
+        assert res == u'["\xe9\u1234\U00012345", "a"]'
+        assert type(res) is unicode
+        # these are left to json/encoder.py
+        assert encode([u"\xe9", "\xc3\xa9"]) is None
+        assert encode([u"\ud800\udc00"]) is None
+
+    def test_encode_fallback(self):
+        import _pypyjson
+        class MyList(list):
+            pass
+        seen = []
+        def fallback(o):
+            seen.append(o)
+            return '"fallback"'
+        def encode(o):
+            return _pypyjson.encode(o, True, True, False, False, True,
+                                    ', ', ': ', fallback)
+        l = MyList([1])
+        assert encode([l, {"a": 1j}]) == '["fallback", {"a": "fallback"}]'
+        assert seen == [l, 1j]
+
+    def test_encode_circular(self):
+        import _pypyjson
+        def encode(o, check_circular=True):
+            return _pypyjson.encode(o, True, True, False, False,
+                                    check_circular, ', ', ': ', None)
+        l = [1]
+        assert encode([l, l]) == '[[1], [1]]'
+        l.append(l)
+        exc = raises(ValueError, encode, l)
+        assert str(exc.value) == "Circular reference detected"
+        d = {}
+        d["a"] = [d]
+        raises(ValueError, encode, d)
+
+    def test_json_dumps(self):
+        import json
+        class MyDict(dict):
+            def iteritems(self):
+                return iter([("z", 0)])
+        def default(o):
+            if isinstance(o, complex):
+                return [o.real, o.imag]
+            raise TypeError
+        for o in [{"a": [1, 2.5, None, True, u"\u1234"], "b": (3, 4)},
+                  [MyDict(x=1)], [1j, {"c": 2j}]]:
+            for kwds in [{}, {"sort_keys": True}, {"ensure_ascii": False},
+                         {"separators": (",", ":")}, {"indent": 2}]:
+                enc = json.JSONEncoder(default=default, **kwds)
+                res = enc.encode(o)
+                expected = ''.join(enc.iterencode(o))
+                assert res == expected
+        raises(TypeError, json.dumps, object())
+        raises(UnicodeDecodeError, json.dumps, [u"\xe9", "\xc3\xa9"],
+               ensure_ascii=False)
+        assert json.dumps([u"\ud800\udc00"], ensure_ascii=False) == (
+            u'["\ud800\udc00"]')
+
+    def test_stream_decoder(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        dec.feed('{"a": 1}\n[1, 2')
+        assert list(dec) == [{'a': 1}]
+        dec.feed(', 3]\n"x y" 42')
+        assert list(dec) == [[1, 2, 3], u'x y']
+        dec.feed('3 true')
+        assert list(dec) == [423]
+        dec.close()
+        assert list(dec) == [True]
+        assert list(dec) == []
+        raises(ValueError, dec.feed, '1')
+
+    def test_stream_decoder_chunks(self):
+        import _pypyjson
+        s = ('{"a": [1, {"b": "}]\\\\"}], "c": "\\\\\\"x"}\n'
+             '  "str\\\\\\"ing" 1.5e3 null{"d":[]}[]')
+        expected = _pypyjson.StreamDecoder()
+        expected.feed(s)
+        expected.close()
+        expected = list(expected)
+        assert expected == [{'a': [1, {'b': '}]\\'}], 'c': '\\"x'},
+                            u'str\\"ing', 1500.0, None, {'d': []}, []]
+        for size in [1, 2, 3, 7]:
+            chunks = [s[i:i+size] for i in range(0, len(s), size)]
+            assert list(_pypyjson.iterloads(chunks)) == expected
+
+    def test_stream_decoder_errors(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        dec.feed('[1, 2')
+        assert list(dec) == []
+        dec.close()
+        raises(ValueError, list, dec)
+        dec = _pypyjson.StreamDecoder()
+        dec.feed('[1,,2] ')
+        raises(ValueError, list, dec)
+        dec = _pypyjson.StreamDecoder()
+        dec.feed('1 ] 2')
+        raises(ValueError, list, dec)
+
+    def test_stream_decoder_path(self):
+        import _pypyjson
+        s = ('{"meta": {"items": "no", "x": [1, {"items": []}]},'
+             ' "data": {"count": 3, "items": [{"id": 1}, [2], "3"], "z": 4},'
+             ' "more": 5}')
+        for size in [1, 5, len(s)]:
+            chunks = [s[i:i+size] for i in range(0, len(s), size)]
+            res = list(_pypyjson.iterloads(chunks, ["data", "items"]))
+            assert res == [{'id': 1}, [2], u'3']
+        assert list(_pypyjson.iterloads([s], ["meta", "x"])) == [
+            1, {'items': []}]
+        assert list(_pypyjson.iterloads([s], ["nothing"])) == []
+        assert list(_pypyjson.iterloads(['{"a": []}'], ["a"])) == []
+        raises(ValueError, list, _pypyjson.iterloads([s], ["more"]))
+        raises(ValueError, list, _pypyjson.iterloads(['[1]'], ["a"]))
+
+    def test_iterload_file(self):
+        import _pypyjson
+        from StringIO import StringIO
+        lines = ''.join(['{"n": %d, "s": "%s"}\n' % (i, 'x' * i)
+                         for i in range(50)])
+        res = list(_pypyjson.iterload(StringIO(lines), chunksize=16))
+        assert res == [{'n': i, 's': 'x' * i} for i in range(50)]
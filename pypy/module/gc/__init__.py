@@ -4,12 +4,20 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     interpleveldefs = {
         'collect': 'interp_gc.collect',
+        'collect_step': 'interp_gc.collect_step',
+        'set_max_pause': 'interp_gc.set_max_pause',
+        'set_max_heap_size': 'interp_gc.set_max_heap_size',
+        'set_soft_max_heap_size': 'interp_gc.set_soft_max_heap_size',
+        'release_memory': 'interp_gc.release_memory',
         'enable': 'interp_gc.enable',
         'disable': 'interp_gc.disable',
         'isenabled': 'interp_gc.isenabled',
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage': 'space.newlist([])',
+        'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
+        'GcCollectStepStats': 'hook.W_GcCollectStepStats',
+        'get_stats': 'interp_gc.get_stats',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {}
@@ -0,0 +1,528 @@
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc import incminimark
+from rpython.rlib import rgc
+from rpython.rlib.nonconst import NonConstant
+from rpython.rlib.rarithmetic import r_uint, r_longlong, longlongmax
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty, GetSetProperty
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.executioncontext import AsyncAction
+
+class LowLevelGcHooks(GcHooks):
+    """
+    These are the low-level hooks which are called directly from the GC.
+
+    They can't do much, because the base class marks the methods as
+    @rgc.no_collect.
+
+    This is expected to be a singleton, created by space.fromcache, and it is
+    integrated with the translation by targetpypystandalone.get_gchooks
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.w_hooks = space.fromcache(W_AppLevelHooks)
+
+    def is_gc_minor_enabled(self):
+        return self.w_hooks.gc_minor_enabled
+
+    def is_gc_collect_step_enabled(self):
+        return self.w_hooks.gc_collect_step_enabled
+
+    def is_gc_collect_enabled(self):
+        return (self.w_hooks.gc_collect_enabled or
+                self.w_hooks.gc_soft_limit_enabled)
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    bytes_promoted, nursery_size, threshold_reached):
+        action = self.w_hooks.gc_minor
+        action.count += 1
+        action.duration += duration
+        action.duration_min = min(action.duration_min, duration)
+        action.duration_max = max(action.duration_max, duration)
+        action.total_memory_used = total_memory_used
+        action.pinned_objects = pinned_objects
+        action.bytes_promoted += bytes_promoted
+        action.nursery_size = nursery_size
+        action.threshold_reached = threshold_reached
+        action.fire()
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        action = self.w_hooks.gc_collect_step
+        action.count += 1
+        action.duration += duration
+        action.duration_min = min(action.duration_min, duration)
+        action.duration_max = max(action.duration_max, duration)
+        action.oldstate = oldstate
+        action.newstate = newstate
+        action.fire()
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        if self.w_hooks.gc_collect_enabled:
+            action = self.w_hooks.gc_collect
+            action.count += 1
+            action.num_major_collects = num_major_collects
+            action.arenas_count_before = arenas_count_before
+            action.arenas_count_after = arenas_count_after
+            action.arenas_bytes = arenas_bytes
+            action.rawmalloc_bytes_before = rawmalloc_bytes_before
+            action.rawmalloc_bytes_after = rawmalloc_bytes_after
+            action.fire()
+        if self.w_hooks.gc_soft_limit_enabled:
+            # the memory still in use after the major collection, i.e.
+            # the memory that the program really needs at this point
+            total_memory = arenas_bytes + rawmalloc_bytes_after
+            soft_max_heap_size = self.w_hooks.soft_max_heap_size
+            if soft_max_heap_size > 0 and total_memory > soft_max_heap_size:
+                action = self.w_hooks.gc_soft_limit
+                action.count += 1
+                action.total_memory = total_memory
+                action.soft_max_heap_size = soft_max_heap_size
+                action.fire()
+
+
+class W_AppLevelHooks(W_Root):
+
+    def __init__(self, space):
+        self.space = space
+        self.gc_minor_enabled = False
+        self.gc_collect_step_enabled = False
+        self.gc_collect_enabled = False
+        self.gc_soft_limit_enabled = False
+        self.soft_max_heap_size = r_uint(0)     # see gc.set_soft_max_heap_size
+        self.gc_minor = GcMinorHookAction(space)
+        self.gc_collect_step = GcCollectStepHookAction(space)
+        self.gc_collect = GcCollectHookAction(space)
+        self.gc_soft_limit = GcSoftLimitHookAction(space)
+
+    def descr_get_on_gc_minor(self, space):
+        return self.gc_minor.w_callable
+
+    def descr_set_on_gc_minor(self, space, w_obj):
+        self.gc_minor_enabled = not space.is_none(w_obj)
+        self.gc_minor.w_callable = w_obj
+        self.gc_minor.fix_annotation()
+
+    def descr_get_on_gc_collect_step(self, space):
+        return self.gc_collect_step.w_callable
+
+    def descr_set_on_gc_collect_step(self, space, w_obj):
+        self.gc_collect_step_enabled = not space.is_none(w_obj)
+        self.gc_collect_step.w_callable = w_obj
+        self.gc_collect_step.fix_annotation()
+
+    def descr_get_on_gc_collect(self, space):
+        return self.gc_collect.w_callable
+
+    def descr_set_on_gc_collect(self, space, w_obj):
+        self.gc_collect_enabled = not space.is_none(w_obj)
+        self.gc_collect.w_callable = w_obj
+        self.gc_collect.fix_annotation()
+
+    def descr_get_on_gc_soft_limit(self, space):
+        return self.gc_soft_limit.w_callable
+
+    def descr_set_on_gc_soft_limit(self, space, w_obj):
+        self.gc_soft_limit_enabled = not space.is_none(w_obj)
+        self.gc_soft_limit.w_callable = w_obj
+        self.gc_soft_limit.fix_annotation()
+
+    def descr_set(self, space, w_obj):
+        w_a = space.getattr(w_obj, space.newtext('on_gc_minor'))
+        w_b = space.getattr(w_obj, space.newtext('on_gc_collect_step'))
+        w_c = space.getattr(w_obj, space.newtext('on_gc_collect'))
+        # optional, for compatibility with the objects written before
+        # this hook existed
+        w_d = space.findattr(w_obj, space.newtext('on_gc_soft_limit'))
+        if w_d is None:
+            w_d = space.w_None
+        self.descr_set_on_gc_minor(space, w_a)
+        self.descr_set_on_gc_collect_step(space, w_b)
+        self.descr_set_on_gc_collect(space, w_c)
+        self.descr_set_on_gc_soft_limit(space, w_d)
+
+    def descr_reset(self, space):
+        self.descr_set_on_gc_minor(space, space.w_None)
+        self.descr_set_on_gc_collect_step(space, space.w_None)
+        self.descr_set_on_gc_collect(space, space.w_None)
+        self.descr_set_on_gc_soft_limit(space, space.w_None)
+
+
+class GcMinorHookAction(AsyncAction):
+    total_memory_used = r_uint(0)
+    pinned_objects = 0
+    bytes_promoted = 0
+    nursery_size = 0
+    threshold_reached = False
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.w_callable = space.w_None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.duration = r_longlong(0)
+        self.duration_min = r_longlong(longlongmax)
+        self.duration_max = r_longlong(0)
+        self.bytes_promoted = 0
+
+    def fix_annotation(self):
+        # the annotation of the class and its attributes must be completed
+        # BEFORE we do the gc transform; this makes sure that everything is
+        # annotated with the correct types
+        if NonConstant(False):
+            self.count = NonConstant(-42)
+            self.duration = NonConstant(r_longlong(-42))
+            self.duration_min = NonConstant(r_longlong(-42))
+            self.duration_max = NonConstant(r_longlong(-42))
+            self.total_memory_used = NonConstant(r_uint(42))
+            self.pinned_objects = NonConstant(-42)
+            self.bytes_promoted = NonConstant(-42)
+            self.nursery_size = NonConstant(-42)
+            self.threshold_reached = NonConstant(True)
+            self.fire()
+            self.perform(None, None)
+
+    def perform(self, ec, frame):
+        if self.space.is_none(self.w_callable):
+            # the hook was removed after the action was fired
+            self.reset()
+            return
+        w_stats = W_GcMinorStats(
+            self.count,
+            self.duration,
+            self.duration_min,
+            self.duration_max,
+            self.total_memory_used,
+            self.pinned_objects,
+            self.bytes_promoted,
+            self.nursery_size,
+            self.threshold_reached)
+        self.reset()
+        self.space.call_function(self.w_callable, w_stats)
+
+
+class GcCollectStepHookAction(AsyncAction):
+    oldstate = 0
+    newstate = 0
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.w_callable = space.w_None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.duration = r_longlong(0)
+        self.duration_min = r_longlong(longlongmax)
+        self.duration_max = r_longlong(0)
+
+    def fix_annotation(self):
+        # the annotation of the class and its attributes must be completed
+        # BEFORE we do the gc transform; this makes sure that everything is
+        # annotated with the correct types
+        if NonConstant(False):
+            self.count = NonConstant(-42)
+            self.duration = NonConstant(r_longlong(-42))
+            self.duration_min = NonConstant(r_longlong(-42))
+            self.duration_max = NonConstant(r_longlong(-42))
+            self.oldstate = NonConstant(-42)
+            self.newstate = NonConstant(-42)
+            self.fire()
+            self.perform(None, None)
+
+    def perform(self, ec, frame):
+        if self.space.is_none(self.w_callable):
+            # the hook was removed after the action was fired
+            self.reset()
+            return
+        w_stats = W_GcCollectStepStats(
+            self.count,
+            self.duration,
+            self.duration_min,
+            self.duration_max,
+            self.oldstate,
+            self.newstate,
+            rgc.is_done__states(self.oldstate, self.newstate))
+        self.reset()
+        self.space.call_function(self.w_callable, w_stats)
+
+
+class GcCollectHookAction(AsyncAction):
+    num_major_collects = 0
+    arenas_count_before = 0
+    arenas_count_after = 0
+    arenas_bytes = r_uint(0)
+    rawmalloc_bytes_before = r_uint(0)
+    rawmalloc_bytes_after = r_uint(0)
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.w_callable = space.w_None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+
+    def fix_annotation(self):
+        # the annotation of the class and its attributes must be completed
+        # BEFORE we do the gc transform; this makes sure that everything is
+        # annotated with the correct types
+        if NonConstant(False):
+            self.count = NonConstant(-42)
+            self.num_major_collects = NonConstant(-42)
+            self.arenas_count_before = NonConstant(-42)
+            self.arenas_count_after = NonConstant(-42)
+            self.arenas_bytes = NonConstant(r_uint(42))
+            self.rawmalloc_bytes_before = NonConstant(r_uint(42))
+            self.rawmalloc_bytes_after = NonConstant(r_uint(42))
+            self.fire()
+            self.perform(None, None)
+
+    def perform(self, ec, frame):
+        if self.space.is_none(self.w_callable):
+            # the hook was removed after the action was fired
+            self.reset()
+            return
+        w_stats = W_GcCollectStats(self.count,
+                                   self.num_major_collects,
+                                   self.arenas_count_before,
+                                   self.arenas_count_after,
+                                   self.arenas_bytes,
+                                   self.rawmalloc_bytes_before,
+                                   self.rawmalloc_bytes_after)
+        self.reset()
+        self.space.call_function(self.w_callable, w_stats)
+
+
+class GcSoftLimitHookAction(AsyncAction):
+    total_memory = r_uint(0)
+    soft_max_heap_size = r_uint(0)
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.w_callable = space.w_None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+
+    def fix_annotation(self):
+        # the annotation of the class and its attributes must be completed
+        # BEFORE we do the gc transform; this makes sure that everything is
+        # annotated with the correct types
+        if NonConstant(False):
+            self.count = NonConstant(-42)
+            self.total_memory = NonConstant(r_uint(42))
+            self.soft_max_heap_size = NonConstant(r_uint(42))
+            self.fire()
+            self.perform(None, None)
+
+    def perform(self, ec, frame):
+        if self.space.is_none(self.w_callable):
+            # the hook was removed after the action was fired
+            self.reset()
+            return
+        w_stats = W_GcSoftLimitStats(self.count,
+                                     self.total_memory,
+                                     self.soft_max_heap_size)
+        self.reset()
+        self.space.call_function(self.w_callable, w_stats)
+
+
+class W_GcMinorStats(W_Root):
+
+    def __init__(self, count, duration, duration_min, duration_max,
+                 total_memory_used, pinned_objects, bytes_promoted,
+                 nursery_size, threshold_reached):
+        self.count = count
+        self.duration = duration
+        self.duration_min = duration_min
+        self.duration_max = duration_max
+        self.total_memory_used = total_memory_used
+        self.pinned_objects = pinned_objects
+        self.bytes_promoted = bytes_promoted
+        self.nursery_size = nursery_size
+        self.threshold_reached = threshold_reached
+
+
+class W_GcCollectStepStats(W_Root):
+
+    def __init__(self, count, duration, duration_min, duration_max,
+                 oldstate, newstate, major_is_done):
+        self.count = count
+        self.duration = duration
+        self.duration_min = duration_min
+        self.duration_max = duration_max
+        self.oldstate = oldstate
+        self.newstate = newstate
+        self.major_is_done = major_is_done
+
+
+class W_GcCollectStats(W_Root):
+    def __init__(self, count, num_major_collects,
+                 arenas_count_before, arenas_count_after,
+                 arenas_bytes, rawmalloc_bytes_before,
+                 rawmalloc_bytes_after):
+        self.count = count
+        self.num_major_collects = num_major_collects
+        self.arenas_count_before = arenas_count_before
+        self.arenas_count_after = arenas_count_after
+        self.arenas_bytes = arenas_bytes
+        self.rawmalloc_bytes_before = rawmalloc_bytes_before
+        self.rawmalloc_bytes_after = rawmalloc_bytes_after
+
+
+class W_GcSoftLimitStats(W_Root):
+    def __init__(self, count, total_memory, soft_max_heap_size):
+        self.count = count
+        self.total_memory = total_memory
+        self.soft_max_heap_size = soft_max_heap_size
+
+
+class W_GcStats(W_Root):
+    """A snapshot of rgc.get_stats(), see gc.get_stats()"""
+
+    def __init__(self):
+        self.total_memory = rgc.get_stats(rgc.TOTAL_MEMORY)
+        self.total_arena_memory = rgc.get_stats(rgc.TOTAL_ARENA_MEMORY)
+        self.total_rawmalloced_memory = rgc.get_stats(
+            rgc.TOTAL_RAWMALLOCED_MEMORY)
+        self.peak_memory = rgc.get_stats(rgc.PEAK_MEMORY)
+        self.arenas_count = rgc.get_stats(rgc.ARENAS_COUNT)
+        self.arenas_bytes = rgc.get_stats(rgc.ARENAS_BYTES)
+        self.nursery_size = rgc.get_stats(rgc.NURSERY_SIZE)
+        self.next_major_threshold = rgc.get_stats(rgc.NEXT_MAJOR_THRESHOLD)
+        self.num_minor_collects = rgc.get_stats(rgc.NUM_MINOR_COLLECTS)
+        self.num_major_collects = rgc.get_stats(rgc.NUM_MAJOR_COLLECTS)
+        self.total_gc_time = rgc.get_stats(rgc.TOTAL_GC_TIME)
+        self.gc_state = rgc.get_stats(rgc.GC_STATE)
+        self.pinned_objects = rgc.get_stats(rgc.PINNED_OBJECTS)
+        self.max_heap_size = rgc.get_stats(rgc.MAX_HEAP_SIZE)
+        self.memory_pressure = rgc.get_stats(rgc.MEMORY_PRESSURE)
+        self.num_wb_slowpath = rgc.get_stats(rgc.NUM_WB_SLOWPATH)
+        self.num_cards_scanned = rgc.get_stats(rgc.NUM_CARDS_SCANNED)
+        self.num_old_objects_rescanned = rgc.get_stats(
+            rgc.NUM_OLD_OBJECTS_RESCANNED)
+        # how much more memory can be used before allocations start to
+        # raise MemoryError, or -1 if there is no limit
+        if self.max_heap_size > 0:
+            self.memory_headroom = max(self.max_heap_size -
+                                       self.total_memory -
+                                       self.memory_pressure, 0)
+        else:
+            self.memory_headroom = -1
+
+
+# just a shortcut to make the typedefs shorter
+def wrap_many_ints(cls, names):
+    d = {}
+    for name in names:
+        d[name] = interp_attrproperty(name, cls=cls, wrapfn="newint")
+    return d
+
+
+W_AppLevelHooks.typedef = TypeDef(
+    "GcHooks",
+    on_gc_minor = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_minor,
+        W_AppLevelHooks.descr_set_on_gc_minor),
+
+    on_gc_collect_step = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect_step,
+        W_AppLevelHooks.descr_set_on_gc_collect_step),
+
+    on_gc_collect = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect,
+        W_AppLevelHooks.descr_set_on_gc_collect),
+
+    on_gc_soft_limit = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_soft_limit,
+        W_AppLevelHooks.descr_set_on_gc_soft_limit),
+
+    set = interp2app(W_AppLevelHooks.descr_set),
+    reset = interp2app(W_AppLevelHooks.descr_reset),
+    )
+
+W_GcMinorStats.typedef = TypeDef(
+    "GcMinorStats",
+    threshold_reached = interp_attrproperty("threshold_reached",
+                                            cls=W_GcMinorStats,
+                                            wrapfn="newbool"),
+    **wrap_many_ints(W_GcMinorStats, (
+        "count",
+        "duration",
+        "duration_min",
+        "duration_max",
+        "total_memory_used",
+        "pinned_objects",
+        "bytes_promoted",
+        "nursery_size"))
+    )
+
+W_GcCollectStepStats.typedef = TypeDef(
+    "GcCollectStepStats",
+    STATE_SCANNING = incminimark.STATE_SCANNING,
+    STATE_MARKING = incminimark.STATE_MARKING,
+    STATE_SWEEPING = incminimark.STATE_SWEEPING,
+    STATE_FINALIZING = incminimark.STATE_FINALIZING,
+    GC_STATES = tuple(incminimark.GC_STATES),
+    major_is_done = interp_attrproperty("major_is_done",
+                                        cls=W_GcCollectStepStats,
+                                        wrapfn="newbool"),
+    **wrap_many_ints(W_GcCollectStepStats, (
+        "count",
+        "duration",
+        "duration_min",
+        "duration_max",
+        "oldstate",
+        "newstate"))
+    )
+
+W_GcCollectStats.typedef = TypeDef(
+    "GcCollectStats",
+    **wrap_many_ints(W_GcCollectStats, (
+        "count",
+        "num_major_collects",
+        "arenas_count_before",
+        "arenas_count_after",
+        "arenas_bytes",
+        "rawmalloc_bytes_before",
+        "rawmalloc_bytes_after"))
+    )
+
+W_GcSoftLimitStats.typedef = TypeDef(
+    "GcSoftLimitStats",
+    **wrap_many_ints(W_GcSoftLimitStats, (
+        "count",
+        "total_memory",
+        "soft_max_heap_size"))
+    )
+
+W_GcStats.typedef = TypeDef(
+    "GcStats",
+    **wrap_many_ints(W_GcStats, (
+        "total_memory",
+        "total_arena_memory",
+        "total_rawmalloced_memory",
+        "peak_memory",
+        "arenas_count",
+        "arenas_bytes",
+        "nursery_size",
+        "next_major_threshold",
+        "num_minor_collects",
+        "num_major_collects",
+        "total_gc_time",
+        "gc_state",
+        "pinned_objects",
+        "max_heap_size",
+        "memory_pressure",
+        "memory_headroom",
+        "num_wb_slowpath",
+        "num_cards_scanned",
+        "num_old_objects_rescanned"))
+    )
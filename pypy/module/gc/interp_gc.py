@@ -1,6 +1,8 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import oefmt
 from rpython.rlib import rgc
+from rpython.rlib.rtimer import read_timestamp
+from rpython.rlib.rarithmetic import r_uint
 
 
 @unwrap_spec(generation=int)
@@ -38,6 +40,72 @@ def collect(space, generation=0):
 
     return space.newint(0)
 
+def collect_step(space):
+    """If the GC is incremental, run a single gc-collect-step: a minor
+    collection followed by one bounded increment of the current major
+    collection, starting a new one if needed.  Return a GcCollectStepStats
+    object with the states of the GC before and after the step, the
+    duration, and 'major_is_done' telling if a major collection has just
+    been completed.  If the GC is not incremental, do a full collection.
+
+    A program can call it in its idle time, e.g. between two requests,
+    to do the work of the GC at a convenient time."""
+    from pypy.module.gc.hook import W_GcCollectStepStats
+    start = read_timestamp()
+    states = rgc.collect_step()
+    duration = read_timestamp() - start
+    oldstate = rgc.old_state(states)
+    newstate = rgc.new_state(states)
+    return W_GcCollectStepStats(
+        count = 1,
+        duration = duration,
+        duration_min = duration,
+        duration_max = duration,
+        oldstate = oldstate,
+        newstate = newstate,
+        major_is_done = rgc.is_done__states(oldstate, newstate))
+
+@unwrap_spec(ticks=int)
+def set_max_pause(space, ticks):
+    """Try to keep the marking or sweeping work of each step of the
+    incremental GC under the given duration, in the units of the durations
+    reported by gc.hooks and gc.collect_step(), by adapting the size of
+    the steps.
+    0 means no limit, which is the default."""
+    if ticks < 0:
+        raise oefmt(space.w_ValueError, "the pause must be >= 0")
+    rgc.set_max_pause(ticks)
+
+@unwrap_spec(nbytes=int)
+def set_max_heap_size(space, nbytes):
+    """Limit the memory used by the GC to the given number of bytes,
+    counting the raw memory announced with __pypy__.add_memory_pressure().
+    An allocation of a large object that would go over the limit, even
+    after a full collection, raises MemoryError.  Small objects are only
+    checked at the end of the major collections, which raise MemoryError
+    if the heap is still over the limit.
+    0 means no limit, which is the default (see PYPY_GC_MAX)."""
+    if nbytes < 0:
+        raise oefmt(space.w_ValueError, "the size must be >= 0")
+    rgc.set_max_heap_size(nbytes)
+
+@unwrap_spec(nbytes=int)
+def set_soft_max_heap_size(space, nbytes):
+    """Call gc.hooks.on_gc_soft_limit after each major collection that
+    leaves more than the given number of bytes in use.
+    0 means no soft limit, which is the default."""
+    if nbytes < 0:
+        raise oefmt(space.w_ValueError, "the size must be >= 0")
+    from pypy.module.gc.hook import W_AppLevelHooks
+    space.fromcache(W_AppLevelHooks).soft_max_heap_size = r_uint(nbytes)
+
+def release_memory(space):
+    """Give back to the OS as much as possible of the memory that the GC
+    has allocated but does not use at the moment: the nursery, which is
+    emptied first, and the free pages of the GC's arenas.  Meant to be
+    called before the process becomes idle for a while."""
+    rgc.release_memory()
+
 def enable(space):
     """Non-recursive version.  Enable finalizers now.
     If they were already enabled, no-op.
@@ -77,6 +145,14 @@ def disable_finalizers(space):
     if uda.pending_with_disabled_del is None:
         uda.pending_with_disabled_del = []
 
+def get_stats(space):
+    """Return a snapshot of the statistics of the GC: the memory used,
+    the size of the nursery, the number of collections done so far, the
+    total time spent in the GC, and so on.  The values are -1 if the GC
+    doesn't support them."""
+    from pypy.module.gc.hook import W_GcStats
+    return W_GcStats()
+
 # ____________________________________________________________
 
 @unwrap_spec(filename='fsencode')
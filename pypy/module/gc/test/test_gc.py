@@ -83,6 +83,34 @@ class AppTestGC(object):
         assert deleted == [1]
         gc.enable()
 
+    def test_collect_step(self):
+        import gc
+        # untranslated, collect_step() does a full collection
+        stats = gc.collect_step()
+        assert stats.count == 1
+        assert stats.duration >= 0
+        assert stats.duration_min == stats.duration_max == stats.duration
+        assert stats.major_is_done
+        assert stats.newstate == gc.GcCollectStepStats.STATE_SCANNING
+        assert stats.oldstate != stats.newstate
+
+    def test_set_max_pause(self):
+        import gc
+        gc.set_max_pause(1000000)
+        gc.set_max_pause(0)
+        raises(ValueError, gc.set_max_pause, -1)
+
+    def test_release_memory(self):
+        import gc
+        lst = [[i] for i in range(1000)]
+        gc.release_memory()
+        assert lst[999] == [999]
+
+    def test_set_max_heap_size(self):
+        import gc
+        gc.set_max_heap_size(0)
+        raises(ValueError, gc.set_max_heap_size, -1)
+
 
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
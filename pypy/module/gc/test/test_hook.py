@@ -0,0 +1,229 @@
+from rpython.rlib.rarithmetic import r_uint
+from pypy.module.gc.hook import LowLevelGcHooks
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+
+
+class AppTestGcHooks(object):
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            import py
+            py.test.skip("these tests cannot work with -A")
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        @unwrap_spec(ObjSpace, int, r_uint, int, int, int, bool)
+        def fire_gc_minor(space, duration, total_memory_used, pinned_objects,
+                          bytes_promoted, nursery_size, threshold_reached):
+            gchooks.fire_gc_minor(duration, total_memory_used, pinned_objects,
+                                  bytes_promoted, nursery_size,
+                                  threshold_reached)
+
+        @unwrap_spec(ObjSpace, int, int, int)
+        def fire_gc_collect_step(space, duration, oldstate, newstate):
+            gchooks.fire_gc_collect_step(duration, oldstate, newstate)
+
+        @unwrap_spec(ObjSpace, int, int, int, r_uint, r_uint, r_uint)
+        def fire_gc_collect(space, a, b, c, d, e, f):
+            gchooks.fire_gc_collect(a, b, c, d, e, f)
+
+        @unwrap_spec(ObjSpace)
+        def fire_many(space):
+            gchooks.fire_gc_minor(5, 0, 0, 10, 100, False)
+            gchooks.fire_gc_minor(7, 0, 0, 20, 100, True)
+            gchooks.fire_gc_collect_step(5, 0, 1)
+            gchooks.fire_gc_collect_step(15, 1, 2)
+
+        cls.w_fire_gc_minor = space.wrap(interp2app(fire_gc_minor))
+        cls.w_fire_gc_collect_step = space.wrap(interp2app(fire_gc_collect_step))
+        cls.w_fire_gc_collect = space.wrap(interp2app(fire_gc_collect))
+        cls.w_fire_many = space.wrap(interp2app(fire_many))
+
+    def test_default(self):
+        import gc
+        assert gc.hooks.on_gc_minor is None
+        assert gc.hooks.on_gc_collect_step is None
+        assert gc.hooks.on_gc_collect is None
+        assert gc.hooks.on_gc_soft_limit is None
+
+    def test_on_gc_minor(self):
+        import gc
+        lst = []
+        def on_gc_minor(stats):
+            lst.append((stats.count,
+                        stats.duration,
+                        stats.total_memory_used,
+                        stats.pinned_objects,
+                        stats.bytes_promoted,
+                        stats.nursery_size,
+                        stats.threshold_reached))
+        gc.hooks.on_gc_minor = on_gc_minor
+        self.fire_gc_minor(10, 20, 30, 40, 50, False)
+        self.fire_gc_minor(1, 2, 3, 4, 5, True)
+        assert lst == [
+            (1, 10, 20, 30, 40, 50, False),
+            (1, 1, 2, 3, 4, 5, True),
+            ]
+        #
+        gc.hooks.on_gc_minor = None
+        self.fire_gc_minor(100, 200, 300, 400, 500, False)  # won't fire
+        assert len(lst) == 2
+
+    def test_on_gc_collect_step(self):
+        import gc
+        SCANNING = gc.GcCollectStepStats.STATE_SCANNING
+        MARKING = gc.GcCollectStepStats.STATE_MARKING
+        assert gc.GcCollectStepStats.GC_STATES[MARKING] == 'MARKING'
+        lst = []
+        def on_gc_collect_step(stats):
+            lst.append((stats.count,
+                        stats.duration,
+                        stats.oldstate,
+                        stats.newstate,
+                        stats.major_is_done))
+        gc.hooks.on_gc_collect_step = on_gc_collect_step
+        self.fire_gc_collect_step(10, SCANNING, MARKING)
+        self.fire_gc_collect_step(40, MARKING, SCANNING)
+        assert lst == [
+            (1, 10, SCANNING, MARKING, False),
+            (1, 40, MARKING, SCANNING, True),
+            ]
+        #
+        gc.hooks.on_gc_collect_step = None
+        self.fire_gc_collect_step(50, SCANNING, MARKING)  # won't fire
+        assert len(lst) == 2
+
+    def test_on_gc_collect(self):
+        import gc
+        lst = []
+        def on_gc_collect(stats):
+            lst.append((stats.count,
+                        stats.num_major_collects,
+                        stats.arenas_count_before,
+                        stats.arenas_count_after,
+                        stats.arenas_bytes,
+                        stats.rawmalloc_bytes_before,
+                        stats.rawmalloc_bytes_after))
+        gc.hooks.on_gc_collect = on_gc_collect
+        self.fire_gc_collect(1, 2, 3, 4, 5, 6)
+        self.fire_gc_collect(7, 8, 9, 10, 11, 12)
+        assert lst == [
+            (1, 1, 2, 3, 4, 5, 6),
+            (1, 7, 8, 9, 10, 11, 12),
+            ]
+        #
+        gc.hooks.on_gc_collect = None
+        self.fire_gc_collect(42, 42, 42, 42, 42, 42)  # won't fire
+        assert len(lst) == 2
+
+    def test_on_gc_soft_limit(self):
+        import gc
+        lst = []
+        def on_gc_soft_limit(stats):
+            lst.append((stats.count,
+                        stats.total_memory,
+                        stats.soft_max_heap_size))
+        gc.hooks.on_gc_soft_limit = on_gc_soft_limit
+        self.fire_gc_collect(1, 2, 3, 400, 500, 600)   # no soft limit
+        assert lst == []
+        gc.set_soft_max_heap_size(1000)
+        try:
+            self.fire_gc_collect(1, 2, 3, 400, 5000, 600)   # below the limit
+            assert lst == []
+            self.fire_gc_collect(1, 2, 3, 400, 500, 700)
+            assert lst == [(1, 1100, 1000)]
+            #
+            # the soft limit hook works independently of on_gc_collect
+            collects = []
+            gc.hooks.on_gc_collect = collects.append
+            self.fire_gc_collect(1, 2, 3, 400, 500, 300)   # below the limit
+            assert len(collects) == 1
+            assert len(lst) == 1
+            gc.hooks.on_gc_collect = None
+            #
+            gc.hooks.on_gc_soft_limit = None
+            self.fire_gc_collect(1, 2, 3, 400, 500, 700)   # won't fire
+            assert len(lst) == 1
+        finally:
+            gc.set_soft_max_heap_size(0)
+        raises(ValueError, gc.set_soft_max_heap_size, -1)
+
+    def test_consts(self):
+        import gc
+        S = gc.GcCollectStepStats
+        assert S.STATE_SCANNING == 0
+        assert S.STATE_MARKING == 1
+        assert S.STATE_SWEEPING == 2
+        assert S.STATE_FINALIZING == 3
+        assert S.GC_STATES == ('SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING')
+
+    def test_cumulative(self):
+        import gc
+        class MyHooks(object):
+
+            def __init__(self):
+                self.minors = []
+                self.steps = []
+
+            def on_gc_minor(self, stats):
+                self.minors.append((stats.count, stats.duration,
+                                    stats.duration_min, stats.duration_max,
+                                    stats.bytes_promoted,
+                                    stats.threshold_reached))
+
+            def on_gc_collect_step(self, stats):
+                self.steps.append((stats.count, stats.duration,
+                                   stats.duration_min, stats.duration_max,
+                                   stats.oldstate, stats.newstate))
+
+            on_gc_collect = None
+
+        myhooks = MyHooks()
+        gc.hooks.set(myhooks)
+        self.fire_many()
+        assert myhooks.minors == [(2, 12, 5, 7, 30, True)]
+        assert myhooks.steps == [(2, 20, 5, 15, 1, 2)]
+        #
+        gc.hooks.reset()
+        assert gc.hooks.on_gc_minor is None
+        assert gc.hooks.on_gc_collect_step is None
+
+    def test_clear_queue(self):
+        import gc
+        class MyHooks(object):
+
+            def __init__(self):
+                self.lst = []
+
+            def on_gc_minor(self, stats):
+                self.lst.append('minor')
+
+            def on_gc_collect_step(self, stats):
+                self.lst.append('step')
+
+            def on_gc_collect(self, stats):
+                self.lst.append('collect')
+
+        myhooks = MyHooks()
+        gc.hooks.set(myhooks)
+        self.fire_many()
+        assert myhooks.lst == ['minor', 'step']
+        #
+        # a hook that is disabled before it runs must not be called
+        gc.hooks.reset()
+        self.fire_many()
+        assert myhooks.lst == ['minor', 'step']
+
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        for name in ['total_memory', 'total_arena_memory',
+                     'total_rawmalloced_memory', 'peak_memory',
+                     'arenas_count', 'arenas_bytes', 'nursery_size',
+                     'next_major_threshold', 'num_minor_collects',
+                     'num_major_collects', 'total_gc_time', 'gc_state',
+                     'pinned_objects', 'max_heap_size', 'memory_pressure',
+                     'memory_headroom', 'num_wb_slowpath',
+                     'num_cards_scanned', 'num_old_objects_rescanned']:
+            assert isinstance(getattr(stats, name), (int, long))
@@ -0,0 +1,29 @@
+# NOT_RPYTHON
+
+def save_warmup_profile(filename):
+    """Write the result of get_warmup_profile() to the given file, one
+    loop per line, as 'next_instr<TAB>co_firstlineno<TAB>co_name<TAB>
+    co_filename'.  Returns the number of loops written."""
+    import pypyjit
+    profile = pypyjit.get_warmup_profile()
+    with open(filename, 'w') as f:
+        for co_filename, co_firstlineno, co_name, next_instr in profile:
+            f.write('%d\t%d\t%s\t%s\n' % (next_instr, co_firstlineno,
+                                          co_name, co_filename))
+    return len(profile)
+
+def load_warmup_profile(filename):
+    """Load a file written by save_warmup_profile() with
+    set_warmup_profile().  Returns the number of loops loaded."""
+    import pypyjit
+    profile = []
+    with open(filename) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            next_instr, co_firstlineno, co_name, co_filename = line.split(
+                '\t', 3)
+            profile.append((co_filename, int(co_firstlineno), co_name,
+                            int(next_instr)))
+    return pypyjit.set_warmup_profile(profile)
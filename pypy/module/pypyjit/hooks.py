@@ -4,7 +4,8 @@ from rpython.rlib.jit import JitHookInterface, Counters
 
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
-    WrappedOp, W_JitLoopInfo, wrap_oplist)
+    WrappedOp, W_JitLoopInfo, wrap_oplist, greenkey_to_pycode)
+from pypy.module.pypyjit.interp_warmup import WarmupProfile
 
 class PyPyJitIface(JitHookInterface):
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -46,6 +47,8 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        if debug_info.type == 'loop':
+            self._record_warmup(debug_info)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
@@ -57,6 +60,16 @@ class PyPyJitIface(JitHookInterface):
     def before_compile_bridge(self, debug_info):
         pass
 
+    def _record_warmup(self, debug_info):
+        if debug_info.get_jitdriver().name != 'pypyjit':
+            return
+        greenkey = debug_info.greenkey
+        if greenkey[1].getint():     # is_being_profiled
+            return
+        pycode = greenkey_to_pycode(greenkey)
+        self.space.fromcache(WarmupProfile).record(pycode,
+                                                   greenkey[0].getint())
+
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
         cache = space.fromcache(Cache)
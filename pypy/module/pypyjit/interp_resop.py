@@ -29,6 +29,12 @@ class Cache(object):
         self.no += 1
         return self.no - 1
 
+def greenkey_to_pycode(greenkey):
+    # only for the greenkeys of 'pypyjit'
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    return cast_base_ptr_to_instance(PyCode, ll_code)
+
 def wrap_greenkey(space, jitdriver, greenkey, greenkey_repr):
     if greenkey is None:
         return space.w_None
@@ -36,9 +42,7 @@ def wrap_greenkey(space, jitdriver, greenkey, greenkey_repr):
     if jitdriver_name == 'pypyjit':
         next_instr = greenkey[0].getint()
         is_being_profiled = greenkey[1].getint()
-        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
-                                         greenkey[2].getref_base())
-        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        pycode = greenkey_to_pycode(greenkey)
         return space.newtuple([pycode, space.newint(next_instr),
                                space.newbool(bool(is_being_profiled))])
     else:
@@ -339,10 +343,12 @@ W_JitLoopInfo.typedef.acceptable_as_base_class = False
 
 
 class W_JitInfoSnapshot(W_Root):
-    def __init__(self, space, w_times, w_counters, w_counter_times):
+    def __init__(self, space, w_times, w_counters, w_counter_times,
+                 w_compile_pauses):
         self.w_loop_run_times = w_times
         self.w_counters = w_counters
         self.w_counter_times = w_counter_times
+        self.w_compile_pauses = w_compile_pauses
 
 W_JitInfoSnapshot.typedef = TypeDef(
     "JitInfoSnapshot",
@@ -353,7 +359,11 @@ W_JitInfoSnapshot.typedef = TypeDef(
                                        doc="various JIT counters"),
     counter_times = interp_attrproperty_w("w_counter_times",
                                             cls=W_JitInfoSnapshot,
-                                            doc="various JIT timers")
+                                            doc="various JIT timers"),
+    compile_pauses = interp_attrproperty_w("w_compile_pauses",
+                                           cls=W_JitInfoSnapshot,
+                                           doc="percentiles of the time spent "
+                                               "tracing and compiling")
 )
 W_JitInfoSnapshot.typedef.acceptable_as_base_class = False
 
@@ -379,14 +389,40 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'TRACING', space.newfloat(tr_time))
     b_time = jit_hooks.stats_get_times_value(None, Counters.BACKEND)
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
-    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
-
-def get_stats_asmmemmgr(space):
+    w_compile_pauses = space.newdict()
+    for name, percent in [('p50', 50), ('p90', 90), ('p99', 99),
+                          ('max', 100)]:
+        pause = jit_hooks.stats_get_compile_pause(None, percent)
+        space.setitem_str(w_compile_pauses, name, space.newfloat(pause))
+    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times,
+                             w_compile_pauses)
+
+@unwrap_spec(details=bool)
+def get_stats_asmmemmgr(space, details=False):
     """Returns the raw memory currently used by the JIT backend,
-    as a pair (total_memory_allocated, memory_in_use)."""
+    as a pair (total_memory_allocated, memory_in_use).
+
+    With details=True, returns instead a dict that also contains the
+    size of the machine code and resume data of the loops kept alive
+    ('code_size'), the budget set with the 'loop_memory_budget' parameter
+    ('code_size_budget', 0 if unlimited), and how many loops and bytes
+    were evicted so far because of it ('evicted_loops', 'evicted_bytes')."""
     m1 = jit_hooks.stats_asmmemmgr_allocated(None)
     m2 = jit_hooks.stats_asmmemmgr_used(None)
-    return space.newtuple([space.newint(m1), space.newint(m2)])
+    if not details:
+        return space.newtuple([space.newint(m1), space.newint(m2)])
+    w_stats = space.newdict()
+    space.setitem_str(w_stats, 'allocated', space.newint(m1))
+    space.setitem_str(w_stats, 'used', space.newint(m2))
+    space.setitem_str(w_stats, 'code_size',
+                      space.newint(jit_hooks.stats_memmgr_code_size(None)))
+    space.setitem_str(w_stats, 'code_size_budget',
+                      space.newint(jit_hooks.stats_memmgr_max_code_size(None)))
+    space.setitem_str(w_stats, 'evicted_loops',
+                      space.newint(jit_hooks.stats_memmgr_evicted_loops(None)))
+    space.setitem_str(w_stats, 'evicted_bytes',
+                      space.newint(jit_hooks.stats_memmgr_evicted_bytes(None)))
+    return w_stats
 
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
@@ -0,0 +1,106 @@
+"""Warm-up profiles: remember which loops the JIT compiled, and pre-arm
+their jit counters in the next process.
+
+The green keys of the compiled loops are recorded as (co_filename,
+co_firstlineno, co_name, next_instr), which, unlike the identity of the
+code objects, stays the same across processes.  When such a profile is
+loaded with set_warmup_profile(), every code object created afterwards
+that matches one of its entries gets the corresponding jit counters set
+close to the threshold with trace_next_iteration(), so that the loop is
+traced the next time it runs instead of after 'threshold' iterations.
+"""
+
+from rpython.rlib import jit_hooks
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+from pypy.interpreter.pycode import CodeHookCache
+
+
+class WarmupProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.recorded = []       # list of (filename, firstlineno, name,
+                                 #          next_instr), in compile order
+        self.recorded_keys = {}
+        self.loaded = {}         # {(filename, firstlineno, name):
+                                 #                     [next_instr, ...]}
+        self.num_armed = 0
+
+    def record(self, pycode, next_instr):
+        key = (pycode.co_filename, pycode.co_firstlineno, pycode.co_name,
+               next_instr)
+        if key not in self.recorded_keys:
+            self.recorded_keys[key] = None
+            self.recorded.append(key)
+
+    @dont_look_inside
+    def new_code(self, pycode):
+        key = (pycode.co_filename, pycode.co_firstlineno, pycode.co_name)
+        offsets = self.loaded.get(key, None)
+        if offsets is None:
+            return
+        ll_pycode = cast_instance_to_gcref(pycode)
+        for next_instr in offsets:
+            if 0 <= next_instr < len(pycode.co_code):
+                jit_hooks.trace_next_iteration(
+                    'pypyjit', r_uint(next_instr), 0, ll_pycode)
+                self.num_armed += 1
+
+
+def get_warmup_profile(space):
+    """get_warmup_profile()
+
+    Return the loops compiled so far by the JIT, in the order in which
+    they were compiled, as a list of tuples (co_filename, co_firstlineno,
+    co_name, next_instr).  This can be passed to set_warmup_profile()
+    in another process."""
+    profile = space.fromcache(WarmupProfile)
+    items_w = []
+    for filename, firstlineno, name, next_instr in profile.recorded:
+        items_w.append(space.newtuple([space.newtext(filename),
+                                       space.newint(firstlineno),
+                                       space.newtext(name),
+                                       space.newint(next_instr)]))
+    return space.newlist(items_w)
+
+def set_warmup_profile(space, w_profile):
+    """set_warmup_profile(profile)
+
+    Load a profile returned by get_warmup_profile() in an earlier process.
+    The loops it lists are traced as soon as they run, instead of after
+    'threshold' iterations.  This only applies to the code objects created
+    afterwards, so it should be called before the hot modules are
+    imported.  Returns the number of entries loaded."""
+    profile = space.fromcache(WarmupProfile)
+    loaded = {}
+    count = 0
+    for w_item in space.unpackiterable(w_profile):
+        w_filename, w_firstlineno, w_name, w_next_instr = space.fixedview(
+            w_item, 4)
+        key = (space.text_w(w_filename), space.int_w(w_firstlineno),
+               space.text_w(w_name))
+        offsets = loaded.get(key, None)
+        if offsets is None:
+            offsets = []
+            loaded[key] = offsets
+        offsets.append(space.int_w(w_next_instr))
+        count += 1
+    profile.loaded = loaded
+    cache = space.fromcache(CodeHookCache)
+    if loaded:
+        cache._jit_warmup_profile = profile
+    else:
+        cache._jit_warmup_profile = None
+    return space.newint(count)
+
+def get_warmup_profile_stats(space):
+    """get_warmup_profile_stats()
+
+    Return a tuple (recorded, loaded, armed): the number of loops recorded
+    in this process, the number of code objects with entries in the
+    loaded profile, and the number of jit counters pre-armed so far."""
+    profile = space.fromcache(WarmupProfile)
+    return space.newtuple([space.newint(len(profile.recorded)),
+                           space.newint(len(profile.loaded)),
+                           space.newint(profile.num_armed)])
@@ -12,6 +12,7 @@ from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.rtyper.rclass import OBJECT
 from pypy.module.pypyjit.interp_jit import pypyjitdriver
 from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit import interp_warmup
 from rpython.jit.tool.oparser import parse
 from rpython.jit.metainterp.typesystem import llhelper
 from rpython.rlib.jit import JitDebugInfo, AsmInfo, Counters
@@ -109,6 +110,26 @@ class AppTestJitHook(object):
         cls.orig_oplist = oplist
         cls.w_sorted_keys = space.wrap(sorted(Counters.counter_names))
 
+        # trace_next_iteration() only works when translated
+        armed = []
+        class FakeJitHooks(object):
+            @staticmethod
+            def trace_next_iteration(jitdriver_name, next_instr,
+                                     is_being_profiled, ll_pycode):
+                armed.append(next_instr)
+        cls.orig_jit_hooks = interp_warmup.jit_hooks
+        interp_warmup.jit_hooks = FakeJitHooks
+
+        def interp_get_armed():
+            return space.wrap(armed)
+        cls.w_get_armed = space.wrap(interp2app(interp_get_armed))
+        from rpython.tool.udir import udir
+        cls.w_profile_filename = space.wrap(
+            str(udir.join('test_jit_hook_warmup.txt')))
+
+    def teardown_class(cls):
+        interp_warmup.jit_hooks = cls.orig_jit_hooks
+
     def setup_method(self, meth):
         self.__class__.oplist = self.orig_oplist[:]
 
@@ -154,6 +175,41 @@ class AppTestJitHook(object):
         self.on_compile()
         assert len(all) == 2
 
+    def test_warmup_profile(self):
+        import pypyjit
+        self.on_compile()
+        self.on_compile()
+        profile = pypyjit.get_warmup_profile()
+        assert len(profile) == 1
+        co_filename, co_firstlineno, co_name, next_instr = profile[0]
+        assert co_filename == self.f.__code__.co_filename
+        assert co_firstlineno == self.f.__code__.co_firstlineno
+        assert co_name == 'function'
+        assert next_instr == 0
+        #
+        # code objects created after loading a profile are pre-armed
+        src = "x = 5\ndef g():\n    pass\ndef h():\n    pass\n"
+        assert pypyjit.set_warmup_profile([('warmup.py', 2, 'g', 0),
+                                           ('warmup.py', 2, 'g', 1),
+                                           ('warmup.py', 4, 'h', 1000),
+                                           ('other.py', 2, 'g', 0)]) == 4
+        compile(src, 'warmup.py', 'exec')
+        assert self.get_armed() == [0, 1]     # 1000 is out of range
+        assert pypyjit.get_warmup_profile_stats() == (1, 3, 2)
+        assert pypyjit.set_warmup_profile([]) == 0
+        compile(src, 'warmup.py', 'exec')
+        assert self.get_armed() == [0, 1]
+
+    def test_warmup_profile_file(self):
+        import pypyjit
+        self.on_compile()
+        assert pypyjit.save_warmup_profile(self.profile_filename) == 1
+        with open(self.profile_filename) as f:
+            assert f.read().endswith('\tfunction\t%s\n' % (
+                self.f.__code__.co_filename,))
+        assert pypyjit.load_warmup_profile(self.profile_filename) == 1
+        pypyjit.set_warmup_profile([])
+
     def test_on_compile_exception(self):
         import pypyjit, sys, cStringIO
 
@@ -17,7 +17,13 @@ def checkmodule(*modnames, **kwds):
         module.init(space)
         modules.append(module)
         for name in module.loaders:
-            seeobj_w.append(module._load_lazily(space, name))
+            w_obj = module._load_lazily(space, name)
+            seeobj_w.append(w_obj)
+            # a prebuilt instance of a class of the module: see its typedef
+            # too, it is not otherwise reachable from the seen objects
+            if (isinstance(w_obj, W_Root) and
+                    type(w_obj).__module__.startswith(mod.__name__ + '.')):
+                space.gettypefor(type(w_obj))
         if hasattr(module, 'submodules'):
             for cls in module.submodules.itervalues():
                 submod = cls(space, W_Root())
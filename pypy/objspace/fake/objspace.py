@@ -398,6 +398,7 @@ class FakeObjSpace(ObjSpace):
                 setattr(space, 'w_' + name, w_some_obj())
         space.w_bytes = w_some_obj()
         space.w_text = w_some_obj()
+        space.w_NoneType = w_some_obj()
         space.w_type = w_some_type()
         #
         for (name, _, arity, _) in ObjSpace.MethodTable:
@@ -0,0 +1,100 @@
+""" Memory and speed of dicts and sets of ints.
+
+Builds a counter (int -> int), a histogram (int -> float) and a set of ids,
+and reports the memory they keep alive and the time of a few operations on
+them.  On a pypy translated with --objspace-std-withintmap they are stored
+unboxed in flat open-addressing tables; the 'boxed' column uses one value
+that is not an int or a float (or, for the set, the one int that these
+tables cannot store), which always gives the regular strategies.
+
+Usage:  pypy bench_intmap.py [items] [repeat]
+"""
+
+import gc
+import sys
+import time
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return 0
+    return pages * 4
+
+def make_counter(n, boxed):
+    d = {}
+    if boxed:
+        d[-1] = None
+    for i in range(n):
+        key = (i * 7919) % n
+        d[key] = d.get(key, 0) + i
+    return d
+
+def make_histogram(n, boxed):
+    d = {}
+    if boxed:
+        d[-1] = None
+    for i in range(n):
+        d[i * 16] = i * 0.25
+    return d
+
+def make_idset(n, boxed):
+    s = set()
+    if boxed:
+        s.add(-sys.maxint - 1)
+    for i in range(n):
+        s.add(i * 1000003)
+    return s
+
+def memory(make, n, boxed):
+    gc.collect()
+    rss_before = rss_kb()
+    t0 = time.time()
+    keep = make(n, boxed)
+    t = (time.time() - t0) * 1000.0
+    gc.collect()
+    rss_after = rss_kb()
+    return keep, rss_after - rss_before, t
+
+def op_lookup(container, n):
+    total = 0
+    for i in range(n):
+        if i in container:
+            total += 1
+    return total
+
+def op_iterate(container, n):
+    total = 0
+    for x in container:
+        total += 1
+    return total
+
+def timeit(op, container, n, repeat):
+    op(container, n)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(container, n)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 1000000
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    print '%d items' % n
+    print '%-24s %12s %12s' % ('', 'unboxed', 'boxed')
+    for make in [make_counter, make_histogram, make_idset]:
+        name = make.__name__[5:]
+        unboxed, kb_unboxed, t_unboxed = memory(make, n, False)
+        boxed, kb_boxed, t_boxed = memory(make, n, True)
+        print '%-24s %9d kB %9d kB' % (name + ' memory kept', kb_unboxed,
+                                       kb_boxed)
+        print '%-24s %9.2f ms %9.2f ms' % (name + ' build', t_unboxed,
+                                           t_boxed)
+        for op in [op_lookup, op_iterate]:
+            print '%-24s %9.2f ms %9.2f ms' % (
+                name + ' ' + op.__name__[3:],
+                timeit(op, unboxed, n, repeat), timeit(op, boxed, n, repeat))
+        del unboxed, boxed
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,78 @@
+""" Speed of line-processing pipelines on lists of byte strings.
+
+Writes a file of lines, then times the usual steps of a script working on
+f.readlines(): sorting, removing duplicates with set() and dict.fromkeys(),
+counting, comparing and joining.  All these steps work on the unwrapped
+strings of a list with the BytesListStrategy.  The 'mixed' column runs the
+same steps on a list that also contains one unicode string, which always
+gives the ObjectListStrategy.
+
+Usage:  pypy bench_lines.py [lines] [repeat]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+def write_lines(n):
+    fd, filename = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+        for i in range(n):
+            f.write('line %d of the file\n' % ((i * 7919) % (n // 4 + 1)))
+    return filename
+
+def op_readlines(filename, lines):
+    with open(filename) as f:
+        return len(f.readlines())
+
+def op_sort(filename, lines):
+    return len(sorted(lines))
+
+def op_uniq_set(filename, lines):
+    return len(sorted(set(lines)))
+
+def op_uniq_fromkeys(filename, lines):
+    return len(dict.fromkeys(lines))
+
+def op_count(filename, lines):
+    return lines.count(lines[0])
+
+def op_contains(filename, lines):
+    return 'not a line\n' in lines
+
+def op_compare(filename, lines):
+    return lines == lines[:]
+
+def op_join(filename, lines):
+    return len(''.join(lines))
+
+def timeit(op, filename, lines, repeat):
+    op(filename, lines)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(filename, lines)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 500000
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    filename = write_lines(n)
+    try:
+        with open(filename) as f:
+            lines = f.readlines()
+        mixed = lines[:]
+        mixed.append(u'unicode line\n')
+        print '%d lines' % n
+        print '%-16s %12s %12s' % ('', 'bytes', 'mixed')
+        for op in [op_readlines, op_sort, op_uniq_set, op_uniq_fromkeys,
+                   op_count, op_contains, op_compare, op_join]:
+            print '%-16s %9.2f ms %9.2f ms' % (
+                op.__name__[3:],
+                timeit(op, filename, lines, repeat),
+                timeit(op, filename, mixed, repeat))
+    finally:
+        os.unlink(filename)
+
+if __name__ == '__main__':
+    main(sys.argv)
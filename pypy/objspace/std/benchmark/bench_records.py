@@ -0,0 +1,99 @@
+""" Memory and speed of many dicts with the same str keys.
+
+Builds records the way csv.DictReader and database drivers do, with
+dict(zip(fields, row)), and reports the memory they keep alive and the time
+of a few operations on them.  On a pypy translated with
+--objspace-std-withsharedkeysdict the keys are stored once for all the
+records; the 'unshared' column uses a key that is not a str in every record,
+which always gives a regular dict.
+
+Usage:  pypy bench_records.py [records] [repeat]
+"""
+
+import gc
+import sys
+import time
+
+FIELDS = ['id', 'name', 'email', 'city', 'country', 'created', 'status',
+          'score']
+
+def make_rows(n):
+    return [(i, 'user%d' % i, 'user%d@example.com' % i, 'city%d' % (i % 97),
+             'XX', '2017-09-%02d' % (1 + i % 28), i % 3, i * 0.5)
+            for i in range(n)]
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return 0
+    return pages * 4
+
+def build(rows, shared):
+    if shared:
+        return [dict(zip(FIELDS, row)) for row in rows]
+    result = []
+    for row in rows:
+        d = {0: None}
+        d.update(zip(FIELDS, row))
+        del d[0]
+        result.append(d)
+    return result
+
+def memory(rows, shared):
+    gc.collect()
+    rss_before = rss_kb()
+    keep = build(rows, shared)
+    gc.collect()
+    rss_after = rss_kb()
+    return keep, rss_after - rss_before
+
+def op_getitem(records):
+    for r in records:
+        r['name']
+        r['score']
+
+def op_setitem(records):
+    for r in records:
+        r['status'] = 1
+
+def op_iterate(records):
+    for r in records:
+        for key, value in r.iteritems():
+            pass
+
+def op_keys(records):
+    for r in records:
+        r.keys()
+
+OPS = [op_getitem, op_setitem, op_iterate, op_keys]
+
+def timeit(op, records, repeat):
+    op(records)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(records)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 200000
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    rows = make_rows(n)
+    t0 = time.time()
+    shared, kb_shared = memory(rows, True)
+    t_shared = (time.time() - t0) * 1000.0
+    t0 = time.time()
+    unshared, kb_unshared = memory(rows, False)
+    t_unshared = (time.time() - t0) * 1000.0
+    print '%d records of %d fields:' % (n, len(FIELDS))
+    print '%-16s %12s %12s' % ('', 'shared', 'unshared')
+    print '%-16s %9d kB %9d kB' % ('memory kept', kb_shared, kb_unshared)
+    print '%-16s %9.2f ms %9.2f ms' % ('build', t_shared, t_unshared)
+    for op in OPS:
+        print '%-16s %9.2f ms %9.2f ms' % (
+            op.__name__[3:], timeit(op, shared, repeat),
+            timeit(op, unshared, repeat))
+
+if __name__ == '__main__':
+    main(sys.argv)
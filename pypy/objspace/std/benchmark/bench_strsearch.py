@@ -0,0 +1,81 @@
+""" Microbenchmarks of substring searching.
+
+Times find, rfind, count, replace, split and partition on str, unicode and
+bytearray haystacks, for a few kinds of needles:
+
+  short        a 6-character word, found at the end
+  long         a 150-character marker, found at the end of a log blob
+  long absent  the same marker, missing from the blob
+  adversarial  'a' * (m - 1) + 'b' in a haystack of 'a's: the worst case of
+               the old search, quadratic-ish, linear with the two-way search
+
+Usage:  pypy bench_strsearch.py [haystack size in kB] [repeat]
+"""
+
+import sys
+import time
+
+def log_blob(size):
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = ('2017-09-%02d 12:%02d:%02d INFO worker-%d request %d done '
+                'in %d ms\n' % (1 + i % 28, i % 60, i % 59, i % 16, i, i % 997))
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return ''.join(lines)
+
+MARKER = '-----BEGIN TRACEBACK ' + 'x' * 100 + ' worker crashed-----'
+
+def cases(size):
+    blob = log_blob(size)
+    return [
+        ('short', blob + 'needle', 'needle'),
+        ('long', blob + MARKER, MARKER),
+        ('long absent', blob, MARKER),
+        ('adversarial m=20', 'a' * size, 'a' * 19 + 'b'),
+        ('adversarial m=200', 'a' * size, 'a' * 199 + 'b'),
+    ]
+
+OPS = [
+    ('find', lambda h, n: h.find(n)),
+    ('rfind', lambda h, n: h.rfind(n)),
+    ('count', lambda h, n: h.count(n)),
+    ('replace', lambda h, n: h.replace(n, n[:1])),
+    ('split', lambda h, n: h.split(n)),
+    ('partition', lambda h, n: h.partition(n)),
+]
+
+def convert(kind, s):
+    if kind == 'str':
+        return s
+    if kind == 'unicode':
+        return s.decode('ascii')
+    return bytearray(s)
+
+def timeit(op, haystack, needle, repeat):
+    op(haystack, needle)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(haystack, needle)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    size = int(argv[1]) * 1024 if len(argv) > 1 else 1024 * 1024
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    kinds = ['str', 'unicode', 'bytearray']
+    print '%-18s %-10s' % ('', '') + ''.join(['%12s' % k for k in kinds])
+    for title, haystack, needle in cases(size):
+        for opname, op in OPS:
+            if opname == 'partition' and not hasattr(bytearray, 'partition'):
+                continue
+            times = [timeit(op, convert(kind, haystack),
+                            convert(kind, needle), repeat)
+                     for kind in kinds]
+            print '%-18s %-10s' % (title, opname) + ''.join(
+                ['%9.3f ms' % t for t in times])
+
+if __name__ == '__main__':
+    main(sys.argv)
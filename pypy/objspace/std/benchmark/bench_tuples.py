@@ -0,0 +1,101 @@
+""" Memory and speed of fixed-width homogeneous tuples.
+
+Builds many tuples of WIDTH ints, floats or strs, uses them as dict keys,
+and reports the memory they keep alive and the time of a few operations.
+On a pypy translated with --objspace-std-withspecialisedtuple (the default
+with the JIT) these tuples keep their items unboxed in an array; the
+'boxed' column adds one item of another type at the end of every tuple,
+which always gives the regular W_TupleObject.
+
+Usage:  pypy bench_tuples.py [tuples] [width] [repeat]
+"""
+
+import gc
+import sys
+import time
+
+class Other(object):
+    pass
+OTHER = Other()
+
+def make_rows(kind, n, width, boxed):
+    if kind == 'int':
+        rows = [[i + j for j in range(width)] for i in range(n)]
+    elif kind == 'float':
+        rows = [[i * 0.5 + j for j in range(width)] for i in range(n)]
+    else:
+        rows = [['%d-%d' % (i % 100, j) for j in range(width)]
+                for i in range(n)]
+    if boxed:
+        for row in rows:
+            row.append(OTHER)
+    return rows
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return 0
+    return pages * 4
+
+def memory(rows):
+    gc.collect()
+    rss_before = rss_kb()
+    keep = [tuple(row) for row in rows]
+    gc.collect()
+    rss_after = rss_kb()
+    return keep, rss_after - rss_before
+
+def op_build(tuples, rows):
+    for row in rows:
+        tuple(row)
+
+def op_dict(tuples, rows):
+    d = {}
+    for t in tuples:
+        d[t] = None
+    for t in tuples:
+        t in d
+
+def op_compare(tuples, rows):
+    prev = tuples[0]
+    for t in tuples:
+        prev == t
+        prev = t
+
+def op_index(tuples, rows):
+    for t in tuples:
+        t[0]
+        t[-1]
+
+OPS = [op_build, op_dict, op_compare, op_index]
+
+def timeit(op, tuples, rows, repeat):
+    op(tuples, rows)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(tuples, rows)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 200000
+    width = int(argv[2]) if len(argv) > 2 else 12
+    repeat = int(argv[3]) if len(argv) > 3 else 10
+    for kind in ['int', 'float', 'str']:
+        rows = make_rows(kind, n, width, False)
+        boxed_rows = make_rows(kind, n, width, True)
+        print '%d tuples of %d %ss:' % (n, width, kind)
+        unboxed, kb_unboxed = memory(rows)
+        boxed, kb_boxed = memory(boxed_rows)
+        print '%-16s %12s %12s' % ('', 'unboxed', 'boxed')
+        print '%-16s %9d kB %9d kB' % ('memory kept', kb_unboxed, kb_boxed)
+        for op in OPS:
+            print '%-16s %9.2f ms %9.2f ms' % (
+                op.__name__[3:], timeit(op, unboxed, rows, repeat),
+                timeit(op, boxed, boxed_rows, repeat))
+        print
+        del unboxed, boxed
+
+if __name__ == '__main__':
+    main(sys.argv)
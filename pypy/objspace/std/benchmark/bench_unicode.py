@@ -0,0 +1,110 @@
+""" Memory and speed of unicode strings made by decoding utf-8.
+
+Every test is run on two sets of the same strings: one made with
+decode('utf-8'), which gives utf-8 backed strings on a pypy translated
+with --objspace-std-withutf8unicode, and one made with decode('utf_8'),
+which goes through the codecs module and always gives the regular
+representation of 4 bytes per character.  On any other build, the two
+columns should show the same numbers.
+
+Usage:  pypy bench_unicode.py [lines] [repeat]
+"""
+
+import gc
+import sys
+import time
+
+WORDS = ['request', 'finished', 'user', 'session', 'order', 'GET', 'POST',
+         '/api/v1/items', 'status=200', 'ms', 'cache', 'miss', 'hit']
+NON_ASCII = ['caf\xc3\xa9', 'na\xc3\xafve', '\xe2\x82\xac42',
+             'M\xc3\xbcnchen']
+
+def make_lines(n, non_ascii_ratio):
+    lines = []
+    for i in range(n):
+        words = [WORDS[(i * 7 + j * 3) % len(WORDS)] for j in range(12)]
+        if non_ascii_ratio and i % non_ascii_ratio == 0:
+            words[i % 12] = NON_ASCII[i % len(NON_ASCII)]
+        lines.append('%08d %s' % (i, ' '.join(words)))
+    return lines
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return 0
+    return pages * 4
+
+def memory(lines, encoding):
+    gc.collect()
+    rss_before = rss_kb()
+    keep = [line.decode(encoding) for line in lines]
+    gc.collect()
+    rss_after = rss_kb()
+    return keep, rss_after - rss_before
+
+def op_slice(strings):
+    for s in strings:
+        s[9:20]
+        s[-5:]
+
+def op_index(strings):
+    for s in strings:
+        s[10]
+        s[len(s) // 2]
+
+def op_find(strings, sub=u'status'):
+    for s in strings:
+        s.find(sub)
+        sub in s
+
+def op_split(strings, sep=u' '):
+    for s in strings:
+        s.split(sep)
+        s.split()
+
+def op_encode(strings):
+    for s in strings:
+        s.encode('utf-8')
+
+def op_compare(strings):
+    prev = strings[0]
+    for s in strings:
+        prev == s
+        prev < s
+        prev = s
+
+def op_hash(strings):
+    d = {}
+    for s in strings:
+        d[s] = None
+
+OPS = [op_slice, op_index, op_find, op_split, op_encode, op_compare,
+       op_hash]
+
+def timeit(op, strings, repeat):
+    op(strings)     # warm up
+    t0 = time.time()
+    for i in range(repeat):
+        op(strings)
+    return (time.time() - t0) / repeat * 1000.0
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 100000
+    repeat = int(argv[2]) if len(argv) > 2 else 10
+    for title, ratio in [('ascii lines', 0), ('1 line in 8 non-ascii', 8)]:
+        lines = make_lines(n, ratio)
+        print '%s, %d bytes of utf-8:' % (title, sum(map(len, lines)))
+        utf8, kb_utf8 = memory(lines, 'utf-8')
+        regular, kb_regular = memory(lines, 'utf_8')
+        print '%-16s %12s %12s' % ('', "'utf-8'", "'utf_8'")
+        print '%-16s %9d kB %9d kB' % ('memory kept', kb_utf8, kb_regular)
+        for op in OPS:
+            print '%-16s %9.2f ms %9.2f ms' % (
+                op.__name__[3:], timeit(op, utf8, repeat),
+                timeit(op, regular, repeat))
+        print
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -661,8 +661,9 @@ class W_BytesObject(W_AbstractBytesObject):
         if space.isinstance_w(w_prefix, space.w_unicode):
             self_as_unicode = unicode_from_encoded_object(space, self, None,
                                                           None)
-            return self_as_unicode._startswith(space, self_as_unicode._value,
-                                               w_prefix, start, end)
+            uvalue = self_as_unicode._val(space)
+            return self_as_unicode._startswith(space, uvalue, w_prefix, start,
+                                               end)
         return self._StringMethods__startswith(space, value, w_prefix, start,
                                                end)
 
@@ -671,8 +672,9 @@ class W_BytesObject(W_AbstractBytesObject):
         if space.isinstance_w(w_suffix, space.w_unicode):
             self_as_unicode = unicode_from_encoded_object(space, self, None,
                                                           None)
-            return self_as_unicode._endswith(space, self_as_unicode._value,
-                                             w_suffix, start, end)
+            uvalue = self_as_unicode._val(space)
+            return self_as_unicode._endswith(space, uvalue, w_suffix, start,
+                                             end)
         return self._StringMethods__endswith(space, value, w_suffix, start,
                                              end)
 
@@ -684,7 +686,7 @@ class W_BytesObject(W_AbstractBytesObject):
             self_as_unicode = unicode_from_encoded_object(space, self, None,
                                                           None)
             return space.newbool(
-                self_as_unicode._value.find(w_sub._value) >= 0)
+                self_as_unicode._val(space).find(w_sub._val(space)) >= 0)
         return self._StringMethods_descr_contains(space, w_sub)
 
     _StringMethods_descr_replace = descr_replace
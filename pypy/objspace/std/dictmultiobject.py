@@ -119,14 +119,24 @@ class W_DictMultiObject(W_Root):
         if w_fill is None:
             w_fill = space.w_None
         if space.is_w(w_type, space.w_dict):
-            w_dict = W_DictMultiObject.allocate_and_init_instance(space,
-                                                                  w_type)
-
-            byteslist = space.listview_bytes(w_keys)
-            if byteslist is not None:
+            byteslist = None
+            if not space.config.objspace.std.withsharedkeysdict:
+                # with shared keys, the str keys of an empty dict don't
+                # give a BytesDictStrategy dict
+                byteslist = space.listview_bytes(w_keys)
+            if byteslist is not None and len(byteslist) > 0:
+                # fill the storage of a BytesDictStrategy dict directly,
+                # without wrapping the keys or going through the strategy
+                # switches of an empty dict
+                w_dict = W_DictMultiObject.allocate_and_init_instance(space,
+                                                                strdict=True)
+                strategy = space.fromcache(BytesDictStrategy)
+                d = strategy.unerase(w_dict.dstorage)
                 for key in byteslist:
-                    w_dict.setitem_str(key, w_fill)
+                    d[key] = w_fill
             else:
+                w_dict = W_DictMultiObject.allocate_and_init_instance(space,
+                                                                      w_type)
                 for w_key in space.listview(w_keys):
                     w_dict.setitem(w_key, w_fill)
         else:
@@ -648,6 +658,10 @@ class EmptyDictStrategy(DictStrategy):
         elif type(w_key) is self.space.UnicodeObjectCls:
             self.switch_to_unicode_strategy(w_dict)
             return
+        elif (self.space.config.objspace.std.withutf8unicode and
+              type(w_key) is self.space.UTF8UnicodeObjectCls):
+            self.switch_to_unicode_strategy(w_dict)
+            return
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
@@ -657,6 +671,11 @@ class EmptyDictStrategy(DictStrategy):
             self.switch_to_object_strategy(w_dict)
 
     def switch_to_bytes_strategy(self, w_dict):
+        if self.space.config.objspace.std.withsharedkeysdict:
+            from pypy.objspace.std.sharedkeysdict import (
+                switch_to_shared_keys_strategy)
+            switch_to_shared_keys_strategy(self.space, w_dict)
+            return
         strategy = self.space.fromcache(BytesDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
@@ -669,7 +688,11 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.dstorage = storage
 
     def switch_to_int_strategy(self, w_dict):
-        strategy = self.space.fromcache(IntDictStrategy)
+        if self.space.config.objspace.std.withintmap:
+            from pypy.objspace.std.intdict import IntIntDictStrategy
+            strategy = self.space.fromcache(IntIntDictStrategy)
+        else:
+            strategy = self.space.fromcache(IntDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
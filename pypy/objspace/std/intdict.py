@@ -0,0 +1,231 @@
+## ----------------------------------------------------------------------------
+## dict strategies (see dictmultiobject.py)
+
+from rpython.rlib import rerased
+
+from pypy.objspace.std.dictmultiobject import (
+    DictStrategy, IntDictStrategy, ObjectDictStrategy, create_iterator_classes)
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intmap import IntFloatMap, IntIntMap, is_storable_key
+from pypy.objspace.std.intobject import W_IntObject
+
+
+def _wrapint(space, key):
+    return space.newint(key)
+
+def _wrapfloat(space, value):
+    return space.newfloat(value)
+
+
+class AbstractIntMapDictStrategy(object):
+    """
+    Strategies for dicts mapping ints to ints or to floats, used with
+    objspace.std.withintmap.  The keys and values are stored unboxed in an
+    IntIntMap or IntFloatMap (see intmap.py).  A value of another type turns
+    the dict into a regular IntDictStrategy dict, and a key that is not an
+    int into an ObjectDictStrategy dict.
+
+    An empty dict with an int key starts as an IntIntDictStrategy dict, and
+    its first value decides between the two strategies.
+    """
+    _mixin_ = True
+
+    def wrap_value(self, value):
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_value(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def unwrap_value(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_key(self, w_key):
+        return (type(w_key) is W_IntObject and
+                is_storable_key(self.space.int_w(w_key)))
+
+    def _never_equal_to(self, w_lookup_type):
+        return self.space.fromcache(IntDictStrategy)._never_equal_to(
+            w_lookup_type)
+
+    def length(self, w_dict):
+        return self.unerase(w_dict.dstorage).length()
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_key(w_key):
+            intmap = self.unerase(w_dict.dstorage)
+            entry = intmap.lookup(space.int_w(w_key))
+            if entry < 0:
+                return None
+            return self.wrap_value(intmap.values[entry])
+        elif type(w_key) is W_IntObject:
+            return None     # the one int that is never stored
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def getitem_str(self, w_dict, key):
+        return None
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_key(w_key):
+            if self.is_correct_value(w_value):
+                self.unerase(w_dict.dstorage).setitem(
+                    self.space.int_w(w_key), self.unwrap_value(w_value))
+                return
+            if self.length(w_dict) == 0:
+                strategy = self.other_strategy()
+                if strategy.is_correct_value(w_value):
+                    w_dict.set_strategy(strategy)
+                    w_dict.dstorage = strategy.get_empty_storage()
+                    w_dict.setitem(w_key, w_value)
+                    return
+            self.switch_to_int_strategy(w_dict)
+        elif type(w_key) is W_IntObject:
+            self.switch_to_int_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value):
+        self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(self.space.newtext(key), w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        w_value = self.getitem(w_dict, w_key)
+        if w_value is not None:
+            return w_value
+        w_dict.setitem(w_key, w_default)
+        return w_default
+
+    def delitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_key(w_key):
+            if not self.unerase(w_dict.dstorage).delitem(space.int_w(w_key)):
+                raise KeyError
+        elif type(w_key) is W_IntObject:
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def popitem(self, w_dict):
+        space = self.space
+        intmap = self.unerase(w_dict.dstorage)
+        entry = intmap.last_entry()
+        if entry < 0:
+            raise KeyError
+        key = intmap.keys[entry]
+        w_value = self.wrap_value(intmap.values[entry])
+        intmap.delitem(key)
+        return (space.newint(key), w_value)
+
+    def listview_int(self, w_dict):
+        return self.unerase(w_dict.dstorage).live_keys()
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_int(self.listview_int(w_dict))
+
+    def values(self, w_dict):
+        return [self.wrap_value(value)
+                for value in self.unerase(w_dict.dstorage).live_values()]
+
+    def items(self, w_dict):
+        space = self.space
+        intmap = self.unerase(w_dict.dstorage)
+        keys = intmap.live_keys()
+        values = intmap.live_values()
+        return [space.newtuple([space.newint(keys[i]),
+                                self.wrap_value(values[i])])
+                for i in range(len(keys))]
+
+    def switch_to_int_strategy(self, w_dict):
+        space = self.space
+        intmap = self.unerase(w_dict.dstorage)
+        strategy = space.fromcache(IntDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value, keyhash in intmap.iteritems_with_hash():
+            d_new[key] = self.wrap_value(value)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def switch_to_object_strategy(self, w_dict):
+        space = self.space
+        intmap = self.unerase(w_dict.dstorage)
+        strategy = space.fromcache(ObjectDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value, keyhash in intmap.iteritems_with_hash():
+            d_new[space.newint(key)] = self.wrap_value(value)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    # --------------- iterator interface -----------------
+
+    def getiterkeys(self, w_dict):
+        return self.unerase(w_dict.dstorage).iterkeys()
+
+    def getitervalues(self, w_dict):
+        return self.unerase(w_dict.dstorage).itervalues()
+
+    def getiteritems_with_hash(self, w_dict):
+        return self.unerase(w_dict.dstorage).iteritems_with_hash()
+
+    def getiterreversed(self, w_dict):
+        return self.unerase(w_dict.dstorage).iterreversed()
+
+    wrapkey = _wrapint
+
+    def setitem_untyped(self, dstorage, key, value, keyhash):
+        self.unerase(dstorage).setitem(key, value)
+
+
+class IntIntDictStrategy(AbstractIntMapDictStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("intint")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase(IntIntMap())
+
+    def wrap_value(self, value):
+        return self.space.newint(value)
+
+    wrapvalue = _wrapint
+
+    def is_correct_value(self, w_value):
+        return type(w_value) is W_IntObject
+
+    def unwrap_value(self, w_value):
+        return self.space.int_w(w_value)
+
+    def other_strategy(self):
+        return self.space.fromcache(IntFloatDictStrategy)
+
+create_iterator_classes(IntIntDictStrategy)
+
+
+class IntFloatDictStrategy(AbstractIntMapDictStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("intfloat")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase(IntFloatMap())
+
+    def wrap_value(self, value):
+        return self.space.newfloat(value)
+
+    wrapvalue = _wrapfloat
+
+    def is_correct_value(self, w_value):
+        return type(w_value) is W_FloatObject
+
+    def unwrap_value(self, w_value):
+        return self.space.float_w(w_value)
+
+    def other_strategy(self):
+        return self.space.fromcache(IntIntDictStrategy)
+
+create_iterator_classes(IntFloatDictStrategy)
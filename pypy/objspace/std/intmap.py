@@ -0,0 +1,380 @@
+"""Hash tables of unboxed ints, stored in flat arrays with open addressing.
+
+IntSet is a set of ints kept directly in its array of slots, with linear
+probing; removing an item shifts the following items back, so there are no
+tombstones.  IntIntMap and IntFloatMap map ints to ints or floats.  Like the
+RPython dicts they keep the insertion order: the keys and values are stored
+in two dense arrays, and a separate array of 32-bit slots indexes them.
+
+None of them can store the key MISSING_KEY, which marks the free slots of an
+IntSet and the deleted entries of a map.  The strategies using these tables
+check for it with is_storable_key().
+"""
+
+import sys
+
+from rpython.rlib.rarithmetic import LONG_BIT, intmask, r_uint, r_uint32, widen
+
+MISSING_KEY = -sys.maxint - 1
+MIN_SIZE = 8
+
+# the slots of the index of a map: FREE, DELETED, or 2 + an entry number
+FREE = 0
+DELETED = 1
+MAX_ENTRIES = 0x7fffffff
+
+if LONG_BIT == 64:
+    MULTIPLIER = r_uint(0x9E3779B97F4A7C15)
+else:
+    MULTIPLIER = r_uint(0x9E3779B9)
+
+
+def is_storable_key(key):
+    return key != MISSING_KEY
+
+def _shift_for_size(size):
+    # 'size' is a power of two; the first slot of a key is made of the
+    # highest bits of key * MULTIPLIER (Fibonacci hashing), so that keys
+    # in arithmetic progressions are spread over the table
+    shift = LONG_BIT
+    while size > 1:
+        size >>= 1
+        shift -= 1
+    return shift
+
+def _first_slot(key, shift):
+    return intmask((r_uint(key) * MULTIPLIER) >> shift)
+
+def _size_for(num_items):
+    # the smallest table in which num_items fill at most a third of the
+    # slots: it can then grow to twice num_items before the next resize
+    size = MIN_SIZE
+    while size < num_items * 3:
+        size <<= 1
+    return size
+
+
+class IntSet(object):
+    def __init__(self, size=MIN_SIZE):
+        self.slots = [MISSING_KEY] * size
+        self.shift = _shift_for_size(size)
+        self.num_items = 0
+        self.pop_position = 0
+
+    @staticmethod
+    def from_list(keys):
+        result = IntSet(_size_for(len(keys)))
+        for key in keys:
+            result.add(key)
+        return result
+
+    def length(self):
+        return self.num_items
+
+    def copy(self):
+        result = IntSet(1)
+        result.slots = self.slots[:]
+        result.shift = self.shift
+        result.num_items = self.num_items
+        return result
+
+    def contains(self, key):
+        slots = self.slots
+        mask = len(slots) - 1
+        i = _first_slot(key, self.shift)
+        while True:
+            k = slots[i]
+            if k == key:
+                return True
+            if k == MISSING_KEY:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, key):
+        """Add 'key', return False if it was already there."""
+        if (self.num_items + 1) * 3 > len(self.slots) * 2:
+            self._resize(_size_for(self.num_items + 1))
+        slots = self.slots
+        mask = len(slots) - 1
+        i = _first_slot(key, self.shift)
+        while True:
+            k = slots[i]
+            if k == key:
+                return False
+            if k == MISSING_KEY:
+                slots[i] = key
+                self.num_items += 1
+                return True
+            i = (i + 1) & mask
+
+    def remove(self, key):
+        """Remove 'key', return False if it was not there."""
+        slots = self.slots
+        mask = len(slots) - 1
+        shift = self.shift
+        i = _first_slot(key, shift)
+        while True:
+            k = slots[i]
+            if k == key:
+                break
+            if k == MISSING_KEY:
+                return False
+            i = (i + 1) & mask
+        slots[i] = MISSING_KEY
+        self.num_items -= 1
+        # move back the following keys of the same run that can no longer
+        # be found because of the hole at 'i'
+        j = i
+        while True:
+            j = (j + 1) & mask
+            k = slots[j]
+            if k == MISSING_KEY:
+                return True
+            home = _first_slot(k, shift)
+            if i <= j:
+                stays = i < home and home <= j
+            else:
+                stays = home > i or home <= j
+            if not stays:
+                slots[i] = k
+                slots[j] = MISSING_KEY
+                i = j
+
+    def pop(self):
+        """Remove and return any key.  The set must not be empty."""
+        assert self.num_items > 0
+        slots = self.slots
+        mask = len(slots) - 1
+        i = self.pop_position & mask
+        while slots[i] == MISSING_KEY:
+            i = (i + 1) & mask
+        key = slots[i]
+        self.pop_position = i
+        self.remove(key)
+        return key
+
+    def _resize(self, size):
+        old_slots = self.slots
+        self.slots = [MISSING_KEY] * size
+        self.shift = _shift_for_size(size)
+        self.num_items = 0
+        for key in old_slots:
+            if key != MISSING_KEY:
+                self.add(key)
+
+    def keys(self):
+        return [key for key in self.slots if key != MISSING_KEY]
+
+    def iterkeys(self):
+        return IntSetIterator(self)
+
+
+class IntSetIterator(object):
+    def __init__(self, intset):
+        self.intset = intset
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        slots = self.intset.slots
+        i = self.position
+        while i < len(slots):
+            key = slots[i]
+            i += 1
+            if key != MISSING_KEY:
+                self.position = i
+                return key
+        self.position = i
+        raise StopIteration
+
+
+def _make_int_map(name, default_value):
+    class IntMap(object):
+        def __init__(self, size=MIN_SIZE):
+            self.index = [r_uint32(FREE)] * size
+            self.shift = _shift_for_size(size)
+            self.num_filled = 0     # the slots of 'index' that are not FREE
+            self.num_items = 0
+            self.keys = []
+            self.values = []
+
+        def length(self):
+            return self.num_items
+
+        def copy(self):
+            result = IntMap(1)
+            result.index = self.index[:]
+            result.shift = self.shift
+            result.num_filled = self.num_filled
+            result.num_items = self.num_items
+            result.keys = self.keys[:]
+            result.values = self.values[:]
+            return result
+
+        def _find_slot(self, key):
+            index = self.index
+            mask = len(index) - 1
+            i = _first_slot(key, self.shift)
+            while True:
+                entry = widen(index[i])
+                if entry == FREE:
+                    return -1
+                if entry != DELETED and self.keys[entry - 2] == key:
+                    return i
+                i = (i + 1) & mask
+
+        def lookup(self, key):
+            """Return the position of 'key' in self.keys and self.values,
+            or -1."""
+            i = self._find_slot(key)
+            if i < 0:
+                return -1
+            return widen(self.index[i]) - 2
+
+        def setitem(self, key, value):
+            entry = self.lookup(key)
+            if entry >= 0:
+                self.values[entry] = value
+                return
+            if (self.num_filled + 1) * 3 > len(self.index) * 2:
+                self._rebuild(_size_for(self.num_items + 1))
+            entry = len(self.keys)
+            assert entry < MAX_ENTRIES
+            self.keys.append(key)
+            self.values.append(value)
+            self._insert_entry(key, entry)
+            self.num_items += 1
+
+        def _insert_entry(self, key, entry):
+            index = self.index
+            mask = len(index) - 1
+            i = _first_slot(key, self.shift)
+            while True:
+                slot = widen(index[i])
+                if slot == FREE or slot == DELETED:
+                    if slot == FREE:
+                        self.num_filled += 1
+                    index[i] = r_uint32(entry + 2)
+                    return
+                i = (i + 1) & mask
+
+        def delitem(self, key):
+            """Remove 'key', return False if it was not there."""
+            i = self._find_slot(key)
+            if i < 0:
+                return False
+            entry = widen(self.index[i]) - 2
+            self.index[i] = r_uint32(DELETED)
+            self.keys[entry] = MISSING_KEY
+            self.values[entry] = default_value
+            self.num_items -= 1
+            # drop the deleted entries at the end, so that popping the
+            # last item repeatedly takes constant time
+            keys = self.keys
+            while keys and keys[-1] == MISSING_KEY:
+                keys.pop()
+                self.values.pop()
+            return True
+
+        def last_entry(self):
+            """The position of the last item, or -1 if the map is empty."""
+            return len(self.keys) - 1
+
+        def _rebuild(self, size):
+            old_keys = self.keys
+            old_values = self.values
+            self.index = [r_uint32(FREE)] * size
+            self.shift = _shift_for_size(size)
+            self.num_filled = 0
+            self.keys = []
+            self.values = []
+            for i in range(len(old_keys)):
+                key = old_keys[i]
+                if key != MISSING_KEY:
+                    self._insert_entry(key, len(self.keys))
+                    self.keys.append(key)
+                    self.values.append(old_values[i])
+
+        def live_keys(self):
+            if self.num_items == len(self.keys):
+                return self.keys[:]
+            return [key for key in self.keys if key != MISSING_KEY]
+
+        def live_values(self):
+            if self.num_items == len(self.keys):
+                return self.values[:]
+            return [self.values[i] for i in range(len(self.keys))
+                    if self.keys[i] != MISSING_KEY]
+
+        def iterkeys(self):
+            return KeyIterator(self)
+
+        def itervalues(self):
+            return ValueIterator(self)
+
+        def iteritems_with_hash(self):
+            return ItemIterator(self)
+
+        def iterreversed(self):
+            return ReversedKeyIterator(self)
+
+    class BaseIterator(object):
+        def __init__(self, intmap):
+            self.intmap = intmap
+            self.position = 0
+
+        def __iter__(self):
+            return self
+
+        def _next_entry(self):
+            keys = self.intmap.keys
+            i = self.position
+            while i < len(keys):
+                if keys[i] != MISSING_KEY:
+                    self.position = i + 1
+                    return i
+                i += 1
+            self.position = i
+            raise StopIteration
+
+    class KeyIterator(BaseIterator):
+        def next(self):
+            return self.intmap.keys[self._next_entry()]
+
+    class ValueIterator(BaseIterator):
+        def next(self):
+            return self.intmap.values[self._next_entry()]
+
+    class ItemIterator(BaseIterator):
+        def next(self):
+            i = self._next_entry()
+            key = self.intmap.keys[i]
+            return (key, self.intmap.values[i], key)
+
+    class ReversedKeyIterator(object):
+        def __init__(self, intmap):
+            self.intmap = intmap
+            self.position = len(intmap.keys)
+
+        def __iter__(self):
+            return self
+
+        def next(self):
+            keys = self.intmap.keys
+            i = min(self.position, len(keys))
+            while i > 0:
+                i -= 1
+                key = keys[i]
+                if key != MISSING_KEY:
+                    self.position = i
+                    return key
+            self.position = 0
+            raise StopIteration
+
+    IntMap.__name__ = name
+    return IntMap
+
+IntIntMap = _make_int_map('IntIntMap', 0)
+IntFloatMap = _make_int_map('IntFloatMap', 0.0)
@@ -0,0 +1,165 @@
+"""dict implementation specialized for objects created by the _pypyjson
+decoder.
+
+The keys live in a shared JSONMap (see pypy/module/_pypyjson/interp_decoder),
+somewhat like mapdict; the dict itself only stores a list of values.
+"""
+
+from rpython.rlib import rerased, objectmodel
+
+from pypy.objspace.std.dictmultiobject import (
+    DictStrategy, ObjectDictStrategy, UnicodeDictStrategy, W_DictObject,
+    _never_equal_to_string, create_iterator_classes)
+
+
+def from_values_and_jsonmap(space, values_w, jsonmap):
+    """Make a dict whose keys are those of 'jsonmap', in order, and whose
+    values are 'values_w'.  The list is used as storage directly."""
+    assert len(values_w) == jsonmap.length
+    strategy = jsonmap.strategy_instance
+    if strategy is None:
+        strategy = JsonDictStrategy(space, jsonmap)
+        jsonmap.strategy_instance = strategy
+    storage = strategy.erase(values_w)
+    return W_DictObject(space, strategy, storage)
+
+
+class JsonDictStrategy(DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("jsondict")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    _immutable_fields_ = ['jsonmap']
+
+    def __init__(self, space, jsonmap):
+        DictStrategy.__init__(self, space)
+        self.jsonmap = jsonmap
+
+    def get_empty_storage(self):
+        raise NotImplementedError("should not be reachable")
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_unicode)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def length(self, w_dict):
+        return len(self.unerase(w_dict.dstorage))
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            index = self.jsonmap.get_index(space.unicode_w(w_key))
+            if index == -1:
+                return None
+            return self.unerase(w_dict.dstorage)[index]
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_unicode_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def getitem_str(self, w_dict, key):
+        return self.getitem(w_dict, self.space.newtext(key))
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            index = self.jsonmap.get_index(self.space.unicode_w(w_key))
+            if index != -1:
+                self.unerase(w_dict.dstorage)[index] = w_value
+                return
+        # a new key: the dict no longer has the shape of its map
+        self.switch_to_unicode_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value):
+        self.setitem(w_dict, self.space.newtext(key), w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        w_result = self.getitem(w_dict, w_key)
+        if w_result is not None:
+            return w_result
+        self.switch_to_unicode_strategy(w_dict)
+        return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        self.switch_to_unicode_strategy(w_dict)
+        return w_dict.delitem(w_key)
+
+    def popitem(self, w_dict):
+        self.switch_to_unicode_strategy(w_dict)
+        return w_dict.popitem()
+
+    def switch_to_unicode_strategy(self, w_dict):
+        values_w = self.unerase(w_dict.dstorage)
+        keys = self.jsonmap.get_keys_in_order()
+        strategy = self.space.fromcache(UnicodeDictStrategy)
+        storage = strategy.get_empty_storage()
+        d_new = strategy.unerase(storage)
+        for i in range(len(keys)):
+            d_new[keys[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def switch_to_object_strategy(self, w_dict):
+        values_w = self.unerase(w_dict.dstorage)
+        keys_w = self.jsonmap.get_w_keys_in_order()
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for i in range(len(keys_w)):
+            d_new[keys_w[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def listview_unicode(self, w_dict):
+        return self.jsonmap.get_keys_in_order()[:]
+
+    def w_keys(self, w_dict):
+        return self.space.newlist(self.jsonmap.get_w_keys_in_order()[:])
+
+    def values(self, w_dict):
+        return self.unerase(w_dict.dstorage)[:]
+
+    def items(self, w_dict):
+        space = self.space
+        keys_w = self.jsonmap.get_w_keys_in_order()
+        values_w = self.unerase(w_dict.dstorage)
+        return [space.newtuple([keys_w[i], values_w[i]])
+                for i in range(len(keys_w))]
+
+    # --------------- iterator interface -----------------
+    # the keys are the interned W_UnicodeObjects stored in the map, so
+    # iterating does not allocate new key objects
+
+    def getiterkeys(self, w_dict):
+        return iter(self.jsonmap.get_w_keys_in_order())
+
+    def getitervalues(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage))
+
+    def getiteritems_with_hash(self, w_dict):
+        return ZipItemsWithHash(self.jsonmap, self.unerase(w_dict.dstorage))
+
+
+class ZipItemsWithHash(object):
+    def __init__(self, jsonmap, values_w):
+        assert jsonmap.length == len(values_w)
+        self.keys = jsonmap.get_keys_in_order()
+        self.keys_w = jsonmap.get_w_keys_in_order()
+        self.values_w = values_w
+        self.i = 0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        i = self.i
+        if i >= len(self.keys_w):
+            raise StopIteration
+        self.i = i + 1
+        return (self.keys_w[i], self.values_w[i],
+                objectmodel.compute_hash(self.keys[i]))
+
+create_iterator_classes(JsonDictStrategy)
@@ -32,7 +32,7 @@ from pypy.objspace.std.iterobject import (
 from pypy.objspace.std.sliceobject import (
     W_SliceObject, normalize_simple_slice, unwrap_start_stop)
 from pypy.objspace.std.tupleobject import W_AbstractTupleObject
-from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.objspace.std.unicodeobject import is_plain_unicode
 from pypy.objspace.std.util import get_positive_index, negate
 
 __all__ = ['W_ListObject', 'make_range_list', 'make_empty_list_with_size']
@@ -95,10 +95,10 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
         else:
             return space.fromcache(BytesListStrategy)
 
-    elif type(w_firstobj) is W_UnicodeObject:
+    elif is_plain_unicode(space, w_firstobj):
         # check for all-unicodes
         for i in range(1, len(list_w)):
-            if type(list_w[i]) is not W_UnicodeObject:
+            if not is_plain_unicode(space, list_w[i]):
                 break
         else:
             return space.fromcache(UnicodeListStrategy)
@@ -301,6 +301,10 @@ class W_ListObject(W_Root):
         """Find w_item in list[start:end]. If not found, raise ValueError"""
         return self.strategy.find(self, w_item, start, end)
 
+    def count(self, w_item):
+        """Returns the number of items equal to w_item."""
+        return self.strategy.count(self, w_item)
+
     def append(self, w_item):
         """L.append(object) -- append object to end"""
         self.strategy.append(self, w_item)
@@ -443,6 +447,11 @@ class W_ListObject(W_Root):
     def descr_eq(self, space, w_other):
         if not isinstance(w_other, W_ListObject):
             return space.w_NotImplemented
+        if (self.strategy is w_other.strategy and
+                self.strategy is space.fromcache(BytesListStrategy)):
+            # comparing strings cannot call back into app-level code
+            return space.newbool(self.getitems_bytes() ==
+                                 w_other.getitems_bytes())
         return self._descr_eq(space, w_other)
 
     @jit.look_inside_iff(list_unroll_condition)
@@ -631,14 +640,7 @@ class W_ListObject(W_Root):
     def descr_count(self, space, w_value):
         '''L.count(value) -> integer -- return number of
         occurrences of value'''
-        # needs to be safe against eq_w() mutating the w_list behind our back
-        count = 0
-        i = 0
-        while i < self.length():
-            if space.eq_w(self.getitem(i), w_value):
-                count += 1
-            i += 1
-        return space.newint(count)
+        return space.newint(self.count(w_value))
 
     @unwrap_spec(index=int)
     def descr_insert(self, space, index, w_value):
@@ -794,6 +796,17 @@ class ListStrategy(object):
             i += 1
         raise ValueError
 
+    def count(self, w_list, w_item):
+        space = self.space
+        # needs to be safe against eq_w() mutating the w_list behind our back
+        count = 0
+        i = 0
+        while i < w_list.length():
+            if space.eq_w(w_list.getitem(i), w_item):
+                count += 1
+            i += 1
+        return count
+
     def length(self, w_list):
         raise NotImplementedError
 
@@ -953,7 +966,7 @@ class EmptyListStrategy(ListStrategy):
             strategy = self.space.fromcache(IntegerListStrategy)
         elif type(w_item) is W_BytesObject:
             strategy = self.space.fromcache(BytesListStrategy)
-        elif type(w_item) is W_UnicodeObject:
+        elif is_plain_unicode(self.space, w_item):
             strategy = self.space.fromcache(UnicodeListStrategy)
         elif type(w_item) is W_FloatObject:
             strategy = self.space.fromcache(FloatListStrategy)
@@ -1986,6 +1999,16 @@ class BytesListStrategy(ListStrategy):
         if reverse:
             l.reverse()
 
+    def count(self, w_list, w_obj):
+        if type(w_obj) is W_BytesObject:
+            obj = self.unwrap(w_obj)
+            count = 0
+            for val in self.unerase(w_list.lstorage):
+                if val == obj:
+                    count += 1
+            return count
+        return ListStrategy.count(self, w_list, w_obj)
+
     def getitems_bytes(self, w_list):
         return self.unerase(w_list.lstorage)
 
@@ -2007,7 +2030,7 @@ class UnicodeListStrategy(ListStrategy):
     unerase = staticmethod(unerase)
 
     def is_correct_type(self, w_obj):
-        return type(w_obj) is W_UnicodeObject
+        return is_plain_unicode(self.space, w_obj)
 
     def list_is_correct_type(self, w_list):
         return w_list.strategy is self.space.fromcache(UnicodeListStrategy)
@@ -31,7 +31,8 @@ from pypy.objspace.std.setobject import W_SetObject, W_FrozensetObject
 from pypy.objspace.std.sliceobject import W_SliceObject
 from pypy.objspace.std.tupleobject import W_AbstractTupleObject, W_TupleObject
 from pypy.objspace.std.typeobject import W_TypeObject, TypeCache
-from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.objspace.std.unicodeobject import (
+    W_UnicodeObject, W_UTF8UnicodeObject)
 
 
 class StdObjSpace(ObjSpace):
@@ -50,6 +51,7 @@ class StdObjSpace(ObjSpace):
         self.FrameClass = frame.build_frame(self)
         self.StringObjectCls = W_BytesObject
         self.UnicodeObjectCls = W_UnicodeObject
+        self.UTF8UnicodeObjectCls = W_UTF8UnicodeObject
 
         # singletons
         self.w_None = W_NoneObject.w_None
@@ -4,8 +4,9 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.signature import Signature
 from pypy.interpreter.typedef import TypeDef
 from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.intmap import IntSet, is_storable_key
 from pypy.objspace.std.intobject import W_IntObject
-from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.objspace.std.unicodeobject import is_plain_unicode
 from pypy.objspace.std.util import IDTAG_SPECIAL, IDTAG_SHIFT
 
 from rpython.rlib.objectmodel import r_dict
@@ -792,10 +793,13 @@ class EmptySetStrategy(SetStrategy):
 
     def add(self, w_set, w_key):
         if type(w_key) is W_IntObject:
-            strategy = self.space.fromcache(IntegerSetStrategy)
+            if self.space.config.objspace.std.withintmap:
+                strategy = self.space.fromcache(IntMapSetStrategy)
+            else:
+                strategy = self.space.fromcache(IntegerSetStrategy)
         elif type(w_key) is W_BytesObject:
             strategy = self.space.fromcache(BytesSetStrategy)
-        elif type(w_key) is W_UnicodeObject:
+        elif is_plain_unicode(self.space, w_key):
             strategy = self.space.fromcache(UnicodeSetStrategy)
         elif self.space.type(w_key).compares_by_identity():
             strategy = self.space.fromcache(IdentitySetStrategy)
@@ -1242,6 +1246,8 @@ class BytesSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        elif strategy is self.space.fromcache(IntMapSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
@@ -1276,11 +1282,13 @@ class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
         return self.unerase(w_set.sstorage).keys()
 
     def is_correct_type(self, w_key):
-        return type(w_key) is W_UnicodeObject
+        return is_plain_unicode(self.space, w_key)
 
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        elif strategy is self.space.fromcache(IntMapSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
@@ -1338,6 +1346,280 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
         return IntegerIteratorImplementation(self.space, self, w_set)
 
 
+class IntMapSetStrategy(SetStrategy):
+    """Sets of ints used with objspace.std.withintmap instead of
+    IntegerSetStrategy.  The ints are stored unboxed in an IntSet, a flat
+    open-addressing table (see intmap.py).  The set turns into an
+    IntegerSetStrategy set if it gets the one int that IntSet cannot store,
+    and into an ObjectSetStrategy set if it gets an object of another type.
+    """
+    erase, unerase = rerased.new_erasing_pair("intmapset")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(intmap).intersect')
+
+    def get_empty_storage(self):
+        return self.erase(IntSet())
+
+    def get_storage_from_unwrapped_list(self, items):
+        return self.erase(IntSet.from_list(items))
+
+    def listview_int(self, w_set):
+        return self.unerase(w_set.sstorage).keys()
+
+    def is_correct_type(self, w_key):
+        return (type(w_key) is W_IntObject and
+                is_storable_key(self.space.int_w(w_key)))
+
+    def may_contain_equal_elements(self, strategy):
+        return self.space.fromcache(IntegerSetStrategy).\
+            may_contain_equal_elements(strategy)
+
+    def wrap(self, item):
+        return self.space.newint(item)
+
+    def switch_to_integer_strategy(self, w_set):
+        strategy = self.space.fromcache(IntegerSetStrategy)
+        w_set.sstorage = strategy.get_storage_from_unwrapped_list(
+            self.unerase(w_set.sstorage).keys())
+        w_set.strategy = strategy
+
+    def _switch_for(self, w_set, w_key):
+        # w_key is not of the correct type
+        if type(w_key) is W_IntObject:
+            self.switch_to_integer_strategy(w_set)
+        else:
+            w_set.switch_to_object_strategy(self.space)
+
+    def length(self, w_set):
+        return self.unerase(w_set.sstorage).length()
+
+    def clear(self, w_set):
+        w_set.switch_to_empty_strategy()
+
+    def copy_real(self, w_set):
+        storage = self.erase(self.unerase(w_set.sstorage).copy())
+        return w_set.from_storage_and_strategy(storage, w_set.strategy)
+
+    def get_storage_copy(self, w_set):
+        return self.erase(self.unerase(w_set.sstorage).copy())
+
+    def add(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            self.unerase(w_set.sstorage).add(self.space.int_w(w_key))
+        else:
+            self._switch_for(w_set, w_key)
+            w_set.add(w_key)
+
+    def remove(self, w_set, w_item):
+        if self.is_correct_type(w_item):
+            return self.unerase(w_set.sstorage).remove(
+                self.space.int_w(w_item))
+        self._switch_for(w_set, w_item)
+        return w_set.remove(w_item)
+
+    def has_key(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            return self.unerase(w_set.sstorage).contains(
+                self.space.int_w(w_key))
+        self._switch_for(w_set, w_key)
+        return w_set.has_key(w_key)
+
+    def getdict_w(self, w_set):
+        result = newset(self.space)
+        for key in self.unerase(w_set.sstorage).keys():
+            result[self.wrap(key)] = None
+        return result
+
+    def getkeys(self, w_set):
+        return [self.wrap(key) for key in self.unerase(w_set.sstorage).keys()]
+
+    def _contained_in(self, intset, w_other):
+        # return True if all the ints of 'intset' are in w_other
+        if w_other.strategy is self:
+            other = self.unerase(w_other.sstorage)
+            for key in intset.iterkeys():
+                if not other.contains(key):
+                    return False
+        else:
+            for key in intset.iterkeys():
+                if not w_other.has_key(self.wrap(key)):
+                    return False
+        return True
+
+    def equals(self, w_set, w_other):
+        if w_set.length() != w_other.length():
+            return False
+        if w_set.length() == 0:
+            return True
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return False
+        return self._contained_in(self.unerase(w_set.sstorage), w_other)
+
+    def issubset(self, w_set, w_other):
+        if w_set.length() == 0:
+            return True
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return False
+        return self._contained_in(self.unerase(w_set.sstorage), w_other)
+
+    def isdisjoint(self, w_set, w_other):
+        if w_other.length() == 0:
+            return True
+        if w_set.length() > w_other.length():
+            return w_other.isdisjoint(w_set)
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return True
+        intset = self.unerase(w_set.sstorage)
+        if w_other.strategy is self:
+            other = self.unerase(w_other.sstorage)
+            for key in intset.iterkeys():
+                if other.contains(key):
+                    return False
+        else:
+            for key in intset.iterkeys():
+                if w_other.has_key(self.wrap(key)):
+                    return False
+        return True
+
+    def _difference_storage(self, w_set, w_other):
+        intset = self.unerase(w_set.sstorage)
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return self.erase(intset.copy())
+        result = IntSet()
+        if w_other.strategy is self:
+            other = self.unerase(w_other.sstorage)
+            for key in intset.iterkeys():
+                if not other.contains(key):
+                    result.add(key)
+        else:
+            for key in intset.iterkeys():
+                if not w_other.has_key(self.wrap(key)):
+                    result.add(key)
+        return self.erase(result)
+
+    def difference(self, w_set, w_other):
+        storage = self._difference_storage(w_set, w_other)
+        return w_set.from_storage_and_strategy(storage, self)
+
+    def difference_update(self, w_set, w_other):
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return
+        if (w_other.strategy is self and
+                self.length(w_set) >= w_other.length()):
+            # big_set -= small_set: remove the items in place
+            intset = self.unerase(w_set.sstorage)
+            for key in self.unerase(w_other.sstorage).keys():
+                intset.remove(key)
+        else:
+            w_set.sstorage = self._difference_storage(w_set, w_other)
+
+    def _symmetric_difference_base(self, w_set, w_other):
+        if w_other.strategy is self:
+            intset = self.unerase(w_set.sstorage)
+            other = self.unerase(w_other.sstorage)
+            result = IntSet()
+            for key in intset.iterkeys():
+                if not other.contains(key):
+                    result.add(key)
+            for key in other.iterkeys():
+                if not intset.contains(key):
+                    result.add(key)
+            return self.erase(result), self
+        newsetdata = newset(self.space)
+        for key in self.unerase(w_set.sstorage).iterkeys():
+            w_item = self.wrap(key)
+            if not w_other.has_key(w_item):
+                newsetdata[w_item] = None
+        w_iterator = w_other.iter()
+        while True:
+            w_item = w_iterator.next_entry()
+            if w_item is None:
+                break
+            if not w_set.has_key(w_item):
+                newsetdata[w_item] = None
+        strategy = self.space.fromcache(ObjectSetStrategy)
+        return strategy.erase(newsetdata), strategy
+
+    def symmetric_difference(self, w_set, w_other):
+        if w_other.length() == 0:
+            return w_set.copy_real()
+        storage, strategy = self._symmetric_difference_base(w_set, w_other)
+        return w_set.from_storage_and_strategy(storage, strategy)
+
+    def symmetric_difference_update(self, w_set, w_other):
+        if w_other.length() == 0:
+            return
+        storage, strategy = self._symmetric_difference_base(w_set, w_other)
+        w_set.strategy = strategy
+        w_set.sstorage = storage
+
+    def _intersect_wrapped(self, w_set, w_other):
+        result = newset(self.space)
+        for key in self.unerase(w_set.sstorage).iterkeys():
+            self.intersect_jmp.jit_merge_point()
+            w_key = self.wrap(key)
+            if w_other.has_key(w_key):
+                result[w_key] = None
+        strategy = self.space.fromcache(ObjectSetStrategy)
+        return strategy.erase(result)
+
+    def _intersect_base(self, w_set, w_other):
+        if w_other.strategy is self:
+            if w_set.length() > w_other.length():
+                w_set, w_other = w_other, w_set
+            other = self.unerase(w_other.sstorage)
+            result = IntSet()
+            for key in self.unerase(w_set.sstorage).iterkeys():
+                if other.contains(key):
+                    result.add(key)
+            return self.erase(result), self
+        elif not self.may_contain_equal_elements(w_other.strategy):
+            strategy = self.space.fromcache(EmptySetStrategy)
+            return strategy.get_empty_storage(), strategy
+        strategy = self.space.fromcache(ObjectSetStrategy)
+        if w_set.length() > w_other.length():
+            storage = w_other.strategy._intersect_wrapped(w_other, w_set)
+        else:
+            storage = self._intersect_wrapped(w_set, w_other)
+        return storage, strategy
+
+    def intersect(self, w_set, w_other):
+        storage, strategy = self._intersect_base(w_set, w_other)
+        return w_set.from_storage_and_strategy(storage, strategy)
+
+    def intersect_update(self, w_set, w_other):
+        storage, strategy = self._intersect_base(w_set, w_other)
+        w_set.strategy = strategy
+        w_set.sstorage = storage
+
+    def update(self, w_set, w_other):
+        if w_other.length() == 0:
+            return
+        intlist = w_other.listview_int()
+        if intlist is not None:
+            intset = self.unerase(w_set.sstorage)
+            for key in intlist:
+                if not is_storable_key(key):
+                    break
+                intset.add(key)
+            else:
+                return
+        w_set.switch_to_object_strategy(self.space)
+        w_set.update(w_other)
+
+    def popitem(self, w_set):
+        intset = self.unerase(w_set.sstorage)
+        if intset.length() == 0:
+            raise oefmt(self.space.w_KeyError, "pop from an empty set")
+        return self.wrap(intset.pop())
+
+    def iter(self, w_set):
+        return IntMapIteratorImplementation(self.space, self, w_set)
+
+
 class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("object")
     erase = staticmethod(erase)
@@ -1409,6 +1691,8 @@ class IdentitySetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        if strategy is self.space.fromcache(IntMapSetStrategy):
+            return False
         if strategy is self.space.fromcache(BytesSetStrategy):
             return False
         if strategy is self.space.fromcache(UnicodeSetStrategy):
@@ -1514,6 +1798,17 @@ class IntegerIteratorImplementation(IteratorImplementation):
         else:
             return None
 
+class IntMapIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        self.iterator = strategy.unerase(w_set.sstorage).iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.newint(key)
+        else:
+            return None
+
 class IdentityIteratorImplementation(IteratorImplementation):
     def __init__(self, space, strategy, w_set):
         IteratorImplementation.__init__(self, space, strategy, w_set)
@@ -1573,6 +1868,15 @@ setiter_typedef = W_SetIterObject.typedef
 def newset(space):
     return r_dict(space.eq_w, space.hash_w, force_non_null=True)
 
+def _integer_set_strategy(space, intlist):
+    if space.config.objspace.std.withintmap:
+        for key in intlist:
+            if not is_storable_key(key):
+                break
+        else:
+            return space.fromcache(IntMapSetStrategy)
+    return space.fromcache(IntegerSetStrategy)
+
 def set_strategy_and_setdata(space, w_set, w_iterable):
     if w_iterable is None :
         w_set.strategy = strategy = space.fromcache(EmptySetStrategy)
@@ -1600,7 +1904,7 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
 
     intlist = space.listview_int(w_iterable)
     if intlist is not None:
-        strategy = space.fromcache(IntegerSetStrategy)
+        strategy = _integer_set_strategy(space, intlist)
         w_set.strategy = strategy
         w_set.sstorage = strategy.get_storage_from_unwrapped_list(intlist)
         return
@@ -1622,6 +1926,12 @@ def _pick_correct_strategy_unroll(space, w_set, w_iterable):
         if type(w_item) is not W_IntObject:
             break
     else:
+        if space.config.objspace.std.withintmap:
+            intlist = [space.int_w(w_item) for w_item in iterable_w]
+            w_set.strategy = _integer_set_strategy(space, intlist)
+            w_set.sstorage = w_set.strategy.get_storage_from_unwrapped_list(
+                intlist)
+            return
         w_set.strategy = space.fromcache(IntegerSetStrategy)
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
@@ -1637,7 +1947,7 @@ def _pick_correct_strategy_unroll(space, w_set, w_iterable):
 
     # check for unicode
     for w_item in iterable_w:
-        if type(w_item) is not W_UnicodeObject:
+        if not is_plain_unicode(space, w_item):
             break
     else:
         w_set.strategy = space.fromcache(UnicodeSetStrategy)
@@ -0,0 +1,273 @@
+"""dict implementation where dicts with the same keys share them.
+
+Many dicts get the same str keys, added in the same order: the rows of
+csv.DictReader or of database drivers, records built with dict(zip(...)).
+Like the maps of mapdict, the key tables form a tree: a dict with the keys
+('a', 'b') that gets the key 'c' moves to the child table ('a', 'b', 'c').
+The tables are shared and never change, and a dict only stores the list of
+its values.  Anything else (deleting a key other than the last one, a key
+that is not a str, too many keys) turns the dict into a regular
+BytesDictStrategy or ObjectDictStrategy dict.
+
+Only used with objspace.std.withsharedkeysdict.
+"""
+
+from rpython.rlib import jit, rerased
+
+from pypy.objspace.std.dictmultiobject import (
+    BytesDictStrategy, DictStrategy, ObjectDictStrategy,
+    _never_equal_to_string, create_iterator_classes)
+from pypy.objspace.std.kwargsdict import ZipItemsWithHash
+
+# a dict with more keys than that is probably not a record
+MAX_KEYS = 64
+# if more than that many different keys are added to dicts of the same
+# table, the keys are probably data, not field names.  There is no such
+# limit on the first key of the dicts.
+MAX_TRANSITIONS = 32
+# the total number of tables of a space
+MAX_TABLES = 20000
+# tables with more keys than that get a dict to find the index of a key
+MIN_KEYS_FOR_INDEX = 8
+
+
+def _wrapkey(space, key):
+    return space.newbytes(key)
+
+
+class KeyTable(object):
+    """The keys of a dict, in order: the keys of 'parent', plus 'key'."""
+    _immutable_fields_ = ['parent', 'key', 'length']
+
+    def __init__(self, parent, key):
+        self.parent = parent
+        self.key = key
+        if parent is None:
+            self.length = 0
+        else:
+            self.length = parent.length + 1
+        self.keys = None
+        self.index = None
+        self.transitions = None
+        self.strategy = None
+
+    @jit.elidable
+    def get_index(self, key):
+        "Return the position of 'key' in the table, or -1"
+        if self.length >= MIN_KEYS_FOR_INDEX:
+            index = self.index
+            if index is None:
+                index = {}
+                keys = self.get_keys()
+                for i in range(len(keys)):
+                    index[keys[i]] = i
+                self.index = index
+            return index.get(key, -1)
+        table = self
+        while table.length > 0:
+            if table.key == key:
+                return table.length - 1
+            table = table.parent
+        return -1
+
+    @jit.elidable
+    def get_keys(self):
+        keys = self.keys
+        if keys is None:
+            keys = [''] * self.length
+            table = self
+            while table.length > 0:
+                keys[table.length - 1] = table.key
+                table = table.parent
+            self.keys = keys
+        return keys
+
+    @jit.elidable
+    def get_next_table(self, cache, key):
+        """Return the table with the keys of this one plus 'key', or None if
+        dicts with these keys should not share them."""
+        transitions = self.transitions
+        if transitions is None:
+            transitions = self.transitions = {}
+        else:
+            next = transitions.get(key, None)
+            if next is not None:
+                return next
+        if (self.length >= MAX_KEYS or
+                (self.length > 0 and len(transitions) >= MAX_TRANSITIONS) or
+                cache.num_tables >= MAX_TABLES):
+            return None
+        next = KeyTable(self, key)
+        transitions[key] = next
+        cache.num_tables += 1
+        return next
+
+    def get_strategy(self, space):
+        strategy = self.strategy
+        if strategy is None:
+            strategy = self.strategy = SharedKeysDictStrategy(space, self)
+        return strategy
+
+
+class KeyTableCache(object):
+    def __init__(self, space):
+        self.root = KeyTable(None, '')
+        self.num_tables = 0
+
+
+def switch_to_shared_keys_strategy(space, w_dict):
+    """Make the empty dict 'w_dict' a dict with shared str keys."""
+    strategy = space.fromcache(KeyTableCache).root.get_strategy(space)
+    w_dict.set_strategy(strategy)
+    w_dict.dstorage = strategy.get_empty_storage()
+
+
+class SharedKeysDictStrategy(DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("sharedkeysdict")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    _immutable_fields_ = ['table']
+
+    def __init__(self, space, table):
+        DictStrategy.__init__(self, space)
+        self.table = table
+
+    def wrap(self, key):
+        return _wrapkey(self.space, key)
+
+    def get_empty_storage(self):
+        assert self.table.length == 0
+        return self.erase([])
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is self.space.StringObjectCls
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def length(self, w_dict):
+        return len(self.unerase(w_dict.dstorage))
+
+    def getitem_str(self, w_dict, key):
+        index = self.table.get_index(key)
+        if index == -1:
+            return None
+        return self.unerase(w_dict.dstorage)[index]
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            return self.getitem_str(w_dict, space.bytes_w(w_key))
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def setitem_str(self, w_dict, key, w_value):
+        values_w = self.unerase(w_dict.dstorage)
+        index = self.table.get_index(key)
+        if index != -1:
+            values_w[index] = w_value
+            return
+        cache = self.space.fromcache(KeyTableCache)
+        next = self.table.get_next_table(cache, key)
+        if next is None:
+            self.switch_to_bytes_strategy(w_dict)
+            w_dict.setitem_str(key, w_value)
+            return
+        values_w.append(w_value)
+        w_dict.set_strategy(next.get_strategy(self.space))
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            self.setitem_str(w_dict, self.space.bytes_w(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            key = self.space.bytes_w(w_key)
+            w_result = self.getitem_str(w_dict, key)
+            if w_result is not None:
+                return w_result
+            self.setitem_str(w_dict, key, w_default)
+            return w_default
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        table = self.table
+        if (self.is_correct_type(w_key) and table.length > 0 and
+                table.key == self.space.bytes_w(w_key)):
+            # deleting the last key: go back to the parent table
+            self.unerase(w_dict.dstorage).pop()
+            w_dict.set_strategy(table.parent.get_strategy(self.space))
+            return
+        self.switch_to_bytes_strategy(w_dict)
+        w_dict.delitem(w_key)
+
+    def popitem(self, w_dict):
+        table = self.table
+        if table.length == 0:
+            raise KeyError
+        w_value = self.unerase(w_dict.dstorage).pop()
+        w_dict.set_strategy(table.parent.get_strategy(self.space))
+        return self.wrap(table.key), w_value
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_bytes(self.table.get_keys()[:])
+
+    def values(self, w_dict):
+        return self.unerase(w_dict.dstorage)[:]
+
+    def items(self, w_dict):
+        space = self.space
+        keys = self.table.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        return [space.newtuple([self.wrap(keys[i]), values_w[i]])
+                for i in range(len(keys))]
+
+    def listview_bytes(self, w_dict):
+        return self.table.get_keys()[:]
+
+    def view_as_kwargs(self, w_dict):
+        return (self.table.get_keys()[:], self.unerase(w_dict.dstorage)[:])
+
+    def switch_to_bytes_strategy(self, w_dict):
+        strategy = self.space.fromcache(BytesDictStrategy)
+        keys = self.table.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        storage = strategy.get_empty_storage()
+        d_new = strategy.unerase(storage)
+        for i in range(len(keys)):
+            d_new[keys[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def switch_to_object_strategy(self, w_dict):
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        keys = self.table.get_keys()
+        values_w = self.unerase(w_dict.dstorage)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for i in range(len(keys)):
+            d_new[self.wrap(keys[i])] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def getiterkeys(self, w_dict):
+        return iter(self.table.get_keys())
+
+    def getitervalues(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage))
+
+    def getiteritems_with_hash(self, w_dict):
+        return ZipItemsWithHash(self.table.get_keys(),
+                                self.unerase(w_dict.dstorage))
+
+    wrapkey = _wrapkey
+
+create_iterator_classes(SharedKeysDictStrategy)
@@ -1,6 +1,8 @@
 from pypy.interpreter.error import oefmt
-from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject, UNROLL_CUTOFF
 from pypy.objspace.std.util import negate
+from rpython.rlib import jit
+from rpython.rlib.debug import make_sure_not_resized
 from rpython.rlib.objectmodel import compute_hash, specialize
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.unroll import unrolling_iterable
@@ -143,9 +145,180 @@ Cls_ii = make_specialised_class((int, int))
 Cls_oo = make_specialised_class((object, object))
 Cls_ff = make_specialised_class((float, float))
 
+# ---------- array-backed homogeneous tuples ----------
+# Tuples of MIN_ARRAY_LENGTH or more items which are all exact ints, all
+# exact floats or all exact strs keep the unboxed items in a single array.
+# Hash and equality are computed directly on the array, and give the same
+# results as for the W_TupleObject with the same items.
+
+MIN_ARRAY_LENGTH = 3
+
+def _hash_int(space, value):
+    # mimic cpythons behavior of a hash value of -2 for -1
+    value -= (value == -1)
+    return value
+
+def _hash_float(space, value):
+    from pypy.objspace.std.floatobject import _hash_float
+    return _hash_float(space, value)
+
+def _hash_str(space, value):
+    x = compute_hash(value)
+    x -= (x == -1)
+    return x
+
+def _eq_float(value1, value2):
+    # like space.eq_w(): NaNs with the same bits are equal
+    return (value1 == value2 or
+            float2longlong(value1) == float2longlong(value2))
+
+def _eq_same(value1, value2):
+    return value1 == value2
+
+def make_array_tuple_class(name, typ, wrap, unwrap, hash_item, eq_item):
+
+    class cls(W_AbstractTupleObject):
+        _immutable_fields_ = ['items[*]']
+
+        def __init__(self, space, items):
+            make_sure_not_resized(items)
+            self.space = space
+            self.items = items
+
+        def length(self):
+            return len(self.items)
+
+        def tolist(self):
+            items = self.items
+            list_w = [None] * len(items)
+            for i in range(len(items)):
+                list_w[i] = wrap(self.space, items[i])
+            return list_w
+
+        def getitems_copy(self):
+            return [wrap(self.space, value) for value in self.items]
+
+        def is_correct_type(self, w_obj):
+            return type(w_obj) is typ
+
+        def descr_hash(self, space):
+            mult = 1000003
+            x = 0x345678
+            z = len(self.items)
+            for value in self.items:
+                y = hash_item(space, value)
+                x = (x ^ y) * mult
+                z -= 1
+                mult += 82520 + z + z
+            x += 97531
+            return space.newint(intmask(x))
+
+        def descr_eq(self, space, w_other):
+            if not isinstance(w_other, W_AbstractTupleObject):
+                return space.w_NotImplemented
+            items1 = self.items
+            if isinstance(w_other, cls):
+                items2 = w_other.items
+                if len(items1) != len(items2):
+                    return space.w_False
+                for i in range(len(items1)):
+                    if not eq_item(items1[i], items2[i]):
+                        return space.w_False
+                return space.w_True
+            if len(items1) != w_other.length():
+                return space.w_False
+            for i in range(len(items1)):
+                w_item1 = wrap(space, items1[i])
+                if not space.eq_w(w_item1, w_other.getitem(space, i)):
+                    return space.w_False
+            return space.w_True
+
+        descr_ne = negate(descr_eq)
+
+        def descr_contains(self, space, w_obj):
+            if not self.is_correct_type(w_obj):
+                return W_AbstractTupleObject.descr_contains(self, space, w_obj)
+            value = unwrap(space, w_obj)
+            for item in self.items:
+                if eq_item(item, value):
+                    return space.w_True
+            return space.w_False
+
+        def getitem(self, space, index):
+            try:
+                return wrap(space, self.items[index])
+            except IndexError:
+                raise oefmt(space.w_IndexError, "tuple index out of range")
+
+    cls.__name__ = 'W_ArrayTupleObject_' + name
+    return cls
+
+def _make_array_tuple_classes():
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    from pypy.objspace.std.intobject import W_IntObject
+    return (
+        make_array_tuple_class(
+            'i', W_IntObject, lambda space, x: space.newint(x),
+            lambda space, w_x: space.int_w(w_x), _hash_int, _eq_same),
+        make_array_tuple_class(
+            'f', W_FloatObject, lambda space, x: space.newfloat(x),
+            lambda space, w_x: space.float_w(w_x), _hash_float, _eq_float),
+        make_array_tuple_class(
+            's', W_BytesObject, lambda space, x: space.newbytes(x),
+            lambda space, w_x: space.bytes_w(w_x), _hash_str, _eq_same))
+
+Cls_int_array, Cls_float_array, Cls_str_array = _make_array_tuple_classes()
+_array_tuple_classes = [Cls_int_array, Cls_float_array, Cls_str_array]
+
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def _make_array_tuple(space, list_w):
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    from pypy.objspace.std.intobject import W_IntObject
+    tp = type(list_w[0])
+    if tp is not W_IntObject and tp is not W_FloatObject and (
+            tp is not W_BytesObject):
+        return None
+    for w_item in list_w:
+        if type(w_item) is not tp:
+            return None
+    if tp is W_IntObject:
+        return Cls_int_array(space, [space.int_w(w_item)
+                                     for w_item in list_w])
+    elif tp is W_FloatObject:
+        return Cls_float_array(space, [space.float_w(w_item)
+                                       for w_item in list_w])
+    else:
+        return Cls_str_array(space, [space.bytes_w(w_item)
+                                     for w_item in list_w])
+
+def array_tuple_from_list(space, w_list):
+    """Build the tuple of the items of 'w_list' directly from its unboxed
+    storage, if it uses the int, float or bytes list strategy.  Returns None
+    otherwise."""
+    if w_list.length() < MIN_ARRAY_LENGTH:
+        return None
+    intlist = w_list.getitems_int()
+    if intlist is not None:
+        return Cls_int_array(space, intlist[:])
+    floatlist = w_list.getitems_float()
+    if floatlist is not None:
+        return Cls_float_array(space, floatlist[:])
+    byteslist = w_list.getitems_bytes()
+    if byteslist is not None:
+        return Cls_str_array(space, byteslist[:])
+    return None
+
 def makespecialisedtuple(space, list_w):
     from pypy.objspace.std.intobject import W_IntObject
     from pypy.objspace.std.floatobject import W_FloatObject
+    if len(list_w) >= MIN_ARRAY_LENGTH:
+        w_tuple = _make_array_tuple(space, list_w)
+        if w_tuple is not None:
+            return w_tuple
+        raise NotSpecialised
     if len(list_w) == 2:
         w_arg1, w_arg2 = list_w
         if type(w_arg1) is W_IntObject:
@@ -133,6 +133,21 @@ class TestW_DictObject(object):
 
         assert space.eq_w(w_d.getitem_str("a"), space.w_None)
         assert space.eq_w(w_d.getitem_str("b"), space.w_None)
+        assert type(w_d.get_strategy()) is BytesDictStrategy
+
+    def test_fromkeys_fastpath_no_wrapping(self):
+        space = self.space
+        w_l = space.newlist([space.newbytes("a"), space.newbytes("b"),
+                             space.newbytes("a")])
+        w_l.getitem = None
+        w_d = space.call_method(space.w_dict, "fromkeys", w_l, space.w_True)
+        assert type(w_d.get_strategy()) is BytesDictStrategy
+        assert space.listview_bytes(w_d) == ["a", "b"]
+        assert w_d.getitem_str("a") is space.w_True
+        #
+        w_d = space.call_method(space.w_dict, "fromkeys", space.newlist([]))
+        assert w_d.length() == 0
+        assert type(w_d.get_strategy()) is not BytesDictStrategy
 
     def test_listview_bytes_dict(self):
         w = self.space.wrap
@@ -1262,6 +1277,8 @@ class Config:
     class objspace:
         class std:
             withcelldict = False
+            withintmap = False
+            withutf8unicode = False
             methodcachesizeexp = 11
             withmethodcachecounter = False
 
@@ -0,0 +1,197 @@
+import sys
+
+from pypy.objspace.std.intdict import IntFloatDictStrategy, IntIntDictStrategy
+
+
+class TestIntMapDict(object):
+    spaceconfig = {"objspace.std.withintmap": True}
+
+    def test_strategies(self):
+        space = self.space
+        w_d = space.newdict()
+        space.setitem(w_d, space.newint(1), space.newint(2))
+        assert w_d.get_strategy() is space.fromcache(IntIntDictStrategy)
+        assert space.listview_int(w_d) == [1]
+        w_d = space.newdict()
+        space.setitem(w_d, space.newint(1), space.newfloat(2.5))
+        assert w_d.get_strategy() is space.fromcache(IntFloatDictStrategy)
+        intmap = w_d.get_strategy().unerase(w_d.dstorage)
+        assert intmap.values == [2.5]
+
+    def test_missing_key(self):
+        space = self.space
+        w_d = space.newdict()
+        space.setitem(w_d, space.newint(1), space.newint(2))
+        w_key = space.newint(-sys.maxint - 1)
+        assert w_d.getitem(w_key) is None
+        space.setitem(w_d, w_key, space.newint(3))
+        assert w_d.get_strategy().__class__.__name__ == 'IntDictStrategy'
+        assert space.int_w(w_d.getitem(w_key)) == 3
+
+
+class AppTestIntMapDict(object):
+    spaceconfig = {"objspace.std.withintmap": True}
+
+    def test_check_strategy(self):
+        import __pypy__
+        d = {1: 2}
+        assert __pypy__.strategy(d) == "IntIntDictStrategy"
+        d = {1: 2.5}
+        assert __pypy__.strategy(d) == "IntFloatDictStrategy"
+        d = {1: 'a'}
+        assert __pypy__.strategy(d) == "IntDictStrategy"
+        d = dict.fromkeys(range(5), 0)
+        assert __pypy__.strategy(d) == "IntIntDictStrategy"
+
+    def test_operations(self):
+        d = {}
+        for i in range(100):
+            d[i * 3] = d.get(i * 3, 0) + i
+        assert len(d) == 100
+        assert d[6] == 2
+        assert d.get(7) is None
+        assert d.get('x', 5) == 5
+        assert 99 in d and 100 not in d
+        assert d.setdefault(9, 42) == 3
+        assert d.setdefault(10, 42) == 42
+        del d[10]
+        raises(KeyError, "del d[10]")
+        raises(KeyError, "d[1]")
+        assert d.keys() == [i * 3 for i in range(100)]
+        assert d.values() == range(100)
+        assert d.items()[:2] == [(0, 0), (3, 1)]
+        assert list(d.iteritems())[-1] == (297, 99)
+        assert d == dict(zip(range(0, 300, 3), range(100)))
+        assert d.copy() == d
+        assert d.popitem() == (297, 99)
+        assert d.pop(294) == 98
+        assert len(d) == 98
+        d.clear()
+        assert d == {}
+
+    def test_order(self):
+        import __pypy__
+        d = {}
+        for key in [5, -3, 17, 2**40, 0]:
+            d[key] = 1.5
+        del d[17]
+        d[17] = 2.5
+        assert list(d) == [5, -3, 2**40, 0, 17]
+        assert list(__pypy__.reversed_dict(d)) == [17, 0, 2**40, -3, 5]
+        __pypy__.move_to_end(d, 5)
+        assert list(d) == [-3, 2**40, 0, 17, 5]
+        from collections import OrderedDict
+        od = OrderedDict([(3, 1), (1, 2), (2, 3)])
+        assert od.keys() == [3, 1, 2]
+        assert od.popitem(last=False) == (3, 1)
+
+    def test_devolve(self):
+        import __pypy__
+        d = {1: 2}
+        d[2] = 2.5
+        assert __pypy__.strategy(d) == "IntDictStrategy"
+        assert d == {1: 2, 2: 2.5}
+        d = {1: 2.5}
+        d[2] = 2
+        assert __pypy__.strategy(d) == "IntDictStrategy"
+        assert type(d[2]) is int
+        d = {1: 2}
+        d['a'] = 3
+        assert __pypy__.strategy(d) == "ObjectDictStrategy"
+        assert d == {1: 2, 'a': 3}
+        d = {1: 2}
+        assert d[1.0] == 2
+        assert d == {1: 2}
+        d = {1: 2}
+        d[True] = 3
+        assert d == {1: 3}
+        import sys
+        d = {1: 2}
+        d[-sys.maxint - 1] = 3
+        assert d == {1: 2, -sys.maxint - 1: 3}
+
+    def test_change_during_iteration(self):
+        d = {1: 2, 3: 4}
+        it = d.iteritems()
+        it.next()
+        d[5] = 6
+        raises(RuntimeError, it.next)
+
+    def test_values_identity(self):
+        d = {1: 12345678, 2: float('nan')}
+        assert d[1] is d[1]
+        x = d[2]
+        assert x != x
+        assert d.values()[0] == 12345678
+
+
+class AppTestIntMapSet(object):
+    spaceconfig = {"objspace.std.withintmap": True}
+
+    def test_check_strategy(self):
+        import __pypy__, sys
+        assert __pypy__.strategy(set([1, 2, 3])) == "IntMapSetStrategy"
+        s = set()
+        s.add(5)
+        assert __pypy__.strategy(s) == "IntMapSetStrategy"
+        assert __pypy__.strategy(set([1, -sys.maxint - 1])) == (
+            "IntegerSetStrategy")
+        s.add('a')
+        assert __pypy__.strategy(s) == "ObjectSetStrategy"
+
+    def test_operations(self):
+        a = set(range(0, 100, 2))
+        b = set(range(0, 100, 3))
+        assert len(a) == 50
+        assert 4 in a and 5 not in a and 'x' not in a
+        assert a & b == set(range(0, 100, 6))
+        assert a | b == set([i for i in range(100) if i % 2 == 0 or i % 3 == 0])
+        assert a - b == set([i for i in range(0, 100, 2) if i % 3])
+        assert a ^ b == (a | b) - (a & b)
+        assert a <= a | b and not a <= b
+        assert a.isdisjoint(set([1, 3])) and not a.isdisjoint(b)
+        assert a == set(range(0, 100, 2))
+        assert a != b
+        assert a & set(['x']) == set()
+        assert a & set([2.0, 'x']) == set([2])
+        assert a - set([2.0]) == a - set([2])
+        c = a.copy()
+        c -= b
+        assert c == a - b
+        c = a.copy()
+        c &= b
+        assert c == a & b
+        c = a.copy()
+        c ^= b
+        assert c == a ^ b
+        c = a.copy()
+        c |= b
+        assert c == a | b
+        c -= c
+        assert c == set()
+        c = set([1, 2])
+        c.update([3, 4])
+        assert c == set([1, 2, 3, 4])
+        c.remove(3)
+        c.discard(5)
+        raises(KeyError, c.remove, 3)
+        assert sorted(c) == [1, 2, 4]
+        assert sorted([c.pop(), c.pop(), c.pop()]) == [1, 2, 4]
+        raises(KeyError, c.pop)
+        assert frozenset([1, 2]) == frozenset([2, 1])
+        assert hash(frozenset([1, 2])) == hash(frozenset([2, 1]))
+
+    def test_mixed_strategies(self):
+        import sys
+        a = set([1, 2, 3])
+        b = set([2, 3, -sys.maxint - 1])
+        assert a & b == set([2, 3])
+        assert b & a == set([2, 3])
+        assert a - b == set([1])
+        assert b - a == set([-sys.maxint - 1])
+        assert a ^ b == set([1, -sys.maxint - 1])
+        assert a | b == set([1, 2, 3, -sys.maxint - 1])
+        assert set([2, 3]) <= b
+        a.add(-sys.maxint - 1)
+        assert -sys.maxint - 1 in a
+        assert a == set([1, 2, 3, -sys.maxint - 1])
@@ -0,0 +1,114 @@
+import random
+
+from rpython.rtyper.test.test_llinterp import interpret
+
+from pypy.objspace.std.intmap import (
+    IntFloatMap, IntIntMap, IntSet, MISSING_KEY, is_storable_key)
+
+
+def test_intset_random():
+    r = random.Random(42)
+    intset = IntSet()
+    expected = set()
+    for i in range(5000):
+        key = r.choice([r.randrange(200), r.randrange(-2**63, 2**63 - 1),
+                        r.randrange(100) * 1024])
+        if not is_storable_key(key):
+            continue
+        if r.random() < 0.6:
+            assert intset.add(key) == (key not in expected)
+            expected.add(key)
+        else:
+            assert intset.remove(key) == (key in expected)
+            expected.discard(key)
+        assert intset.length() == len(expected)
+    for key in range(-10, 300):
+        assert intset.contains(key) == (key in expected)
+    assert sorted(intset.keys()) == sorted(expected)
+    assert sorted(intset.iterkeys()) == sorted(expected)
+    copy = intset.copy()
+    while intset.length():
+        expected.remove(intset.pop())
+    assert not expected
+    assert copy.length() > 0
+
+def test_intset_size():
+    intset = IntSet.from_list(range(1000))
+    assert intset.length() == 1000
+    assert len(intset.slots) == 4096
+    for i in range(1000, 2730):
+        intset.add(i)
+    assert len(intset.slots) == 4096
+    intset.add(-1)
+    assert len(intset.slots) == 16384
+
+def test_intmap_random():
+    r = random.Random(43)
+    for cls, value in [(IntIntMap, 5), (IntFloatMap, 2.5)]:
+        intmap = cls()
+        expected = {}
+        order = []
+        for i in range(5000):
+            key = r.randrange(300)
+            if r.random() < 0.6:
+                intmap.setitem(key, value * i)
+                if key not in expected:
+                    order.append(key)
+                expected[key] = value * i
+            else:
+                assert intmap.delitem(key) == (key in expected)
+                if key in expected:
+                    del expected[key]
+                    order.remove(key)
+            assert intmap.length() == len(expected)
+        for key in range(300):
+            entry = intmap.lookup(key)
+            if key in expected:
+                assert intmap.values[entry] == expected[key]
+            else:
+                assert entry == -1
+        # the insertion order is kept
+        assert intmap.live_keys() == order
+        assert list(intmap.iterkeys()) == order
+        assert intmap.live_values() == [expected[key] for key in order]
+        assert list(intmap.itervalues()) == intmap.live_values()
+        assert [(k, v) for (k, v, h) in intmap.iteritems_with_hash()] == [
+            (key, expected[key]) for key in order]
+        assert intmap.copy().live_keys() == order
+        assert list(intmap.iterreversed()) == order[::-1]
+
+def test_intmap_popitem_order():
+    intmap = IntIntMap()
+    for i in range(100):
+        intmap.setitem(i * 7, i)
+    intmap.delitem(99 * 7)
+    intmap.delitem(98 * 7)
+    assert intmap.last_entry() == 97
+    assert len(intmap.keys) == 98
+    intmap.setitem(5, 5)
+    assert intmap.keys[intmap.last_entry()] == 5
+
+def test_missing_key():
+    assert not is_storable_key(MISSING_KEY)
+    assert is_storable_key(-MISSING_KEY - 1)
+
+def test_rtyped():
+    def f(n):
+        intset = IntSet()
+        intmap = IntIntMap()
+        floatmap = IntFloatMap()
+        for i in range(n):
+            intset.add(i * 3)
+            intmap.setitem(i, i * 2)
+            floatmap.setitem(i, i * 0.5)
+        intset.remove(3)
+        intmap.delitem(1)
+        total = 0
+        for key in intset.iterkeys():
+            total += key
+        for key, value, keyhash in intmap.iteritems_with_hash():
+            total += value
+        entry = floatmap.lookup(4)
+        return (total + intset.length() * 1000 + intmap.length() * 100000 +
+                int(floatmap.values[entry]))
+    assert interpret(f, [20]) == f(20)
@@ -0,0 +1,101 @@
+
+class AppTest(object):
+    spaceconfig = {"objspace.usemodules._pypyjson": True}
+
+    def test_check_strategy(self):
+        import __pypy__
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1}')
+        assert __pypy__.strategy(d) == "JsonDictStrategy"
+        d = _pypyjson.loads('{}')
+        assert __pypy__.strategy(d) == "EmptyDictStrategy"
+
+    def test_simple(self):
+        import __pypy__
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        assert len(d) == 2
+        assert d[u"a"] == 1
+        assert d[u"b"] == u"x"
+        assert d.get(u"c") is None
+        assert d.get(42) is None
+        assert u"a" in d
+        assert u"c" not in d
+        assert d.keys() == [u"a", u"b"]
+        assert d.values() == [1, u"x"]
+        assert d.items() == [(u"a", 1), (u"b", u"x")]
+        assert list(d.iterkeys()) == [u"a", u"b"]
+        assert list(d.itervalues()) == [1, u"x"]
+        assert list(d.iteritems()) == [(u"a", 1), (u"b", u"x")]
+        assert d == {u"a": 1, u"b": u"x"}
+        assert __pypy__.strategy(d) == "JsonDictStrategy"
+        assert d["a"] == 1
+
+    def test_setitem_existing(self):
+        import __pypy__
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        d[u"a"] = 2
+        assert d == {u"a": 2, u"b": u"x"}
+        assert __pypy__.strategy(d) == "JsonDictStrategy"
+        assert d.setdefault(u"b", 5) == u"x"
+        assert __pypy__.strategy(d) == "JsonDictStrategy"
+        # other dicts of the same shape are not affected
+        d2 = _pypyjson.loads('{"a": 1, "b": "x"}')
+        assert d2 == {u"a": 1, u"b": u"x"}
+
+    def test_devolve(self):
+        import __pypy__
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        d[u"c"] = 3
+        assert __pypy__.strategy(d) == "UnicodeDictStrategy"
+        assert d == {u"a": 1, u"b": u"x", u"c": 3}
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        del d[u"a"]
+        assert d == {u"b": u"x"}
+        assert __pypy__.strategy(d) == "UnicodeDictStrategy"
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        assert d.pop(u"b") == u"x"
+        assert d == {u"a": 1}
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        assert d.setdefault(u"c", 5) == 5
+        assert d == {u"a": 1, u"b": u"x", u"c": 5}
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        d[42] = 3
+        assert __pypy__.strategy(d) == "ObjectDictStrategy"
+        assert d == {u"a": 1, u"b": u"x", 42: 3}
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        d.clear()
+        assert d == {}
+
+    def test_copy_and_update(self):
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        d2 = d.copy()
+        assert d2 == d
+        d2[u"a"] = 5
+        assert d[u"a"] == 1
+        d3 = {u"c": 3}
+        d3.update(d)
+        assert d3 == {u"a": 1, u"b": u"x", u"c": 3}
+        assert dict(d) == d
+
+    def test_change_during_iteration(self):
+        import _pypyjson
+
+        d = _pypyjson.loads('{"a": 1, "b": "x"}')
+        it = d.iteritems()
+        assert next(it) == (u"a", 1)
+        d[u"c"] = 3
+        raises(RuntimeError, next, it)
@@ -628,6 +628,23 @@ class TestW_ListStrategies(TestW_ListObject):
         w_l.getitems = None
         assert space.unicode_w(space.call_method(space.wrap(u"c"), "join", w_l)) == u"acb"
 
+    def test_bytes_count_and_eq_do_not_wrap(self):
+        space = self.space
+        w_l1 = space.newlist([space.newbytes('a'), space.newbytes('b'),
+                              space.newbytes('a')])
+        w_l2 = space.newlist([space.newbytes('a'), space.newbytes('b'),
+                              space.newbytes('a')])
+        assert isinstance(w_l1.strategy, BytesListStrategy)
+        w_l1.getitem = w_l2.getitem = None
+        w_count = space.call_method(w_l1, "count", space.newbytes('a'))
+        assert space.int_w(w_count) == 2
+        w_count = space.call_method(w_l1, "count", space.newbytes('c'))
+        assert space.int_w(w_count) == 0
+        assert space.is_true(space.eq(w_l1, w_l2))
+        w_l2.append(space.newbytes('c'))
+        assert not space.is_true(space.eq(w_l1, w_l2))
+        assert space.is_true(space.ne(w_l1, w_l2))
+
     def test_string_join_returns_same_instance(self):
         space = self.space
         w_text = space.wrap("text")
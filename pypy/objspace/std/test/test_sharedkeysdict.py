@@ -0,0 +1,135 @@
+from pypy.objspace.std.sharedkeysdict import (
+    SharedKeysDictStrategy, MAX_KEYS, MAX_TRANSITIONS)
+
+
+class TestSharedKeysDict(object):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True}
+
+    def newdict(self, keys):
+        space = self.space
+        w_d = space.newdict()
+        for i, key in enumerate(keys):
+            space.setitem(w_d, space.newbytes(key), space.newint(i))
+        return w_d
+
+    def test_tables_are_shared(self):
+        w_d1 = self.newdict(['a', 'b', 'c'])
+        w_d2 = self.newdict(['a', 'b', 'c'])
+        strategy = w_d1.get_strategy()
+        assert isinstance(strategy, SharedKeysDictStrategy)
+        assert strategy is w_d2.get_strategy()
+        assert strategy.table.get_keys() == ['a', 'b', 'c']
+        assert strategy.unerase(w_d1.dstorage) is not (
+            strategy.unerase(w_d2.dstorage))
+        w_d3 = self.newdict(['a', 'c'])
+        assert w_d3.get_strategy().table.parent is (
+            strategy.table.parent.parent)
+
+    def test_get_index(self):
+        keys = ['k%d' % i for i in range(20)]
+        table = self.newdict(keys).get_strategy().table
+        for i, key in enumerate(keys):
+            assert table.get_index(key) == i
+            assert table.parent.parent.get_index(key) == (
+                i if i < 18 else -1)
+        assert table.get_index('x') == -1
+
+    def test_limits(self):
+        space = self.space
+        w_d = self.newdict(['k%d' % i for i in range(MAX_KEYS + 1)])
+        assert w_d.get_strategy().__class__.__name__ == 'BytesDictStrategy'
+        assert space.int_w(space.len(w_d)) == MAX_KEYS + 1
+        for i in range(MAX_TRANSITIONS + 1):
+            w_d = self.newdict(['id', 'key%d' % i])
+        assert w_d.get_strategy().__class__.__name__ == 'BytesDictStrategy'
+        for i in range(MAX_TRANSITIONS + 1):
+            w_d = self.newdict(['first%d' % i])
+        assert isinstance(w_d.get_strategy(), SharedKeysDictStrategy)
+
+
+class AppTest(object):
+    spaceconfig = {"objspace.std.withsharedkeysdict": True}
+
+    def test_check_strategy(self):
+        import __pypy__
+        d = {}
+        assert __pypy__.strategy(d) == "EmptyDictStrategy"
+        d['a'] = 1
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        d = dict(zip(['x', 'y'], [1, 2]))
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        d = {u'a': 1}
+        assert __pypy__.strategy(d) == "UnicodeDictStrategy"
+
+    def test_simple(self):
+        import __pypy__
+        d = {}
+        d['a'] = 1
+        d['b'] = 'x'
+        assert len(d) == 2
+        assert d['a'] == 1
+        assert d.get('c') is None
+        assert d.get(42) is None
+        assert 'a' in d
+        assert 'c' not in d
+        assert d.keys() == ['a', 'b']
+        assert d.values() == [1, 'x']
+        assert d.items() == [('a', 1), ('b', 'x')]
+        assert list(d.iteritems()) == [('a', 1), ('b', 'x')]
+        assert d == {'b': 'x', 'a': 1}
+        d['a'] = 2
+        assert d.setdefault('a', 5) == 2
+        assert d.setdefault('c', 5) == 5
+        assert d.items() == [('a', 2), ('b', 'x'), ('c', 5)]
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        assert d.copy() == d
+        assert __pypy__.strategy(d.copy()) == "SharedKeysDictStrategy"
+
+    def test_del_and_pop(self):
+        import __pypy__
+        d = dict.fromkeys(['a', 'b', 'c'], 0)
+        assert d.popitem() == ('c', 0)
+        del d['b']
+        assert d == {'a': 0}
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        d['b'] = 1
+        d['c'] = 2
+        del d['a']
+        assert __pypy__.strategy(d) == "BytesDictStrategy"
+        assert sorted(d.items()) == [('b', 1), ('c', 2)]
+        raises(KeyError, "del d['a']")
+
+    def test_fromkeys(self):
+        import __pypy__
+        d = dict.fromkeys(['a', 'b', 'c'])
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        assert d.items() == [('a', None), ('b', None), ('c', None)]
+        d = dict.fromkeys(('x', 'y'), 5)
+        assert __pypy__.strategy(d) == "SharedKeysDictStrategy"
+        assert d.items() == [('x', 5), ('y', 5)]
+
+    def test_devolve(self):
+        import __pypy__
+        d = dict(zip(['a', 'b'], [1, 2]))
+        d[1] = 3
+        assert __pypy__.strategy(d) == "ObjectDictStrategy"
+        assert d == {'a': 1, 'b': 2, 1: 3}
+        d = dict(zip(['a', 'b'], [1, 2]))
+        assert d[u'a'] == 1
+        assert d == {'a': 1, 'b': 2}
+        d = dict(zip(['a', 'b'], [1, 2]))
+        d.clear()
+        assert __pypy__.strategy(d) == "EmptyDictStrategy"
+
+    def test_kwargs(self):
+        def f(**kwargs):
+            return kwargs
+        d = dict(zip(['a', 'b'], [1, 2]))
+        assert f(**d) == d
+
+    def test_change_during_iteration(self):
+        d = dict(zip(['a', 'b'], [1, 2]))
+        it = d.iteritems()
+        it.next()
+        d['c'] = 3
+        raises(RuntimeError, it.next)
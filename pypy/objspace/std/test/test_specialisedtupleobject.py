@@ -1,10 +1,11 @@
-from pypy.objspace.std.specialisedtupleobject import _specialisations
+from pypy.objspace.std.specialisedtupleobject import (
+    _array_tuple_classes, _specialisations)
 from pypy.objspace.std.test import test_tupleobject
 from pypy.objspace.std.tupleobject import W_TupleObject
 from pypy.tool.pytest.objspace import gettestobjspace
 
 
-for cls in _specialisations:
+for cls in _specialisations + _array_tuple_classes:
     globals()[cls.__name__] = cls
 
 
@@ -47,6 +48,40 @@ class TestW_SpecialisedTupleObject():
         hash_test([1, ()])
         hash_test([1, 2, 3], must_be_specialized=False)
 
+    def test_array_tuples(self):
+        space = self.space
+        for values, cls in [(range(-3, 17), W_ArrayTupleObject_i),
+                            ([0.5 * i for i in range(12)] + [-0.0],
+                             W_ArrayTupleObject_f),
+                            (['a', 'bc', '', 'd' * 30], W_ArrayTupleObject_s)]:
+            values_w = [space.wrap(value) for value in values]
+            w_tuple = space.newtuple(values_w)
+            assert type(w_tuple) is cls
+            assert w_tuple.items == values
+            w_normal = W_TupleObject(values_w[:])
+            assert space.eq_w(w_tuple, w_normal)
+            assert space.eq_w(w_normal, w_tuple)
+            assert space.hash_w(w_tuple) == space.hash_w(w_normal)
+            assert space.eq_w(w_tuple, space.newtuple(values_w[:]))
+            w_other = space.newtuple(values_w[:-1] + [space.wrap(42j)])
+            assert not space.eq_w(w_tuple, w_other)
+            assert space.is_true(space.contains(w_tuple, values_w[-1]))
+        w_tuple = space.newtuple([space.wrap(1), space.wrap(2.5),
+                                  space.wrap(3)])
+        assert type(w_tuple) is W_TupleObject
+
+    def test_tuple_from_list_storage(self):
+        space = self.space
+        for values, cls in [([1, 2, 3, 4], W_ArrayTupleObject_i),
+                            ([1.5, 2.5, 3.5], W_ArrayTupleObject_f),
+                            (['a', 'b', 'c'], W_ArrayTupleObject_s)]:
+            w_list = space.newlist([space.wrap(value) for value in values])
+            w_tuple = space.call_function(space.w_tuple, w_list)
+            assert type(w_tuple) is cls
+            assert w_tuple.items == values
+            space.call_method(w_list, 'pop')
+            assert len(w_tuple.items) == len(values)
+
 
 class AppTestW_SpecialisedTupleObject:
     spaceconfig = {"objspace.std.withspecialisedtuple": True}
@@ -57,6 +92,11 @@ class AppTestW_SpecialisedTupleObject:
         print obj, '==>', r, '   (expected: %r)' % expected
         return ("SpecialisedTupleObject" + expected) in r
 
+    def w_isarraytuple(self, obj, expected=''):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return ("W_ArrayTupleObject_" + expected) in r
+
     def test_createspecialisedtuple(self):
         have = ['ii', 'ff', 'oo']
         #
@@ -226,6 +266,45 @@ class AppTestW_SpecialisedTupleObject:
         t = (F(42), F(43))
         assert type(t[0]) is F
 
+    def test_array_tuples(self):
+        t = tuple(range(10))
+        assert self.isarraytuple(t, 'i')
+        assert t == tuple(range(10)) and t != tuple(range(9))
+        assert t == (0, 1, 2, 3, 4, 5, 6, 7, 8, 9L)
+        assert t < (0, 1, 2, 3, 4, 5, 6, 7, 8, 10)
+        assert hash(t) == hash((0, 1, 2, 3, 4, 5, 6, 7, 8, 9L))
+        assert hash((-1, -1, -1)) == hash((-1, -1, -1L))
+        assert t[-1] == 9 and t[2:5] == (2, 3, 4)
+        raises(IndexError, "t[10]")
+        assert 5 in t and 5.0 in t and 42 not in t and 'x' not in t
+        assert t.index(3) == 3 and t.count(3) == 1
+        assert list(t) == range(10)
+        d = {t: 1}
+        assert d[tuple(range(10))] == 1
+        assert d[tuple([float(i) for i in range(10)])] == 1
+        t = ('a', 'b', 'c')
+        assert self.isarraytuple(t, 's')
+        assert hash(t) == hash(('a', 'b', u'c'))
+        assert t == ('a', 'b', u'c')
+        t = (1.5, 2.5, float('nan'), -0.0)
+        assert self.isarraytuple(t, 'f')
+        assert t[2] in t
+        assert t == t[:]
+        assert (0.0, 0.0, 0.0) == (-0.0, -0.0, -0.0)
+
+    def test_tuple_from_list(self):
+        l = [1, 2, 3]
+        t = tuple(l)
+        assert self.isarraytuple(t, 'i')
+        l.append(4)
+        assert t == (1, 2, 3)
+        assert self.isarraytuple(tuple([1.5, 2.5, 3.5]), 'f')
+        assert self.isarraytuple(tuple(iter(['a', 'b', 'c'])), 's')
+        assert not self.isarraytuple(tuple([1, 2.5, 'c']))
+        class T(tuple):
+            pass
+        assert type(T(l)) is T and T(l) == (1, 2, 3, 4)
+
     def test_bug_tuples_of_nans(self):
         N = float('nan')
         T = (N, N)
@@ -0,0 +1,150 @@
+import sys
+import py
+
+from pypy.objspace.std.unicodeobject import (
+    W_UnicodeObject, W_UTF8UnicodeObject)
+
+if sys.maxunicode < 0x10ffff:
+    py.test.skip("the utf-8 representation needs a wide unicode build")
+
+
+class TestW_UnicodeObjectUtf8:
+    spaceconfig = {"objspace.std.withutf8unicode": True}
+
+    def decode(self, s):
+        space = self.space
+        return space.call_method(space.newbytes(s), 'decode',
+                                 space.newtext('utf-8'))
+
+    def test_decode_keeps_utf8(self):
+        w_u = self.decode('hello')
+        assert type(w_u) is W_UTF8UnicodeObject
+        assert w_u._utf8 == 'hello'
+        assert w_u._decoded is None
+        assert self.space.len_w(w_u) == 5
+        assert w_u._decoded is None
+        w_u = self.decode('caf\xc3\xa9')
+        assert w_u._utf8 == 'caf\xc3\xa9'
+        assert w_u._length == 4
+        assert self.space.unicode_w(w_u) == u'caf\xe9'
+        assert w_u._decoded == u'caf\xe9'
+        assert not hasattr(w_u, '_value')
+
+    def test_surrogates_not_kept(self):
+        w_u = self.decode('\xed\xa0\x80')
+        assert type(w_u) is W_UnicodeObject
+        w_u = self.decode('\xed\x9f\xbf')    # u'\ud7ff' is not a surrogate
+        assert w_u._utf8 == '\xed\x9f\xbf'
+
+    def test_ascii_fast_paths_do_not_decode(self):
+        space = self.space
+        w_u = self.decode('hello world, hello')
+        w_hello = self.decode('hello')
+        for w_res in [space.getitem(w_u, space.newint(1)),
+                      space.getslice(w_u, space.newint(6), space.newint(11)),
+                      space.add(w_u, w_hello),
+                      space.call_method(w_u, 'upper')]:
+            assert type(w_res) is W_UTF8UnicodeObject
+            assert w_res._decoded is None
+        assert space.int_w(space.call_method(w_u, 'find', w_hello,
+                                             space.newint(1))) == 13
+        assert space.int_w(space.call_method(w_u, 'count', w_hello)) == 2
+        assert space.is_true(space.eq(w_hello, self.decode('hello')))
+        assert space.is_true(space.lt(w_hello, w_u))
+        assert space.bytes_w(space.call_method(
+            w_u, 'encode', space.newtext('ascii'))) == 'hello world, hello'
+        assert space.hash_w(w_u) == space.hash_w(space.newbytes(
+            'hello world, hello'))
+        assert w_u._decoded is None
+        assert w_hello._decoded is None
+
+    def test_index(self):
+        space = self.space
+        chars = u''.join([unichr(0x20 + i * 37 % 0x2000) for i in range(300)])
+        w_u = self.decode(chars.encode('utf-8'))
+        assert not w_u._is_ascii()
+        for i in [0, 1, 63, 64, 65, 200, 299, -1, -300]:
+            w_c = space.getitem(w_u, space.newint(i))
+            assert w_c._decoded is None
+            assert space.unicode_w(w_c) == chars[i]
+        w_s = space.getslice(w_u, space.newint(60), space.newint(130))
+        assert w_s._decoded is None
+        assert space.unicode_w(w_s) == chars[60:130]
+        assert w_u._decoded is None
+        assert len(w_u._index) == 300 // 64 + 1
+
+    def test_strategies(self):
+        from pypy.objspace.std.dictmultiobject import UnicodeDictStrategy
+        from pypy.objspace.std.listobject import UnicodeListStrategy
+        from pypy.objspace.std.setobject import UnicodeSetStrategy
+        space = self.space
+        w_l = space.newlist([self.decode('a'), space.newunicode(u'b'),
+                             self.decode('\xc3\xa9')])
+        assert w_l.strategy is space.fromcache(UnicodeListStrategy)
+        w_s = space.newset([self.decode('a'), space.newunicode(u'b')])
+        assert w_s.strategy is space.fromcache(UnicodeSetStrategy)
+        w_d = space.newdict()
+        space.setitem(w_d, self.decode('a'), space.w_None)
+        assert w_d.get_strategy() is space.fromcache(UnicodeDictStrategy)
+
+
+class TestW_UnicodeObjectDefault:
+
+    def test_decode_is_plain(self):
+        space = self.space
+        w_u = space.call_method(space.newbytes('caf\xc3\xa9'), 'decode',
+                                space.newtext('utf-8'))
+        assert type(w_u) is W_UnicodeObject
+        assert w_u._value == u'caf\xe9'
+
+
+class AppTestUnicodeUtf8:
+    spaceconfig = {"objspace.std.withutf8unicode": True}
+
+    def test_operations(self):
+        u = 'caf\xc3\xa9 au lait'.decode('utf-8')
+        assert len(u) == 12
+        assert u[3] == u'\xe9'
+        assert u[-4:] == u'lait'
+        assert u[::2] == u'cf uli'
+        assert u.split() == [u'caf\xe9', u'au', u'lait']
+        assert u.find(u'lait') == 8
+        assert u.encode('utf-8') == 'caf\xc3\xa9 au lait'
+        raises(UnicodeEncodeError, u.encode, 'ascii')
+        assert u == u'caf\xe9 au lait'
+        assert hash(u) == hash(u'caf\xe9 au lait')
+        assert u'caf\xe9' in u
+
+    def test_ascii(self):
+        u = 'a,b\x1c c'.decode('ascii')
+        assert u.split(u',') == [u'a', u'b\x1c c']
+        assert u.split() == [u'a,b', u'c']
+        assert u.split(None, 1) == [u'a,b', u'c']
+        assert u.rfind(u'c') == 5
+        assert u.find(u'\xe9') == -1
+        assert u.upper() == u'A,B\x1c C'
+        assert str(u) == 'a,b\x1c c'
+        assert u + u'\xe9' == u'a,b\x1c c\xe9'
+        assert u < 'b'.decode('ascii')
+        raises(IndexError, "u[6]")
+        assert {u: 1}['a,b\x1c c'] == 1
+
+    def test_compare_order(self):
+        l = [x.decode('utf-8') for x in
+             ['\xf0\x90\x80\x80', '\xef\xbf\xbf', 'z', '\xc3\xa9', '']]
+        assert sorted(l) == sorted([u'\U00010000', u'\uffff', u'z',
+                                    u'\xe9', u''])
+
+    def test_mixed_with_other_unicodes(self):
+        u = 'abc'.decode('ascii')
+        d = {u'abc': 1, u'\xe9': 2}
+        assert d[u] == 1
+        assert d['\xc3\xa9'.decode('utf-8')] == 2
+        assert u in set([u'abc'])
+        assert [u'x', u].index(u'abc') == 1
+        assert u'ab' + u[2] == u
+        assert u'%s!' % u == u'abc!'
+        assert u'{0}'.format(u) == u'abc'
+        assert int('42'.decode('ascii')) == 42
+        assert 'xabc'.endswith(u)
+        assert ord(u[1]) == 98
@@ -94,6 +94,9 @@ class W_AbstractTupleObject(W_Root):
               space.is_w(space.type(w_sequence), space.w_tuple)):
             return w_sequence
         else:
+            if (space.config.objspace.std.withspecialisedtuple and
+                    space.is_w(w_tupletype, space.w_tuple)):
+                return _specialised_tuple_from(space, w_sequence)
             tuple_w = space.fixedview(w_sequence)
         w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
         W_TupleObject.__init__(w_obj, tuple_w)
@@ -251,7 +254,7 @@ If the argument is a tuple, the return value is the same object.""",
 
     __len__ = interp2app(W_AbstractTupleObject.descr_len),
     __iter__ = interp2app(W_AbstractTupleObject.descr_iter),
-    __contains__ = interp2app(W_AbstractTupleObject.descr_contains),
+    __contains__ = interpindirect2app(W_AbstractTupleObject.descr_contains),
 
     __add__ = interp2app(W_AbstractTupleObject.descr_add),
     __mul__ = interp2app(W_AbstractTupleObject.descr_mul),
@@ -353,3 +356,14 @@ def wraptuple(space, list_w):
         except NotSpecialised:
             pass
     return W_TupleObject(list_w)
+
+
+def _specialised_tuple_from(space, w_sequence):
+    from pypy.objspace.std.listobject import W_ListObject
+    from pypy.objspace.std.specialisedtupleobject import (
+        array_tuple_from_list)
+    if type(w_sequence) is W_ListObject:
+        w_tuple = array_tuple_from_list(space, w_sequence)
+        if w_tuple is not None:
+            return w_tuple
+    return wraptuple(space, space.fixedview(w_sequence))
@@ -5,26 +5,32 @@ from rpython.rlib.objectmodel import (
     enforceargs)
 from rpython.rlib.buffer import StringBuffer
 from rpython.rlib.mutbuffer import MutableStringBuffer
-from rpython.rlib.rstring import StringBuilder, UnicodeBuilder
+from rpython.rlib.rstring import StringBuilder, UnicodeBuilder, split
 from rpython.rlib.runicode import (
     make_unicode_escape_function, str_decode_ascii, str_decode_utf_8,
-    unicode_encode_ascii, unicode_encode_utf_8, fast_str_decode_ascii)
+    unicode_encode_ascii, unicode_encode_utf_8, fast_str_decode_ascii,
+    MAXUNICODE)
 
 from pypy.interpreter import unicodehelper
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
-from pypy.interpreter.gateway import WrappedDefault, interp2app, unwrap_spec
+from pypy.interpreter.gateway import (
+    WrappedDefault, interp2app, interpindirect2app, unwrap_spec)
 from pypy.interpreter.typedef import TypeDef
 from pypy.module.unicodedata import unicodedb
 from pypy.objspace.std import newformat
 from pypy.objspace.std.basestringtype import basestring_typedef
 from pypy.objspace.std.formatting import mod_format
-from pypy.objspace.std.stringmethods import StringMethods
+from pypy.objspace.std.sliceobject import (W_SliceObject, unwrap_start_stop,
+    normalize_simple_slice)
+from pypy.objspace.std.stringmethods import (StringMethods,
+    _descr_getslice_slowpath)
 from pypy.objspace.std.util import IDTAG_SPECIAL, IDTAG_SHIFT
 
 __all__ = ['W_UnicodeObject', 'wrapunicode', 'plain_str2unicode',
            'encode_object', 'decode_object', 'unicode_from_object',
-           'unicode_from_string', 'unicode_to_decimal_w']
+           'unicode_from_string', 'unicode_to_decimal_w',
+           'newunicode_from_utf8', 'newunicode_from_ascii']
 
 
 class W_UnicodeObject(W_Root):
@@ -85,9 +91,10 @@ class W_UnicodeObject(W_Root):
 
     def readbuf_w(self, space):
         from rpython.rlib.rstruct.unichar import pack_unichar, UNICODE_SIZE
-        buf = MutableStringBuffer(len(self._value) * UNICODE_SIZE)
+        value = self._val(space)
+        buf = MutableStringBuffer(len(value) * UNICODE_SIZE)
         pos = 0
-        for unich in self._value:
+        for unich in value:
             pack_unichar(unich, buf, pos)
             pos += UNICODE_SIZE
         return StringBuffer(buf.finish())
@@ -102,11 +109,12 @@ class W_UnicodeObject(W_Root):
         return _create_list_from_unicode(self._value)
 
     def ord(self, space):
-        if len(self._value) != 1:
+        value = self._val(space)
+        if len(value) != 1:
             raise oefmt(space.w_TypeError,
                          "ord() expected a character, but string of length %d "
-                         "found", len(self._value))
-        return space.newint(ord(self._value[0]))
+                         "found", len(value))
+        return space.newint(ord(value[0]))
 
     def _new(self, value):
         return W_UnicodeObject(value)
@@ -131,14 +139,14 @@ class W_UnicodeObject(W_Root):
     @staticmethod
     def _op_val(space, w_other, strict=None):
         if isinstance(w_other, W_UnicodeObject):
-            return w_other._value
+            return w_other._val(space)
         if space.isinstance_w(w_other, space.w_bytes):
-            return unicode_from_string(space, w_other)._value
+            return unicode_from_string(space, w_other)._val(space)
         if strict:
             raise oefmt(space.w_TypeError,
                 "%s arg must be None, unicode or str", strict)
         return unicode_from_encoded_object(
-            space, w_other, None, "strict")._value
+            space, w_other, None, "strict")._val(space)
 
     def _chr(self, char):
         assert len(char) == 1
@@ -225,11 +233,11 @@ class W_UnicodeObject(W_Root):
 
         assert isinstance(w_value, W_UnicodeObject)
         w_newobj = space.allocate_instance(W_UnicodeObject, w_unicodetype)
-        W_UnicodeObject.__init__(w_newobj, w_value._value)
+        W_UnicodeObject.__init__(w_newobj, w_value._val(space))
         return w_newobj
 
     def descr_repr(self, space):
-        chars = self._value
+        chars = self._val(space)
         size = len(chars)
         s = _repr_function(chars, size, "strict")
         return space.newtext(s)
@@ -320,7 +328,7 @@ class W_UnicodeObject(W_Root):
         formatter = newformat.unicode_formatter(space, spec)
         self2 = unicode_from_object(space, self)
         assert isinstance(self2, W_UnicodeObject)
-        return formatter.format_string(self2._value)
+        return formatter.format_string(self2._val(space))
 
     def descr_mod(self, space, w_values):
         return mod_format(space, self, w_values, do_unicode=True)
@@ -329,7 +337,7 @@ class W_UnicodeObject(W_Root):
         return mod_format(space, w_values, self, do_unicode=True)
 
     def descr_translate(self, space, w_table):
-        selfvalue = self._value
+        selfvalue = self._val(space)
         w_sys = space.getbuiltinmodule('sys')
         maxunicode = space.int_w(space.getattr(w_sys,
                                                space.newtext("maxunicode")))
@@ -401,7 +409,7 @@ class W_UnicodeObject(W_Root):
 
     def descr_islower(self, space):
         cased = False
-        for uchar in self._value:
+        for uchar in self._val(space):
             if (unicodedb.isupper(ord(uchar)) or
                 unicodedb.istitle(ord(uchar))):
                 return space.w_False
@@ -411,7 +419,7 @@ class W_UnicodeObject(W_Root):
 
     def descr_isupper(self, space):
         cased = False
-        for uchar in self._value:
+        for uchar in self._val(space):
             if (unicodedb.islower(ord(uchar)) or
                 unicodedb.istitle(ord(uchar))):
                 return space.w_False
@@ -423,6 +431,320 @@ class W_UnicodeObject(W_Root):
         return len(prefix) == 0
 
 
+# the utf-8 index of a non-ascii string stores the byte offset of every
+# (1 << INDEX_SHIFT)th character
+INDEX_SHIFT = 6
+INDEX_MASK = (1 << INDEX_SHIFT) - 1
+
+
+class W_UTF8UnicodeObject(W_UnicodeObject):
+    """A unicode string stored as its utf-8 encoding.  With
+    objspace.std.withutf8unicode, it is made instead of a W_UnicodeObject
+    by newunicode_from_utf8() and newunicode_from_ascii().
+
+    _utf8 is the utf-8 encoding and _length the number of characters.  The
+    RPython unicode string is only built, and then kept in _decoded, when
+    an operation without a utf-8 fast path needs it.  The _value field of
+    W_UnicodeObject is never set.
+    """
+    _immutable_fields_ = ['_utf8', '_length']
+
+    def __init__(self, utf8, length):
+        """'utf8' must be the utf-8 encoding of 'length' characters, without
+        surrogates (see _can_store_utf8())."""
+        self._utf8 = utf8
+        self._length = length
+        self._decoded = None
+        self._index = None
+
+    def __repr__(self):
+        """representation for debugging purposes"""
+        return "%s(utf8=%r)" % (self.__class__.__name__, self._utf8)
+
+    def unwrap(self, space):
+        # for testing
+        return self._get_value()
+
+    def create_if_subclassed(self):
+        return self
+
+    def unicode_w(self, space):
+        return self._get_value()
+
+    def listview_unicode(self):
+        return _create_list_from_unicode(self._get_value())
+
+    def _len(self):
+        return self._length
+
+    _val = unicode_w
+
+    def _get_value(self):
+        value = self._decoded
+        if value is None:
+            utf8 = self._utf8
+            value = str_decode_utf_8(utf8, len(utf8), 'strict', final=True,
+                                     allow_surrogates=True)[0]
+            assert len(value) == self._length
+            self._decoded = value
+        return value
+
+    def _is_ascii(self):
+        return len(self._utf8) == self._length
+
+    def _use_utf8(self):
+        # ascii strings are always faster to handle in utf-8; for the other
+        # ones, only do it as long as the unicode string was not built
+        return self._decoded is None or self._is_ascii()
+
+    def _get_utf8_index(self):
+        index = self._index
+        if index is None:
+            utf8 = self._utf8
+            index = [0] * ((self._length >> INDEX_SHIFT) + 1)
+            pos = 0
+            for i in range(self._length):
+                if i & INDEX_MASK == 0:
+                    index[i >> INDEX_SHIFT] = pos
+                pos = _utf8_next_char(utf8, pos)
+            self._index = index
+        return index
+
+    def _utf8_offset(self, i):
+        "Return the position in _utf8 of the character number i"
+        if self._is_ascii():
+            return i
+        if i >= self._length:
+            return len(self._utf8)
+        utf8 = self._utf8
+        pos = self._get_utf8_index()[i >> INDEX_SHIFT]
+        for j in range(i & INDEX_MASK):
+            pos = _utf8_next_char(utf8, pos)
+        return pos
+
+    def _utf8_slice(self, start, stop):
+        assert 0 <= start <= stop
+        if start == stop:
+            return self._empty()
+        i = self._utf8_offset(start)
+        j = self._utf8_offset(stop)
+        assert 0 <= i <= j
+        return W_UTF8UnicodeObject(self._utf8[i:j], stop - start)
+
+    @staticmethod
+    def _other_utf8(w_other):
+        if type(w_other) is W_UTF8UnicodeObject:
+            return w_other._utf8
+        return None
+
+    def _both_ascii(self, w_sub):
+        "Return the utf-8 string of w_sub if both strings are pure ascii"
+        if (self._is_ascii() and type(w_sub) is W_UTF8UnicodeObject and
+                w_sub._is_ascii()):
+            return w_sub._utf8
+        return None
+
+    def descr_hash(self, space):
+        # ascii str and unicode strings have the same hash
+        if self._is_ascii():
+            x = compute_hash(self._utf8)
+        else:
+            x = compute_hash(self._get_value())
+        x -= (x == -1) # convert -1 to -2 without creating a bridge
+        return space.newint(x)
+
+    def descr_eq(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 == other)
+        return W_UnicodeObject.descr_eq(self, space, w_other)
+
+    def descr_ne(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 != other)
+        return W_UnicodeObject.descr_ne(self, space, w_other)
+
+    def descr_lt(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 < other)
+        return W_UnicodeObject.descr_lt(self, space, w_other)
+
+    def descr_le(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 <= other)
+        return W_UnicodeObject.descr_le(self, space, w_other)
+
+    def descr_gt(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 > other)
+        return W_UnicodeObject.descr_gt(self, space, w_other)
+
+    def descr_ge(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            return space.newbool(self._utf8 >= other)
+        return W_UnicodeObject.descr_ge(self, space, w_other)
+
+    def descr_add(self, space, w_other):
+        other = self._other_utf8(w_other)
+        if other is not None:
+            assert isinstance(w_other, W_UTF8UnicodeObject)
+            return W_UTF8UnicodeObject(self._utf8 + other,
+                                       self._length + w_other._length)
+        return W_UnicodeObject.descr_add(self, space, w_other)
+
+    def descr_getitem(self, space, w_index):
+        if not self._use_utf8():
+            return W_UnicodeObject.descr_getitem(self, space, w_index)
+        length = self._length
+        if isinstance(w_index, W_SliceObject):
+            start, stop, step, sl = w_index.indices4(space, length)
+            if sl == 0:
+                return self._empty()
+            elif step == 1:
+                return self._utf8_slice(start, stop)
+            ret = _descr_getslice_slowpath(self._val(space), start, step, sl)
+            return self._new_from_list(ret)
+        index = space.getindex_w(w_index, space.w_IndexError, "string index")
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise oefmt(space.w_IndexError, "string index out of range")
+        return self._utf8_slice(index, index + 1)
+
+    def descr_getslice(self, space, w_start, w_stop):
+        if not self._use_utf8():
+            return W_UnicodeObject.descr_getslice(self, space, w_start,
+                                                  w_stop)
+        start, stop = normalize_simple_slice(space, self._length, w_start,
+                                             w_stop)
+        return self._utf8_slice(start, stop)
+
+    def descr_contains(self, space, w_sub):
+        sub = self._both_ascii(w_sub)
+        if sub is not None:
+            return space.newbool(self._utf8.find(sub) >= 0)
+        return W_UnicodeObject.descr_contains(self, space, w_sub)
+
+    def descr_find(self, space, w_sub, w_start=None, w_end=None):
+        sub = self._both_ascii(w_sub)
+        if sub is not None:
+            value = self._utf8
+            start, end = unwrap_start_stop(space, len(value), w_start, w_end)
+            return space.newint(value.find(sub, start, end))
+        return W_UnicodeObject.descr_find(self, space, w_sub, w_start, w_end)
+
+    def descr_rfind(self, space, w_sub, w_start=None, w_end=None):
+        sub = self._both_ascii(w_sub)
+        if sub is not None:
+            value = self._utf8
+            start, end = unwrap_start_stop(space, len(value), w_start, w_end)
+            return space.newint(value.rfind(sub, start, end))
+        return W_UnicodeObject.descr_rfind(self, space, w_sub, w_start,
+                                           w_end)
+
+    def descr_count(self, space, w_sub, w_start=None, w_end=None):
+        sub = self._both_ascii(w_sub)
+        if sub is not None:
+            value = self._utf8
+            start, end = unwrap_start_stop(space, len(value), w_start, w_end)
+            return space.newint(value.count(sub, start, end))
+        return W_UnicodeObject.descr_count(self, space, w_sub, w_start,
+                                           w_end)
+
+    def descr_split(self, space, w_sep=None, maxsplit=-1):
+        if self._is_ascii():
+            value = self._utf8
+            if space.is_none(w_sep):
+                # the characters 0x1c to 0x1f are unicode whitespace, but
+                # not str whitespace
+                if not _contains_separator_controls(value):
+                    return self._newlist_ascii(space,
+                                               split(value, None, maxsplit))
+            else:
+                by = self._both_ascii(w_sep)
+                if by:
+                    return self._newlist_ascii(space,
+                                               split(value, by, maxsplit))
+        return W_UnicodeObject.descr_split(self, space, w_sep, maxsplit)
+
+    def _newlist_ascii(self, space, lst):
+        return self._newlist_unwrapped(space,
+                                       [s.decode('latin-1') for s in lst])
+
+    def descr_lower(self, space):
+        if self._is_ascii():
+            return W_UTF8UnicodeObject(self._utf8.lower(), self._length)
+        return W_UnicodeObject.descr_lower(self, space)
+
+    def descr_upper(self, space):
+        if self._is_ascii():
+            return W_UTF8UnicodeObject(self._utf8.upper(), self._length)
+        return W_UnicodeObject.descr_upper(self, space)
+
+
+def _utf8_next_char(utf8, pos):
+    ch = ord(utf8[pos])
+    if ch < 0x80:
+        return pos + 1
+    elif ch < 0xe0:
+        return pos + 2
+    elif ch < 0xf0:
+        return pos + 3
+    return pos + 4
+
+def _contains_separator_controls(s):
+    for c in s:
+        if '\x1c' <= c <= '\x1f':
+            return True
+    return False
+
+def _can_store_utf8(utf8):
+    # the utf-8 representation is only used on builds where a character of
+    # a unicode string is a whole code point, and if there is no surrogate
+    # in the string: then equal strings have equal utf-8 encodings, and the
+    # utf-8 order is the same as the unicode order
+    if MAXUNICODE < 0x10ffff:
+        return False
+    for i in range(len(utf8) - 1):
+        if utf8[i] == '\xed' and ord(utf8[i + 1]) >= 0xa0:
+            return False
+    return True
+
+def _is_ascii(s):
+    for c in s:
+        if ord(c) >= 0x80:
+            return False
+    return True
+
+def newunicode_from_utf8(space, utf8, uni):
+    """Return a unicode object for 'uni', whose utf-8 encoding is 'utf8'.
+    With objspace.std.withutf8unicode, the object keeps 'utf8' instead of
+    'uni' if possible."""
+    if space.config.objspace.std.withutf8unicode and _can_store_utf8(utf8):
+        return W_UTF8UnicodeObject(utf8, len(uni))
+    return space.newunicode(uni)
+
+def newunicode_from_ascii(space, s):
+    """Return a unicode object for 's', which must only contain ascii
+    characters."""
+    if space.config.objspace.std.withutf8unicode:
+        return W_UTF8UnicodeObject(s, len(s))
+    return space.newunicode(s.decode('latin-1'))
+
+def is_plain_unicode(space, w_obj):
+    """Return True if w_obj is a unicode object, but not an instance of a
+    subclass of unicode."""
+    if type(w_obj) is W_UnicodeObject:
+        return True
+    return (space.config.objspace.std.withutf8unicode and
+            type(w_obj) is W_UTF8UnicodeObject)
+
+
 def wrapunicode(space, uni):
     return W_UnicodeObject(uni)
 
@@ -460,6 +782,17 @@ def _get_encoding_and_errors(space, w_encoding, w_errors):
 
 
 def encode_object(space, w_object, encoding, errors):
+    if (space.config.objspace.std.withutf8unicode and
+            type(w_object) is W_UTF8UnicodeObject and
+            (errors is None or errors == 'strict')):
+        # no need to encode anything, except if the string is not ascii
+        # and the encoding is not utf-8
+        enc = encoding
+        if enc is None:
+            enc = getdefaultencoding(space)
+        if enc == 'utf-8' or (w_object._is_ascii() and
+                              (enc == 'ascii' or enc == 'latin-1')):
+            return space.newbytes(w_object._utf8)
     if encoding is None:
         # Get the encoder functions as a wrapped object.
         # This lookup is cached.
@@ -499,6 +832,8 @@ def decode_object(space, w_obj, encoding, errors):
         if encoding == 'ascii':
             # XXX error handling
             s = space.charbuf_w(w_obj)
+            if space.config.objspace.std.withutf8unicode and _is_ascii(s):
+                return newunicode_from_ascii(space, s)
             try:
                 u = fast_str_decode_ascii(s)
             except ValueError:
@@ -509,9 +844,9 @@ def decode_object(space, w_obj, encoding, errors):
         if encoding == 'utf-8':
             s = space.charbuf_w(w_obj)
             eh = unicodehelper.decode_error_handler(space)
-            return space.newunicode(str_decode_utf_8(
-                    s, len(s), None, final=True, errorhandler=eh,
-                    allow_surrogates=True)[0])
+            u = str_decode_utf_8(s, len(s), None, final=True,
+                                 errorhandler=eh, allow_surrogates=True)[0]
+            return newunicode_from_utf8(space, s, u)
     w_codecs = space.getbuiltinmodule("_codecs")
     w_decode = space.getattr(w_codecs, space.newtext("decode"))
     if errors is None:
@@ -981,55 +1316,55 @@ W_UnicodeObject.typedef = TypeDef(
                           doc=UnicodeDocstrings.__repr__.__doc__),
     __str__ = interp2app(W_UnicodeObject.descr_str,
                          doc=UnicodeDocstrings.__str__.__doc__),
-    __hash__ = interp2app(W_UnicodeObject.descr_hash,
-                          doc=UnicodeDocstrings.__hash__.__doc__),
-
-    __eq__ = interp2app(W_UnicodeObject.descr_eq,
-                        doc=UnicodeDocstrings.__eq__.__doc__),
-    __ne__ = interp2app(W_UnicodeObject.descr_ne,
-                        doc=UnicodeDocstrings.__ne__.__doc__),
-    __lt__ = interp2app(W_UnicodeObject.descr_lt,
-                        doc=UnicodeDocstrings.__lt__.__doc__),
-    __le__ = interp2app(W_UnicodeObject.descr_le,
-                        doc=UnicodeDocstrings.__le__.__doc__),
-    __gt__ = interp2app(W_UnicodeObject.descr_gt,
-                        doc=UnicodeDocstrings.__gt__.__doc__),
-    __ge__ = interp2app(W_UnicodeObject.descr_ge,
-                        doc=UnicodeDocstrings.__ge__.__doc__),
+    __hash__ = interpindirect2app(W_UnicodeObject.descr_hash,
+                                  doc=UnicodeDocstrings.__hash__.__doc__),
+
+    __eq__ = interpindirect2app(W_UnicodeObject.descr_eq,
+                                doc=UnicodeDocstrings.__eq__.__doc__),
+    __ne__ = interpindirect2app(W_UnicodeObject.descr_ne,
+                                doc=UnicodeDocstrings.__ne__.__doc__),
+    __lt__ = interpindirect2app(W_UnicodeObject.descr_lt,
+                                doc=UnicodeDocstrings.__lt__.__doc__),
+    __le__ = interpindirect2app(W_UnicodeObject.descr_le,
+                                doc=UnicodeDocstrings.__le__.__doc__),
+    __gt__ = interpindirect2app(W_UnicodeObject.descr_gt,
+                                doc=UnicodeDocstrings.__gt__.__doc__),
+    __ge__ = interpindirect2app(W_UnicodeObject.descr_ge,
+                                doc=UnicodeDocstrings.__ge__.__doc__),
 
     __len__ = interp2app(W_UnicodeObject.descr_len,
                          doc=UnicodeDocstrings.__len__.__doc__),
-    __contains__ = interp2app(W_UnicodeObject.descr_contains,
-                              doc=UnicodeDocstrings.__contains__.__doc__),
+    __contains__ = interpindirect2app(W_UnicodeObject.descr_contains,
+        doc=UnicodeDocstrings.__contains__.__doc__),
 
-    __add__ = interp2app(W_UnicodeObject.descr_add,
-                         doc=UnicodeDocstrings.__add__.__doc__),
+    __add__ = interpindirect2app(W_UnicodeObject.descr_add,
+                                 doc=UnicodeDocstrings.__add__.__doc__),
     __mul__ = interp2app(W_UnicodeObject.descr_mul,
                          doc=UnicodeDocstrings.__mul__.__doc__),
     __rmul__ = interp2app(W_UnicodeObject.descr_mul,
                           doc=UnicodeDocstrings.__rmul__.__doc__),
 
-    __getitem__ = interp2app(W_UnicodeObject.descr_getitem,
-                             doc=UnicodeDocstrings.__getitem__.__doc__),
-    __getslice__ = interp2app(W_UnicodeObject.descr_getslice,
-                              doc=UnicodeDocstrings.__getslice__.__doc__),
+    __getitem__ = interpindirect2app(W_UnicodeObject.descr_getitem,
+        doc=UnicodeDocstrings.__getitem__.__doc__),
+    __getslice__ = interpindirect2app(W_UnicodeObject.descr_getslice,
+        doc=UnicodeDocstrings.__getslice__.__doc__),
 
     capitalize = interp2app(W_UnicodeObject.descr_capitalize,
                             doc=UnicodeDocstrings.capitalize.__doc__),
     center = interp2app(W_UnicodeObject.descr_center,
                         doc=UnicodeDocstrings.center.__doc__),
-    count = interp2app(W_UnicodeObject.descr_count,
-                       doc=UnicodeDocstrings.count.__doc__),
+    count = interpindirect2app(W_UnicodeObject.descr_count,
+                               doc=UnicodeDocstrings.count.__doc__),
     decode = interp2app(W_UnicodeObject.descr_decode,
                         doc=UnicodeDocstrings.decode.__doc__),
     encode = interp2app(W_UnicodeObject.descr_encode,
                         doc=UnicodeDocstrings.encode.__doc__),
     expandtabs = interp2app(W_UnicodeObject.descr_expandtabs,
                             doc=UnicodeDocstrings.expandtabs.__doc__),
-    find = interp2app(W_UnicodeObject.descr_find,
-                      doc=UnicodeDocstrings.find.__doc__),
-    rfind = interp2app(W_UnicodeObject.descr_rfind,
-                       doc=UnicodeDocstrings.rfind.__doc__),
+    find = interpindirect2app(W_UnicodeObject.descr_find,
+                              doc=UnicodeDocstrings.find.__doc__),
+    rfind = interpindirect2app(W_UnicodeObject.descr_rfind,
+                               doc=UnicodeDocstrings.rfind.__doc__),
     index = interp2app(W_UnicodeObject.descr_index,
                        doc=UnicodeDocstrings.index.__doc__),
     rindex = interp2app(W_UnicodeObject.descr_rindex,
@@ -1058,16 +1393,16 @@ W_UnicodeObject.typedef = TypeDef(
                        doc=UnicodeDocstrings.ljust.__doc__),
     rjust = interp2app(W_UnicodeObject.descr_rjust,
                        doc=UnicodeDocstrings.rjust.__doc__),
-    lower = interp2app(W_UnicodeObject.descr_lower,
-                       doc=UnicodeDocstrings.lower.__doc__),
+    lower = interpindirect2app(W_UnicodeObject.descr_lower,
+                               doc=UnicodeDocstrings.lower.__doc__),
     partition = interp2app(W_UnicodeObject.descr_partition,
                            doc=UnicodeDocstrings.partition.__doc__),
     rpartition = interp2app(W_UnicodeObject.descr_rpartition,
                             doc=UnicodeDocstrings.rpartition.__doc__),
     replace = interp2app(W_UnicodeObject.descr_replace,
                          doc=UnicodeDocstrings.replace.__doc__),
-    split = interp2app(W_UnicodeObject.descr_split,
-                       doc=UnicodeDocstrings.split.__doc__),
+    split = interpindirect2app(W_UnicodeObject.descr_split,
+                               doc=UnicodeDocstrings.split.__doc__),
     rsplit = interp2app(W_UnicodeObject.descr_rsplit,
                         doc=UnicodeDocstrings.rsplit.__doc__),
     splitlines = interp2app(W_UnicodeObject.descr_splitlines,
@@ -1088,8 +1423,8 @@ W_UnicodeObject.typedef = TypeDef(
                        doc=UnicodeDocstrings.title.__doc__),
     translate = interp2app(W_UnicodeObject.descr_translate,
                            doc=UnicodeDocstrings.translate.__doc__),
-    upper = interp2app(W_UnicodeObject.descr_upper,
-                       doc=UnicodeDocstrings.upper.__doc__),
+    upper = interpindirect2app(W_UnicodeObject.descr_upper,
+                               doc=UnicodeDocstrings.upper.__doc__),
     zfill = interp2app(W_UnicodeObject.descr_zfill,
                        doc=UnicodeDocstrings.zfill.__doc__),
 
@@ -1123,7 +1458,7 @@ W_UnicodeObject.EMPTY = W_UnicodeObject(u'')
 def unicode_to_decimal_w(space, w_unistr):
     if not isinstance(w_unistr, W_UnicodeObject):
         raise oefmt(space.w_TypeError, "expected unicode, got '%T'", w_unistr)
-    unistr = w_unistr._value
+    unistr = w_unistr._val(space)
     result = ['\0'] * len(unistr)
     digits = ['0', '1', '2', '3', '4',
               '5', '6', '7', '8', '9']
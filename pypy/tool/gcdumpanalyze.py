@@ -0,0 +1,428 @@
+#! /usr/bin/env python
+"""
+Analyzes dumpfiles produced by gc.dump_rpy_heap(), see also gcdump.py.
+
+Syntax:
+    gcdumpanalyze.py [--typeids=<typeids.txt>] diff <dump1> <dump2> [...]
+    gcdumpanalyze.py [--typeids=<typeids.txt>] retained <dumpfile>
+    gcdumpanalyze.py [--typeids=<typeids.txt>] paths <typenum> <dumpfile>
+
+'diff' prints the growth of the number and total size of the objects of
+each type between consecutive dumps.  It reads each dump only once, with
+a memory usage that depends only on the number of types.
+
+'retained' prints the types and the single objects that keep alive the
+most memory, computed with the dominator tree of the heap: an object
+retains all the objects that are only reachable from the roots through it.
+
+'paths' prints the most common chains of types through which the objects
+of the type number <typenum> are reached from the roots.
+
+'retained' and 'paths' need a few compact arrays of one word per object
+and per reference, plus a dict mapping addresses to objects.
+
+By default, typeids.txt is loaded from the same dir as the first dumpfile
+and, if it is not there, from gc.get_typeids_z() of the running PyPy.  Note
+that the dumps contain the RPython types only: all instances of app-level
+classes show up as one of the W_*Object types.
+"""
+import sys, os, array, mmap, heapq
+
+from pypy.tool.gcdump import Stat
+
+WORD = array.array('l').itemsize
+
+
+class DumpFile(object):
+    """A dumpfile, memory-mapped and read in chunks."""
+
+    CHUNK = 1 << 20     # words
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.f = open(filename, 'rb')
+        size = os.fstat(self.f.fileno()).st_size
+        assert size % WORD == 0, "invalid dump file (or 32/64-bit mix)"
+        self.nwords = size // WORD
+        if self.nwords > 0:
+            self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mm = ''
+        assert self.nwords >= 2 and self.words(self.nwords - 2,
+                                               self.nwords)[1] == -1, (
+            "invalid or truncated dump file (or 32/64-bit mix)")
+
+    def close(self):
+        if self.nwords > 0:
+            self.mm.close()
+        self.f.close()
+
+    def words(self, start, stop):
+        a = array.array('l')
+        a.fromstring(self.mm[start * WORD:stop * WORD])
+        return a
+
+    def walk(self):
+        """Yields (addr, typenum, size, refs) for all objects, in the
+        order of the file.  'refs' is an array of addresses.  The roots are
+        the objects before the marker, which has an 'addr' of 0.
+        """
+        pos = 0
+        chunk = self.CHUNK
+        while pos < self.nwords:
+            stop = min(pos + chunk, self.nwords)
+            buf = self.words(pos, stop)
+            i = 0
+            end = len(buf)
+            while i < end:
+                j = i + 3
+                while j < end and buf[j] != -1:
+                    j += 1
+                if j >= end:
+                    break        # record cut at the end of the chunk
+                yield (buf[i], buf[i+1], buf[i+2], buf[i+3:j])
+                i = j + 1
+            if i == 0:
+                assert stop < self.nwords, "truncated dump file"
+                chunk *= 2       # a single record bigger than the chunk
+            pos += i
+
+
+def type_summary(dump):
+    """Returns {typenum: [count, totalsize]} for a DumpFile."""
+    summary = {}
+    for addr, typenum, size, refs in dump.walk():
+        if addr == 0:
+            continue     # the marker after the roots
+        try:
+            stat = summary[typenum]
+        except KeyError:
+            stat = summary[typenum] = [0, 0]
+        stat[0] += 1
+        stat[1] += size
+    return summary
+
+def diff_summaries(old, new):
+    """Returns a list of (typenum, count_delta, size_delta, count, size),
+    largest size_delta first, for the types that changed."""
+    result = []
+    for typenum in set(old) | set(new):
+        oldcount, oldsize = old.get(typenum, (0, 0))
+        count, size = new.get(typenum, (0, 0))
+        if count != oldcount or size != oldsize:
+            result.append((typenum, count - oldcount, size - oldsize,
+                           count, size))
+    result.sort(key=lambda item: (-item[2], -item[1], item[0]))
+    return result
+
+
+class HeapGraph(object):
+    """The objects of a DumpFile and their references.  Object number 0 is
+    a virtual root that references all the roots; the objects of the dump
+    are numbered from 1 in the order of the file.
+    """
+
+    def __init__(self, dump):
+        self.typenums = array.array('l', [0])
+        self.sizes = array.array('l', [0])
+        index = {}
+        nroots = -1
+        for addr, typenum, size, refs in dump.walk():
+            if addr == 0:
+                nroots = len(self.typenums) - 1
+                continue
+            index[addr] = len(self.typenums)
+            self.typenums.append(typenum)
+            self.sizes.append(size)
+        if nroots < 0:
+            nroots = len(self.typenums) - 1    # no marker: all are roots
+        self.length = len(self.typenums)
+        #
+        # the successors, as slices of 'self.succ'
+        self.succ_start = array.array('l', [0])
+        self.succ = array.array('l', xrange(1, nroots + 1))
+        for addr, typenum, size, refs in dump.walk():
+            if addr == 0:
+                continue
+            self.succ_start.append(len(self.succ))
+            for ref in refs:
+                target = index.get(ref, 0)
+                if target:
+                    self.succ.append(target)
+        self.succ_start.append(len(self.succ))
+        del index
+        self._idom = None
+
+    def successors(self, i):
+        return self.succ[self.succ_start[i]:self.succ_start[i+1]]
+
+    def _reverse_postorder(self):
+        seen = array.array('b', [0]) * self.length
+        order = array.array('l')
+        stack = [(0, 0)]
+        seen[0] = 1
+        while stack:
+            i, k = stack[-1]
+            start = self.succ_start[i]
+            if start + k < self.succ_start[i+1]:
+                stack[-1] = (i, k + 1)
+                j = self.succ[start + k]
+                if not seen[j]:
+                    seen[j] = 1
+                    stack.append((j, 0))
+            else:
+                stack.pop()
+                order.append(i)
+        order.reverse()
+        return order
+
+    def compute_dominators(self):
+        """Computes the immediate dominator of each reachable object, with
+        the iterative algorithm of Cooper, Harvey and Kennedy.  Unreachable
+        objects get an idom of -1.
+        """
+        order = self._reverse_postorder()
+        rpo = array.array('l', [-1]) * self.length
+        for n, i in enumerate(order):
+            rpo[i] = n
+        #
+        # the predecessors, as slices of 'pred'
+        counts = array.array('l', [0]) * (self.length + 1)
+        for j in self.succ:
+            counts[j + 1] += 1
+        for i in xrange(self.length):
+            counts[i + 1] += counts[i]
+        pred_start = array.array('l', counts)
+        pred = array.array('l', [0]) * len(self.succ)
+        for i in xrange(self.length):
+            for k in xrange(self.succ_start[i], self.succ_start[i+1]):
+                j = self.succ[k]
+                pred[counts[j]] = i
+                counts[j] += 1
+        del counts
+        #
+        idom = array.array('l', [-1]) * self.length
+        idom[0] = 0
+        changed = True
+        while changed:
+            changed = False
+            for n in xrange(1, len(order)):
+                i = order[n]
+                new_idom = -1
+                for k in xrange(pred_start[i], pred_start[i+1]):
+                    p = pred[k]
+                    if idom[p] < 0:
+                        continue
+                    if new_idom < 0:
+                        new_idom = p
+                        continue
+                    # intersect
+                    a = p
+                    b = new_idom
+                    while a != b:
+                        while rpo[a] > rpo[b]:
+                            a = idom[a]
+                        while rpo[b] > rpo[a]:
+                            b = idom[b]
+                    new_idom = a
+                if idom[i] != new_idom:
+                    idom[i] = new_idom
+                    changed = True
+        self._idom = idom
+        self._order = order
+        return idom
+
+    def retained_sizes(self):
+        """Returns an array with, for each object, the total size of the
+        objects that it dominates, including itself."""
+        if self._idom is None:
+            self.compute_dominators()
+        idom = self._idom
+        retained = array.array('l', self.sizes)
+        for n in xrange(len(self._order) - 1, 0, -1):
+            i = self._order[n]
+            retained[idom[i]] += retained[i]
+        return retained
+
+    def retained_by_type(self):
+        """Returns {typenum: [count, retained]}, where 'retained' is the
+        total size kept alive by the objects of that type, without counting
+        twice the objects of the same type dominated by one another."""
+        retained = self.retained_sizes()
+        idom = self._idom
+        # the children in the dominator tree, as slices of 'children'
+        counts = array.array('l', [0]) * (self.length + 1)
+        for i in xrange(1, self.length):
+            if idom[i] >= 0:
+                counts[idom[i] + 1] += 1
+        for i in xrange(self.length):
+            counts[i + 1] += counts[i]
+        child_start = array.array('l', counts)
+        children = array.array('l', [0]) * counts[self.length]
+        for i in xrange(1, self.length):
+            if idom[i] >= 0:
+                children[counts[idom[i]]] = i
+                counts[idom[i]] += 1
+        del counts
+        #
+        result = {}
+        active = {}      # {typenum: number of dominators of that type}
+        stack = [(0, True)]
+        while stack:
+            i, entering = stack.pop()
+            typenum = self.typenums[i]
+            if not entering:
+                active[typenum] -= 1
+                continue
+            if i != 0:
+                try:
+                    stat = result[typenum]
+                except KeyError:
+                    stat = result[typenum] = [0, 0]
+                stat[0] += 1
+                if not active.get(typenum):
+                    stat[1] += retained[i]
+                active[typenum] = active.get(typenum, 0) + 1
+                stack.append((i, False))
+            for k in xrange(child_start[i], child_start[i+1]):
+                stack.append((children[k], True))
+        return result
+
+    def shortest_paths_parents(self):
+        """Returns an array with, for each object, its parent in a
+        breadth-first walk from the roots (-1 if unreachable)."""
+        parent = array.array('l', [-1]) * self.length
+        parent[0] = 0
+        pending = array.array('l', [0])
+        k = 0
+        while k < len(pending):
+            i = pending[k]
+            k += 1
+            for j in self.successors(i):
+                if parent[j] < 0:
+                    parent[j] = i
+                    pending.append(j)
+        return parent
+
+    def retaining_paths(self, typenum, maxdepth=8):
+        """Returns a list of (path, count, retained) for the objects of type
+        'typenum', most common paths first.  A path is the tuple of type
+        numbers on the shortest path from the roots to the object,
+        including it, limited to the last 'maxdepth' ones.
+        """
+        parent = self.shortest_paths_parents()
+        retained = self.retained_sizes()
+        paths = {}
+        for i in xrange(1, self.length):
+            if self.typenums[i] != typenum or parent[i] < 0:
+                continue
+            path = []
+            j = i
+            while j != 0 and len(path) < maxdepth:
+                path.append(self.typenums[j])
+                j = parent[j]
+            if j != 0:
+                path.append(-1)     # truncated
+            path.reverse()
+            path = tuple(path)
+            try:
+                stat = paths[path]
+            except KeyError:
+                stat = paths[path] = [0, 0]
+            stat[0] += 1
+            stat[1] += retained[i]
+        result = [(path, stat[0], stat[1]) for path, stat in paths.items()]
+        result.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return result
+
+
+# ____________________________________________________________
+
+def _mb(size):
+    return size / (1024.0 * 1024.0)
+
+def print_diff(stat, filenames, top=30):
+    previous = None
+    for filename in filenames:
+        dump = DumpFile(filename)
+        try:
+            summary = type_summary(dump)
+        finally:
+            dump.close()
+        if previous is not None:
+            print '%s => %s:' % (previous[0], filename)
+            for (typenum, dcount, dsize, count,
+                 size) in diff_summaries(previous[1], summary)[:top]:
+                print '%+10d %+10.2fM  %10d %10.2fM  %s' % (
+                    dcount, _mb(dsize), count, _mb(size),
+                    stat.get_type_name(typenum))
+            print
+        previous = (filename, summary)
+
+def print_retained(stat, filename, top=30):
+    dump = DumpFile(filename)
+    try:
+        graph = HeapGraph(dump)
+    finally:
+        dump.close()
+    bytype = graph.retained_by_type()
+    items = sorted(bytype.items(), key=lambda (typenum, st): -st[1])
+    print 'retained by type:'
+    for typenum, (count, retained) in items[:top]:
+        print '%10d %10.2fM  %s' % (count, _mb(retained),
+                                    stat.get_type_name(typenum))
+    print
+    retained = graph.retained_sizes()
+    biggest = heapq.nlargest(top, xrange(1, graph.length),
+                             key=retained.__getitem__)
+    print 'largest retained sizes of single objects:'
+    for i in biggest:
+        print '%21.2fM  %s' % (_mb(retained[i]),
+                               stat.get_type_name(graph.typenums[i]))
+
+def print_paths(stat, typenum, filename, top=10):
+    dump = DumpFile(filename)
+    try:
+        graph = HeapGraph(dump)
+    finally:
+        dump.close()
+    print 'retaining paths of %s:' % (stat.get_type_name(typenum),)
+    for path, count, retained in graph.retaining_paths(typenum)[:top]:
+        print '%10d objects, %.2fM retained:' % (count, _mb(retained))
+        for num in path:
+            if num == -1:
+                print '        ...'
+            else:
+                print '        %s' % (stat.get_type_name(num),)
+
+
+def main(argv):
+    typeids = None
+    if argv and argv[0].startswith('--typeids='):
+        typeids = argv.pop(0)[len('--typeids='):]
+    if (len(argv) < 2 or argv[0] not in ('diff', 'retained', 'paths') or
+            (argv[0] == 'paths' and len(argv) < 3)):
+        print >> sys.stderr, __doc__
+        return 2
+    command = argv.pop(0)
+    if command == 'paths':
+        typenum = int(argv.pop(0))
+    stat = Stat()
+    if typeids is None:
+        typeids = os.path.join(os.path.dirname(argv[0]), 'typeids.txt')
+    if os.path.isfile(typeids):
+        stat.load_typeids(typeids)
+    else:
+        import zlib, gc
+        stat.load_typeids(zlib.decompress(gc.get_typeids_z()).split("\n"))
+    #
+    if command == 'diff':
+        print_diff(stat, argv)
+    elif command == 'retained':
+        print_retained(stat, argv[0])
+    else:
+        print_paths(stat, typenum, argv[0])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
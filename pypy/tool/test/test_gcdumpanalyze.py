@@ -0,0 +1,127 @@
+import array
+from pypy.tool.gcdumpanalyze import (DumpFile, HeapGraph, type_summary,
+                                     diff_summaries, main)
+
+
+def write_dump(tmpdir, name, roots, others):
+    # 'roots' and 'others' are lists of (addr, typenum, size, [refs])
+    a = array.array('l')
+    for i, records in enumerate([roots, others]):
+        for addr, typenum, size, refs in records:
+            a.extend([addr, typenum, size] + refs + [-1])
+        if i == 0:
+            a.extend([0, 0, 0, -1])
+    p = tmpdir.join(name)
+    p.write(a.tostring(), 'wb')
+    return str(p)
+
+# A heap with two roots, with the type numbers in brackets:
+#
+#     root1[1] -> a[2] -> c[3] -> d[3]
+#              -> b[2] -> c
+#     root2[1] -> e[4] -> d
+#
+ROOTS = [(1000, 1, 8, [2000, 3000]),
+         (6000, 1, 8, [7000])]
+OTHERS = [(2000, 2, 16, [4000]),
+          (3000, 2, 16, [4000]),
+          (4000, 3, 24, [5000]),
+          (7000, 4, 32, [5000]),
+          (5000, 3, 40, [])]
+
+
+def test_walk(tmpdir):
+    fn = write_dump(tmpdir, 'dump', ROOTS, OTHERS)
+    dump = DumpFile(fn)
+    records = [(addr, typenum, size, list(refs))
+               for addr, typenum, size, refs in dump.walk()]
+    dump.close()
+    assert records == ROOTS + [(0, 0, 0, [])] + [
+        (addr, typenum, size, refs) for addr, typenum, size, refs in OTHERS]
+
+def test_walk_small_chunks(tmpdir):
+    fn = write_dump(tmpdir, 'dump', ROOTS, OTHERS)
+    dump = DumpFile(fn)
+    expected = list(dump.walk())
+    dump.CHUNK = 3      # smaller than most records
+    assert list(dump.walk()) == expected
+    dump.close()
+
+def test_type_summary_and_diff(tmpdir):
+    dump = DumpFile(write_dump(tmpdir, 'dump1', ROOTS, OTHERS))
+    summary1 = type_summary(dump)
+    dump.close()
+    assert summary1 == {1: [2, 16], 2: [2, 32], 3: [2, 64], 4: [1, 32]}
+    more = OTHERS + [(8000, 3, 24, []), (9000, 5, 100, [])]
+    dump = DumpFile(write_dump(tmpdir, 'dump2', ROOTS, more[1:]))
+    summary2 = type_summary(dump)
+    dump.close()
+    assert diff_summaries(summary1, summary2) == [
+        (5, 1, 100, 1, 100),
+        (3, 1, 24, 3, 88),
+        (2, -1, -16, 1, 16),
+        ]
+
+def test_dominators(tmpdir):
+    dump = DumpFile(write_dump(tmpdir, 'dump', ROOTS, OTHERS))
+    graph = HeapGraph(dump)
+    dump.close()
+    # numbering: 0 virtual root, 1 root1, 2 root2, 3 a, 4 b, 5 c, 6 e, 7 d
+    idom = graph.compute_dominators()
+    assert list(idom) == [0, 0, 0, 1, 1, 1, 2, 0]
+    retained = graph.retained_sizes()
+    assert list(retained) == [0 + 8 + 8 + 16 + 16 + 24 + 32 + 40,
+                              8 + 16 + 16 + 24, 8 + 32, 16, 16, 24, 32, 40]
+    assert graph.retained_by_type() == {
+        1: [2, 64 + 40],
+        2: [2, 32],
+        3: [2, 64],
+        4: [1, 32],
+        }
+
+def test_nested_same_type(tmpdir):
+    # a linked list of objects of type 2: the first one retains them all
+    roots = [(1000, 1, 8, [2000])]
+    others = [(2000, 2, 16, [3000]),
+              (3000, 2, 16, [4000]),
+              (4000, 2, 16, [])]
+    dump = DumpFile(write_dump(tmpdir, 'dump', roots, others))
+    graph = HeapGraph(dump)
+    dump.close()
+    assert graph.retained_by_type() == {1: [1, 56], 2: [3, 48]}
+
+def test_retaining_paths(tmpdir):
+    dump = DumpFile(write_dump(tmpdir, 'dump', ROOTS, OTHERS))
+    graph = HeapGraph(dump)
+    dump.close()
+    # 'd' is reached through the shortest path, root2 -> e -> d
+    assert graph.retaining_paths(3) == [
+        ((1, 4, 3), 1, 40),
+        ((1, 2, 3), 1, 24),
+        ]
+    assert graph.retaining_paths(3, maxdepth=2) == [
+        ((-1, 4, 3), 1, 40),
+        ((-1, 2, 3), 1, 24),
+        ]
+    assert graph.retaining_paths(2) == [((1, 2), 2, 32)]
+
+def test_main(tmpdir, capsys):
+    fn1 = write_dump(tmpdir, 'dump1', ROOTS, OTHERS)
+    fn2 = write_dump(tmpdir, 'dump2', ROOTS, OTHERS + [(8000, 3, 24, [])])
+    typeids = tmpdir.join('typeids.txt')
+    typeids.write('\n'.join(['member0    ?',
+                             'member1    GcStruct Root',
+                             'member2    GcStruct A',
+                             'member3    GcStruct C',
+                             'member4    GcStruct E']) + '\n')
+    assert main(['diff', fn1, fn2]) == 0
+    out, err = capsys.readouterr()
+    assert 'dump1 => ' in out
+    assert '+1' in out and ' C\n' in out
+    assert main(['retained', fn1]) == 0
+    out, err = capsys.readouterr()
+    assert 'Root' in out
+    assert main(['paths', '3', fn1]) == 0
+    out, err = capsys.readouterr()
+    assert 'retaining paths of C' in out
+    assert main(['paths', fn1]) == 2
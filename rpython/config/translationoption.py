@@ -97,6 +97,11 @@ translation_optiondescription = OptionDescription(
                  }),
     BoolOption("gcremovetypeptr", "Remove the typeptr from every object",
                default=IS_64_BITS, cmdline="--gcremovetypeptr"),
+    BoolOption("gcbarrierstats",
+               "Count the write barrier slow paths, the cards scanned and "
+               "the old objects rescanned by minor collections "
+               "(incminimark only)",
+               default=False, cmdline="--gcbarrierstats"),
     ChoiceOption("gcrootfinder",
                  "Strategy for finding GC Roots (framework GCs only)",
                  ["n/a", "shadowstack", "asmgcc"],
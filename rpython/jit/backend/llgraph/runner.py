@@ -26,6 +26,9 @@ class LLAsmInfo(object):
     def __init__(self, lltrace):
         self.ops_offset = None
         self.lltrace = lltrace
+        # there is no machine code: count the operations instead, which
+        # is good enough for the code size budget of memmgr.py
+        self.asmlen = len(lltrace.operations)
 
 class LLTrace(object):
     has_been_freed = False
@@ -356,6 +359,7 @@ class LLGraphCPU(model.AbstractCPU):
         clt._llgraph_loop = lltrace
         clt._llgraph_alltraces = [lltrace]
         self._record_labels(lltrace)
+        return LLAsmInfo(lltrace)
 
     def compile_bridge(self, faildescr, inputargs, operations,
                        original_loop_token, log=True, logger=None):
@@ -289,6 +289,12 @@ class RegisterManager(object):
         self.position = -1
         self.frame_manager = frame_manager
         self.assembler = assembler
+        # optional hints, filled by the backend: the sorted positions of
+        # the calls (see compute_call_positions()), and the register in
+        # which we would like a variable to be, e.g. because that is
+        # where the final JUMP expects it
+        self.call_positions = None
+        self.hint_regs = {}
 
     def is_still_alive(self, v):
         # Check if 'v' is alive at the current position.
@@ -303,6 +309,45 @@ class RegisterManager(object):
     def next_instruction(self, incr=1):
         self.position += incr
 
+    def _lives_across_call(self, v):
+        # Check if 'v' is still needed after one of the calls that follow
+        # the current position (or that is at the current position).
+        call_positions = self.call_positions
+        lo = 0
+        hi = len(call_positions)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if call_positions[mid] < self.position:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(call_positions) or v not in self.longevity:
+            return False
+        return self.longevity[v][1] > call_positions[lo]
+
+    def _pick_free_reg(self, v):
+        """ Remove and return a register from 'free_regs' for the new
+        variable v.  Prefer, in this order: the register hinted in
+        'hint_regs'; a register not in 'save_around_call_regs' if v is
+        alive across a call, or one in 'save_around_call_regs' if it is
+        not, to keep the others for the variables that need them.
+        """
+        free_regs = self.free_regs
+        hint = self.hint_regs.get(v, None)
+        if hint is not None:
+            for i in range(len(free_regs)):
+                if free_regs[i] is hint:
+                    del free_regs[i]
+                    return hint
+        if self.call_positions:
+            across_call = self._lives_across_call(v)
+            for i in range(len(free_regs) - 1, -1, -1):
+                reg = free_regs[i]
+                if (reg in self.save_around_call_regs) != across_call:
+                    del free_regs[i]
+                    return reg
+        return free_regs.pop()
+
     def _check_type(self, v):
         if not we_are_translated() and self.box_types is not None:
             assert isinstance(v, TempVar) or v.type in self.box_types
@@ -395,7 +440,7 @@ class RegisterManager(object):
             return self.reg_bindings[v]
         except KeyError:
             if self.free_regs:
-                loc = self.free_regs.pop()
+                loc = self._pick_free_reg(v)
                 self.reg_bindings[v] = loc
                 return loc
 
@@ -529,7 +574,7 @@ class RegisterManager(object):
 
     def _move_variable_away(self, v, prev_loc):
         if self.free_regs:
-            loc = self.free_regs.pop()
+            loc = self._pick_free_reg(v)
             self.reg_bindings[v] = loc
             self.assembler.regalloc_mov(prev_loc, loc)
         else:
@@ -545,7 +590,7 @@ class RegisterManager(object):
         self._check_type(v)
         if isinstance(v, Const):
             if self.free_regs:
-                loc = self.free_regs.pop()
+                loc = self._pick_free_reg(result_v)
             else:
                 loc = self._spill_var(v, forbidden_vars, None)
             self.assembler.regalloc_mov(self.convert_to_imm(v), loc)
@@ -553,7 +598,13 @@ class RegisterManager(object):
             return loc
         if v not in self.reg_bindings:
             prev_loc = self.frame_manager.loc(v)
-            loc = self.force_allocate_reg(v, forbidden_vars)
+            if self.free_regs:
+                # the register is going to hold 'result_v': pick it
+                # according to the hints about 'result_v'
+                loc = self._pick_free_reg(result_v)
+                self.reg_bindings[v] = loc
+            else:
+                loc = self.force_allocate_reg(v, forbidden_vars)
             self.assembler.regalloc_mov(prev_loc, loc)
         assert v in self.reg_bindings
         if self.longevity[v][1] > self.position:
@@ -847,6 +898,16 @@ def compute_vars_longevity(inputargs, operations):
     
     return longevity, last_real_usage
 
+def compute_call_positions(operations):
+    # returns the sorted list of the indexes in 'operations' of the
+    # calls, i.e. of the places where the registers listed in
+    # 'save_around_call_regs' are clobbered
+    call_positions = []
+    for i in range(len(operations)):
+        if rop.is_call(operations[i].getopnum()):
+            call_positions.append(i)
+    return call_positions
+
 def is_comparison_or_ovf_op(opnum):
     return rop.is_comparison(opnum) or rop.is_ovf(opnum)
 
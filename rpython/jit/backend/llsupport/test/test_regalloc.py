@@ -378,6 +378,55 @@ class TestRegalloc(object):
         assert spilled2 is loc
         rm._check_invariants()
 
+    def test_hint_regs(self):
+        b0, b1, b2 = newboxes(0, 1, 2)
+        longevity = {b0: (0, 2), b1: (0, 2), b2: (1, 2)}
+        rm = RegisterManager(longevity)
+        rm.hint_regs[b1] = r2
+        rm.hint_regs[b2] = r2
+        rm.next_instruction()
+        assert rm.try_allocate_reg(b0) is r0
+        assert rm.try_allocate_reg(b1) is r2
+        rm.next_instruction()
+        # the hinted register is taken: pick another one
+        assert rm.try_allocate_reg(b2) is r1
+        rm._check_invariants()
+
+    def test_call_positions(self):
+        class XRegisterManager(RegisterManager):
+            save_around_call_regs = [r0, r1]
+
+        b0, b1, b2, b3 = newboxes(0, 1, 2, 3)
+        longevity = {b0: (0, 5), b1: (0, 2), b2: (0, 3), b3: (0, 3)}
+        rm = XRegisterManager(longevity)
+        rm.call_positions = [3]
+        rm.next_instruction()
+        # b0 is alive after the call at position 3
+        assert rm.try_allocate_reg(b0) is r2
+        # b1 is not
+        assert rm.try_allocate_reg(b1) is r0
+        # b2 is an argument of the call, but is not needed after it
+        assert rm.try_allocate_reg(b2) is r1
+        # no more register in save_around_call_regs
+        assert rm.try_allocate_reg(b3) is r3
+        rm._check_invariants()
+
+    def test_call_positions_current_call(self):
+        class XRegisterManager(RegisterManager):
+            save_around_call_regs = [r0, r1]
+
+        b0, b1 = newboxes(0, 1)
+        longevity = {b0: (0, 4), b1: (0, 4)}
+        rm = XRegisterManager(longevity)
+        rm.call_positions = [1, 4]
+        rm.next_instruction()
+        rm.next_instruction()
+        # the call at the current position counts
+        assert rm.try_allocate_reg(b0) is r2
+        rm.next_instruction()
+        assert rm.try_allocate_reg(b1) is r0
+        rm._check_invariants()
+
 
     def test_hint_frame_locations_1(self):
         for hint_value in range(11):
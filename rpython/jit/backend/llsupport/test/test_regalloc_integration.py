@@ -406,6 +406,34 @@ class TestRegallocSimple(BaseTestRegalloc):
         assert len(regalloc.rm.reg_bindings) == 0
         assert len(regalloc.fm.bindings) == 4
 
+    def test_loop_with_call_and_register_hints(self):
+        ops = '''
+        [i0, i1, i2]
+        i3 = int_add(i0, 1)
+        i4 = call_i(ConstClass(f1ptr), i3, descr=f1_calldescr)
+        i5 = int_add(i1, i4)
+        i6 = int_mul(i2, 3)
+        label(i3, i5, i6, descr=targettoken)
+        i13 = int_add(i3, 1)
+        i14 = call_i(ConstClass(f1ptr), i13, descr=f1_calldescr)
+        i15 = int_add(i5, i14)
+        i16 = int_sub(i6, 1)
+        i17 = int_lt(i13, 10)
+        guard_true(i17) [i13, i15, i16]
+        jump(i13, i15, i16, descr=targettoken)
+        '''
+        self.interpret(ops, [0, 0, 5])
+        assert self.getints(3) == [10, sum(range(2, 12)), 15 - 9]
+        regalloc = self.cpu.assembler._regalloc
+        jump_op = self.loop.operations[-1]
+        # the values are computed in the registers where the LABEL
+        # expects them, and the value alive across the calls is in a
+        # callee-saved register
+        arglocs = self.targettoken._x86_arglocs
+        for i in range(jump_op.numargs()):
+            assert regalloc.rm.hint_regs[jump_op.getarg(i)] is arglocs[i]
+        assert arglocs[2] not in regalloc.rm.save_around_call_regs
+
 
 class TestRegallocCompOps(BaseTestRegalloc):
 
@@ -268,6 +268,27 @@ class TranslationTestJITStats(CCompiledMixin):
         res = self.meta_interp(main, [])
         assert res == 0
 
+    def test_compile_pauses(self):
+        from rpython.jit.metainterp.jitprof import Profiler
+        driver = JitDriver(greens = [], reds = ['i'])
+
+        def f():
+            i = 0
+            while i < 100000:
+                driver.jit_merge_point(i=i)
+                i += 1
+
+        def main():
+            f()
+            p50 = jit_hooks.stats_get_compile_pause(None, 50)
+            pmax = jit_hooks.stats_get_compile_pause(None, 100)
+            if 0.0 < p50 <= pmax:
+                return 42
+            return 0
+
+        res = self.meta_interp(main, [], ProfilerClass=Profiler)
+        assert res == 42
+
 class TranslationRemoveTypePtrTest(CCompiledMixin):
     CPUClass = getcpuclass()
 
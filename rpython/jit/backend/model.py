@@ -284,6 +284,8 @@ class AbstractCPU(object):
 class CompiledLoopToken(object):
     asmmemmgr_blocks = None
     asmmemmgr_gcreftracers = None
+    code_size = 0      # bytes of machine code and resume data, see memmgr
+    hotness = 0        # entries and guard failures, see memmgr.py
 
     def __init__(self, cpu, number):
         cpu.tracker.total_compiled_loops += 1
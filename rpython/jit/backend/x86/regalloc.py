@@ -7,8 +7,8 @@ from rpython.jit.backend.llsupport import symbolic
 from rpython.jit.backend.llsupport.descr import CallDescr, unpack_arraydescr
 from rpython.jit.backend.llsupport.gcmap import allocate_gcmap
 from rpython.jit.backend.llsupport.regalloc import (FrameManager, BaseRegalloc,
-     RegisterManager, TempVar, compute_vars_longevity, is_comparison_or_ovf_op,
-     valid_addressing_size, get_scale)
+     RegisterManager, TempVar, compute_vars_longevity, compute_call_positions,
+     is_comparison_or_ovf_op, valid_addressing_size, get_scale)
 from rpython.jit.backend.x86 import rx86
 from rpython.jit.backend.x86.arch import (WORD, JITFRAME_FIXED_SIZE, IS_X86_32,
     IS_X86_64, DEFAULT_FRAME_BYTES)
@@ -174,6 +174,9 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
                                   assembler = self.assembler)
         self.xrm = xmm_reg_mgr_cls(self.longevity, frame_manager = self.fm,
                                    assembler = self.assembler)
+        call_positions = compute_call_positions(operations)
+        self.rm.call_positions = call_positions
+        self.xrm.call_positions = call_positions
         return operations
 
     def prepare_loop(self, inputargs, operations, looptoken, allgcrefs):
@@ -509,9 +512,11 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
         #
         # For symmetrical operations, if 'y' is already in a register
         # and won't be used after the current operation finishes,
-        # then swap the role of 'x' and 'y'
+        # then swap the role of 'x' and 'y' (unless 'x' is already in
+        # the register in which we would like the result to be)
         if (symm and isinstance(argloc, RegLoc) and
-                self.rm.longevity[y][1] == self.rm.position):
+                self.rm.longevity[y][1] == self.rm.position and
+                self.rm.hint_regs.get(op, None) is not self.loc(x)):
             x, y = y, x
             argloc = self.loc(y)
         #
@@ -529,7 +534,13 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
 
     def _consider_lea(self, op, loc):
         argloc = self.loc(op.getarg(1))
-        resloc = self.force_allocate_reg(op)
+        if (self.rm.hint_regs.get(op, None) is loc and
+                not self.rm.stays_alive(op.getarg(0))):
+            # we would like the result to be in the register of the
+            # argument, which dies here: reuse it
+            resloc = self.rm.force_result_in_reg(op, op.getarg(0))
+        else:
+            resloc = self.force_allocate_reg(op)
         self.perform(op, [loc, argloc], resloc)
 
     def consider_int_add(self, op):
@@ -1306,8 +1317,9 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
 
     def compute_hint_frame_locations(self, operations):
         # optimization only: fill in the 'hint_frame_locations' dictionary
-        # of 'fm' based on the JUMP at the end of the loop, by looking
-        # at where we would like the boxes to be after the jump.
+        # of 'fm', and the 'hint_regs' dictionaries of 'rm' and 'xrm',
+        # based on the JUMP at the end of the loop, by looking at where
+        # we would like the boxes to be after the jump.
         op = operations[-1]
         if op.getopnum() != rop.JUMP:
             return
@@ -1334,6 +1346,13 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
                 loc = arglocs[i]
                 if isinstance(loc, FrameLoc):
                     self.fm.hint_frame_pos[box] = self.fm.get_loc_index(loc)
+                elif isinstance(loc, RegLoc) and not box.is_vector():
+                    # if 'box' is computed in this register, then the
+                    # jump does not need to move it
+                    if loc.is_xmm:
+                        self.xrm.hint_regs[box] = loc
+                    else:
+                        self.rm.hint_regs[box] = loc
 
     def consider_jump(self, op):
         assembler = self.assembler
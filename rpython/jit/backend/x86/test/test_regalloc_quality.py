@@ -0,0 +1,24 @@
+from cStringIO import StringIO
+from rpython.jit.backend.x86.tool.regalloc_quality import (measure,
+    print_results, LOOPS)
+
+
+def test_regalloc_quality():
+    results = measure()
+    assert [name for name, counts in results] == [name for name, _ in LOOPS]
+    for name, counts in results:
+        # the values are computed in the registers where the LABEL
+        # expects them
+        assert counts['jump'] == 0, name
+        assert counts['bytes'] > 0
+    counts = dict(results)
+    # the integers alive across the calls stay in callee-saved registers
+    for name in ['call', 'two_calls', 'parse_call']:
+        assert counts[name]['spill'] == 0, name
+    out = StringIO()
+    print_results(results, out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split() == ['loop', 'reg-reg', 'spill', 'reload',
+                                'const', 'jump', 'bytes']
+    assert len(lines) == len(LOOPS) + 2
+    assert lines[-1].split()[0] == 'total'
@@ -0,0 +1,226 @@
+#! /usr/bin/env python
+"""Measure the quality of the register allocation of the x86 backend.
+Compiles a few loops typical of numeric and parsing code and reports
+how many moves the register allocator asks for: between registers,
+spills to the frame, reloads from the frame, loads of constants, and
+the moves needed by the final JUMP to put the values where the LABEL
+expects them.  Lower is better.
+
+Syntax:
+    python regalloc_quality.py
+"""
+import sys
+
+from rpython.jit.backend.detect_cpu import getcpuclass
+from rpython.jit.backend.x86 import regalloc
+from rpython.jit.backend.x86.regloc import RegLoc, FrameLoc
+from rpython.jit.codewriter.effectinfo import EffectInfo
+from rpython.jit.metainterp.history import JitCellToken, TargetToken
+from rpython.jit.tool.oparser import parse
+from rpython.rtyper.annlowlevel import llhelper
+from rpython.rtyper.lltypesystem import lltype
+
+
+# like the loops produced by the JIT, these loops start with a peeled
+# iteration, so that the values are in registers at the LABEL
+LOOPS = [
+    ('call', """
+    [i0, i1, i2]
+    i3 = int_add(i0, 1)
+    i4 = call_i(ConstClass(f1ptr), i3, descr=f1_calldescr)
+    i5 = int_add(i1, i4)
+    i6 = int_mul(i2, 3)
+    label(i3, i5, i6, descr=targettoken)
+    i13 = int_add(i3, 1)
+    i14 = call_i(ConstClass(f1ptr), i13, descr=f1_calldescr)
+    i15 = int_add(i5, i14)
+    i16 = int_mul(i6, 3)
+    i17 = int_lt(i13, 1000)
+    guard_true(i17) [i13, i15, i16]
+    jump(i13, i15, i16, descr=targettoken)
+    """),
+
+    ('two_calls', """
+    [i0, i1, i2, i3, i4]
+    i5 = call_i(ConstClass(f2ptr), i0, i1, descr=f2_calldescr)
+    i6 = int_add(i2, i5)
+    i7 = call_i(ConstClass(f1ptr), i6, descr=f1_calldescr)
+    i8 = int_add(i3, i7)
+    i9 = int_sub(i4, 1)
+    label(i0, i1, i6, i8, i9, descr=targettoken)
+    i15 = call_i(ConstClass(f2ptr), i0, i1, descr=f2_calldescr)
+    i16 = int_add(i6, i15)
+    i17 = call_i(ConstClass(f1ptr), i16, descr=f1_calldescr)
+    i18 = int_add(i8, i17)
+    i19 = int_sub(i9, 1)
+    i20 = int_gt(i19, 0)
+    guard_true(i20) [i0, i1, i16, i18, i19]
+    jump(i0, i1, i16, i18, i19, descr=targettoken)
+    """),
+
+    ('parse', """
+    [p0, i0, i1, i2]
+    i3 = getarrayitem_gc_i(p0, i0, descr=arraydescr)
+    i4 = int_eq(i3, 32)
+    i5 = int_add(i0, 1)
+    i6 = int_add(i1, i4)
+    i7 = int_mul(i2, 10)
+    i8 = int_add(i7, i3)
+    label(p0, i5, i6, i8, descr=targettoken)
+    i13 = getarrayitem_gc_i(p0, i5, descr=arraydescr)
+    i14 = int_eq(i13, 32)
+    i15 = int_add(i5, 1)
+    i16 = int_add(i6, i14)
+    i17 = int_mul(i8, 10)
+    i18 = int_add(i17, i13)
+    i19 = int_lt(i15, 100)
+    guard_true(i19) [p0, i15, i16, i18]
+    jump(p0, i15, i16, i18, descr=targettoken)
+    """),
+
+    ('parse_call', """
+    [p0, i0, i1, i2]
+    i3 = getarrayitem_gc_i(p0, i0, descr=arraydescr)
+    i4 = int_add(i0, 1)
+    i5 = call_i(ConstClass(f2ptr), i3, i1, descr=f2_calldescr)
+    i6 = int_add(i2, i5)
+    label(p0, i4, i5, i6, descr=targettoken)
+    i13 = getarrayitem_gc_i(p0, i4, descr=arraydescr)
+    i14 = int_add(i4, 1)
+    i15 = call_i(ConstClass(f2ptr), i13, i5, descr=f2_calldescr)
+    i16 = int_add(i6, i15)
+    i17 = int_lt(i14, 100)
+    guard_true(i17) [p0, i14, i15, i16]
+    jump(p0, i14, i15, i16, descr=targettoken)
+    """),
+
+    ('float_call', """
+    [f0, f1, i0]
+    f2 = float_mul(f0, f1)
+    f3 = call_f(ConstClass(ffptr), f2, descr=ff_calldescr)
+    f4 = float_add(f0, f3)
+    i1 = int_sub(i0, 1)
+    label(f4, f1, i1, descr=targettoken)
+    f12 = float_mul(f4, f1)
+    f13 = call_f(ConstClass(ffptr), f12, descr=ff_calldescr)
+    f14 = float_add(f4, f13)
+    i11 = int_sub(i1, 1)
+    i12 = int_gt(i11, 0)
+    guard_true(i12) [f14, f1, i11]
+    jump(f14, f1, i11, descr=targettoken)
+    """),
+]
+
+COLUMNS = ['reg-reg', 'spill', 'reload', 'const', 'jump', 'bytes']
+
+
+def f1(x):
+    return x + 1
+
+def f2(x, y):
+    return x * y
+
+def ff(x):
+    return x * 0.5
+
+
+class AllocationStats(object):
+    def __init__(self):
+        self.counts = dict.fromkeys(COLUMNS, 0)
+        self.in_jump = False
+
+    def record_mov(self, from_loc, to_loc):
+        if self.in_jump:
+            self.counts['jump'] += 1
+        elif isinstance(from_loc, RegLoc) and isinstance(to_loc, RegLoc):
+            self.counts['reg-reg'] += 1
+        elif isinstance(to_loc, FrameLoc):
+            self.counts['spill'] += 1
+        elif isinstance(from_loc, FrameLoc):
+            self.counts['reload'] += 1
+        else:
+            self.counts['const'] += 1
+
+    def record_push_or_pop(self, loc):
+        if self.in_jump:
+            self.counts['jump'] += 1
+
+
+def make_namespace(cpu):
+    F1PTR = lltype.Ptr(lltype.FuncType([lltype.Signed], lltype.Signed))
+    F2PTR = lltype.Ptr(lltype.FuncType([lltype.Signed] * 2, lltype.Signed))
+    FFPTR = lltype.Ptr(lltype.FuncType([lltype.Float], lltype.Float))
+    def calldescr(FPTR):
+        return cpu.calldescrof(FPTR.TO, FPTR.TO.ARGS, FPTR.TO.RESULT,
+                               EffectInfo.MOST_GENERAL)
+    return {
+        'f1ptr': llhelper(F1PTR, f1),
+        'f2ptr': llhelper(F2PTR, f2),
+        'ffptr': llhelper(FFPTR, ff),
+        'f1_calldescr': calldescr(F1PTR),
+        'f2_calldescr': calldescr(F2PTR),
+        'ff_calldescr': calldescr(FFPTR),
+        'arraydescr': cpu.arraydescrof(lltype.GcArray(lltype.Signed)),
+    }
+
+def measure_loop(cpu, namespace, source):
+    """Compile the loop and return a dict {column: count}."""
+    namespace = namespace.copy()
+    namespace['targettoken'] = TargetToken()
+    loop = parse(source, cpu, namespace)
+    stats = AllocationStats()
+    assembler = cpu.assembler
+    orig_remap = regalloc.remap_frame_layout_mixed
+    def remap_frame_layout_mixed(*args):
+        stats.in_jump = True
+        try:
+            orig_remap(*args)
+        finally:
+            stats.in_jump = False
+    def regalloc_mov(from_loc, to_loc):
+        stats.record_mov(from_loc, to_loc)
+        type(assembler).regalloc_mov(assembler, from_loc, to_loc)
+    def regalloc_push(loc):
+        stats.record_push_or_pop(loc)
+        type(assembler).regalloc_push(assembler, loc)
+    def regalloc_pop(loc):
+        stats.record_push_or_pop(loc)
+        type(assembler).regalloc_pop(assembler, loc)
+    regalloc.remap_frame_layout_mixed = remap_frame_layout_mixed
+    assembler.regalloc_mov = regalloc_mov
+    assembler.regalloc_push = regalloc_push
+    assembler.regalloc_pop = regalloc_pop
+    try:
+        asminfo = cpu.compile_loop(loop.inputargs, loop.operations,
+                                   JitCellToken())
+    finally:
+        regalloc.remap_frame_layout_mixed = orig_remap
+        del assembler.regalloc_mov
+        del assembler.regalloc_push
+        del assembler.regalloc_pop
+    stats.counts['bytes'] = asminfo.asmlen
+    return stats.counts
+
+def measure(cpu=None):
+    """Return a list of (name, {column: count}), one per loop in LOOPS."""
+    if cpu is None:
+        cpu = getcpuclass()(None, None)
+        cpu.setup_once()
+    namespace = make_namespace(cpu)
+    return [(name, measure_loop(cpu, namespace, source))
+            for name, source in LOOPS]
+
+def print_results(results, out=sys.stdout):
+    print >> out, '%-12s' % 'loop' + ''.join(['%9s' % c for c in COLUMNS])
+    totals = dict.fromkeys(COLUMNS, 0)
+    for name, counts in results:
+        print >> out, '%-12s' % name + ''.join(['%9d' % counts[c]
+                                                 for c in COLUMNS])
+        for c in COLUMNS:
+            totals[c] += counts[c]
+    print >> out, '%-12s' % 'total' + ''.join(['%9d' % totals[c]
+                                                for c in COLUMNS])
+
+
+if __name__ == '__main__':
+    print_results(measure())
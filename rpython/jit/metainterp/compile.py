@@ -168,11 +168,15 @@ def record_loop_or_bridge(metainterp_sd, loop):
     wref = weakref.ref(original_jitcell_token)
     clt = original_jitcell_token.compiled_loop_token
     clt.loop_token_wref = wref
+    resume_size = 0
     for op in loop.operations:
         descr = op.getdescr()
         # not sure what descr.index is about
         if isinstance(descr, ResumeDescr):
             descr.rd_loop_token = clt   # stick it there
+            if isinstance(descr, ResumeGuardDescr) and descr.rd_numb:
+                # approximate: cloned guards share their numbering
+                resume_size += len(descr.rd_numb.code)
             #n = descr.index
             #if n >= 0:       # we also record the resumedescr number
             #    original_jitcell_token.compiled_loop_token.record_faildescr_index(n)
@@ -194,6 +198,9 @@ def record_loop_or_bridge(metainterp_sd, loop):
                 op._descr_wref = weakref.ref(op._descr)
             op.cleardescr()    # clear reference to prevent the history.Stats
                                # from keeping the loop alive during tests
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        metainterp_sd.warmrunnerdesc.memory_manager.record_code_size(
+            original_jitcell_token, resume_size)
     # record this looptoken on the QuasiImmut used in the code
     if loop.quasi_immutable_deps is not None:
         for qmut in loop.quasi_immutable_deps:
@@ -580,7 +587,10 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
                                       name=loopname)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
-        metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        memmgr = metainterp_sd.warmrunnerdesc.memory_manager
+        if asminfo is not None:
+            memmgr.record_code_size(original_jitcell_token, asminfo.asmlen)
+        memmgr.keep_loop_alive(original_jitcell_token)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token, memo):
@@ -625,6 +635,9 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset, memo=memo)
     #
+    if metainterp_sd.warmrunnerdesc is not None and asminfo is not None:
+        metainterp_sd.warmrunnerdesc.memory_manager.record_code_size(
+            original_loop_token, asminfo.asmlen)
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
@@ -727,6 +740,9 @@ class AbstractResumeGuardDescr(ResumeDescr):
     TY_FLOAT        = 0x06
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        clt = self.rd_loop_token
+        if clt is not None:
+            clt.hotness += 1      # see memmgr.py
         if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd)
                 and not rstack.stack_almost_full()):
             self.start_compiling()
@@ -118,6 +118,7 @@ class AbstractFailDescr(AbstractDescr):
     _attrs_ = ('adr_jump_offset', 'rd_locs', 'rd_loop_token', 'rd_vector_info')
 
     rd_vector_info = None
+    rd_loop_token = None
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
         raise NotImplementedError
@@ -9,10 +9,16 @@ from rpython.jit.metainterp.jitexc import JitException
 from rpython.rlib.jit import Counters
 
 
-JITPROF_LINES = Counters.ncounters + 1 + 1
-# one for TOTAL, 1 for calls, update if needed
+JITPROF_LINES = Counters.ncounters + 1 + 1 + 1
+# one for TOTAL, 1 for Pauses, 1 for calls, update if needed
 _CPU_LINES = 4       # the last 4 lines are stored on the cpu
 
+# Histogram of the compilation pauses, i.e. the time spent in the JIT
+# between entering tracing and leaving it, including the optimizer and
+# the backend.  Bucket 0 counts the pauses below 1 microsecond, and
+# bucket i > 0 the pauses between 2**(i-1) and 2**i microseconds.
+PAUSE_BUCKETS = 32
+
 class BaseProfiler(object):
     pass
 
@@ -49,6 +55,9 @@ class EmptyProfiler(BaseProfiler):
     def get_times(self, num):
         return 0.0
 
+    def get_pause_percentile(self, percent):
+        return 0.0
+
 class Profiler(BaseProfiler):
     initialized = False
     timer = staticmethod(time.time)
@@ -59,6 +68,9 @@ class Profiler(BaseProfiler):
     calls = 0
     current = None
     cpu = None
+    pause_start = 0
+    pauses = None
+    max_pause = 0.0
 
     def start(self):
         self.starttime = self.timer()
@@ -67,6 +79,8 @@ class Profiler(BaseProfiler):
         self.counters = [0] * (Counters.ncounters - _CPU_LINES)
         self.calls = 0
         self.current = []
+        self.pauses = [0] * PAUSE_BUCKETS
+        self.max_pause = 0.0
 
     def finish(self):
         self.tk = self.timer()
@@ -77,6 +91,8 @@ class Profiler(BaseProfiler):
         self.t1 = self.timer()
         if self.current:
             self.times[self.current[-1]] += self.t1 - t0
+        else:
+            self.pause_start = self.t1
         self.counters[event] += 1
         self.current.append(event)
 
@@ -91,6 +107,39 @@ class Profiler(BaseProfiler):
             debug_print("BROKEN PROFILER DATA!")
             return
         self.times[ev1] += self.t1 - t0
+        if not self.current:
+            self._record_pause(self.t1 - self.pause_start)
+
+    def _record_pause(self, duration):
+        if duration > self.max_pause:
+            self.max_pause = duration
+        microseconds = int(duration * 1000000.0)
+        bucket = 0
+        while microseconds > 0 and bucket < PAUSE_BUCKETS - 1:
+            microseconds >>= 1
+            bucket += 1
+        self.pauses[bucket] += 1
+
+    def get_pause_percentile(self, percent):
+        """Return an upper bound of the given percentile of the compilation
+        pauses, in seconds.  A percent of 100 or more returns the longest
+        pause."""
+        if percent >= 100:
+            return float(self.max_pause)
+        total = 0
+        for count in self.pauses:
+            total += count
+        if total == 0:
+            return 0.0
+        seen = 0
+        bucket = 0
+        while bucket < PAUSE_BUCKETS:
+            seen += self.pauses[bucket]
+            if seen * 100 >= total * percent:
+                break
+            bucket += 1
+        upper = (1 << bucket) / 1000000.0
+        return min(upper, float(self.max_pause))
 
     def start_tracing(self):   self._start(Counters.TRACING)
     def end_tracing(self):     self._end  (Counters.TRACING)
@@ -137,6 +186,10 @@ class Profiler(BaseProfiler):
                               tim[Counters.BACKEND])
         line = "TOTAL:      \t\t%f" % (self.tk - self.starttime, )
         debug_print(line)
+        line = "Pauses:     \t\tp50 %f p90 %f p99 %f max %f" % (
+            self.get_pause_percentile(50), self.get_pause_percentile(90),
+            self.get_pause_percentile(99), self.get_pause_percentile(100))
+        debug_print(line)
         self._print_intline("ops", cnt[Counters.OPS])
         self._print_intline("recorded ops", cnt[Counters.RECORDED_OPS])
         self._print_intline("  calls", calls)
@@ -155,6 +208,9 @@ class Profiler(BaseProfiler):
         self._print_intline("nvirtuals", cnt[Counters.NVIRTUALS])
         self._print_intline("nvholes", cnt[Counters.NVHOLES])
         self._print_intline("nvreused", cnt[Counters.NVREUSED])
+        self._print_intline("resume bytes", cnt[Counters.RESUME_BYTES])
+        self._print_intline("resume bytes shared",
+                            cnt[Counters.RESUME_BYTES_SHARED])
         self._print_intline("vecopt tried", cnt[Counters.OPT_VECTORIZE_TRY])
         self._print_intline("vecopt success", cnt[Counters.OPT_VECTORIZED])
         cpu = self.cpu
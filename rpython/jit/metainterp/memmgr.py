@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,23 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently, the total size of the machine code and resume data of
+# the alive loops (including their bridges) can be bounded with the
+# 'loop_memory_budget' parameter.  When it is exceeded, the loops that
+# give the least 'hotness' per byte of code are removed from
+# 'alive_loops' until the total fits again.  The hotness of a loop is
+# the number of times it was entered from the interpreter plus the
+# number of guard failures that left it; it is halved after every
+# eviction, so that it reflects the recent past more than the whole
+# history.  Bridges are not evicted on their own: they are patched into
+# the guards of their loop, and they are freed together with it.
+#
+
+def _candidate_lt(a, b):
+    return a[0] < b[0]
+
+CandidateSort = make_timsort_class(lt=_candidate_lt)
+
 
 class MemoryManager(object):
 
@@ -38,6 +56,10 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_code_size = 0       # in bytes; 0 means no limit
+        self.alive_code_size = 0     # total code size of 'alive_loops'
+        self.num_evicted_loops = 0
+        self.num_evicted_bytes = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +71,45 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_code_size(self, max_code_size):
+        if max_code_size < 0:
+            max_code_size = 0
+        self.max_code_size = max_code_size
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if 0 < self.max_code_size < self.alive_code_size:
+            self._evict_loops_now()
 
     def keep_loop_alive(self, looptoken):
+        clt = looptoken.compiled_loop_token
+        if clt is not None:
+            clt.hotness += 1
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                self.alive_loops[looptoken] = None
+                self.alive_code_size += _get_code_size(looptoken)
+
+    def record_code_size(self, looptoken, size):
+        # called after the loop or one of its bridges has been compiled,
+        # with the size of its machine code and then of its resume data
+        clt = looptoken.compiled_loop_token
+        if clt is not None:
+            clt.code_size += size
+            if looptoken in self.alive_loops:
+                self.alive_code_size += size
+
+    def clear(self):
+        self.alive_loops.clear()
+        self.alive_code_size = 0
+
+    def _forget_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= _get_code_size(looptoken)
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -70,14 +121,61 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._forget_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
         #print self.alive_loops.keys()
         if not we_are_translated() and oldtotal != newtotal:
             looptoken = None
-            from rpython.rlib import rgc
-            # a single one is not enough for all tests :-(
-            rgc.collect(); rgc.collect(); rgc.collect()
+            _collect_now()
         debug_stop("jit-mem-collect")
+
+    def _evict_loops_now(self):
+        debug_start("jit-mem-evict")
+        debug_print("Current generation:", self.current_generation)
+        debug_print("Code size before:  ", self.alive_code_size)
+        # the loops that ran since the previous loop or bridge was
+        # compiled are kept, starting with that loop itself
+        min_generation = self.current_generation - 1
+        candidates = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.generation >= min_generation:
+                continue
+            size = _get_code_size(looptoken)
+            if size <= 0:
+                continue
+            hotness = looptoken.compiled_loop_token.hotness
+            candidates.append((hotness / float(size), looptoken))
+        CandidateSort(candidates).sort()
+        evicted = 0
+        while (evicted < len(candidates) and
+               self.alive_code_size > self.max_code_size):
+            looptoken = candidates[evicted][1]
+            self.num_evicted_bytes += _get_code_size(looptoken)
+            self._forget_loop(looptoken)
+            evicted += 1
+        self.num_evicted_loops += evicted
+        for looptoken in self.alive_loops.keys():
+            clt = looptoken.compiled_loop_token
+            if clt is not None:
+                clt.hotness >>= 1
+        debug_print("Loop tokens evicted:", evicted)
+        debug_print("Code size after:   ", self.alive_code_size)
+        if not we_are_translated() and evicted > 0:
+            looptoken = None
+            candidates = None
+            _collect_now()
+        debug_stop("jit-mem-evict")
+
+
+def _get_code_size(looptoken):
+    clt = looptoken.compiled_loop_token
+    if clt is None:
+        return 0
+    return clt.code_size
+
+def _collect_now():
+    from rpython.rlib import rgc
+    # a single one is not enough for all tests :-(
+    rgc.collect(); rgc.collect(); rgc.collect()
@@ -184,6 +184,11 @@ class ResumeDataLoopMemo(object):
         self.nvirtuals = 0
         self.nvholes = 0
         self.nvreused = 0
+        # the last numbering stored in full, used as a base for the next ones
+        self.base_numb = resumecode.NULL_NUMBER
+        self.base_items = None
+        self.nresumebytes = 0
+        self.nresumebytes_shared = 0
 
     def getconst(self, const):
         if const.type == INT:
@@ -218,6 +223,27 @@ class ResumeDataLoopMemo(object):
         self.consts.append(const)
         return result
 
+    def create_numbering(self, numb_state):
+        """ Turn the resume code of a guard into a NUMBERING, as a delta
+        against the previous full one if that is at most half the size.
+        Otherwise the new numbering is stored in full and becomes the base
+        for the following guards.
+        """
+        items = numb_state.current
+        full_size = resumecode.encoded_size(items)
+        if self.base_items is not None:
+            delta = resumecode.encode_delta(items, self.base_items)
+            delta_size = resumecode.encoded_size(delta)
+            if delta_size * 2 <= full_size:
+                self.nresumebytes += delta_size
+                self.nresumebytes_shared += full_size - delta_size
+                return resumecode.make_numbering(delta, self.base_numb)
+        numb = numb_state.create_numbering()
+        self.base_numb = numb
+        self.base_items = items
+        self.nresumebytes += len(numb.code)
+        return numb
+
     # env numbering
 
     def _number_boxes(self, iter, arr, optimizer, numb_state):
@@ -317,6 +343,9 @@ class ResumeDataLoopMemo(object):
         profiler.count(jitprof.Counters.NVIRTUALS, self.nvirtuals)
         profiler.count(jitprof.Counters.NVHOLES, self.nvholes)
         profiler.count(jitprof.Counters.NVREUSED, self.nvreused)
+        profiler.count(jitprof.Counters.RESUME_BYTES, self.nresumebytes)
+        profiler.count(jitprof.Counters.RESUME_BYTES_SHARED,
+                       self.nresumebytes_shared)
 
 _frame_info_placeholder = (None, 0, 0)
 
@@ -465,7 +494,7 @@ class ResumeDataVirtualAdder(VirtualVisitor):
         numb_state.patch(1, len(liveboxes))
 
         self._add_optimizer_sections(numb_state, liveboxes, liveboxes_from_env)
-        storage.rd_numb = numb_state.create_numbering()
+        storage.rd_numb = self.memo.create_numbering(numb_state)
         storage.rd_consts = self.memo.consts
         return liveboxes[:]
 
@@ -20,6 +20,19 @@
 
   # ----- optimization section
   <more code>                                      further sections according to bridgeopt.py
+
+The items above are stored as variable-sized integers in the 'code' array
+of a NUMBERING.  Guards of the same trace tend to have very similar resume
+code, which is why a NUMBERING can also be a delta against another one,
+'prev', that is itself stored in full.  In that case 'code' contains runs:
+
+  [<n> <m> <item 1> ... <item m>]
+  [<n> <m> <item 1> ... <item m>]
+  ...
+
+meaning "the next n items are the same as the items at the same positions
+in 'prev', then come m items that are different".  The Reader decodes both
+forms lazily, one item at a time, without expanding the delta.
 """
 
 from rpython.rtyper.lltypesystem import rffi, lltype
@@ -27,6 +40,7 @@ from rpython.rlib import objectmodel
 
 NUMBERINGP = lltype.Ptr(lltype.GcForwardReference())
 NUMBERING = lltype.GcStruct('Numbering',
+                            ('prev', NUMBERINGP),
                             ('code', lltype.Array(rffi.UCHAR)))
 NUMBERINGP.TO.become(NUMBERING)
 NULL_NUMBER = lltype.nullptr(NUMBERING)
@@ -50,6 +64,18 @@ def append_numbering(lst, item):
         lst.append(rffi.cast(rffi.UCHAR, item >> 14))
 
 
+def numbering_item_size(item):
+    """ number of bytes that append_numbering() uses for 'item' """
+    item = rffi.cast(lltype.Signed, item)
+    item *= 2
+    if item < 0:
+        item = -1 - item
+    if item < 2**7:
+        return 1
+    elif item < 2**14:
+        return 2
+    return 3
+
 def numb_next_item(numb, index):
     value = rffi.cast(lltype.Signed, numb.code[index])
     index += 1
@@ -74,12 +100,56 @@ def numb_next_n_items(numb, size, index):
 
 def unpack_numbering(numb):
     l = []
-    i = 0
-    while i < len(numb.code):
-        next, i = numb_next_item(numb, i)
-        l.append(next)
+    reader = Reader(numb)
+    while not reader.at_end():
+        l.append(reader.next_item())
     return l
 
+# a run of equal items shorter than this is cheaper to store as it is
+MIN_COPY_RUN = 3
+
+def _same_run_length(items, base_items, i):
+    n = 0
+    while (i + n < len(items) and i + n < len(base_items) and
+           items[i + n] == base_items[i + n]):
+        n += 1
+    return n
+
+def encode_delta(items, base_items):
+    """ Return the runs, as a list of ints, that express 'items' as a
+    delta against 'base_items'; see the docstring of this module. """
+    result = []
+    i = 0
+    while i < len(items):
+        copy = _same_run_length(items, base_items, i)
+        i += copy
+        start = i
+        while i < len(items):
+            if _same_run_length(items, base_items, i) >= MIN_COPY_RUN:
+                break
+            i += 1
+        result.append(copy)
+        result.append(i - start)
+        for j in range(start, i):
+            result.append(rffi.cast(lltype.Signed, items[j]))
+    return result
+
+def encoded_size(items):
+    size = 0
+    for item in items:
+        size += numbering_item_size(item)
+    return size
+
+def make_numbering(items, prev=NULL_NUMBER):
+    final = objectmodel.newlist_hint(len(items) * 3)
+    for item in items:
+        append_numbering(final, item)
+    numb = lltype.malloc(NUMBERING, len(final))
+    numb.prev = prev
+    for i, elt in enumerate(final):
+        numb.code[i] = elt
+    return numb
+
 class Writer(object):
     def __init__(self, size=0):
         self.current = objectmodel.newlist_hint(size)
@@ -93,13 +163,7 @@ class Writer(object):
         return self.append_short(short)
 
     def create_numbering(self):
-        final = objectmodel.newlist_hint(len(self.current) * 3)
-        for item in self.current:
-            append_numbering(final, item)
-        numb = lltype.malloc(NUMBERING, len(final))
-        for i, elt in enumerate(final):
-            numb.code[i] = elt
-        return numb
+        return make_numbering(self.current)
 
     def patch_current_size(self, index):
         self.patch(index, len(self.current))
@@ -119,18 +183,62 @@ class Reader(object):
         self.code = code
         self.cur_pos = 0 # index into the code
         self.items_read = 0 # number of items read
+        # for deltas: index into code.prev, and what is left of the run
+        self.prev_pos = 0
+        self.copy_left = 0
+        self.different_left = 0
 
     def next_item(self):
-        result, self.cur_pos = numb_next_item(self.code, self.cur_pos)
+        if self.code.prev:
+            result = self._next_delta_item()
+        else:
+            result, self.cur_pos = numb_next_item(self.code, self.cur_pos)
         self.items_read += 1
         return result
 
+    def _next_delta_item(self):
+        prev = self.code.prev
+        if self.copy_left == 0 and self.different_left == 0:
+            self.copy_left, self.cur_pos = numb_next_item(
+                self.code, self.cur_pos)
+            self.different_left, self.cur_pos = numb_next_item(
+                self.code, self.cur_pos)
+        if self.copy_left > 0:
+            result, self.prev_pos = numb_next_item(prev, self.prev_pos)
+            self.copy_left -= 1
+        else:
+            result, self.cur_pos = numb_next_item(self.code, self.cur_pos)
+            if self.prev_pos < len(prev.code):
+                _, self.prev_pos = numb_next_item(prev, self.prev_pos)
+            self.different_left -= 1
+        return result
+
+    def at_end(self):
+        return (self.cur_pos >= len(self.code.code) and
+                self.copy_left == 0 and self.different_left == 0)
+
     def peek(self):
-        result, _ = numb_next_item(self.code, self.cur_pos)
+        if not self.code.prev:
+            result, _ = numb_next_item(self.code, self.cur_pos)
+            return result
+        cur_pos = self.cur_pos
+        prev_pos = self.prev_pos
+        copy_left = self.copy_left
+        different_left = self.different_left
+        result = self._next_delta_item()
+        self.cur_pos = cur_pos
+        self.prev_pos = prev_pos
+        self.copy_left = copy_left
+        self.different_left = different_left
         return result
 
     def jump(self, size):
         """ jump n items forward without returning anything """
+        if self.code.prev:
+            for i in range(size):
+                self._next_delta_item()
+            self.items_read += size
+            return
         index = self.cur_pos
         for i in range(size):
             _, index = numb_next_item(self.code, index)
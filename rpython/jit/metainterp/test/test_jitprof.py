@@ -54,6 +54,8 @@ class TestProfile(ProfilerMixin):
             ]
         assert profiler.events == expected
         assert profiler.times == [2, 1]
+        assert sum(profiler.pauses) == 1
+        assert profiler.get_pause_percentile(100) == 3
         py.test.skip("disabled until unrolling")
         assert profiler.counters == [1, 1, 3, 3, 2, 15, 2, 0, 0, 0, 0,
                                      0, 0, 0, 0, 0, 0, 0]
@@ -97,3 +99,18 @@ class TestProfile(ProfilerMixin):
         assert res == f(6, 7, 2)
         profiler = pyjitpl._warmrunnerdesc.metainterp_sd.profiler
         assert profiler.calls == 1
+
+
+def test_pause_percentiles():
+    profiler = Profiler()
+    profiler.start()
+    assert profiler.get_pause_percentile(50) == 0.0
+    for duration in [0.0000005, 0.00001, 0.001, 0.001, 0.5]:
+        profiler._record_pause(duration)
+    assert profiler.pauses[0] == 1
+    assert sum(profiler.pauses) == 5
+    assert profiler.get_pause_percentile(0) == 0.000001
+    assert profiler.get_pause_percentile(50) == 0.001024
+    assert profiler.get_pause_percentile(80) == 0.001024
+    assert profiler.get_pause_percentile(99) == 0.5
+    assert profiler.get_pause_percentile(100) == 0.5
@@ -21,6 +21,17 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    code_size = 0
+    hotness = 0
+
+def make_token(code_size):
+    token = FakeLoopToken()
+    token.compiled_loop_token = FakeCompiledLoopToken()
+    token.compiled_loop_token.code_size = code_size
+    return token
 
 
 class _TestMemoryManager:
@@ -78,6 +89,89 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_code_size_budget_disabled(self):
+        memmgr = MemoryManager()
+        tokens = [make_token(100) for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        assert memmgr.alive_code_size == 1000
+        assert memmgr.num_evicted_loops == 0
+
+    def test_code_size_budget(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_code_size(250)
+        tokens = [make_token(100) for i in range(3)]
+        for i in range(len(tokens)):
+            memmgr.keep_loop_alive(tokens[i])
+            for j in range(i * 5):       # tokens[0] is the least used
+                memmgr.keep_loop_alive(tokens[i])
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[1:])
+        assert memmgr.alive_code_size == 200
+        assert memmgr.num_evicted_loops == 1
+        assert memmgr.num_evicted_bytes == 100
+        # the hotness of the loops left was halved
+        assert tokens[1].compiled_loop_token.hotness == 3
+        assert tokens[2].compiled_loop_token.hotness == 5
+
+    def test_code_size_budget_per_byte(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_code_size(500)
+        big = make_token(400)
+        small = make_token(50)
+        for token in [big, small]:
+            for j in range(10):
+                memmgr.keep_loop_alive(token)
+        memmgr.next_generation()
+        # same hotness, but 'big' gives much less of it per byte
+        memmgr.keep_loop_alive(make_token(100))
+        memmgr.next_generation()
+        assert big not in memmgr.alive_loops
+        assert small in memmgr.alive_loops
+        assert memmgr.alive_code_size == 150
+
+    def test_code_size_budget_bridges(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_code_size(250)
+        tokens = [make_token(100) for i in range(2)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.keep_loop_alive(token)
+        memmgr.next_generation()
+        assert memmgr.alive_code_size == 200
+        # a bridge attached to tokens[0] makes its loop the least valuable
+        memmgr.record_code_size(tokens[0], 100)
+        assert tokens[0].compiled_loop_token.code_size == 200
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[1]: None}
+        assert memmgr.num_evicted_bytes == 200
+
+    def test_code_size_budget_current_generation(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_code_size(50)
+        token = make_token(100)
+        memmgr.keep_loop_alive(token)
+        # the loop that was just compiled is not evicted immediately
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {token: None}
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {}
+        assert memmgr.alive_code_size == 0
+
+    def test_code_size_with_max_age(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        tokens = [make_token(10) for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[7:])
+        assert memmgr.alive_code_size == 30
+        memmgr.keep_loop_alive(tokens[0])
+        assert memmgr.alive_code_size == 40
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -12,7 +12,7 @@ from rpython.jit.metainterp.resume import ResumeDataVirtualAdder,\
      capture_resumedata, ResumeDataLoopMemo, UNASSIGNEDVIRTUAL, INT,\
      annlowlevel, PENDINGFIELDSP, TAG_CONST_OFFSET
 from rpython.jit.metainterp.resumecode import unpack_numbering,\
-     create_numbering, NULL_NUMBER
+     create_numbering, NULL_NUMBER, encoded_size
 from rpython.jit.metainterp.opencoder import Trace, Snapshot, TopSnapshot
 
 from rpython.jit.metainterp.optimizeopt import info
@@ -936,6 +936,51 @@ def test_ResumeDataLoopMemo_number():
         2, 1, tag(3, TAGINT), tag(0, TAGVIRTUAL), tag(0, TAGBOX), tag(3, TAGINT)
         ] + [0, 0]
 
+def test_ResumeDataLoopMemo_create_numbering():
+    from rpython.jit.metainterp.resume import NumberingState
+    from rpython.jit.metainterp.jitprof import Counters
+
+    def make_numb_state(items):
+        numb_state = NumberingState(len(items))
+        for item in items:
+            numb_state.append_int(item)
+        return numb_state
+
+    class FakeProfiler(object):
+        def __init__(self):
+            self.counters = {}
+        def count(self, kind, inc=1):
+            self.counters[kind] = self.counters.get(kind, 0) + inc
+
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    items1 = [40, 3] + [tag(i, TAGBOX) for i in range(38)]
+    numb1 = memo.create_numbering(make_numb_state(items1))
+    assert not numb1.prev
+    assert unpack_numbering(numb1) == items1
+    # the second guard differs only by one box: stored as a delta
+    items2 = items1[:]
+    items2[20] = tag(3, TAGINT)
+    numb2 = memo.create_numbering(make_numb_state(items2))
+    assert numb2.prev == numb1
+    assert len(numb2.code) < len(numb1.code) // 4
+    assert unpack_numbering(numb2) == items2
+    # the third one is too different: it becomes the new base
+    items3 = [20, 1] + [tag(i, TAGINT) for i in range(18)]
+    numb3 = memo.create_numbering(make_numb_state(items3))
+    assert not numb3.prev
+    assert unpack_numbering(numb3) == items3
+    numb4 = memo.create_numbering(make_numb_state(items3 + [tag(1, TAGBOX)]))
+    assert numb4.prev == numb3
+    assert unpack_numbering(numb4) == items3 + [tag(1, TAGBOX)]
+    profiler = FakeProfiler()
+    memo.update_counters(profiler)
+    numbs = [numb1, numb2, numb3, numb4]
+    assert profiler.counters[Counters.RESUME_BYTES] == sum(
+        [len(numb.code) for numb in numbs])
+    assert profiler.counters[Counters.RESUME_BYTES_SHARED] == (
+        encoded_size(items2) - len(numb2.code) +
+        encoded_size(items3) + 1 - len(numb4.code))
+
 @given(strategies.lists(strategies.builds(IntFrontendOp, strategies.just(0)) | intconsts,
        min_size=1))
 def test_ResumeDataLoopMemo_random(lst):
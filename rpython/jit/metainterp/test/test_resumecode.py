@@ -1,5 +1,6 @@
 from rpython.jit.metainterp.resumecode import create_numbering,\
-    unpack_numbering, Reader, Writer
+    unpack_numbering, Reader, Writer, encode_delta, make_numbering,\
+    encoded_size
 from rpython.rtyper.lltypesystem import lltype
 
 from hypothesis import strategies, given, example
@@ -60,3 +61,50 @@ def test_patch(l):
         n = w.create_numbering()
         assert unpack_numbering(n)[1:] == l
         assert unpack_numbering(n)[0] == middle + 1
+
+def make_bases(l):
+    return [l, l[1:], [x // 2 for x in l], l + [5, 6, 7], []]
+
+@hypothesis_and_examples
+def test_delta_roundtrip(l):
+    for base_l in make_bases(l):
+        base = create_numbering(base_l)
+        delta = encode_delta(l, base_l)
+        n = make_numbering(delta, base)
+        assert n.prev == base
+        assert len(n.code) == encoded_size(delta)
+        assert unpack_numbering(n) == l
+
+def test_delta_compressing():
+    l = range(100)
+    base = create_numbering(l)
+    l2 = l[:]
+    l2[50] = -5
+    n = make_numbering(encode_delta(l2, l), base)
+    assert unpack_numbering(n) == l2
+    assert len(n.code) == 5      # [50 1 -5] [49 0]
+    n = make_numbering(encode_delta(l, l), base)
+    assert unpack_numbering(n) == l
+    assert len(n.code) == 3      # [100 0]
+
+def test_delta_reader():
+    for l in examples:
+        check_delta_reader(l)
+
+def check_delta_reader(l):
+    for base_l in make_bases(l):
+        n = make_numbering(encode_delta(l, base_l), create_numbering(base_l))
+        r = Reader(n)
+        for i, elt in enumerate(l):
+            assert r.items_read == i
+            assert not r.at_end()
+            assert r.peek() == elt
+            assert r.next_item() == elt
+        assert r.at_end()
+        for size in set([0, len(l) // 2, len(l) - 1]):
+            if size < 0:
+                continue
+            r = Reader(n)
+            r.jump(size)
+            assert r.items_read == size
+            assert r.next_item() == l[size]
@@ -11,6 +11,8 @@ REGEXES = [
     (('tracing_no', 'tracing_time'), '^Tracing:\s+([\d.]+)\s+([\d.]+)$'),
     (('backend_no', 'backend_time'), '^Backend:\s+([\d.]+)\s+([\d.]+)$'),
     (None, '^TOTAL.*$'),
+    (('pause_p50', 'pause_p90', 'pause_p99', 'pause_max'),
+     '^Pauses:\s+p50 ([\d.]+) p90 ([\d.]+) p99 ([\d.]+) max ([\d.]+)$'),
     (('ops.total',), '^ops:\s+(\d+)$'),
     (('recorded_ops.total',), '^recorded ops:\s+(\d+)$'),
     (('recorded_ops.calls',), '^\s+calls:\s+(\d+)$'),
@@ -27,6 +29,8 @@ REGEXES = [
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
+    (('resume_bytes',), '^resume bytes:\s+(\d+)$'),
+    (('resume_bytes_shared',), '^resume bytes shared:\s+(\d+)$'),
     (('vecopt_tried',), '^vecopt tried:\s+(\d+)$'),
     (('vecopt_success',), '^vecopt success:\s+(\d+)$'),
     (('total_compiled_loops',),   '^Total # of loops:\s+(\d+)$'),
@@ -53,6 +57,10 @@ class OutputInfo(object):
     backend_time = 0.0
     asm_no = 0
     asm_time = 0.0
+    pause_p50 = 0.0
+    pause_p90 = 0.0
+    pause_p99 = 0.0
+    pause_max = 0.0
     guards = 0
     opt_ops = 0
     opt_guards = 0
@@ -60,6 +68,8 @@ class OutputInfo(object):
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
+    resume_bytes = 0
+    resume_bytes_shared = 0
     vecopt_tried = 0
     vecopt_success = 0
 
@@ -46,6 +46,7 @@ def test_really_run():
 DATA = '''Tracing:         1       0.006992
 Backend:        1       0.000525
 TOTAL:                  0.025532
+Pauses:                 p50 0.000256 p90 0.004096 p99 0.007003 max 0.007003
 ops:                    2
 recorded ops:           6
   calls:                3
@@ -62,6 +63,8 @@ abort: force quasi-immut: 3
 nvirtuals:              13
 nvholes:                14
 nvreused:               15
+resume bytes:           1200
+resume bytes shared:    800
 vecopt tried:           12
 vecopt success:         4
 Total # of loops:       100
@@ -76,6 +79,10 @@ def test_parse():
     assert info.tracing_time == 0.006992
     assert info.backend_no == 1
     assert info.backend_time == 0.000525
+    assert info.pause_p50 == 0.000256
+    assert info.pause_p90 == 0.004096
+    assert info.pause_p99 == 0.007003
+    assert info.pause_max == 0.007003
     assert info.ops.total == 2
     assert info.recorded_ops.total == 6
     assert info.recorded_ops.calls == 3
@@ -91,5 +98,7 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.resume_bytes == 1200
+    assert info.resume_bytes_shared == 800
     assert info.vecopt_tried == 12
     assert info.vecopt_success == 4
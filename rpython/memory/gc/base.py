@@ -1,7 +1,9 @@
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, rffi
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rlib.debug import ll_assert
+from rpython.rlib import rgc
 from rpython.memory.gcheader import GCHeaderBuilder
+from rpython.memory.gc.hook import GcHooks
 from rpython.memory.support import DEFAULT_CHUNK_SIZE
 from rpython.memory.support import get_address_stack, get_address_deque
 from rpython.memory.support import AddressDict, null_address_dict
@@ -24,7 +26,7 @@ class GCBase(object):
     gcflag_extra = 0   # or a real GC flag that is always 0 when not collecting
 
     def __init__(self, config, chunk_size=DEFAULT_CHUNK_SIZE,
-                 translated_to_c=True):
+                 translated_to_c=True, hooks=None):
         self.gcheaderbuilder = GCHeaderBuilder(self.HDR)
         self.AddressStack = get_address_stack(chunk_size)
         self.AddressDeque = get_address_deque(chunk_size)
@@ -33,6 +35,9 @@ class GCBase(object):
         self.config = config
         assert isinstance(translated_to_c, bool)
         self.translated_to_c = translated_to_c
+        if hooks is None:
+            hooks = GcHooks()     # the default hooks, which do nothing
+        self.hooks = hooks
 
     def setup(self):
         # all runtime mutable values' setup should happen here
@@ -199,6 +204,24 @@ class GCBase(object):
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
+    def collect_step(self):
+        """
+        This is meant to be used together with incminimark.  For the other
+        GCs it is equivalent to a full collection.  Return a value on which
+        rgc.is_done() returns True.
+        """
+        self.collect()
+        return rgc._encode_states(1, 0)
+
+    def set_max_pause(self, ticks):
+        pass
+
+    def release_memory(self):
+        pass
+
+    def get_stats(self, stats_no):
+        return -1
+
     def trace(self, obj, callback, arg):
         """Enumerate the locations inside the given obj that can contain
         GC pointers.  For each such location, callback(pointer, arg) is
@@ -0,0 +1,76 @@
+from rpython.rlib import rgc
+
+# WARNING: for now, the hooks are only called by incminimark.  Add calls
+# to the other GCs if you need them there.
+
+class GcHooks(object):
+    """
+    Base class for the GC hooks: an instance of a subclass can be passed
+    to the GC (see the 'get_gchooks' function of the translation targets)
+    to be told about minor collections, the steps of major collections,
+    and the end of major collections.
+
+    The on_*() methods are called from the middle of a collection.  They
+    must not do anything that can allocate GC memory: they can only update
+    some statistics, set a flag, or fire an action that will run later.
+    The durations are in the units of rtimer.read_timestamp(), i.e. the
+    units of the timestamps in the PYPYLOG output.
+    """
+
+    def is_gc_minor_enabled(self):
+        return False
+
+    def is_gc_collect_step_enabled(self):
+        return False
+
+    def is_gc_collect_enabled(self):
+        return False
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    bytes_promoted, nursery_size, threshold_reached):
+        """
+        Called after a minor collection.  'total_memory_used' is the memory
+        used by old objects, 'bytes_promoted' the size of the objects that
+        were moved out of the nursery, and 'threshold_reached' tells if a
+        major collection is due.
+        """
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        """
+        Called after each step of a major collection.  'oldstate' and
+        'newstate' are the states of the GC before and after the step, see
+        incminimark.STATE_* and incminimark.GC_STATES.
+        """
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        """
+        Called after a major collection is fully done.
+        """
+
+    # the fire_*() methods are called by the GC; don't override them
+
+    @rgc.no_collect
+    def fire_gc_minor(self, duration, total_memory_used, pinned_objects,
+                      bytes_promoted, nursery_size, threshold_reached):
+        if self.is_gc_minor_enabled():
+            self.on_gc_minor(duration, total_memory_used, pinned_objects,
+                             bytes_promoted, nursery_size, threshold_reached)
+
+    @rgc.no_collect
+    def fire_gc_collect_step(self, duration, oldstate, newstate):
+        if self.is_gc_collect_step_enabled():
+            self.on_gc_collect_step(duration, oldstate, newstate)
+
+    @rgc.no_collect
+    def fire_gc_collect(self, num_major_collects,
+                        arenas_count_before, arenas_count_after,
+                        arenas_bytes, rawmalloc_bytes_before,
+                        rawmalloc_bytes_after):
+        if self.is_gc_collect_enabled():
+            self.on_gc_collect(num_major_collects,
+                               arenas_count_before, arenas_count_after,
+                               arenas_bytes, rawmalloc_bytes_before,
+                               rawmalloc_bytes_after)
@@ -6,6 +6,21 @@ Environment variables can be used to fine-tune the following parameters:
                          '4M'.  Small values
                          (like 1 or 1KB) are useful for debugging.
 
+ PYPY_GC_NURSERY_MAX     If set to more than PYPY_GC_NURSERY, the nursery
+                         size is adapted after each minor collection
+                         between these two sizes: it grows while a large
+                         part of the nursery survives the minor collections,
+                         and shrinks again when almost nothing survives.
+                         Default is 0 (the nursery has a fixed size).
+
+ PYPY_GC_RELEASE_SPARSE  After each major collection, give back to the OS
+                         the memory of the free pages in the arenas that
+                         have at least this fraction of free pages, like
+                         '0.5'.  Long-running programs can use it to shrink
+                         their RSS after a peak: the GC never moves old
+                         objects, so these sparse arenas may never become
+                         entirely free.  Default is 0 (off).
+
  PYPY_GC_NURSERY_DEBUG   If set to non-zero, will fill nursery with garbage,
                          to help debugging.
 
@@ -15,6 +30,12 @@ Environment variables can be used to fine-tune the following parameters:
                          to size that survives minor collection * 1.5 so we
                          reclaim anything all the time.
 
+ PYPY_GC_MAX_PAUSE       Try to keep the marking work of each step of a
+                         major collection under this duration, in the
+                         units of the PYPYLOG timestamps: the size of the
+                         marking steps is then adapted at run-time, starting
+                         from PYPY_GC_INCREMENT_STEP.  Default is 0 (off).
+
  PYPY_GC_MAJOR_COLLECT   Major collection memory factor.  Default is '1.82',
                          which means trigger a major collection when the
                          memory consumed equals 1.82 times the memory
@@ -72,6 +93,8 @@ from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib import rgc
+from rpython.rlib.rtimer import read_timestamp
 from rpython.memory.gc.minimarkpage import out_of_memory
 
 #
@@ -187,6 +210,7 @@ FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
 NURSARRAY = lltype.Array(llmemory.Address)
+BARRIERSTATSARRAY = lltype.Array(lltype.Signed)
 
 # ____________________________________________________________
 
@@ -280,6 +304,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 nursery_size_max=0,
+                 release_sparse_arenas=0.0,
                  ArenaCollectionClass=None,
                  **kwds):
         "NOT_RPYTHON"
@@ -287,14 +313,38 @@ class IncrementalMiniMarkGC(MovingGCBase):
         assert small_request_threshold % WORD == 0
         self.read_from_env = read_from_env
         self.nursery_size = nursery_size
+        # if nursery_size_max > nursery_size, the nursery size is adapted
+        # between these two sizes, see _adapt_nursery_size()
+        self.nursery_size_min = nursery_size
+        self.nursery_size_max = nursery_size_max
+        # see PYPY_GC_RELEASE_SPARSE
+        self.release_sparse_arenas = release_sparse_arenas
 
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
         self.num_major_collects = 0
+        self.num_minor_collects = 0
+        self.total_gc_time = 0      # in the units of read_timestamp()
+        self.peak_memory_used = r_uint(0)
         self.min_heap_size = 0.0
         self.max_heap_size = 0.0
+        self.max_pause = 0
+        self.pause_increment_step = 0.0
+        self.pause_sweep_step = 0.0
+        self.stop_the_world = False
         self.max_heap_size_already_raised = False
+        self.memory_pressure = 0    # since the end of the last major gc
+        #
+        # Write barrier statistics, only updated if the translation
+        # option --gcbarrierstats is enabled.  The per-type counters
+        # are indexed by get_member_index(typeid).
+        self.num_wb_slowpath = 0
+        self.num_cards_scanned = 0
+        self.num_old_objects_rescanned = 0
+        self.last_minor_wb_slowpath = 0
+        self.old_objects_rescanned_per_type = lltype.nullptr(
+            BARRIERSTATSARRAY)
         self.max_delta = float(r_uint(-1))
         self.max_number_of_pinned_objects = 0      # computed later
         #
@@ -371,6 +421,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_rawmalloced_objects = self.AddressStack()
         self.raw_malloc_might_sweep = self.AddressStack()
         self.rawmalloced_total_size = r_uint(0)
+        self.stat_arenas_count_before = 0
+        self.stat_rawmalloced_total_size = r_uint(0)
 
         self.gc_state = STATE_SCANNING
         #
@@ -484,15 +536,31 @@ class IncrementalMiniMarkGC(MovingGCBase):
             else:
                 self.gc_increment_step = newsize * 4
             #
+            release_sparse = env.read_float_from_env('PYPY_GC_RELEASE_SPARSE')
+            if release_sparse > 0.0:
+                self.release_sparse_arenas = release_sparse
+            #
             nursery_debug = env.read_uint_from_env('PYPY_GC_NURSERY_DEBUG')
             if nursery_debug > 0:
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            nursery_size_max = env.read_from_env('PYPY_GC_NURSERY_MAX')
+            if nursery_size_max > newsize:
+                self.nursery_size_max = nursery_size_max & ~(WORD-1)
+            else:
+                self.nursery_size_max = 0
+            #
             self._minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
+            self.nursery_size_min = newsize
             self.allocate_nursery()
+            #
+            # after the nursery size is known: it seeds the sweeping step
+            max_pause = env.read_uint_from_env('PYPY_GC_MAX_PAUSE')
+            if max_pause > 0:
+                self.set_max_pause(intmask(max_pause))
         #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
         if env_max_number_of_pinned_objects:
@@ -510,7 +578,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def _nursery_memory_size(self):
         extra = self.nonlarge_max + 1
-        return self.nursery_size + extra
+        return max(self.nursery_size, self.nursery_size_max) + extra
 
     def _alloc_nursery(self):
         # the start of the nursery: we actually allocate a bit more for
@@ -752,6 +820,34 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.rrc_invoke_callback()
 
 
+    def collect_step(self):
+        """Do a minor collection followed by a single major collection
+        step.  Return the GC states before and after, encoded as
+        documented in rgc.collect_step().
+        """
+        oldstate = self.gc_state
+        self._minor_collection()
+        self.major_collection_step()
+        self.rrc_invoke_callback()
+        return rgc._encode_states(oldstate, self.gc_state)
+
+    def release_memory(self):
+        """Do a minor collection, and give back to the OS the memory of
+        the then-empty nursery and of all the free pages in the arenas.
+        The nursery's pages are faulted in again by the next allocations.
+        """
+        debug_start("gc-release-memory")
+        self._minor_collection()
+        released = 0
+        if not self.nursery_barriers.non_empty():   # no pinned objects
+            size = max(self.nursery_size, self.nursery_size_max)
+            llarena.arena_reset(self.nursery, size, 4)
+            released += size
+        released += self.ac.release_free_pages(1) * self.ac.page_size
+        debug_print("released about", released, "bytes")
+        debug_stop("gc-release-memory")
+        self.rrc_invoke_callback()
+
     def minor_collection_with_major_progress(self, extrasize=0):
         """Do a minor collection.  Then, if there is already a major GC
         in progress, run at least one major collection step.  If there is
@@ -920,6 +1016,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.minor_collection_with_major_progress(
                 raw_malloc_usage(totalsize) + self.nursery_size // 2)
         #
+        # With a max heap size, an allocation which doesn't fit raises
+        # MemoryError right here, instead of going over the limit and
+        # failing later in some random major collection step.
+        if self.max_heap_size > 0.0:
+            self._check_max_heap_size(raw_malloc_usage(totalsize))
+        #
         # Check if the object would fit in the ArenaCollection.
         # Also, an object allocated from ArenaCollection must be old.
         if (raw_malloc_usage(totalsize) <= self.small_request_threshold
@@ -1017,17 +1119,72 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def set_max_heap_size(self, size):
         self.max_heap_size = float(size)
+        self.max_heap_size_already_raised = False
         if self.max_heap_size > 0.0:
             if self.max_heap_size < self.next_major_collection_initial:
                 self.next_major_collection_initial = self.max_heap_size
             if self.max_heap_size < self.next_major_collection_threshold:
                 self.next_major_collection_threshold = self.max_heap_size
 
+    def set_max_pause(self, ticks):
+        if ticks < 0:
+            ticks = 0
+        self.max_pause = ticks
+        # start again from the fixed sizes, and adapt from there
+        self.pause_increment_step = float(self.gc_increment_step)
+        self.pause_sweep_step = float(3 * self.nursery_size)
+
+    def _adapted_step(self, step, processed, duration):
+        # Called after a step which processed 'processed' bytes in
+        # 'duration' ticks: compute the number of bytes that can be processed
+        # in 'max_pause' ticks at the same speed.  Move half-way towards it,
+        # to avoid oscillating too much.
+        if processed <= 0 or duration <= 0:
+            return step
+        target = float(processed) * float(self.max_pause) / float(duration)
+        step = (step + target) * 0.5
+        # don't go below some reasonably small number of bytes, and don't
+        # overflow
+        minimum = float(self.nursery_size // 16)
+        if step < minimum:
+            step = minimum
+        elif step > float(sys.maxint // 4):
+            step = float(sys.maxint // 4)
+        return step
+
+    def _adapt_increment_step(self, visited, duration):
+        # the lower bound computed from the surviving size of the nursery
+        # still applies in major_collection_step()
+        self.pause_increment_step = self._adapted_step(
+            self.pause_increment_step, visited, duration)
+        debug_print("adapted increment step: ",
+                    int(self.pause_increment_step))
+
+    def _adapt_sweep_step(self, swept, duration):
+        self.pause_sweep_step = self._adapted_step(
+            self.pause_sweep_step, swept, duration)
+        debug_print("adapted sweep step: ", int(self.pause_sweep_step))
+
+    def _exceeds_max_heap_size(self, size):
+        # the raw memory announced with add_memory_pressure() counts too
+        used = float(self.get_total_memory_used()) + float(self.memory_pressure)
+        return used + float(size) > self.max_heap_size
+
+    def _check_max_heap_size(self, size):
+        if self._exceeds_max_heap_size(size):
+            # maybe enough memory can be freed: do a full major collection
+            # before giving up
+            self.minor_and_major_collection()
+            if self._exceeds_max_heap_size(size):
+                raise MemoryError
+    _check_max_heap_size._dont_inline_ = True
+
     def raw_malloc_memory_pressure(self, sizehint):
         # Decrement by 'sizehint' plus a very little bit extra.  This
         # is needed e.g. for _rawffi, which may allocate a lot of tiny
         # arrays.
         self.next_major_collection_threshold -= (sizehint + 2 * WORD)
+        self.memory_pressure += sizehint
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
@@ -1183,6 +1340,47 @@ class IncrementalMiniMarkGC(MovingGCBase):
         """
         return self.ac.total_memory_used + self.rawmalloced_total_size
 
+    def get_stats(self, stats_no):
+        if stats_no == rgc.TOTAL_MEMORY:
+            return intmask(self.get_total_memory_used())
+        elif stats_no == rgc.TOTAL_ARENA_MEMORY:
+            return intmask(self.ac.total_memory_used)
+        elif stats_no == rgc.TOTAL_RAWMALLOCED_MEMORY:
+            return intmask(self.rawmalloced_total_size)
+        elif stats_no == rgc.PEAK_MEMORY:
+            return intmask(self.peak_memory_used)
+        elif stats_no == rgc.ARENAS_COUNT:
+            return self.ac.arenas_count
+        elif stats_no == rgc.ARENAS_BYTES:
+            return self.ac.arenas_count * self.ac.arena_size
+        elif stats_no == rgc.NURSERY_SIZE:
+            return self.nursery_size
+        elif stats_no == rgc.NEXT_MAJOR_THRESHOLD:
+            return int(self.next_major_collection_threshold)
+        elif stats_no == rgc.NUM_MINOR_COLLECTS:
+            return self.num_minor_collects
+        elif stats_no == rgc.NUM_MAJOR_COLLECTS:
+            return self.num_major_collects
+        elif stats_no == rgc.TOTAL_GC_TIME:
+            return intmask(self.total_gc_time)
+        elif stats_no == rgc.GC_STATE:
+            return self.gc_state
+        elif stats_no == rgc.PINNED_OBJECTS:
+            return self.pinned_objects_in_nursery
+        elif stats_no == rgc.MAX_HEAP_SIZE:
+            return int(self.max_heap_size)
+        elif stats_no == rgc.MEMORY_PRESSURE:
+            return self.memory_pressure
+        elif not self.config.gcbarrierstats:
+            return -1       # the following ones need --gcbarrierstats
+        elif stats_no == rgc.NUM_WB_SLOWPATH:
+            return self.num_wb_slowpath
+        elif stats_no == rgc.NUM_CARDS_SCANNED:
+            return self.num_cards_scanned
+        elif stats_no == rgc.NUM_OLD_OBJECTS_RESCANNED:
+            return self.num_old_objects_rescanned
+        return -1
+
     def threshold_reached(self, extra=0):
         return (self.next_major_collection_threshold -
                 float(self.get_total_memory_used())) < float(extra)
@@ -1419,6 +1617,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # an argument here.  The JIT has always called a
             # 'newvalue'-less version, too.  Moreover, the incremental
             # GC nowadays relies on this fact.
+            if self.config.gcbarrierstats:
+                self.num_wb_slowpath += 1
             self.old_objects_pointing_to_young.append(addr_struct)
             objhdr = self.header(addr_struct)
             objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
@@ -1445,6 +1645,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # item that is (or contains) the pointer that we write.
             # We know that 'addr_array' has GCFLAG_TRACK_YOUNG_PTRS so far.
             #
+            if self.config.gcbarrierstats:
+                self.num_wb_slowpath += 1
             objhdr = self.header(addr_array)
             if objhdr.tid & GCFLAG_HAS_CARDS == 0:
                 #
@@ -1496,6 +1698,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # to remember_young_pointer().
             objhdr = self.header(addr_array)
             if objhdr.tid & GCFLAG_HAS_CARDS:
+                if self.config.gcbarrierstats:
+                    self.num_wb_slowpath += 1
                 self.old_objects_with_cards_set.append(addr_array)
                 objhdr.tid |= GCFLAG_CARDS_SET
             else:
@@ -1620,6 +1824,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start = read_timestamp()
+        wb_slowpath_before = cards_scanned_before = rescanned_before = 0
+        if self.config.gcbarrierstats:
+            # the write barrier slow paths are those since the previous
+            # minor collection, i.e. they are counted before this point
+            wb_slowpath_before = self.last_minor_wb_slowpath
+            self.last_minor_wb_slowpath = self.num_wb_slowpath
+            cards_scanned_before = self.num_cards_scanned
+            rescanned_before = self.num_old_objects_rescanned
         #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
@@ -1658,6 +1871,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.old_objects_pointing_to_pinned.foreach(
                 self._add_to_more_objects_to_trace_if_black, None)
         #
+        # Count the old objects that were written to since the last minor
+        # collection and that we need to trace again.
+        if self.config.gcbarrierstats:
+            self.old_objects_pointing_to_young.foreach(
+                self._count_old_object_rescanned, None)
+            self.old_objects_with_cards_set.foreach(
+                self._count_old_object_rescanned, None)
+        #
         # First, find the roots that point to young objects.  All nursery
         # objects found are copied out of the nursery, and the occasional
         # young raw-malloced object is flagged with GCFLAG_VISITED_RMY.
@@ -1798,6 +2019,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
         #
+        # Adapt the nursery size, if enabled.  Not if there are pinned
+        # objects left in the nursery: they might be after the new end.
+        if (self.nursery_size_max > self.nursery_size_min and
+                self.debug_tiny_nursery < 0 and
+                not self.nursery_barriers.non_empty()):
+            self._adapt_nursery_size()
+        #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
                 self._reset_flag_old_objects_pointing_to_pinned, None)
@@ -1810,13 +2038,60 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     self.get_total_memory_used())
         debug_print("number of pinned objects:",
                     self.pinned_objects_in_nursery)
+        if self.config.gcbarrierstats:
+            debug_print("write barrier slow paths:",
+                        self.num_wb_slowpath - wb_slowpath_before)
+            debug_print("cards scanned:",
+                        self.num_cards_scanned - cards_scanned_before)
+            debug_print("old objects rescanned:",
+                        self.num_old_objects_rescanned - rescanned_before)
         if self.DEBUG >= 2:
             self.debug_check_consistency()     # expensive!
         #
         self.root_walker.finished_minor_collection()
         #
+        self.num_minor_collects += 1
+        total_memory_used = self.get_total_memory_used()
+        if total_memory_used > self.peak_memory_used:
+            self.peak_memory_used = total_memory_used
+        duration = read_timestamp() - start
+        self.total_gc_time += duration
+        self.hooks.fire_gc_minor(
+            duration=duration,
+            total_memory_used=total_memory_used,
+            pinned_objects=self.pinned_objects_in_nursery,
+            bytes_promoted=self.nursery_surviving_size,
+            nursery_size=self.nursery_size,
+            threshold_reached=self.threshold_reached())
+        #
         debug_stop("gc-minor")
 
+    def _adapt_nursery_size(self):
+        # Called at the end of a minor collection, with an empty nursery.
+        # The cost of a minor collection is mostly the copying of the
+        # surviving objects.  If a large part of the nursery survives,
+        # double the nursery size, to give more objects the time to die
+        # before the next minor collection.  If almost nothing survives,
+        # halve it again, to use less of the CPU cache.  The memory between
+        # the old and the new end of the nursery was already reset by
+        # a previous minor collection, or was never used.
+        size = self.nursery_size
+        surviving = self.nursery_surviving_size
+        if surviving > size // 8 and size < self.nursery_size_max:
+            size = min(size * 2, self.nursery_size_max)
+        elif surviving < size // 64 and size > self.nursery_size_min:
+            size = max((size // 2) & ~(WORD-1), self.nursery_size_min)
+            # we don't need the physical pages of the end of the nursery
+            # until it grows again
+            llarena.arena_reset(self.nursery + size, self.nursery_size - size,
+                                4)
+        else:
+            return
+        debug_print("nursery size adapted from", self.nursery_size,
+                    "to", size)
+        self.nursery_size = size
+        self.nursery_top = self.nursery + size
+
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
                   "!GCFLAG_PINNED_OBJECT_PARENT_KNOWN, but requested to reset.")
@@ -1899,6 +2174,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                                 interval_stop = length
                                 ll_assert(cardbyte <= 1 and bytes == 0,
                                           "premature end of object")
+                            if self.config.gcbarrierstats:
+                                self.num_cards_scanned += 1
                             self.trace_and_drag_out_of_nursery_partial(
                                 obj, interval_start, interval_stop)
                         #
@@ -1938,6 +2215,56 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # and adding them to 'old_objects_pointing_to_young' as well.
             self.trace_and_drag_out_of_nursery(obj)
 
+    def _count_old_object_rescanned(self, obj, ignored):
+        # Only with --gcbarrierstats: count the old objects that a minor
+        # collection has to trace again, with a breakdown per type.
+        self.num_old_objects_rescanned += 1
+        index = self.get_member_index(self.get_type_id(obj))
+        counters = self.old_objects_rescanned_per_type
+        if not counters or index >= len(counters):
+            counters = self._grow_barrier_stats(index + 1)
+        counters[index] += 1
+
+    def _grow_barrier_stats(self, minlength):
+        oldcounters = self.old_objects_rescanned_per_type
+        oldlength = 0
+        if oldcounters:
+            oldlength = len(oldcounters)
+        newlength = max(minlength, oldlength * 2)
+        if newlength < 64:
+            newlength = 64
+        counters = lltype.malloc(BARRIERSTATSARRAY, newlength, flavor='raw',
+                                 track_allocation=False)
+        i = 0
+        while i < oldlength:
+            counters[i] = oldcounters[i]
+            i += 1
+        while i < newlength:
+            counters[i] = 0
+            i += 1
+        if oldcounters:
+            lltype.free(oldcounters, flavor='raw', track_allocation=False)
+        self.old_objects_rescanned_per_type = counters
+        return counters
+
+    def debug_print_barrier_stats(self):
+        # Only with --gcbarrierstats: dump the per-type counters in the
+        # 'gc-barrier-stats' section.  The type numbers are the same as
+        # the 'memberN' names in the typeids.txt file.
+        debug_start("gc-barrier-stats")
+        debug_print("write barrier slow paths:", self.num_wb_slowpath)
+        debug_print("cards scanned:           ", self.num_cards_scanned)
+        debug_print("old objects rescanned:   ",
+                    self.num_old_objects_rescanned)
+        counters = self.old_objects_rescanned_per_type
+        if counters:
+            i = 0
+            while i < len(counters):
+                if counters[i] > 0:
+                    debug_print("rescanned member", i, ":", counters[i])
+                i += 1
+        debug_stop("gc-barrier-stats")
+
     def trace_and_drag_out_of_nursery(self, obj):
         """obj must not be in the nursery.  This copies all the
         young objects it references out of the nursery.
@@ -2185,13 +2512,21 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self._add_to_more_objects_to_trace(obj, ignored)
 
     def minor_and_major_collection(self):
-        # First, finish the current major gc, if there is one in progress.
-        # This is a no-op if the gc_state is already STATE_SCANNING.
-        self.gc_step_until(STATE_SCANNING)
-        #
-        # Then do a complete collection again.
-        self.gc_step_until(STATE_MARKING)
-        self.gc_step_until(STATE_SCANNING)
+        # The mutator doesn't run before we are done, so there is no point
+        # in cutting the work in small slices: with 'stop_the_world', each
+        # major collection step marks or sweeps everything it can.
+        self.stop_the_world = True
+        try:
+            # First, finish the current major gc, if there is one in
+            # progress.  This is a no-op if the gc_state is already
+            # STATE_SCANNING.
+            self.gc_step_until(STATE_SCANNING)
+            #
+            # Then do a complete collection again.
+            self.gc_step_until(STATE_MARKING)
+            self.gc_step_until(STATE_SCANNING)
+        finally:
+            self.stop_the_world = False
 
     def gc_step_until(self, state):
         while self.gc_state != state:
@@ -2210,6 +2545,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
     # is done before every major collection step
     def major_collection_step(self, reserving_size=0):
         debug_start("gc-collect-step")
+        oldstate = self.gc_state
+        start = read_timestamp()
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
         # Debugging checks
         if self.pinned_objects_in_nursery == 0:
@@ -2259,6 +2596,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # starting a major GC cycle: reset these two counters
             self.size_objects_made_old = r_uint(0)
             self.threshold_objects_made_old = r_uint(self.nursery_size // 2)
+            #
+            # for the statistics passed to the hooks at the end
+            self.stat_arenas_count_before = self.ac.arenas_count
+            self.stat_rawmalloced_total_size = self.rawmalloced_total_size
 
             self.objects_to_trace = self.AddressStack()
             self.collect_roots()
@@ -2270,12 +2611,22 @@ class IncrementalMiniMarkGC(MovingGCBase):
                         self.objects_to_trace.length(),
                         "plus",
                         self.more_objects_to_trace.length())
-            estimate = self.gc_increment_step
-            estimate_from_nursery = self.nursery_surviving_size * 2
-            if estimate_from_nursery > estimate:
-                estimate = estimate_from_nursery
-            estimate = intmask(estimate)
+            if self.stop_the_world:
+                estimate = sys.maxint
+            else:
+                if self.max_pause > 0:
+                    estimate = r_uint(int(self.pause_increment_step))
+                else:
+                    estimate = self.gc_increment_step
+                estimate_from_nursery = self.nursery_surviving_size * 2
+                if estimate_from_nursery > estimate:
+                    estimate = estimate_from_nursery
+                estimate = intmask(estimate)
+            marking_start = read_timestamp()
             remaining = self.visit_all_objects_step(estimate)
+            if self.max_pause > 0 and not self.stop_the_world:
+                self._adapt_increment_step(estimate - remaining,
+                                           read_timestamp() - marking_start)
             #
             if remaining >= estimate // 2:
                 if self.more_objects_to_trace.non_empty():
@@ -2350,28 +2701,70 @@ class IncrementalMiniMarkGC(MovingGCBase):
             #END MARKING
         elif self.gc_state == STATE_SWEEPING:
             #
-            if self.raw_malloc_might_sweep.non_empty():
-                # Walk all rawmalloced objects and free the ones that don't
-                # have the GCFLAG_VISITED flag.  Visit at most 'limit' objects.
-                # This limit is conservatively high enough to guarantee that
-                # a total object size of at least '3 * nursery_size' bytes
-                # is processed.
-                limit = 3 * self.nursery_size // self.small_request_threshold
-                self.free_unvisited_rawmalloc_objects_step(limit)
-                done = False    # the 2nd half below must still be done
-            else:
-                # Ask the ArenaCollection to visit a fraction of the objects.
-                # Free the ones that have not been visited above, and reset
-                # GCFLAG_VISITED on the others.  Visit at most '3 *
-                # nursery_size' bytes.
-                limit = 3 * self.nursery_size // self.ac.page_size
+            if self.stop_the_world:
+                # Sweep all rawmalloced objects and all pages in one go.
+                self.free_unvisited_rawmalloc_objects_step(sys.maxint)
                 done = self.ac.mass_free_incremental(self._free_if_unvisited,
-                                                     limit)
-            # XXX tweak the limits above
+                                                     sys.maxint)
+            else:
+                # Sweep at most 'sweep_size' bytes: by default '3 *
+                # nursery_size', or what fits in the 'max_pause' budget.
+                if self.max_pause > 0:
+                    sweep_size = int(self.pause_sweep_step)
+                else:
+                    sweep_size = 3 * self.nursery_size
+                sweeping_start = read_timestamp()
+                swept = 0
+                if self.raw_malloc_might_sweep.non_empty():
+                    # Walk all rawmalloced objects and free the ones that
+                    # don't have the GCFLAG_VISITED flag.  Visit at most
+                    # 'limit' objects.  This limit is conservatively high
+                    # enough to guarantee that a total object size of at
+                    # least 'sweep_size' bytes is processed.
+                    limit = max(sweep_size // self.small_request_threshold, 1)
+                    remaining = self.free_unvisited_rawmalloc_objects_step(
+                        limit)
+                    swept = (limit - remaining) * self.small_request_threshold
+                    done = False    # the 2nd half below must still be done
+                else:
+                    # Ask the ArenaCollection to visit a fraction of the
+                    # objects.  Free the ones that have not been visited
+                    # above, and reset GCFLAG_VISITED on the others.  Visit
+                    # at most 'sweep_size' bytes.
+                    limit = max(sweep_size // self.ac.page_size, 1)
+                    done = self.ac.mass_free_incremental(
+                        self._free_if_unvisited, limit)
+                    if not done:
+                        swept = limit * self.ac.page_size
+                if self.max_pause > 0:
+                    self._adapt_sweep_step(swept,
+                                           read_timestamp() - sweeping_start)
             #
             if done:
                 self.num_major_collects += 1
                 #
+                debug_start("gc-collect-done")
+                if self.release_sparse_arenas > 0.0:
+                    self.release_sparse_arena_pages()
+                debug_print("arenas:               ",
+                            self.stat_arenas_count_before, " => ",
+                            self.ac.arenas_count)
+                debug_print("bytes used in arenas: ",
+                            self.ac.total_memory_used)
+                debug_print("bytes raw-malloced:   ",
+                            self.stat_rawmalloced_total_size, " => ",
+                            self.rawmalloced_total_size)
+                debug_stop("gc-collect-done")
+                if self.config.gcbarrierstats:
+                    self.debug_print_barrier_stats()
+                self.hooks.fire_gc_collect(
+                    num_major_collects=self.num_major_collects,
+                    arenas_count_before=self.stat_arenas_count_before,
+                    arenas_count_after=self.ac.arenas_count,
+                    arenas_bytes=self.ac.total_memory_used,
+                    rawmalloc_bytes_before=self.stat_rawmalloced_total_size,
+                    rawmalloc_bytes_after=self.rawmalloced_total_size)
+                #
                 # We also need to reset the GCFLAG_VISITED on prebuilt GC objects.
                 self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
                 #
@@ -2380,6 +2773,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # we currently have -- but no more than 'max_delta' more than
                 # we currently have.
                 total_memory_used = float(self.get_total_memory_used())
+                self.memory_pressure = 0    # see raw_malloc_memory_pressure()
                 bounded = self.set_major_threshold_from(
                     min(total_memory_used * self.major_collection_threshold,
                         total_memory_used + self.max_delta),
@@ -2400,6 +2794,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     self.max_heap_size_already_raised = True
                     self.gc_state = STATE_SCANNING
                     raise MemoryError
+                #
+                # Back under the limit: the next time it is reached is not
+                # the second one any more.
+                self.max_heap_size_already_raised = False
 
                 self.gc_state = STATE_FINALIZING
             # FINALIZING not yet incrementalised
@@ -2421,12 +2819,24 @@ class IncrementalMiniMarkGC(MovingGCBase):
             pass #XXX which exception to raise here. Should be unreachable.
 
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
+        duration = read_timestamp() - start
+        self.total_gc_time += duration
+        self.hooks.fire_gc_collect_step(
+            duration=duration,
+            oldstate=oldstate,
+            newstate=self.gc_state)
         debug_stop("gc-collect-step")
 
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
             new_list.append(obj)
 
+    def release_sparse_arena_pages(self):
+        pages_per_arena = self.ac.arena_size // self.ac.page_size
+        min_nfreepages = int(self.release_sparse_arenas * pages_per_arena)
+        released = self.ac.release_free_pages(max(min_nfreepages, 1))
+        debug_print("pages released:       ", released)
+
     def _free_if_unvisited(self, hdr):
         size_gc_header = self.gcheaderbuilder.size_gc_header
         obj = hdr + size_gc_header
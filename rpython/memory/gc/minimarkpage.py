@@ -17,6 +17,7 @@ assert 1 << WORD_POWER_2 == WORD
 # into pages.  For each arena we allocate one of the following structures:
 
 ARENA_PTR = lltype.Ptr(lltype.ForwardReference())
+ADDRESS_ARRAY = lltype.Array(llmemory.Address, hints={'nolength': True})
 ARENA = lltype.Struct('ArenaReference',
     # -- The address of the arena, as returned by malloc()
     ('base', llmemory.Address),
@@ -25,6 +26,12 @@ ARENA = lltype.Struct('ArenaReference',
     ('totalpages', lltype.Signed),
     # -- A chained list of free pages in the arena.  Ends with NULL.
     ('freepages', llmemory.Address),
+    # -- The free pages whose memory was given back to the OS by
+    #    release_free_pages().  They are not in 'freepages', which would
+    #    keep their first word in memory, but in this array, allocated
+    #    the first time it is needed.  'nfreepages' counts them too.
+    ('nreleasedpages', lltype.Signed),
+    ('releasedpages', lltype.Ptr(ADDRESS_ARRAY)),
     # -- A linked list of arenas.  See below.
     ('nextarena', ARENA_PTR),
     )
@@ -140,6 +147,9 @@ class ArenaCollection(object):
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
+        #
+        # the number of arenas currently allocated
+        self.arenas_count = 0
 
 
     def _new_page_ptr_list(self, length):
@@ -201,7 +211,7 @@ class ArenaCollection(object):
         # The result is simply 'current_arena.freepages'.
         arena = self.current_arena
         result = arena.freepages
-        if arena.nfreepages > 0:
+        if arena.nfreepages > arena.nreleasedpages:
             #
             # The 'result' was part of the chained list; read the next.
             arena.nfreepages -= 1
@@ -210,6 +220,14 @@ class ArenaCollection(object):
                                 llmemory.sizeof(llmemory.Address),
                                 0)
             #
+        elif arena.nreleasedpages > 0:
+            #
+            # Only released pages are left; take the last one.
+            arena.nfreepages -= 1
+            arena.nreleasedpages -= 1
+            result = arena.releasedpages[arena.nreleasedpages]
+            freepages = NULL
+            #
         else:
             # The 'result' is part of the uninitialized pages.
             ll_assert(self.num_uninitialized_pages > 0,
@@ -221,7 +239,7 @@ class ArenaCollection(object):
                 freepages = NULL
         #
         arena.freepages = freepages
-        if freepages == NULL:
+        if freepages == NULL and arena.nreleasedpages == 0:
             # This was the last page, so put the arena away into
             # arenas_lists[0].
             ll_assert(arena.nfreepages == 0, 
@@ -309,8 +327,11 @@ class ArenaCollection(object):
         arena.nfreepages = 0        # they are all uninitialized pages
         arena.totalpages = npages
         arena.freepages = firstpage
+        arena.nreleasedpages = 0
+        arena.releasedpages = lltype.nullptr(ADDRESS_ARRAY)
         self.num_uninitialized_pages = npages
         self.current_arena = arena
+        self.arenas_count += 1
         #
     allocate_new_arena._dont_inline_ = True
 
@@ -397,7 +418,11 @@ class ArenaCollection(object):
                     # The whole arena is empty.  Free it.
                     llarena.arena_reset(arena.base, self.arena_size, 4)
                     llarena.arena_free(arena.base)
+                    if arena.releasedpages:
+                        lltype.free(arena.releasedpages, flavor='raw',
+                                    track_allocation=False)
                     lltype.free(arena, flavor='raw', track_allocation=False)
+                    self.arenas_count -= 1
                     #
                 else:
                     # Insert 'arena' in the correct arenas_lists[n]
@@ -476,6 +501,49 @@ class ArenaCollection(object):
         return max_pages
 
 
+    def release_free_pages(self, min_nfreepages):
+        """Give back to the OS the memory of the free pages of the arenas
+        that have at least 'min_nfreepages' free pages.  These sparse arenas
+        are the last ones from which we allocate (see _pick_next_arena()),
+        so their free pages are likely to remain unused for a while.  Call
+        this after mass_free().  Returns the number of pages released.
+        """
+        released = 0
+        i = max(min_nfreepages, 1)
+        while i < self.max_pages_per_arena:
+            arena = self.arenas_lists[i]
+            while arena != ARENA_NULL:
+                released += self._release_arena_free_pages(arena)
+                arena = arena.nextarena
+            i += 1
+        return released
+
+    def _release_arena_free_pages(self, arena):
+        # The pages released so far are not in the chained list any more:
+        # move all the pages of the list to 'releasedpages', releasing the
+        # whole of each of them.
+        count = arena.nfreepages - arena.nreleasedpages
+        if count == 0:
+            return 0
+        if not arena.releasedpages:
+            arena.releasedpages = lltype.malloc(ADDRESS_ARRAY,
+                                                arena.totalpages,
+                                                flavor='raw',
+                                                track_allocation=False)
+        pageaddr = arena.freepages
+        i = 0
+        while i < count:
+            nextpage = pageaddr.address[0]
+            llarena.arena_reset(pageaddr, self.page_size, 4)
+            arena.releasedpages[arena.nreleasedpages] = pageaddr
+            arena.nreleasedpages += 1
+            pageaddr = nextpage
+            i += 1
+        ll_assert(pageaddr == NULL, "free pages left in the chained list")
+        arena.freepages = NULL
+        return count
+
+
     def free_page(self, page):
         """Free a whole page."""
         #
@@ -20,6 +20,7 @@ class SimpleArenaCollection(object):
         self.small_request_threshold = small_request_threshold
         self.all_objects = []
         self.total_memory_used = 0
+        self.arenas_count = 0
 
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
@@ -52,6 +53,9 @@ class SimpleArenaCollection(object):
                 return False
         return True
 
+    def release_free_pages(self, min_nfreepages):
+        return 0
+
     def mass_free(self, ok_to_free_func):
         self.mass_free_prepare()
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
@@ -10,6 +10,7 @@ import py
 from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.memory.gctypelayout import TypeLayoutBuilder, FIN_HANDLER_ARRAY
 from rpython.rlib.rarithmetic import LONG_BIT, is_valid_int
+from rpython.rlib import rgc
 from rpython.memory.gc import minimark, incminimark
 from rpython.memory.gctypelayout import zero_gc_pointers_inside, zero_gc_pointers
 from rpython.rlib.debug import debug_print
@@ -671,6 +672,250 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
         assert self.stackroots[1].x == 13
 
+    def test_collect_step(self):
+        from rpython.rlib import rgc
+        self.stackroots.append(self.malloc(S))
+        states = []
+        while True:
+            val = self.gc.collect_step()
+            states.append((rgc.old_state(val), rgc.new_state(val)))
+            if rgc.is_done(val):
+                break
+        assert states == [
+            (incminimark.STATE_SCANNING, incminimark.STATE_MARKING),
+            (incminimark.STATE_MARKING, incminimark.STATE_SWEEPING),
+            (incminimark.STATE_SWEEPING, incminimark.STATE_FINALIZING),
+            (incminimark.STATE_FINALIZING, incminimark.STATE_SCANNING)]
+        assert self.gc.num_major_collects == 1
+
+    def test_max_pause_adapts_increment_step(self):
+        gc = self.gc
+        gc.gc_increment_step = 100000
+        gc.set_max_pause(1000)
+        assert gc.pause_increment_step == 100000.0
+        # marking 100000 bytes took 4000 ticks: aim at 25000 bytes, half-way
+        gc._adapt_increment_step(100000, 4000)
+        assert gc.pause_increment_step == 62500.0
+        gc._adapt_increment_step(62500, 2500)
+        assert gc.pause_increment_step == 43750.0
+        # much faster marking: the step grows again
+        gc._adapt_increment_step(43750, 10)
+        assert gc.pause_increment_step > 1000000.0
+        # never below a minimum
+        for i in range(100):
+            gc._adapt_increment_step(1000, 1000000)
+        assert gc.pause_increment_step == float(gc.nursery_size // 16)
+        # nothing measured, nothing changes
+        gc._adapt_increment_step(0, 1000)
+        gc._adapt_increment_step(1000, 0)
+        assert gc.pause_increment_step == float(gc.nursery_size // 16)
+
+    def test_max_pause_marking_steps(self):
+        # a linked list of objects: with a small pause budget, marking it
+        # needs more steps than with the default increment step
+        self.gc.DEBUG = False     # too slow otherwise
+        def count_marking_steps(max_pause):
+            self.gc.set_max_pause(max_pause)
+            head = self.malloc(S)
+            self.stackroots.append(head)
+            for i in range(50):
+                obj = self.malloc(S)
+                self.write(obj, 'next', self.stackroots[-1])
+                self.stackroots[-1] = obj
+            self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+            steps = 0
+            while self.gc.gc_state == incminimark.STATE_MARKING:
+                self.gc.debug_gc_step()
+                steps += 1
+            self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+            self.stackroots.pop()
+            return steps
+        default_steps = count_marking_steps(0)
+        self.gc.gc_increment_step = 64
+        assert count_marking_steps(1) > default_steps
+
+    def test_max_pause_adapts_sweep_step(self):
+        gc = self.gc
+        gc.set_max_pause(1000)
+        assert gc.pause_sweep_step == float(3 * gc.nursery_size)
+        gc.pause_sweep_step = 100000.0
+        # sweeping 100000 bytes took 4000 ticks: aim at 25000 bytes
+        gc._adapt_sweep_step(100000, 4000)
+        assert gc.pause_sweep_step == 62500.0
+        # the marking step is independent
+        assert gc.pause_increment_step == float(gc.gc_increment_step)
+        for i in range(100):
+            gc._adapt_sweep_step(1000, 1000000)
+        assert gc.pause_sweep_step == float(gc.nursery_size // 16)
+
+    def test_max_pause_sweeping_steps(self):
+        self.gc.DEBUG = False     # too slow otherwise
+        def count_sweeping_steps(max_pause):
+            self.gc.set_max_pause(max_pause)
+            for i in range(300):
+                self.stackroots.append(self.malloc(S))
+            self.gc.collect()        # make them old
+            self.stackroots = []
+            self.gc.debug_gc_step_until(incminimark.STATE_SWEEPING)
+            steps = 0
+            while self.gc.gc_state == incminimark.STATE_SWEEPING:
+                self.gc.debug_gc_step()
+                steps += 1
+            self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+            return steps
+        default_steps = count_sweeping_steps(0)
+        assert count_sweeping_steps(1) > default_steps
+
+    def test_max_pause_from_env(self, monkeypatch):
+        monkeypatch.setenv('PYPY_GC_NURSERY', '64KB')
+        monkeypatch.setenv('PYPY_GC_MAX_PAUSE', '1000')
+        self.setup_method(self.test_max_pause_from_env)
+        gc = self.gc
+        assert gc.max_pause == 1000
+        # seeded from the final nursery, not from the temporary small one
+        assert gc.nursery_size == 64 * 1024
+        assert gc.pause_sweep_step == float(3 * gc.nursery_size)
+    test_max_pause_from_env.GC_PARAMS = {'read_from_env': True}
+
+    def test_nursery_size_adapts(self):
+        gc = self.gc
+        initial_size = gc.nursery_size
+        assert gc.nursery_size_min == initial_size
+        # everything survives: the nursery grows up to the maximum
+        for i in range(200):
+            self.stackroots.append(self.malloc(S))
+            self.stackroots[-1].x = i
+        assert gc.nursery_size == 4 * initial_size
+        assert gc.nursery_top == gc.nursery + gc.nursery_size
+        assert [p.x for p in self.stackroots] == range(200)
+        # nothing survives: back to the minimum
+        self.stackroots = []
+        for i in range(200):
+            self.malloc(S)
+        assert gc.nursery_size == initial_size
+    test_nursery_size_adapts.GC_PARAMS = {'nursery_size_max': 128 * WORD}
+
+    def test_nursery_size_fixed_by_default(self):
+        initial_size = self.gc.nursery_size
+        for i in range(200):
+            self.stackroots.append(self.malloc(S))
+        assert self.gc.nursery_size == initial_size
+
+    def test_full_collect_is_not_sliced(self):
+        # gc.collect() stops the mutator anyway: it marks and sweeps
+        # everything in a single step each, however small the increments
+        self.gc.DEBUG = False
+        self.gc.gc_increment_step = 64
+        self.gc.set_max_pause(1)
+        self.stackroots.append(self.malloc(S))
+        for i in range(50):
+            obj = self.malloc(S)
+            self.write(obj, 'next', self.stackroots[-1])
+            self.stackroots[-1] = obj
+        self.stackroots.append(self.malloc(VAR, 1000))  # rawmalloced
+        self.gc.collect()      # make them old
+        states = []
+        orig_step = self.gc.major_collection_step
+        def major_collection_step(*args):
+            states.append(self.gc.gc_state)
+            orig_step(*args)
+        self.gc.major_collection_step = major_collection_step
+        self.gc.collect()
+        assert states == [incminimark.STATE_SCANNING,
+                          incminimark.STATE_MARKING,
+                          incminimark.STATE_SWEEPING,
+                          incminimark.STATE_FINALIZING]
+        assert not self.gc.stop_the_world
+        #
+        # but incremental steps are still bounded
+        del states[:]
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        assert states.count(incminimark.STATE_MARKING) > 1
+
+    def test_max_heap_size_at_allocation_site(self):
+        self.gc.DEBUG = False
+        self.gc.set_max_heap_size(20000)
+        self.stackroots.append(self.malloc(VAR, 1000))    # rawmalloced
+        # garbage is collected before giving up
+        for i in range(10):
+            self.malloc(VAR, 1000)
+        # but live objects are not
+        py.test.raises(MemoryError, self.malloc, VAR, 2000)
+        assert self.gc.get_stats(rgc.MAX_HEAP_SIZE) == 20000
+        # the object that caused the error is not allocated, so the
+        # program can recover
+        self.stackroots.append(self.malloc(VAR, 1000))
+
+    def test_max_heap_size_counts_memory_pressure(self):
+        self.gc.DEBUG = False
+        self.gc.set_max_heap_size(20000)
+        self.stackroots.append(self.malloc(VAR, 1000))
+        assert not self.gc._exceeds_max_heap_size(8 * 1000)
+        self.gc.raw_malloc_memory_pressure(8 * 1000)
+        assert self.gc.get_stats(rgc.MEMORY_PRESSURE) == 8 * 1000
+        assert self.gc._exceeds_max_heap_size(8 * 1000)
+        # a full collection forgets about the memory pressure, like it
+        # does when computing the next major collection threshold
+        self.gc.collect()
+        assert self.gc.get_stats(rgc.MEMORY_PRESSURE) == 0
+        assert not self.gc._exceeds_max_heap_size(8 * 1000)
+
+    def test_max_heap_size_raises_again(self):
+        self.gc.DEBUG = False
+        self.stackroots.append(self.malloc(S))
+        def fill(limit=0):
+            if limit:
+                self.gc.set_max_heap_size(limit)
+            # small objects only: the limit is checked at the end of
+            # the major collection
+            while True:
+                for i in range(100):
+                    p = self.malloc(S)
+                    self.write(p, 'next', self.stackroots[-1])
+                    self.stackroots[-1] = p
+                self.gc.collect()
+        py.test.raises(MemoryError, fill, 20000)
+        assert self.gc.max_heap_size_already_raised
+        # a new limit is not the second time the old one was reached
+        py.test.raises(MemoryError, fill, 40000)
+        # neither is reaching it again after going back under it
+        self.stackroots[-1] = self.malloc(S)
+        self.gc.collect()
+        assert not self.gc.max_heap_size_already_raised
+        py.test.raises(MemoryError, fill)
+
+    def test_barrier_stats(self):
+        assert self.gc.get_stats(rgc.NUM_WB_SLOWPATH) == -1
+        self.gc.config.gcbarrierstats = True
+        self.stackroots.append(self.malloc(S))
+        self.stackroots.append(self.malloc(VAR, 20))    # rawmalloced, cards
+        self.gc.collect()      # make them old
+        s, a = self.stackroots
+        # only the first write into an old object takes the slow path
+        self.write(s, 'next', self.malloc(S))
+        self.write(s, 'next', self.malloc(S))
+        # arrays with cards take the slow path at every write, but the
+        # minor collection only scans the cards that have been marked
+        self.writearray(a, 0, self.malloc(S))
+        self.writearray(a, 1, self.malloc(S))
+        self.writearray(a, 9, self.malloc(S))
+        assert self.gc.get_stats(rgc.NUM_WB_SLOWPATH) == 4
+        assert self.gc.get_stats(rgc.NUM_CARDS_SCANNED) == 0
+        self.gc._minor_collection()
+        assert self.gc.get_stats(rgc.NUM_CARDS_SCANNED) == 2
+        assert self.gc.get_stats(rgc.NUM_OLD_OBJECTS_RESCANNED) == 2
+        counters = self.gc.old_objects_rescanned_per_type
+        for TYPE in [S, VAR]:
+            index = self.gc.get_member_index(self.get_type_id(TYPE))
+            assert counters[index] == 1
+        # nothing more to rescan if the objects are not written to again
+        self.gc._minor_collection()
+        assert self.gc.get_stats(rgc.NUM_OLD_OBJECTS_RESCANNED) == 2
+        self.gc.debug_print_barrier_stats()
+    test_barrier_stats.GC_PARAMS = {"card_page_indices": 4}
+
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
     def test_malloc_fixedsize_no_cleanup(self):
@@ -728,6 +973,63 @@ class TestIncrementalMiniMarkGCFull(DirectGCTest):
             assert arr_of_ptr_struct[i].prev == lltype.nullptr(S)
             assert arr_of_ptr_struct[i].next == lltype.nullptr(S)
 
+    def test_release_sparse_arenas(self):
+        def nreleasedpages():
+            return sum([arena.nreleasedpages
+                        for arena in self.gc.ac._all_arenas()])
+        for i in range(60):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        # keep one object out of ten, leaving many free pages in the arenas
+        self.stackroots[:] = self.stackroots[::10]
+        self.gc.collect()
+        assert nreleasedpages() == 0    # off by default
+        self.gc.release_sparse_arenas = 0.5
+        self.gc.collect()
+        assert nreleasedpages() > 0
+        for obj in self.stackroots:
+            obj.x = 42      # still alive
+    test_release_sparse_arenas.GC_PARAMS = {'page_size': 16*WORD,
+                                            'arena_size': 128*WORD}
+
+    def test_release_memory(self):
+        def nreleasedpages():
+            return sum([arena.nreleasedpages
+                        for arena in self.gc.ac._all_arenas()])
+        for i in range(60):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        self.stackroots[:] = self.stackroots[::10]
+        self.gc.collect()
+        young = self.malloc(S)
+        young.x = 42
+        self.stackroots.append(young)
+        self.gc.release_memory()
+        assert nreleasedpages() > 0
+        # 'young' was moved out of the nursery first
+        assert not self.gc.is_in_nursery(
+            llmemory.cast_ptr_to_adr(self.stackroots[-1]))
+        assert self.stackroots[-1].x == 42
+        self.stackroots.append(self.malloc(S))
+    test_release_memory.GC_PARAMS = {'page_size': 16*WORD,
+                                     'arena_size': 128*WORD}
+
+    def test_release_memory_no_major_progress(self):
+        for i in range(20):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        self.stackroots.append(self.malloc(S))
+        # only a minor collection: the major collection doesn't advance
+        def major_collection_step(extrasize=0):
+            raise AssertionError("major collection step")
+        self.gc.major_collection_step = major_collection_step
+        self.gc.release_memory()
+        del self.gc.major_collection_step
+        assert self.gc.gc_state == incminimark.STATE_MARKING
+        assert not self.gc.is_in_nursery(
+            llmemory.cast_ptr_to_adr(self.stackroots[-1]))
+
     #fail for now
     def xxx_test_malloc_array_of_ptr_arr(self):
         ARR_OF_PTR_ARR = lltype.GcArray(lltype.Ptr(lltype.GcArray(lltype.Ptr(S))))
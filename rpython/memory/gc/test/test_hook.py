@@ -0,0 +1,147 @@
+from rpython.rlib import rgc
+from rpython.rtyper.lltypesystem import llmemory
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S
+
+
+class MyGcHooks(GcHooks):
+
+    def __init__(self):
+        GcHooks.__init__(self)
+        self._gc_minor_enabled = False
+        self._gc_collect_step_enabled = False
+        self._gc_collect_enabled = False
+        self.reset()
+
+    def is_gc_minor_enabled(self):
+        return self._gc_minor_enabled
+
+    def is_gc_collect_step_enabled(self):
+        return self._gc_collect_step_enabled
+
+    def is_gc_collect_enabled(self):
+        return self._gc_collect_enabled
+
+    def reset(self):
+        self.minors = []
+        self.steps = []
+        self.collects = []
+        self.durations = []
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    bytes_promoted, nursery_size, threshold_reached):
+        self.durations.append(duration)
+        self.minors.append({
+            'total_memory_used': total_memory_used,
+            'pinned_objects': pinned_objects,
+            'bytes_promoted': bytes_promoted,
+            'nursery_size': nursery_size,
+            'threshold_reached': threshold_reached,
+            })
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.durations.append(duration)
+        self.steps.append((oldstate, newstate))
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        self.collects.append({
+            'num_major_collects': num_major_collects,
+            'arenas_count_before': arenas_count_before,
+            'arenas_count_after': arenas_count_after,
+            'arenas_bytes': arenas_bytes,
+            'rawmalloc_bytes_before': rawmalloc_bytes_before,
+            'rawmalloc_bytes_after': rawmalloc_bytes_after,
+            })
+
+
+class TestIncMiniMarkHooks(BaseDirectGCTest):
+    from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
+
+    def setup_method(self, m):
+        BaseDirectGCTest.setup_method(self, m)
+        size = self.gc.fixed_size(self.get_type_id(S))
+        self.size_of_S = llmemory.raw_malloc_usage(
+            size + self.gc.gcheaderbuilder.size_gc_header)
+
+    def test_default_hooks(self):
+        assert isinstance(self.gc.hooks, GcHooks)
+        self.gc.collect()     # does not crash
+
+    def test_on_gc_minor(self):
+        self.gc.hooks = hooks = MyGcHooks()
+        self.malloc(S)
+        self.gc._minor_collection()
+        assert hooks.minors == []
+        #
+        hooks._gc_minor_enabled = True
+        self.stackroots.append(self.malloc(S))
+        self.gc._minor_collection()
+        assert hooks.minors == [{
+            'total_memory_used': self.size_of_S,
+            'pinned_objects': 0,
+            'bytes_promoted': self.size_of_S,
+            'nursery_size': self.gc.nursery_size,
+            'threshold_reached': False,
+            }]
+        assert hooks.durations[0] >= 0
+        #
+        self.stackroots = []
+        self.malloc(S)
+        self.gc._minor_collection()
+        assert len(hooks.minors) == 2
+        assert hooks.minors[1]['bytes_promoted'] == 0
+
+    def test_on_gc_collect(self):
+        from rpython.memory.gc import incminimark as m
+        self.gc.hooks = hooks = MyGcHooks()
+        hooks._gc_collect_step_enabled = True
+        hooks._gc_collect_enabled = True
+        self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        assert hooks.steps == [
+            (m.STATE_SCANNING, m.STATE_MARKING),
+            (m.STATE_MARKING, m.STATE_SWEEPING),
+            (m.STATE_SWEEPING, m.STATE_FINALIZING),
+            (m.STATE_FINALIZING, m.STATE_SCANNING)]
+        assert len(hooks.collects) == 1
+        collect = hooks.collects[0]
+        assert collect['num_major_collects'] == 1
+        assert collect['arenas_bytes'] == self.size_of_S
+        assert collect['rawmalloc_bytes_before'] == 0
+        assert collect['rawmalloc_bytes_after'] == 0
+        assert len(hooks.durations) == 4
+        #
+        hooks.reset()
+        self.stackroots = []
+        self.gc.collect()
+        assert len(hooks.steps) == 4
+        assert hooks.collects[0]['num_major_collects'] == 2
+        assert hooks.collects[0]['arenas_bytes'] == 0
+
+    def test_get_stats(self):
+        gc = self.gc
+        assert gc.get_stats(rgc.NUM_MINOR_COLLECTS) == 0
+        assert gc.get_stats(rgc.NUM_MAJOR_COLLECTS) == 0
+        self.stackroots.append(self.malloc(S))
+        gc.collect()
+        # one minor collection before each step of the major collection
+        assert gc.get_stats(rgc.NUM_MINOR_COLLECTS) == 4
+        assert gc.get_stats(rgc.NUM_MAJOR_COLLECTS) == 1
+        assert gc.get_stats(rgc.TOTAL_MEMORY) == self.size_of_S
+        assert gc.get_stats(rgc.TOTAL_ARENA_MEMORY) == self.size_of_S
+        assert gc.get_stats(rgc.TOTAL_RAWMALLOCED_MEMORY) == 0
+        assert gc.get_stats(rgc.PEAK_MEMORY) == self.size_of_S
+        assert gc.get_stats(rgc.NURSERY_SIZE) == gc.nursery_size
+        assert gc.get_stats(rgc.GC_STATE) == 0
+        assert gc.get_stats(rgc.PINNED_OBJECTS) == 0
+        assert gc.get_stats(rgc.TOTAL_GC_TIME) >= 0
+        assert gc.get_stats(rgc.NEXT_MAJOR_THRESHOLD) > 0
+        assert gc.get_stats(12345) == -1
+        #
+        self.stackroots = []
+        gc.collect()
+        assert gc.get_stats(rgc.TOTAL_MEMORY) == 0
+        assert gc.get_stats(rgc.PEAK_MEMORY) == self.size_of_S
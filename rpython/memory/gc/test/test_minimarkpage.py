@@ -1,7 +1,7 @@
 import py
 from rpython.memory.gc.minimarkpage import ArenaCollection
 from rpython.memory.gc.minimarkpage import PAGE_HEADER, PAGE_PTR
-from rpython.memory.gc.minimarkpage import PAGE_NULL, WORD
+from rpython.memory.gc.minimarkpage import PAGE_NULL, ARENA_NULL, WORD
 from rpython.memory.gc.minimarkpage import _dummy_size
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena
 from rpython.rtyper.lltypesystem.llmemory import cast_ptr_to_adr
@@ -400,6 +400,54 @@ def test_mass_free_half_page_becomes_more_free():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_release_free_pages():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "#..#.")
+    arena = ac.current_arena
+    # move the arena where mass_free() would put it
+    ac.current_arena = ARENA_NULL
+    arena.nextarena = ARENA_NULL
+    ac.arenas_lists[3] = arena
+    assert ac.release_free_pages(4) == 0
+    assert ac.release_free_pages(2) == 3
+    assert arena.nreleasedpages == 3
+    assert ac.release_free_pages(1) == 0      # already released
+    # the released pages are not chained any more, so that none of
+    # their memory is kept
+    assert arena.freepages == NULL
+    assert [arena.releasedpages[i] for i in range(3)] == [
+        pagenum(ac, 1), pagenum(ac, 2), pagenum(ac, 4)]
+    #
+    ac.arenas_lists[3] = ARENA_NULL
+    ac.current_arena = arena
+    page = ac.allocate_new_page(2); checkpage(ac, page, 4)
+    assert arena.nfreepages == 2
+    assert arena.nreleasedpages == 2
+    ac.free_page(page)
+    assert arena.nfreepages == 3
+    assert arena.nreleasedpages == 2
+    assert arena.freepages == pagenum(ac, 4)
+    # the chained list is used first
+    ac.page_for_size[2] = PAGE_NULL
+    page = ac.allocate_new_page(2); checkpage(ac, page, 4)
+    assert arena.freepages == NULL
+    ac.free_page(page)
+    ac.page_for_size[2] = PAGE_NULL
+    ac.current_arena = ARENA_NULL
+    ac.arenas_lists[3] = arena
+    assert ac.release_free_pages(1) == 1
+    assert arena.nreleasedpages == 3
+    assert arena.freepages == NULL
+    # all the free pages can be allocated again
+    ac.arenas_lists[3] = ARENA_NULL
+    ac.current_arena = arena
+    for i in [4, 2, 1]:
+        ac.page_for_size[2] = PAGE_NULL
+        page = ac.allocate_new_page(2); checkpage(ac, page, i)
+    assert arena.nfreepages == 0
+    assert ac.current_arena == ARENA_NULL
+    assert ac.arenas_lists[0] == arena
+
 # ____________________________________________________________
 
 def test_random(incremental=False):
@@ -472,6 +520,10 @@ def test_random(incremental=False):
             assert not (set(live_objects) & set(live_objects_extra))
             live_objects.update(live_objects_extra)
             #
+            # Sometimes release the free pages, which are then reused
+            if random.random() < 0.5:
+                ac.release_free_pages(1)
+            #
     except DoneTesting:
         pass
 
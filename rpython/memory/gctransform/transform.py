@@ -381,6 +381,23 @@ class BaseGCTransformer(object):
         # this assumes a non-moving GC.  Moving GCs need to override this
         hop.rename('cast_ptr_to_int')
 
+    def gct_gc_collect_step(self, hop):
+        # the non-incremental GCs just do a full collection
+        from rpython.rlib import rgc
+        hop.genop('gc__collect', [])
+        return hop.cast_result(rmodel.inputconst(lltype.Signed,
+                                                 rgc._encode_states(1, 0)))
+
+    def gct_gc_set_max_pause(self, hop):
+        pass
+
+    def gct_gc_release_memory(self, hop):
+        pass
+
+    def gct_gc_get_stats(self, hop):
+        # only the framework GCs support get_stats()
+        return hop.cast_result(rmodel.inputconst(lltype.Signed, -1))
+
     def gct_gc_heap_stats(self, hop):
         from rpython.memory.gc.base import ARRAY_TYPEID_MAP
 
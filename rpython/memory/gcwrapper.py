@@ -135,6 +135,12 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def collect_step(self):
+        return self.gc.collect_step()
+
+    def release_memory(self):
+        self.gc.release_memory()
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
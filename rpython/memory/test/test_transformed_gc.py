@@ -15,6 +15,8 @@ from rpython.conftest import option
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib.rarithmetic import LONG_BIT
 from rpython.rtyper.rtyper import llinterp_backend
+from rpython.rlib.nonconst import NonConstant
+from rpython.memory.gc.hook import GcHooks
 
 
 WORD = LONG_BIT // 8
@@ -46,8 +48,10 @@ ARGS = lltype.FixedSizeArray(lltype.Signed, 3)
 
 class GCTest(object):
     gcpolicy = None
+    gchooks = None
     GC_CAN_MOVE = False
     taggedpointers = False
+    gcbarrierstats = False
 
     def setup_class(cls):
         cls.marker = lltype.malloc(rffi.CArray(lltype.Signed), 1,
@@ -105,14 +109,16 @@ class GCTest(object):
 
         s_args = SomePtr(lltype.Ptr(ARGS))
         t = rtype(entrypoint, [s_args], gcname=cls.gcname,
-                  taggedpointers=cls.taggedpointers)
+                  taggedpointers=cls.taggedpointers,
+                  gcbarrierstats=cls.gcbarrierstats)
 
         for fixup in mixlevelstuff:
             if fixup:
                 fixup(t)
 
         cbuild = CStandaloneBuilder(t, entrypoint, config=t.config,
-                                    gcpolicy=cls.gcpolicy)
+                                    gcpolicy=cls.gcpolicy,
+                                    gchooks=cls.gchooks)
         cbuild.make_entrypoint_wrapper = False
         db = cbuild.build_database()
         entrypointptr = cbuild.getentrypointptr()
@@ -1388,8 +1394,50 @@ class TestMiniMarkGC(TestHybridGC):
         assert res([]) == 0
 
 
+class MyGcHooks(GcHooks):
+
+    def __init__(self):
+        self.stats = GcHooksStats()
+
+    def is_gc_minor_enabled(self):
+        return True
+
+    def is_gc_collect_step_enabled(self):
+        return True
+
+    def is_gc_collect_enabled(self):
+        return True
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    bytes_promoted, nursery_size, threshold_reached):
+        self.stats.minors += 1
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.stats.steps += 1
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        self.stats.collects += 1
+
+
+class GcHooksStats(object):
+    minors = 0
+    steps = 0
+    collects = 0
+
+    def reset(self):
+        # NonConstant() so that the annotator sees the fields as a generic
+        # SomeInteger() and not as the constant 0
+        self.minors = NonConstant(0)
+        self.steps = NonConstant(0)
+        self.collects = NonConstant(0)
+
+
 class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     gcname = "incminimark"
+    gchooks = MyGcHooks()
 
     class gcpolicy(gc.BasicFrameworkGcPolicy):
         class transformerclass(shadowstack.ShadowStackFrameworkGCTransformer):
@@ -1438,6 +1486,135 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         res = run([])
         assert res
 
+    def define_gc_hooks(cls):
+        gchooks = cls.gchooks
+        # it is important that we fish .stats OUTSIDE f(); we cannot see
+        # gchooks from within RPython code
+        stats = gchooks.stats
+        def f():
+            stats.reset()
+            # trigger two major collections
+            llop.gc__collect(lltype.Void)
+            llop.gc__collect(lltype.Void)
+            return (10000 * stats.collects +
+                      100 * stats.steps +
+                        1 * stats.minors)
+        return f
+
+    def test_gc_hooks(self):
+        run = self.runner("gc_hooks")
+        count = run([])
+        collects, count = divmod(count, 10000)
+        steps, minors = divmod(count, 100)
+        assert collects == 2
+        assert steps == 8
+        assert minors == 8
+
+    def define_get_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            minors = rgc.get_stats(rgc.NUM_MINOR_COLLECTS)
+            majors = rgc.get_stats(rgc.NUM_MAJOR_COLLECTS)
+            lltype.malloc(S)
+            llop.gc__collect(lltype.Void)
+            if rgc.get_stats(rgc.NUM_MAJOR_COLLECTS) != majors + 1:
+                return 1
+            if rgc.get_stats(rgc.NUM_MINOR_COLLECTS) <= minors:
+                return 2
+            if rgc.get_stats(rgc.PEAK_MEMORY) < rgc.get_stats(
+                                                    rgc.TOTAL_MEMORY):
+                return 3
+            if rgc.get_stats(rgc.NURSERY_SIZE) != 32*WORD:
+                return 4
+            if rgc.get_stats(-1) != -1:
+                return 5
+            return 0
+        return f
+
+    def test_get_stats(self):
+        run = self.runner("get_stats")
+        res = run([])
+        assert res == 0
+
+    def define_collect_step(cls):
+        from rpython.memory.gc import incminimark
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            rgc.set_max_pause(1000)
+            lltype.malloc(S)
+            # finish the current major collection, if any
+            while not rgc.is_done(rgc.collect_step()):
+                pass
+            majors = rgc.get_stats(rgc.NUM_MAJOR_COLLECTS)
+            steps = 0
+            while True:
+                states = rgc.collect_step()
+                steps += 1
+                if rgc.is_done(states):
+                    break
+            if rgc.old_state(states) != incminimark.STATE_FINALIZING:
+                return -1
+            if rgc.get_stats(rgc.NUM_MAJOR_COLLECTS) != majors + 1:
+                return -2
+            rgc.set_max_pause(0)
+            return steps
+        return f
+
+    def test_collect_step(self):
+        run = self.runner("collect_step")
+        res = run([])
+        assert res >= 4
+
+    def define_release_memory(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            s = lltype.malloc(S)
+            s.x = 42
+            rgc.release_memory()
+            t = lltype.malloc(S)    # the nursery is still usable
+            t.x = 1
+            return s.x + t.x
+        return f
+
+    def test_release_memory(self):
+        run = self.runner("release_memory")
+        res = run([])
+        assert res == 43
+
+
+class TestIncrementalMiniMarkGCBarrierStats(GCTest):
+    gcname = "incminimark"
+    gcbarrierstats = True
+    gcpolicy = TestIncrementalMiniMarkGC.gcpolicy
+
+    def define_barrier_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        T = lltype.GcStruct('T', ('s', lltype.Ptr(S)))
+        A = lltype.GcArray(lltype.Ptr(S))
+        def f():
+            t = lltype.malloc(T)
+            a = lltype.malloc(A, 100)      # large, with cards
+            rgc.collect()
+            i = 0
+            while i < 10:
+                t.s = lltype.malloc(S)
+                a[i * 10] = lltype.malloc(S)
+                i += 1
+            rgc.collect()
+            if rgc.get_stats(rgc.NUM_WB_SLOWPATH) <= 0:
+                return -1
+            if rgc.get_stats(rgc.NUM_CARDS_SCANNED) <= 0:
+                return -2
+            if rgc.get_stats(rgc.NUM_OLD_OBJECTS_RESCANNED) <= 0:
+                return -3
+            return 42
+        return f
+
+    def test_barrier_stats(self):
+        run = self.runner("barrier_stats")
+        res = run([])
+        assert res == 42
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -19,6 +19,65 @@ def set_max_heap_size(nbytes):
     """
     pass
 
+def collect_step():
+    """
+    If the GC is incremental, run a single gc-collect-step.
+
+    Return an integer which encodes the starting and ending GC state. Use
+    rgc.{old_state,new_state,is_done} to decode it.
+
+    If the GC is not incremental, do a full collection and return a value on
+    which rgc.is_done() returns True.
+    """
+    gc.collect()
+    return _encode_states(1, 0)
+
+def _encode_states(oldstate, newstate):
+    return oldstate << 8 | newstate
+
+def old_state(states):
+    return (states & 0xFF00) >> 8
+
+def new_state(states):
+    return states & 0xFF
+
+def is_done(states):
+    """
+    Return True if the return value of collect_step signals the end of a major
+    collection
+    """
+    old = old_state(states)
+    new = new_state(states)
+    return is_done__states(old, new)
+
+def is_done__states(oldstate, newstate):
+    "Like is_done, but takes oldstate and newstate explicitly"
+    # a collection is considered done when it ends up in the starting state
+    # (which is usually represented as 0). This logic works for incminimark,
+    # which is currently the only gc actually used and for which collect_step
+    # is implemented. In case we add more GC in the future, we might want to
+    # delegate this logic to the GC itself, but for now it is MUCH simpler to
+    # just write it in plain RPython.
+    return oldstate != 0 and newstate == 0
+
+def set_max_pause(ticks):
+    """If the GC is incremental, try to keep the marking or sweeping work
+    of each gc-collect-step under 'ticks' (in the units of
+    rtimer.read_timestamp(), like the timestamps of PYPYLOG), by adapting
+    the size of the steps.
+    0 means no limit: the steps have fixed sizes, e.g. for marking
+    PYPY_GC_INCREMENT_STEP.
+    """
+    pass
+
+def release_memory():
+    """Give back to the OS as much as possible of the memory that the GC
+    has allocated but doesn't use at the moment, like the nursery after
+    a minor collection and the free pages in the arenas.  This is meant
+    to be called before the program becomes idle for a while.
+    """
+    pass
+
 # for test purposes we allow objects to be pinned and use
 # the following list to keep track of the pinned objects
 _pinned_objects = []
@@ -124,6 +183,41 @@ class CollectEntry(ExtRegistryEntry):
             args_v = hop.inputargs(lltype.Signed)
         return hop.genop('gc__collect', args_v, resulttype=hop.r_result)
 
+class CollectStepEntry(ExtRegistryEntry):
+    _about_ = collect_step
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc_collect_step', [], resulttype=hop.r_result)
+
+class SetMaxPauseEntry(ExtRegistryEntry):
+    _about_ = set_max_pause
+
+    def compute_result_annotation(self, s_ticks):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        [v_ticks] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_set_max_pause', [v_ticks],
+                         resulttype=lltype.Void)
+
+class ReleaseMemoryEntry(ExtRegistryEntry):
+    _about_ = release_memory
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc_release_memory', [], resulttype=lltype.Void)
+
 class SetMaxHeapSizeEntry(ExtRegistryEntry):
     _about_ = set_max_heap_size
 
@@ -137,6 +231,32 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+# the numbers that can be passed to get_stats()
+(TOTAL_MEMORY, TOTAL_ARENA_MEMORY, TOTAL_RAWMALLOCED_MEMORY, PEAK_MEMORY,
+ ARENAS_COUNT, ARENAS_BYTES, NURSERY_SIZE, NEXT_MAJOR_THRESHOLD,
+ NUM_MINOR_COLLECTS, NUM_MAJOR_COLLECTS, TOTAL_GC_TIME, GC_STATE,
+ PINNED_OBJECTS, MAX_HEAP_SIZE, MEMORY_PRESSURE, NUM_WB_SLOWPATH,
+ NUM_CARDS_SCANNED, NUM_OLD_OBJECTS_RESCANNED) = range(18)
+
+@not_rpython
+def get_stats(stats_no):
+    """Return one of the statistics of the GC, selected with one of the
+    constants above.  Returns -1 if the GC doesn't support this statistic.
+    """
+    return -1
+
+class GetStatsEntry(ExtRegistryEntry):
+    _about_ = get_stats
+
+    def compute_result_annotation(self, s_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        [v_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', [v_no], resulttype=hop.r_result)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
@@ -332,6 +332,9 @@ def _search(value, other, start, end, mode):
             return 0
         return -1
 
+    if m >= TWO_WAY_THRESHOLD:
+        return two_way_search(value, other, start, end, mode)
+
     mlast = m - 1
     skip = mlast - 1
     mask = 0
@@ -400,6 +403,153 @@ def _search(value, other, start, end, mode):
         return -1
     return count
 
+# -------------- two-way substring search ----------------
+# The search above is O(n*m) in the worst case, e.g. when looking for a long
+# and repetitive needle.  For needles of at least TWO_WAY_THRESHOLD
+# characters, _search() and rstr.LLHelpers.ll_search() use the two-way
+# algorithm of Crochemore and Perrin instead, which is linear in the size of
+# the haystack and needs constant extra memory.  Like in CPython 3.10, a
+# Horspool-like table of shifts indexed by the last character of the window
+# lets it skip quickly over the parts of the haystack that cannot match.
+#
+# The functions are specialized on the low-level types, so that the same
+# code works on strings, lists of chars and buffers, and on the 'chars'
+# arrays of low-level strings.  The reverse search used by rfind runs the
+# same algorithm on the mirrored needle and haystack.
+
+TWO_WAY_THRESHOLD = 100
+TWO_WAY_TABLE_SIZE = 64     # a power of two
+
+@specialize.ll_and_arg(2)
+def _needle_char(other, i, reverse):
+    if reverse:
+        return ord(other[len(other) - 1 - i])
+    return ord(other[i])
+
+@specialize.ll_and_arg(4)
+def _window_char(value, start, end, i, reverse):
+    if reverse:
+        return ord(value[end - 1 - i])
+    return ord(value[start + i])
+
+@specialize.ll_and_arg(1, 2)
+def _maximal_suffix(other, invert, reverse):
+    """Return (ms, p): the maximal suffix of the needle for the order of
+    the characters, or the inverted order, starts at ms + 1, and its
+    period is p."""
+    m = len(other)
+    ms = -1
+    j = 0
+    k = p = 1
+    while j + k < m:
+        a = _needle_char(other, j + k, reverse)
+        b = _needle_char(other, ms + k, reverse)
+        if invert:
+            smaller = a > b
+        else:
+            smaller = a < b
+        if smaller:
+            j += k
+            k = 1
+            p = j - ms
+        elif a == b:
+            if k != p:
+                k += 1
+            else:
+                j += p
+                k = 1
+        else:
+            ms = j
+            j = ms + 1
+            k = p = 1
+    return ms, p
+
+@specialize.ll_and_arg(5)
+def _two_way(value, other, start, end, count, reverse):
+    """Search the needle in value[start:end], which must be at least as long
+    as it.  Return the offset of the first match from 'start' (or of the
+    last match from 'end', if 'reverse'), or -1; or the number of
+    non-overlapping matches, if 'count'."""
+    n = end - start
+    m = len(other)
+    # critical factorization: needle == left + right, with len(left) == cut
+    ms1, p1 = _maximal_suffix(other, False, reverse)
+    ms2, p2 = _maximal_suffix(other, True, reverse)
+    if ms1 > ms2:
+        cut = ms1 + 1
+        period = p1
+    else:
+        cut = ms2 + 1
+        period = p2
+    # is the period of the right part a period of the whole needle?
+    periodic = cut + period <= m
+    if periodic:
+        for i in range(cut):
+            if (_needle_char(other, i, reverse) !=
+                    _needle_char(other, i + period, reverse)):
+                periodic = False
+                break
+    if not periodic:
+        period = max(cut, m - cut) + 1
+    table = [m] * TWO_WAY_TABLE_SIZE
+    for i in range(m):
+        c = _needle_char(other, i, reverse) & (TWO_WAY_TABLE_SIZE - 1)
+        table[c] = m - 1 - i
+    #
+    found = 0
+    memory = 0
+    j = 0
+    while j <= n - m:
+        c = _window_char(value, start, end, j + m - 1, reverse)
+        shift = table[c & (TWO_WAY_TABLE_SIZE - 1)]
+        if shift > 0:
+            j += shift
+            memory = 0
+            continue
+        # match the right part, from left to right
+        i = max(cut, memory)
+        while (i < m and _needle_char(other, i, reverse) ==
+                         _window_char(value, start, end, j + i, reverse)):
+            i += 1
+        if i < m:
+            j += i - cut + 1
+            memory = 0
+            continue
+        # match the left part, from right to left
+        i = cut - 1
+        while (i >= memory and _needle_char(other, i, reverse) ==
+                               _window_char(value, start, end, j + i, reverse)):
+            i -= 1
+        if i < memory:
+            if not count:
+                return j
+            found += 1
+            j += m
+            memory = 0
+        else:
+            j += period
+            if periodic:
+                memory = m - period
+    if count:
+        return found
+    return -1
+
+@specialize.ll()
+def two_way_search(value, other, start, end, mode):
+    """Like _search(), with 0 < len(other) <= end - start and
+    0 <= start <= end <= len(value)."""
+    if mode == SEARCH_RFIND:
+        res = _two_way(value, other, start, end, False, True)
+        if res < 0:
+            return -1
+        return end - res - len(other)
+    if mode == SEARCH_COUNT:
+        return _two_way(value, other, start, end, True, False)
+    res = _two_way(value, other, start, end, False, False)
+    if res < 0:
+        return -1
+    return start + res
+
 # -------------- numeric parsing support --------------------
 
 def strip_spaces(s):
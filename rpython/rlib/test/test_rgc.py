@@ -39,6 +39,50 @@ def test_collect_0():
 
     assert res is None
 
+def test_collect_step():
+    def f():
+        return rgc.collect_step()
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc_collect_step'
+
+    res = interpret(f, [])
+    assert rgc.is_done(res)
+
+def test_release_memory():
+    def f():
+        rgc.release_memory()
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc_release_memory'
+
+    res = interpret(f, [])
+    assert res is None
+
+def test_encode_states():
+    val = rgc._encode_states(42, 43)
+    assert rgc.old_state(val) == 42
+    assert rgc.new_state(val) == 43
+    assert not rgc.is_done(val)
+    #
+    val = rgc.collect_step()
+    assert rgc.is_done(val)
+
+def test_set_max_pause():
+    def f(n):
+        rgc.set_max_pause(n)
+
+    t, typer, graph = gengraph(f, [int])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    assert ops[0][1].opname == 'gc_set_max_pause'
+
 def test_can_move():
     T0 = lltype.GcStruct('T')
     T1 = lltype.GcArray(lltype.Float)
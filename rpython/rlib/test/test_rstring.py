@@ -3,6 +3,8 @@ import sys, py
 from rpython.rlib.rstring import StringBuilder, UnicodeBuilder, split, rsplit
 from rpython.rlib.rstring import replace, startswith, endswith
 from rpython.rlib.rstring import find, rfind, count
+from rpython.rlib.rstring import (two_way_search, TWO_WAY_THRESHOLD,
+    SEARCH_COUNT, SEARCH_FIND, SEARCH_RFIND)
 from rpython.rlib.buffer import StringBuffer
 from rpython.rtyper.test.tool import BaseRtypingTest
 
@@ -235,6 +237,41 @@ def test_search():
     check_search(count, 'a', 'ab', 0, 1, res=0)
     check_search(count, 'ac', 'ab', 0, 2, res=0)
 
+def test_search_long_needle():
+    needle = 'a' * (TWO_WAY_THRESHOLD - 1) + 'b'
+    value = 'a' * 5000 + needle + 'a' * 1000 + needle
+    for func, res in [(find, 5000), (rfind, 6000 + len(needle)),
+                      (count, 2)]:
+        assert func(list(value), needle, 0, len(value)) == res
+    assert find(list(value), needle, 5001, len(value)) == 6000 + len(needle)
+    assert rfind(list(value), needle, 0, len(value) - 1) == 5000
+    assert count(list(value), 'a' * 200, 0, len(value)) == 25 + 5
+
+def test_two_way_search():
+    import random
+    rnd = random.Random(42)
+    def check(value, needle):
+        for start, end in [(0, len(value)), (3, len(value) - 5)]:
+            if len(needle) > end - start:
+                continue
+            assert (two_way_search(value, needle, start, end, SEARCH_FIND) ==
+                    value.find(needle, start, end))
+            assert (two_way_search(value, needle, start, end, SEARCH_RFIND) ==
+                    value.rfind(needle, start, end))
+            assert (two_way_search(value, needle, start, end, SEARCH_COUNT) ==
+                    value.count(needle, start, end))
+    for i in range(300):
+        alphabet = 'abc'[:rnd.randrange(1, 4)]
+        m = rnd.randrange(1, 12)
+        needle = ''.join([rnd.choice(alphabet) for k in range(m)])
+        value = ''.join([rnd.choice(alphabet) for k in range(80)])
+        value = value[:40] + needle + value[40:]
+        check(value, needle)
+        check(value, needle * 3)
+        check(unicode(value), unicode(needle))
+    check(u'\u1234\u2234' * 50 + u'\u0034', u'\u2234\u1234\u0034')
+    check(u'\u1234\u2234' * 50, u'\u0034' * 3)
+
 
 class TestTranslates(BaseRtypingTest):
     def test_split_rsplit(self):
@@ -265,6 +302,18 @@ class TestTranslates(BaseRtypingTest):
         res = self.interpret(fn, [])
         assert res
 
+    def test_search_long_needle(self):
+        def fn(i):
+            value = 'x' * i + 'ab' * 100 + 'x' * i
+            needle = 'ab' * 99
+            lst = list(value)
+            buf = StringBuffer(needle)
+            return (find(value, buf, 0, len(value)) * 1000000 +
+                    rfind(lst, needle, 0, len(value)) * 1000 +
+                    count(lst, needle, 0, len(value)))
+        res = self.interpret(fn, [7])
+        assert res == fn(7) == 7009001
+
 
     def test_replace(self):
         def fn():
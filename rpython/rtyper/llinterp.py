@@ -816,6 +816,12 @@ class LLFrame(object):
     def op_gc__collect(self, *gen):
         self.heap.collect(*gen)
 
+    def op_gc_collect_step(self):
+        return self.heap.collect_step()
+
+    def op_gc_release_memory(self):
+        self.heap.release_memory()
+
     def op_gc_heap_stats(self):
         raise NotImplementedError
 
@@ -898,6 +904,12 @@ class LLFrame(object):
     def op_gc_set_max_heap_size(self, maxsize):
         raise NotImplementedError("gc_set_max_heap_size")
 
+    def op_gc_get_stats(self, stats_no):
+        raise NotImplementedError("gc_get_stats")
+
+    def op_gc_set_max_pause(self, ticks):
+        raise NotImplementedError("gc_set_max_pause")
+
     def op_gc_asmgcroot_static(self, index):
         raise NotImplementedError("gc_asmgcroot_static")
 
@@ -277,6 +277,10 @@ FAST_RFIND = 2
 
 
 from rpython.rlib.rarithmetic import LONG_BIT as BLOOM_WIDTH
+from rpython.rlib.rstring import (TWO_WAY_THRESHOLD, two_way_search,
+    SEARCH_COUNT, SEARCH_FIND, SEARCH_RFIND)
+assert (FAST_COUNT, FAST_FIND, FAST_RFIND) == (
+    SEARCH_COUNT, SEARCH_FIND, SEARCH_RFIND)
 
 
 def bloom_add(mask, c):
@@ -756,6 +760,9 @@ class LLHelpers(AbstractLLHelpers):
                 return 0
             return -1
 
+        if m >= TWO_WAY_THRESHOLD:
+            return two_way_search(s1.chars, s2.chars, start, end, mode)
+
         mlast = m - 1
         skip = mlast - 1
         mask = 0
@@ -963,6 +963,17 @@ class AbstractTestRstr(BaseRtypingTest):
         res = self.interpret(fn, [4])
         assert res == 4 + 6 + 2 + 8
 
+    def test_find_long_needle(self):
+        const = self.const
+        def fn(i, j):
+            s1 = const('x') * i + const('ab') * 100 + const('x') * i
+            s2 = const('ab') * j
+            return (s1.find(s2) * 1000000 + s1.rfind(s2) * 1000 +
+                    s1.count(s2))
+        for i, j in [(5, 50), (0, 99), (10, 100), (10, 101)]:
+            res = self.interpret(fn, [i, j])
+            assert res == fn(i, j)
+
     def test_count_overlapping_occurences(self):
         const = self.const
         def fn():
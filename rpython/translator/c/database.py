@@ -29,6 +29,7 @@ class LowLevelDatabase(object):
 
     def __init__(self, translator=None, standalone=False,
                  gcpolicyclass=None,
+                 gchooks=None,
                  exctransformer=None,
                  thread_enabled=False,
                  sandbox=False):
@@ -38,6 +39,7 @@ class LowLevelDatabase(object):
         if gcpolicyclass is None:
             gcpolicyclass = gc.RefcountingGcPolicy
         self.gcpolicy = gcpolicyclass(self, thread_enabled)
+        self.gchooks = gchooks
         self.exctransformer = exctransformer
 
         self.structdefnodes = {}
@@ -56,7 +58,8 @@ class LowLevelDatabase(object):
         self.namespace = CNameManager()
 
         if translator is not None:
-            self.gctransformer = self.gcpolicy.gettransformer(translator)
+            self.gctransformer = self.gcpolicy.gettransformer(translator,
+                                                              gchooks)
         self.completed = False
 
         self.instrument_ncounter = 0
@@ -1776,6 +1776,29 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         res = self.run("ignore_finalizer")
         assert res == 1    # translated: x1 is removed from the list
 
+    def define_release_memory(cls):
+        class A:
+            def __init__(self, i):
+                self.i = i
+        def f():
+            alist = [A(i) for i in range(100000)]
+            alist = [a for a in alist if a.i % 10 == 0]  # many free pages
+            rgc.collect()
+            rgc.release_memory()
+            # the released nursery and pages can be used again
+            blist = [A(i) for i in range(100000)]
+            total = 0
+            for a in alist:
+                total += a.i
+            for a in blist:
+                total -= a.i
+            return total
+        return f
+
+    def test_release_memory(self):
+        res = self.run("release_memory")
+        assert res == sum(range(0, 100000, 10)) - sum(range(100000))
+
 
 # ____________________________________________________________________
 